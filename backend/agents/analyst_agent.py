@@ -8,9 +8,16 @@ from backend.models.schemas import ScanOptions
 from backend.services.price_comparator import price_comparator
 from backend.utils.embeddings import get_embedding, format_hotel_for_embedding
 from backend.agents.notifier_agent import NotifierAgent
-from backend.utils.helpers import convert_currency, log_query
+from backend.utils.helpers import convert_currency, build_query_log
+from backend.utils.bulk_writes import bulk_insert, bulk_update_hotels
 from backend.utils.sentiment_utils import generate_mentions, merge_sentiment_breakdowns
 from backend.services.predictive_service import predictive_service
+from backend.services.price_history_index import PriceHistoryIndex
+from backend.services.latest_price_logs import latest_logs_per_hotel
+from backend.services.global_pulse_cache import global_pulse_cache
+from backend.services.trace_sink import trace_sink
+from backend.utils.db import execute_async, run_db
+from backend.utils.projections import HOTEL_SENTIMENT_PROFILE, select_projected_async
 
 
 class AnalystAgent:
@@ -24,23 +31,9 @@ class AnalystAgent:
         self.db = db
 
     async def _log_reasoning(self, session_id: Optional[UUID], message: str):
-        if not session_id:
-            return
-        try:
-            # Atomic-ish append (Fetch-Modify-Update)
-            res = (
-                self.db.table("scan_sessions")
-                .select("reasoning_trace")
-                .eq("id", str(session_id))
-                .execute()
-            )
-            trace = res.data[0]["reasoning_trace"] if res.data else []
-            trace.append(message)
-            self.db.table("scan_sessions").update({"reasoning_trace": trace}).eq(
-                "id", str(session_id)
-            ).execute()
-        except Exception:
-            pass
+        # Buffered, server-side append (see trace_sink) instead of a
+        # read-modify-write of the whole trace per message
+        await trace_sink.append(self.db, session_id, message)
 
     async def analyze_results(
         self,
@@ -50,10 +43,14 @@ class AnalystAgent:
         settings: Optional[Dict[str, Any]] = None,
         options: Optional[ScanOptions] = None,
         session_id: Optional[UUID] = None,
+        history: Optional[PriceHistoryIndex] = None,
     ) -> Dict[str, Any]:
         """
         The Core Analysis Pipeline.
 
+        `history` is the scan's PriceHistoryIndex when the streaming pipeline
+        shares one across micro-batches; without it the batch loads its own.
+
         This method transforms raw scraper output into actionable market intelligence.
 
         Key Stages:
@@ -79,33 +76,25 @@ class AnalystAgent:
             return analysis_summary
 
         # 1. Pre-fetch Historical Prices for all hotels in batch
-        # We fetch the last 2 logs for each hotel to compare with current
-        history_map = {}
-        try:
-            # Note: Complex limit-per-group is hard in Supabase/PostgREST without RPC
-            # For simplicity, we fetch recent logs for these hotels
-            hist_res = (
-                self.db.table("price_logs")
-                .select("hotel_id, price, currency, recorded_at")
-                .in_("hotel_id", hotel_ids)
-                .order("recorded_at", desc=True)
-                .limit(len(hotel_ids) * 2)
-                .execute()
-            )
-
-            for entry in hist_res.data:
-                hid = entry["hotel_id"]
-                if hid not in history_map:
-                    history_map[hid] = []
-                if len(history_map[hid]) < 2:
-                    history_map[hid].append(entry)
-        except Exception as e:
-            print(f"[AnalystAgent] History pre-fetch warning: {e}")
+        # EXPLANATION: One History Load Per Scan
+        # Every per-hotel check below (drop safeguard, Smart Continuity, market
+        # depth, room carry-forward, volatility, sentiment merge) used to issue its
+        # own query. We now load one paged history window + the hotels' metadata
+        # for the whole batch and serve all of those checks from memory.
+        # The window is light; offers, rooms and metadata are hydrated only for
+        # each hotel's newest logs, the only rows those checks read.
+        if history is None:
+            history = await PriceHistoryIndex.load_async(self.db, hotel_ids)
+        await history.hydrate(self.db, hotel_ids)
+        # We compare against the last 2 logs for each hotel
+        history_map = {hid: history.recent(hid, 2) for hid in hotel_ids}
 
         # Batch collectors
         price_logs_to_insert = []
         sentiment_history_to_insert = []
         alerts_to_insert = []
+        query_logs_to_insert = []
+        hotel_updates: Dict[str, Dict[str, Any]] = {}
         pulse_queue = []  # Collectors for Global Pulse batching
 
         # 2. Main Analysis Loop
@@ -121,6 +110,13 @@ class AnalystAgent:
                 if not hotel_id:
                     continue
 
+                # EXPLANATION: Credit Ledger
+                # Results that cost a provider call are always logged as monitor
+                # rows (scan_priority counts them against the daily credit budget);
+                # Global Pulse hits and shared fetches are logged as 'monitor_cached'.
+                credit_spent = res.get("credit_spent", True)
+                log_session = session_id or credit_spent
+
                 if status != "success" or not price_data:
                     error_detail = "Unknown Error"
                     if isinstance(price_data, dict) and price_data.get("error"):
@@ -150,7 +146,7 @@ class AnalystAgent:
                     # If the price drops too sharply compared to history, we treat it as invalid
                     # to trigger the 'Smart Continuity' fallback instead.
                     is_valid_drop, avg_price = self._validate_price_drop(
-                        hotel_id, current_price, currency
+                        hotel_id, current_price, currency, history=history
                     )
                     if not is_valid_drop:
                         await self._log_reasoning(
@@ -192,6 +188,10 @@ class AnalystAgent:
                     if hasattr(check_in, "isoformat")
                     else str(check_in)
                 )
+                # Date grid cell (date_grid.py): only the primary date speaks for
+                # the hotel as a whole (current price, sentiment, Global Pulse)
+                grid = res.get("grid")
+                secondary_cell = bool(grid) and not grid.get("primary")
 
                 # EXPLANATION: Smart Continuity (Vertical Fill Persistence)
                 # User Requirement: "if the scan fails or has no price then look back at the last successful price... up to 7 days back"
@@ -207,21 +207,13 @@ class AnalystAgent:
                         # Window: 7 days back from now
                         cutoff = (datetime.now() - timedelta(days=7)).isoformat()
 
-                        history_res = (
-                            self.db.table("price_logs")
-                            .select(
-                                "price, currency, recorded_at, vendor, parity_offers, room_types"
-                            )
-                            .eq("hotel_id", hotel_id)
-                            .eq("check_in_date", check_in_str)
-                            .gt("recorded_at", cutoff)
-                            .order("recorded_at", desc=True)
-                            .limit(1)
-                            .execute()
+                        last_valid = history.latest(
+                            hotel_id, since=cutoff, check_in_date=check_in_str
                         )
 
-                        if history_res.data:
-                            last_valid = history_res.data[0]
+                        if last_valid:
+                            # Older than the hydrated rows for a hotel scanned often
+                            await history.hydrate_rows(self.db, [last_valid])
                             current_price = last_valid["price"]
                             currency = last_valid["currency"]
                             # KAİZEN: Continuity Metadata Persistence
@@ -240,13 +232,15 @@ class AnalystAgent:
 
                             # KAİZEN: UI Persistence
                             # Log this fallback to query_logs so the ScanSessionModal shows accurate vendor/price counts.
-                            if session_id:
-                                await log_query(
-                                    db=self.db,
+                            if log_session:
+                                self._queue_query_log(
+                                    query_logs_to_insert,
                                     user_id=user_id,
                                     hotel_name=res.get("hotel_name", "Hotel"),
                                     location=res.get("location"),
-                                    action_type="monitor_fallback",
+                                    action_type="monitor_fallback"
+                                    if credit_spent
+                                    else "monitor_cached",
                                     status="success",
                                     price=current_price,
                                     currency=currency,
@@ -256,20 +250,13 @@ class AnalystAgent:
                         else:
                             # [FALLBACK LEVEL 2] Look for ANY recent price for this hotel (ignoring check-in date)
                             # This covers the "Check-In Date Rolling" scenario
-                            history_any_res = (
-                                self.db.table("price_logs")
-                                .select(
-                                    "price, currency, recorded_at, check_in_date, vendor, parity_offers, room_types"
-                                )
-                                .eq("hotel_id", hotel_id)
-                                .gt("recorded_at", cutoff)
-                                .order("recorded_at", desc=True)
-                                .limit(1)
-                                .execute()
+                            # Grid cells fill a calendar per date: another date's
+                            # price would be a wrong value there, not an estimate
+                            last_any = (
+                                None if grid else history.latest(hotel_id, since=cutoff)
                             )
 
-                            if history_any_res.data:
-                                last_any = history_any_res.data[0]
+                            if last_any:
                                 current_price = last_any["price"]
                                 currency = last_any["currency"]
                                 # KAİZEN: Continuity Metadata Persistence
@@ -288,13 +275,15 @@ class AnalystAgent:
                                 )
 
                                 # KAİZEN: UI Persistence
-                                if session_id:
-                                    await log_query(
-                                        db=self.db,
+                                if log_session:
+                                    self._queue_query_log(
+                                        query_logs_to_insert,
                                         user_id=user_id,
                                         hotel_name=res.get("hotel_name", "Hotel"),
                                         location=res.get("location"),
-                                        action_type="monitor_fallback_any",
+                                        action_type="monitor_fallback_any"
+                                        if credit_spent
+                                        else "monitor_cached",
                                         status="success",
                                         price=current_price,
                                         currency=currency,
@@ -321,17 +310,9 @@ class AnalystAgent:
                     # As per user request: a single low result might be transient,
                     # but if it keeps happening, it's a critical logic problem.
                     try:
-                        prev_res = (
-                            self.db.table("price_logs")
-                            .select("metadata")
-                            .eq("hotel_id", hotel_id)
-                            .order("recorded_at", desc=True)
-                            .limit(2)
-                            .execute()
-                        )
                         prev_shallow_count = 0
-                        for row in prev_res.data:
-                            if row.get("metadata", {}).get("is_shallow"):
+                        for row in history.recent(hotel_id, 2):
+                            if (row.get("metadata") or {}).get("is_shallow"):
                                 prev_shallow_count += 1
 
                         if prev_shallow_count >= 2:
@@ -358,17 +339,7 @@ class AnalystAgent:
                 if not current_room_types and not is_estimated:
                     try:
                         rt_cutoff = (datetime.now() - timedelta(days=7)).isoformat()
-                        rt_history = (
-                            self.db.table("price_logs")
-                            .select("room_types, recorded_at")
-                            .eq("hotel_id", hotel_id)
-                            .gt("recorded_at", rt_cutoff)
-                            .order("recorded_at", desc=True)
-                            .limit(10)
-                            .execute()
-                        )
-
-                        for prev_log in rt_history.data or []:
+                        for prev_log in history.recent(hotel_id, 10, since=rt_cutoff):
                             prev_rt = prev_log.get("room_types") or []
                             if len(prev_rt) > 0:
                                 current_room_types = prev_rt
@@ -412,13 +383,13 @@ class AnalystAgent:
 
                 # KAİZEN: UI Persistence for successful monitor results
                 # This ensures the hotel appears in the Pulse Intelligence scan summary
-                if session_id and not is_estimated:
-                    await log_query(
-                        db=self.db,
+                if log_session and not is_estimated:
+                    self._queue_query_log(
+                        query_logs_to_insert,
                         user_id=user_id,
                         hotel_name=res.get("hotel_name", "Hotel"),
                         location=res.get("location"),
-                        action_type="monitor",
+                        action_type="monitor" if credit_spent else "monitor_cached",
                         status="success" if current_price > 0 else "error",
                         price=current_price,
                         currency=currency,
@@ -429,7 +400,7 @@ class AnalystAgent:
                 analysis_summary["prices_updated"] += 1
 
                 # [Global Pulse] Phase 2: Collect pulse data for batching
-                if current_price and current_price > 0:  # and not is_estimated:
+                if current_price and current_price > 0 and not secondary_cell:
                     serp_api_id = price_data.get("property_token") or price_data.get(
                         "serp_api_id"
                     )
@@ -446,16 +417,18 @@ class AnalystAgent:
 
                 # Prepare Metadata Update
                 # Fetch existing record to ensure we have the latest breakdown for mention generation
-                existing_hotel = (
-                    self.db.table("hotels")
-                    .select(
-                        "sentiment_breakdown, image_url, image_url, rating, reviews"
+                existing_hotel = history.hotel(hotel_id)
+                if existing_hotel is None:
+                    hotel_res = await execute_async(
+                        self.db.table("hotels")
+                        .select(
+                            "sentiment_breakdown, image_url, image_url, rating, reviews"
+                        )
+                        .eq("id", hotel_id)
+                        .single()
                     )
-                    .eq("id", hotel_id)
-                    .single()
-                    .execute()
-                )
-                current_breakdown = existing_hotel.data.get("sentiment_breakdown") or []
+                    existing_hotel = hotel_res.data
+                current_breakdown = existing_hotel.get("sentiment_breakdown") or []
 
                 vendor = price_data.get("vendor") or price_data.get("source", "SerpApi")
                 meta_update = {
@@ -463,12 +436,12 @@ class AnalystAgent:
                     "vendor_source": vendor,
                     "embedding_status": "current",
                 }
-                if current_price and current_price > 0:
+                if current_price and current_price > 0 and not secondary_cell:
                     meta_update["current_price"] = current_price
                     # meta_update["currency"] = currency # Column check
 
                 # [Smart Memory - Sentiment Merging Logic]
-                if "reviews_breakdown" in price_data:
+                if "reviews_breakdown" in price_data and not secondary_cell:
                     new_breakdown = price_data["reviews_breakdown"]
                     merged_breakdown = merge_sentiment_breakdowns(
                         current_breakdown, new_breakdown
@@ -521,8 +494,11 @@ class AnalystAgent:
                 if sentiment_changed:
                     meta_update["embedding_status"] = "stale"
 
-                # Update Hotel Metadata
-                self.db.table("hotels").update(meta_update).eq("id", hotel_id).execute()
+                # Update Hotel Metadata (flushed in bulk after the loop)
+                hotel_updates.setdefault(str(hotel_id), {}).update(meta_update)
+                # Keep the scan's snapshot in sync in case the hotel shows up again
+                if history.hotel(hotel_id) is not None:
+                    history.hotel(hotel_id).update(meta_update)
 
                 # EXPLANATION: Parallel Embedding Collection
                 # Previously, embeddings were generated sequentially for each hotel,
@@ -538,7 +514,7 @@ class AnalystAgent:
                     )
 
                 # Prepare Sentiment History
-                if price_data.get("rating"):
+                if price_data.get("rating") and not secondary_cell:
                     sentiment_history_to_insert.append(
                         {
                             "hotel_id": hotel_id,
@@ -557,6 +533,10 @@ class AnalystAgent:
                 # 3. Threshold Breaches (Using pre-fetched history)
                 if current_price and current_price > 0:
                     hotel_history = history_map.get(hotel_id, [])
+                    if grid:
+                        # Compare like with like: the last price for this check-in date
+                        same_date = history.latest(hotel_id, check_in_date=check_in_str)
+                        hotel_history = [same_date] if same_date else []
                     if len(hotel_history) > 0:
                         # The most recent history in DB might be the one we just processed if we didn't pre-fetch BEFORE any inserts.
                         # However, since we pre-fetch at the START, hotel_history[0] is the PREVIOUS price.
@@ -572,8 +552,9 @@ class AnalystAgent:
                         # 3. Dynamic Thresholding (Predictive Yield)
                         current_threshold = threshold
                         if settings and settings.get("dynamic_threshold_enabled"):
-                            volatility = await predictive_service.calculate_market_volatility(
-                                self.db, hotel_id
+                            # Same last-30-logs window calculate_market_volatility reads
+                            volatility = predictive_service.volatility_from_logs(
+                                history.recent(hotel_id, 30)
                             )
                             sensitivity = settings.get("dynamic_threshold_sensitivity", 1.0)
                             current_threshold = predictive_service.get_smart_threshold(
@@ -610,17 +591,41 @@ class AnalystAgent:
         # 4. Final Batch Insertions
         try:
             if price_logs_to_insert:
-                self.db.table("price_logs").insert(price_logs_to_insert).execute()
+                await execute_async(
+                    self.db.table("price_logs").insert(price_logs_to_insert)
+                )
+                # EXPLANATION: Write-Through to the Global Pulse memory tier
+                # Freshly persisted pulses are served to concurrent scans without a
+                # price_logs round trip (see ScraperAgent._check_global_cache).
+                recorded_at = datetime.now().isoformat()
+                global_pulse_cache.put_many(
+                    {**row, "recorded_at": recorded_at} for row in price_logs_to_insert
+                )
+                # Later micro-batches of this scan share the index
+                history.add(
+                    {**row, "recorded_at": recorded_at} for row in price_logs_to_insert
+                )
             if sentiment_history_to_insert:
-                self.db.table("sentiment_history").insert(
-                    sentiment_history_to_insert
-                ).execute()
+                await execute_async(
+                    self.db.table("sentiment_history").insert(
+                        sentiment_history_to_insert
+                    )
+                )
             if alerts_to_insert:
-                self.db.table("alerts").insert(alerts_to_insert).execute()
+                await execute_async(self.db.table("alerts").insert(alerts_to_insert))
         except Exception as e:
             print(f"[AnalystAgent] Batch insert error: {e}")
             reasoning_log.append(f"[CRITICAL] Batch insert failed: {str(e)}")
 
+        # EXPLANATION: Bulk Metadata & Query Log Flush
+        # Hotel metadata patches and query_logs rows used to be written one
+        # round trip per hotel. They are now flushed as a few batched writes;
+        # failures are reported per row instead of aborting the whole batch.
+        write_failures = await run_db(bulk_update_hotels, self.db, hotel_updates)
+        write_failures += await run_db(
+            bulk_insert, self.db, "query_logs", query_logs_to_insert
+        )
+
         # EXPLANATION: Parallel Embedding Generation (2026 Optimization)
         # Instead of slowing down the main analysis loop, we process all queued
         # embeddings in parallel at the end. This typically saves 2-10s per scan.
@@ -637,13 +642,13 @@ class AnalystAgent:
                 )
                 results = await asyncio.gather(*embedding_tasks, return_exceptions=True)
 
-                # Update statuses based on results
+                # Update statuses based on results (one batched write)
+                status_updates = {}
                 for i, res in enumerate(results):
                     hotel_id, _ = self._embedding_queue[i]
                     status = "current" if res is True else "failed"
-                    self.db.table("hotels").update({"embedding_status": status}).eq(
-                        "id", hotel_id
-                    ).execute()
+                    status_updates[str(hotel_id)] = {"embedding_status": status}
+                write_failures += await run_db(bulk_update_hotels, self.db, status_updates)
 
                 reasoning_log.append(
                     f"[Embedding] Parallel processing complete for {len(embedding_tasks)} profiles."
@@ -656,14 +661,20 @@ class AnalystAgent:
                     f"[Embedding] Parallel processing failed: {str(e)}"
                 )
 
+        if write_failures:
+            analysis_summary["write_failures"] = write_failures
+            for failure in write_failures:
+                reasoning_log.append(
+                    f"[Write Failure] {failure['table']} row {failure['id']}: {failure['error']}"
+                )
+
         # 5. Reasoning Trace persistence
-        if session_id and reasoning_log:
-            try:
-                self.db.table("scan_sessions").update(
-                    {"reasoning_trace": reasoning_log}
-                ).eq("id", str(session_id)).execute()
-            except Exception:
-                pass
+        # EXPLANATION: Append, don't overwrite
+        # With the streaming pipeline this method runs once per micro-batch, so
+        # each batch appends its reasoning after what earlier batches (and the
+        # scraper) already wrote. The sink does this server-side in one call.
+        if session_id:
+            await trace_sink.append(self.db, session_id, reasoning_log, flush=True)
 
         # 6. Final Global Pulse Dispatch
         # Aggregates notifications for all rivals across the entire scan.
@@ -672,6 +683,14 @@ class AnalystAgent:
 
         return analysis_summary
 
+    @staticmethod
+    def _queue_query_log(queue: List[Dict[str, Any]], **fields):
+        """Collect a query_logs row for the end-of-analysis bulk insert."""
+        try:
+            queue.append(build_query_log(**fields))
+        except Exception as e:
+            print(f"Error logging query: {e}")
+
     def _get_hotels(self, user_id: UUID):
         res = self.db.table("hotels").select("*").eq("user_id", str(user_id)).execute()
         return res.data or []
@@ -692,12 +711,11 @@ class AnalystAgent:
             serp_ids = [p["serp_api_id"] for p in pulse_data]
 
             # 1. Find all rivals for all hotel IDs (excluding initiator)
-            rivals_res = (
+            rivals_res = await execute_async(
                 self.db.table("hotels")
                 .select("user_id, id, name, serp_api_id")
                 .in_("serp_api_id", serp_ids)
                 .neq("user_id", str(initiator_user_id))
-                .execute()
             )
 
             if not rivals_res.data:
@@ -716,30 +734,20 @@ class AnalystAgent:
 
             # 3. Fetch settings for all rivals at once
             all_rival_uids = list(rival_users_map.keys())
-            settings_res = (
+            settings_res = await execute_async(
                 self.db.table("settings")
                 .select("*")
                 .in_("user_id", all_rival_uids)
-                .execute()
             )
             settings_lookup = {s["user_id"]: s for s in settings_res.data}
 
             # 4. Fetch historical baselines for all rival hotels at once
+            # (the newest log of every rival, however often the others were scanned)
             rival_hotel_ids = [r["id"] for r in rivals_res.data]
-            hist_res = (
-                self.db.table("price_logs")
-                .select("hotel_id, price, currency")
-                .in_("hotel_id", rival_hotel_ids)
-                .order("recorded_at", desc=True)
-                .limit(len(rival_hotel_ids) * 2)
-                .execute()
+            latest = await latest_logs_per_hotel(
+                self.db, rival_hotel_ids, per_hotel=1, columns="hotel_id, price, currency"
             )
-
-            history_lookup = {}
-            for entry in hist_res.data:
-                hid = entry["hotel_id"]
-                if hid not in history_lookup:
-                    history_lookup[hid] = entry
+            history_lookup = {hid: logs[0] for hid, logs in latest.items()}
 
             # 5. Process each rival user
             notifier = NotifierAgent()
@@ -758,7 +766,7 @@ class AnalystAgent:
                     if not pulse:
                         continue
 
-                    last_log = history_lookup.get(hid)
+                    last_log = history_lookup.get(str(hid))
                     if not last_log:
                         continue
 
@@ -797,7 +805,7 @@ class AnalystAgent:
 
                 if user_alerts:
                     # Batch Insert Alerts
-                    self.db.table("alerts").insert(user_alerts).execute()
+                    await execute_async(self.db.table("alerts").insert(user_alerts))
 
                     # Batch Dispatch Notifications
                     try:
@@ -825,38 +833,34 @@ class AnalystAgent:
         """
         try:
             # 1. Get Target Hotel Info (Try SerpApi ID first, then UUID)
-            target = (
+            target = await execute_async(
                 self.db.table("hotel_directory")
                 .select("*")
                 .eq("serp_api_id", target_identifier)
-                .execute()
             )
             if not target.data:
                 # Try UUID
                 try:
-                    target = (
+                    target = await execute_async(
                         self.db.table("hotel_directory")
                         .select("*")
                         .eq("id", target_identifier)
-                        .execute()
                     )
                 except Exception:
                     target = None
 
             if not target or not target.data:
                 # If still not found, check the user's active hotels list
-                target = (
+                target = await execute_async(
                     self.db.table("hotels")
                     .select("*")
                     .eq("id", target_identifier)
-                    .execute()
                 )
                 if not target.data:
-                    target = (
+                    target = await execute_async(
                         self.db.table("hotels")
                         .select("*")
                         .eq("serp_api_id", target_identifier)
-                        .execute()
                     )
 
             if not target or not target.data:
@@ -891,15 +895,17 @@ class AnalystAgent:
 
             # 3. Perform Vector Search (RPC) - request more results to filter by location
             search_limit = limit * 6  # Fetch more to filter by distance
-            res = self.db.rpc(
-                "match_hotels",
-                {
-                    "query_embedding": target_embedding,
-                    "match_threshold": 0.5,
-                    "match_count": search_limit,
-                    "target_hotel_id": serp_api_id or str(target_data.get("id")),
-                },
-            ).execute()
+            res = await execute_async(
+                self.db.rpc(
+                    "match_hotels",
+                    {
+                        "query_embedding": target_embedding,
+                        "match_threshold": 0.5,
+                        "match_count": search_limit,
+                        "target_hotel_id": serp_api_id or str(target_data.get("id")),
+                    },
+                )
+            )
 
             if not res or not hasattr(res, "data") or not res.data:
                 return []
@@ -1039,12 +1045,11 @@ class AnalystAgent:
 
         # 1. DATA ACQUISITION: Fetch core profiles from the 'hotels' table.
         # This includes pricing DNA and sentiment embeddings.
-        target_res = (
+        target_res = await execute_async(
             self.db.table("hotels")
             .select("*")
             .eq("id", target_hotel_id)
             .single()
-            .execute()
         )
         target = target_res.data
         if not target:
@@ -1052,25 +1057,23 @@ class AnalystAgent:
 
         rival = None
         if rival_hotel_id:
-            rival_res = (
+            rival_res = await execute_async(
                 self.db.table("hotels")
                 .select("*")
                 .eq("id", rival_hotel_id)
                 .single()
-                .execute()
             )
             rival = rival_res.data
 
         # 2. HISTORICAL ANALYSIS: Aggregate logs within the lookback window.
         # We focus on price trends, search ranking visibility, and parity offers.
         cutoff = (datetime.now() - timedelta(days=days)).isoformat()
-        logs_res = (
+        logs_res = await execute_async(
             self.db.table("price_logs")
             .select("price, currency, recorded_at, search_rank, parity_offers")
             .eq("hotel_id", target_hotel_id)
             .gte("recorded_at", cutoff)
             .order("recorded_at", desc=True)
-            .execute()
         )
         target_logs = logs_res.data or []
 
@@ -1380,8 +1383,15 @@ class AnalystAgent:
     ) -> bool:
         """Generates and saves the sentiment embedding. Returns True on success."""
         try:
-            # 1. Fetch current full hotel data
-            res = self.db.table("hotels").select("*").eq("id", hotel_id).execute()
+            # 1. Fetch the profile fields (sentiment/reviews only if this scan
+            # did not just produce them)
+            res = await select_projected_async(
+                self.db,
+                HOTEL_SENTIMENT_PROFILE,
+                lambda q: q.eq("id", hotel_id),
+                include=HOTEL_SENTIMENT_PROFILE.heavy,
+                exclude=meta_update.keys(),
+            )
             if not res.data:
                 return False
 
@@ -1442,9 +1452,11 @@ Top Reviews: {reviews_text}
                 embedding = await get_embedding(profile)
 
                 if embedding and len(embedding) == 768:
-                    self.db.table("hotels").update(
-                        {"sentiment_embedding": embedding}
-                    ).eq("id", hotel_id).execute()
+                    await execute_async(
+                        self.db.table("hotels").update(
+                            {"sentiment_embedding": embedding}
+                        ).eq("id", hotel_id)
+                    )
                     print(f"[AnalystAgent] Saved sentiment embedding for {hotel_id}")
                     return True
                 else:
@@ -1458,7 +1470,11 @@ Top Reviews: {reviews_text}
             return False
 
     def _validate_price_drop(
-        self, hotel_id: str, current_price: float, currency: str
+        self,
+        hotel_id: str,
+        current_price: float,
+        currency: str,
+        history: Optional[PriceHistoryIndex] = None,
     ) -> tuple[bool, float]:
         """
         EXPLANATION: Sudden Drop Detection Logic
@@ -1469,24 +1485,29 @@ Top Reviews: {reviews_text}
         1. Fetch up to 10 recent non-zero prices from 'price_logs'.
         2. Calculate the mean (average).
         3. If the NEW price is < 50% of the average, it's flagged as suspicious (False).
+
+        When a pre-fetched `history` index is passed the baseline is read from memory.
         """
         try:
-            # Fetch last 10 valid prices for historical baseline
-            res = (
-                self.db.table("price_logs")
-                .select("price")
-                .eq("hotel_id", hotel_id)
-                .eq("currency", currency)
-                .gt("price", 0)
-                .order("recorded_at", desc=True)
-                .limit(10)
-                .execute()
-            )
+            if history is not None:
+                prices = history.valid_prices(hotel_id, currency, limit=10)
+            else:
+                # Fetch last 10 valid prices for historical baseline
+                res = (
+                    self.db.table("price_logs")
+                    .select("price")
+                    .eq("hotel_id", hotel_id)
+                    .eq("currency", currency)
+                    .gt("price", 0)
+                    .order("recorded_at", desc=True)
+                    .limit(10)
+                    .execute()
+                )
+                prices = [r["price"] for r in res.data or []]
 
-            if not res.data:
+            if not prices:
                 return True, 0.0  # No history, trust the new price as first reference
 
-            prices = [r["price"] for r in res.data]
             avg_price = sum(prices) / len(prices)
 
             # Threshold Check: Rejects prices falling below half of the historical average
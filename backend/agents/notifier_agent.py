@@ -1,5 +1,6 @@
 from typing import Dict, Any
 from backend.services.notification_service import notification_service
+from backend.services.trace_sink import trace_sink
 
 
 class NotifierAgent:
@@ -12,34 +13,19 @@ class NotifierAgent:
         from backend.utils.db import get_supabase
 
         self.db = db or get_supabase()
-        self._log_buffer = []
 
     async def log_reasoning(self, session_id, message: str):
-        """Append a message to the internal buffer instead of immediate DB write."""
+        """Append a message to the shared trace buffer instead of immediate DB write."""
         if not session_id:
             return
-        self._log_buffer.append(f"[Notifier] {message}")
+        trace_sink.add(self.db, session_id, f"[Notifier] {message}")
 
     async def flush_logs(self, session_id):
-        """Perform a single batch update to persist all buffered reasoning traces."""
-        if not session_id or not self._log_buffer:
+        """Persist all buffered reasoning traces with a single server-side append."""
+        if not session_id:
             return
-        try:
-            # Atomic fetch-modify-update
-            res = (
-                self.db.table("scan_sessions")
-                .select("reasoning_trace")
-                .eq("id", str(session_id))
-                .execute()
-            )
-            trace = res.data[0]["reasoning_trace"] if res.data else []
-            trace.extend(self._log_buffer)
-            self.db.table("scan_sessions").update({"reasoning_trace": trace}).eq(
-                "id", str(session_id)
-            ).execute()
-            self._log_buffer = []  # Clear after flush
-        except Exception as e:
-            print(f"[NotifierAgent] Failed to flush logs: {e}")
+        if not await trace_sink.flush(session_id):
+            print(f"[NotifierAgent] Failed to flush logs for session {session_id}")
 
     async def dispatch_alerts(
         self,
@@ -1,12 +1,26 @@
 import asyncio
+import copy
+import time
+from contextlib import nullcontext
 from datetime import date, datetime, timedelta
-from typing import List, Optional, Dict, Any
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
 from uuid import UUID
 from supabase import Client
 from backend.models.schemas import ScanOptions
 from backend.services.provider_factory import ProviderFactory
+from backend.services.global_pulse_cache import global_pulse_cache
+from backend.services.adaptive_limiter import AdaptiveConcurrencyLimiter
+from backend.services.request_coalescer import build_price_key
+from backend.services.price_history_index import PAGE_SIZE
 
 from backend.utils.room_normalizer import RoomTypeNormalizer
+from backend.utils.db import execute_async
+from backend.utils.projections import PRICE_LOG_PULSE, select_projected_async
+from backend.services.trace_sink import trace_sink
+
+# Pages of PAGE_SIZE rows per Global Pulse batch query before unfilled keys are
+# left to the per-hotel lookup
+PULSE_MAX_PAGES = 10
 
 
 class ScraperAgent:
@@ -60,35 +74,138 @@ class ScraperAgent:
                 return english
         return lowered  # Return original lowered if no match
 
+    async def _prefetch_global_cache(
+        self, keys: List[Tuple[str, date]]
+    ) -> Dict[Tuple[str, str], Optional[Dict[str, Any]]]:
+        """
+        [Global Pulse] Batched lookup for an entire scan.
+
+        EXPLANATION: One Round Trip per Scan
+        Instead of one price_logs query per hotel, we fetch every fresh pulse for
+        all (serp_api_id, check_in_date) pairs of the scan in a single query and
+        slice the rows in memory. The newest row per key wins. Keys with no row
+        map to None so the per-hotel check knows it is a confirmed miss.
+
+        EXPLANATION: Paged, Without the Cross Product
+        Hotels sharing the same check-in dates are queried together (a date grid
+        is one query, hotels on different fixed dates never fetch each other's
+        dates). Each query is paged with `.range()` like PriceHistoryIndex.load,
+        because PostgREST's max-rows cap silently drops the oldest rows; paging
+        stops once every key has its newest row. Keys still unfilled when the
+        page budget or a query fails are left out: unknown, not a miss, so the
+        per-hotel lookup runs instead of spending a credit.
+        """
+        wanted = {
+            global_pulse_cache.make_key(sid, d) for sid, d in keys if sid and d
+        }
+        if not wanted:
+            return {}
+
+        dates_by_serp: Dict[str, set] = {}
+        for sid, d in wanted:
+            dates_by_serp.setdefault(sid, set()).add(d)
+        groups: Dict[Tuple[str, ...], List[str]] = {}
+        for sid, ds in dates_by_serp.items():
+            groups.setdefault(tuple(sorted(ds)), []).append(sid)
+
+        prefetched: Dict[Tuple[str, str], Optional[Dict[str, Any]]] = {}
+        unknown = 0
+        queries = 0
+        cutoff = (datetime.now() - timedelta(minutes=180)).isoformat()
+        for dates, serp_ids in groups.items():
+            serp_ids = sorted(serp_ids)
+            found: Dict[Tuple[str, str], Optional[Dict[str, Any]]] = {
+                (sid, d): None for sid in serp_ids for d in dates
+            }
+            complete = False
+            try:
+                for page in range(PULSE_MAX_PAGES):
+                    start = page * PAGE_SIZE
+                    res = await select_projected_async(
+                        self.db,
+                        PRICE_LOG_PULSE,
+                        lambda q: q.in_("serp_api_id", serp_ids)
+                        .in_("check_in_date", list(dates))
+                        .gte("recorded_at", cutoff)
+                        .order("recorded_at", desc=True)
+                        .range(start, start + PAGE_SIZE - 1),
+                    )
+                    queries += 1
+                    data = res.data or []
+                    for row in data:
+                        key = global_pulse_cache.make_key(
+                            row.get("serp_api_id"), row.get("check_in_date")
+                        )
+                        # Rows arrive newest first, so the first row per key is the pulse.
+                        if key in found and found[key] is None:
+                            found[key] = row
+                            global_pulse_cache.put(row)
+                    if len(data) < PAGE_SIZE or all(found.values()):
+                        complete = True
+                        break
+            except Exception as e:
+                # Fall back to per-hotel lookups rather than treating keys as misses
+                print(f"[GlobalPulse] Batch lookup error: {e}")
+
+            for key, row in found.items():
+                if row is not None or complete:
+                    prefetched[key] = row
+                else:
+                    unknown += 1
+
+        hits = sum(1 for v in prefetched.values() if v)
+        print(
+            f"[GlobalPulse] Batch lookup: {hits}/{len(wanted)} keys fresh, "
+            f"{unknown} unknown ({queries} queries)"
+        )
+        return prefetched
+
     async def _check_global_cache(
-        self, serp_api_id: str, check_in_date: date, requested_room_type: str = None
+        self,
+        serp_api_id: str,
+        check_in_date: date,
+        requested_room_type: str = None,
+        prefetched: Optional[Dict[Tuple[str, str], Optional[Dict[str, Any]]]] = None,
     ) -> Optional[Dict[str, Any]]:
         """
         [Global Pulse] Checks if ANY user has scanned this hotel for this date
         in the last 3 hours. If a cached result exists and the user requested
         a specific room type, we attempt to extract that room's price from
         the cached room_types array instead of returning just the base price.
+
+        `prefetched` is the result of `_prefetch_global_cache`; keys it covers
+        never trigger a per-hotel query.
         """
         if not serp_api_id:
             return None
 
         try:
-            # Look for a fresh pulse (recorded in last 180 mins / 3 hours)
-            cutoff = (datetime.now() - timedelta(minutes=180)).isoformat()
-
-            res = (
-                self.db.table("price_logs")
-                .select("*")
-                .eq("serp_api_id", serp_api_id)
-                .eq("check_in_date", str(check_in_date))
-                .gte("recorded_at", cutoff)
-                .order("recorded_at", desc=True)
-                .limit(1)
-                .execute()
-            )
-
-            if res.data:
-                cache = res.data[0]
+            # EXPLANATION: Tiered Lookup
+            # Tier 1 is the process-local LRU/TTL cache (no DB round trip).
+            # Tier 2 is the scan-wide batch result, then the per-key price_logs
+            # query; DB results back-fill tier 1.
+            cache = global_pulse_cache.get(serp_api_id, check_in_date)
+            pulse_key = global_pulse_cache.make_key(serp_api_id, check_in_date)
+            if cache is None and prefetched is not None and pulse_key in prefetched:
+                cache = copy.deepcopy(prefetched[pulse_key])
+            elif cache is None:
+                # Look for a fresh pulse (recorded in last 180 mins / 3 hours)
+                cutoff = (datetime.now() - timedelta(minutes=180)).isoformat()
+
+                res = await select_projected_async(
+                    self.db,
+                    PRICE_LOG_PULSE,
+                    lambda q: q.eq("serp_api_id", serp_api_id)
+                    .eq("check_in_date", str(check_in_date))
+                    .gte("recorded_at", cutoff)
+                    .order("recorded_at", desc=True)
+                    .limit(1),
+                )
+                if res.data:
+                    cache = res.data[0]
+                    global_pulse_cache.put(cache)
+
+            if cache:
                 print(f"[GlobalPulse] Cache HIT for {serp_api_id} on {check_in_date}")
 
                 # EXPLANATION: [Global Pulse Phase 2] — Feature C: Room-Type-Aware Matching
@@ -150,13 +267,6 @@ class ScraperAgent:
         if not session_id:
             return
 
-        if not hasattr(self, "_log_buffer"):
-            self._log_buffer = {}
-
-        sid_key = str(session_id)
-        if sid_key not in self._log_buffer:
-            self._log_buffer[sid_key] = []
-
         entry = {
             "step": step,
             "level": level,
@@ -164,40 +274,67 @@ class ScraperAgent:
             "timestamp": datetime.now().timestamp(),
             "metadata": metadata or {},
         }
-        self._log_buffer[sid_key].append(entry)
+        # EXPLANATION: Shared Append-Only Trace Sink
+        # Entries are buffered by the sink and appended server-side in batches,
+        # so the scraper never rewrites (or clobbers) other agents' entries.
+        await trace_sink.append(self.db, session_id, entry)
 
     async def _flush_logs(self, session_id: UUID):
-        """Batch update the reasoning trace to the database in a single round-trip."""
-        if not session_id or not hasattr(self, "_log_buffer"):
+        """Append any buffered reasoning entries in a single round-trip."""
+        if not session_id:
             return
+        if not await trace_sink.flush(session_id):
+            print(f"[ScraperAgent] Log flush failed for session {session_id}")
 
-        sid_key = str(session_id)
-        if sid_key not in self._log_buffer or not self._log_buffer[sid_key]:
-            return
+    @staticmethod
+    def _resolve_search_params(
+        hotel: Dict[str, Any], options: Optional[ScanOptions]
+    ) -> Tuple[date, date, int, bool]:
+        """
+        Resolves (check_in, check_out, adults, auto_generated) for a hotel.
+        Scan options win over the hotel's fixed dates; missing or malformed
+        dates fall back to tomorrow -> the day after.
+        """
+        check_in_raw = (
+            options.check_in
+            if options and options.check_in
+            else hotel.get("fixed_check_in")
+        )
+        check_out_raw = (
+            options.check_out
+            if options and options.check_out
+            else hotel.get("fixed_check_out")
+        )
 
-        try:
-            # HYPERSPEED KAIZEN: Single atomic append instead of n+1 reads
-            res = (
-                self.db.table("scan_sessions")
-                .select("reasoning_trace")
-                .eq("id", sid_key)
-                .execute()
-            )
-            if res.data:
-                current_trace = res.data[0].get("reasoning_trace") or []
-                current_trace.extend(self._log_buffer[sid_key])
-
-                self.db.table("scan_sessions").update(
-                    {
-                        "reasoning_trace": current_trace,
-                        "updated_at": datetime.now().isoformat(),
-                    }
-                ).eq("id", sid_key).execute()
+        # Normalize Dates
+        check_in = check_in_raw
+        if isinstance(check_in_raw, str):
+            try:
+                check_in = datetime.strptime(check_in_raw, "%Y-%m-%d").date()
+            except ValueError:
+                check_in = None
 
-                # Clear buffer for this session
-                self._log_buffer[sid_key] = []
-        except Exception as e:
-            print(f"[ScraperAgent] Log flush failed: {e}")
+        check_out = check_out_raw
+        if isinstance(check_out_raw, str):
+            try:
+                check_out = datetime.strptime(check_out_raw, "%Y-%m-%d").date()
+            except ValueError:
+                check_out = None
+
+        adults = (
+            options.adults
+            if options and options.adults
+            else (hotel.get("default_adults") or 2)
+        )
+
+        auto_generated = False
+        if not check_in or not check_out:
+            today = date.today()
+            check_in = today + timedelta(days=1)
+            check_out = today + timedelta(days=2)
+            auto_generated = True
+
+        return check_in, check_out, adults, auto_generated
 
     async def run_scan(
         self,
@@ -205,10 +342,34 @@ class ScraperAgent:
         hotels: List[Dict[str, Any]],
         options: Optional[ScanOptions],
         session_id: Optional[UUID] = None,
+        on_result: Optional[Callable[[Dict[str, Any]], Awaitable[None]]] = None,
+        budget: Optional[Any] = None,
+        fetch_plan: Optional[Any] = None,
     ) -> List[Dict[str, Any]]:
-        """Performs the actual scraping for a list of hotels."""
+        """
+        Performs the actual scraping for a list of hotels.
+
+        `on_result` (optional) is awaited with each hotel's result as soon as its
+        fetch completes, letting callers stream results downstream.
+
+        `budget` (optional) is the scheduler's FairShareBudget; every provider
+        call also takes one of this user's global SerpApi slots. `fetch_plan`
+        (optional) is the scheduler's SharedFetchPlan: each unique
+        (property, dates, adults, currency) is fetched once per run.
+        """
         results = []
-        semaphore = asyncio.Semaphore(10)  # Max 10 concurrent requests
+        # EXPLANATION: Adaptive Fan-Out (AIMD)
+        # Concurrency grows while SerpApi stays fast and healthy, halves on 429s
+        # (ApiKeyManager temporary rotations), errors or slow responses, and its
+        # ceiling scales with the number of healthy keys.
+        from backend.services.serpapi_client import serpapi_client
+
+        limiter = AdaptiveConcurrencyLimiter(key_manager=serpapi_client._key_manager)
+        # KAIZEN: Cross-user fairness
+        # Scheduled runs scan several users at once; their provider calls share
+        # one global budget so a large account can't starve the others.
+        budget_slot = (lambda: budget.slot(user_id)) if budget else nullcontext
+        currency = options.currency if options and options.currency else "TRY"
 
         # [Reasoning] Start
         await self.log_reasoning(
@@ -221,16 +382,32 @@ class ScraperAgent:
 
         if session_id:
             try:
-                self.db.table("scan_sessions").update({"status": "running"}).eq(
-                    "id", str(session_id)
-                ).execute()
+                await execute_async(
+                    self.db.table("scan_sessions").update({"status": "running"}).eq(
+                        "id", str(session_id)
+                    )
+                )
             except Exception as e:
                 print(f"[ScraperAgent] Error updating session: {e}")
 
+        # EXPLANATION: Batched Global Pulse Lookup
+        # Resolve every hotel's check-in date up front and fetch all fresh pulses
+        # in one query. Each fetch_hotel task then slices its row from memory.
+        prefetched = await self._prefetch_global_cache(
+            [
+                (h.get("serp_api_id"), self._resolve_search_params(h, options)[0])
+                for h in hotels
+                if h.get("serp_api_id")
+            ]
+        )
+
         async def fetch_hotel(hotel):
             hotel_name = hotel["name"]
+            # Set once this hotel's own provider call starts (a Global Pulse hit
+            # or a shared fetch of this run costs no credit)
+            credit_spent = False
             try:
-                async with semaphore:
+                async with limiter.slot():
                     hotel_id = hotel["id"]
                     location = hotel.get("location")
                     serp_api_id = hotel.get("serp_api_id")
@@ -241,49 +418,12 @@ class ScraperAgent:
                     )
 
                     # Determine search parameters
-                    check_in_raw = (
-                        options.check_in
-                        if options and options.check_in
-                        else hotel.get("fixed_check_in")
-                    )
-                    check_out_raw = (
-                        options.check_out
-                        if options and options.check_out
-                        else hotel.get("fixed_check_out")
-                    )
-
-                    # Normalize Dates
-                    check_in = check_in_raw
-                    if isinstance(check_in_raw, str):
-                        try:
-                            check_in = datetime.strptime(
-                                check_in_raw, "%Y-%m-%d"
-                            ).date()
-                        except ValueError:
-                            check_in = None
-
-                    check_out = check_out_raw
-                    if isinstance(check_out_raw, str):
-                        try:
-                            check_out = datetime.strptime(
-                                check_out_raw, "%Y-%m-%d"
-                            ).date()
-                        except ValueError:
-                            check_out = None
-
-                    adults = (
-                        options.adults
-                        if options and options.adults
-                        else (hotel.get("default_adults") or 2)
+                    check_in, check_out, adults, auto_dates = (
+                        self._resolve_search_params(hotel, options)
                     )
 
-                    # Fallback: Auto-generate dates if not provided
-                    if not check_in or not check_out:
-                        from datetime import timedelta
-
-                        today = date.today()
-                        check_in = today + timedelta(days=1)
-                        check_out = today + timedelta(days=2)
+                    # Fallback: Auto-generated dates if not provided
+                    if auto_dates:
                         await self.log_reasoning(
                             session_id,
                             "Date Generation",
@@ -296,7 +436,7 @@ class ScraperAgent:
                     try:
                         # 1. Check Global Pulse Cache first
                         price_data = await self._check_global_cache(
-                            serp_api_id, check_in
+                            serp_api_id, check_in, prefetched=prefetched
                         )
 
                         if price_data:
@@ -323,27 +463,68 @@ class ScraperAgent:
 
                             # KAİZEN: Per-Request Timeout
                             # We wrap the provider call in a timeout to ensure a single stalling
-                            # request doesn't block the entire background process.
+                            # request doesn't block the entire background process. The timeout
+                            # tracks observed latency (capped at 60s) via the limiter.
+                            call_timeout = limiter.timeout
+
+                            async def provider_call():
+                                nonlocal credit_spent
+                                async with budget_slot():
+                                    credit_spent = True
+                                    call_started = time.monotonic()
+                                    try:
+                                        data = await asyncio.wait_for(
+                                            primary_provider.fetch_price(
+                                                hotel_name=hotel_name,
+                                                location=location,
+                                                check_in=check_in,
+                                                check_out=check_out,
+                                                adults=adults,
+                                                currency=currency,
+                                                serp_api_id=serp_api_id,
+                                            ),
+                                            timeout=call_timeout,
+                                        )
+                                    except asyncio.TimeoutError:
+                                        limiter.observe(call_timeout, ok=False)
+                                        raise
+                                    limiter.observe(
+                                        time.monotonic() - call_started,
+                                        ok=bool(data) and data.get("status") != "error",
+                                    )
+                                    return data
+
                             try:
-                                price_data = await asyncio.wait_for(
-                                    primary_provider.fetch_price(
-                                        hotel_name=hotel_name,
-                                        location=location,
-                                        check_in=check_in,
-                                        check_out=check_out,
-                                        adults=adults,
-                                        currency=options.currency
-                                        if options and options.currency
-                                        else "TRY",
-                                        serp_api_id=serp_api_id,
-                                    ),
-                                    timeout=60.0,
-                                )
+                                if fetch_plan is not None:
+                                    # EXPLANATION: Cross-User Fetch Plan
+                                    # Another user in this scheduler run may already
+                                    # have fetched (or be fetching) the same key.
+                                    price_data, shared = await fetch_plan.fetch(
+                                        build_price_key(
+                                            hotel_name,
+                                            location,
+                                            check_in,
+                                            check_out,
+                                            adults,
+                                            currency,
+                                            serp_api_id,
+                                        ),
+                                        provider_call,
+                                    )
+                                    if shared:
+                                        await self.log_reasoning(
+                                            session_id,
+                                            "Shared Fetch",
+                                            f"Reused this run's fetch for {hotel_name} (no extra credit)",
+                                            "info",
+                                        )
+                                else:
+                                    price_data = await provider_call()
                             except asyncio.TimeoutError:
                                 await self.log_reasoning(
                                     session_id,
                                     "Timeout",
-                                    f"Request for {hotel_name} timed out after 60s.",
+                                    f"Request for {hotel_name} timed out after {call_timeout:.0f}s.",
                                     "warning",
                                 )
                                 price_data = {
@@ -387,18 +568,27 @@ class ScraperAgent:
                     if price_data and "error" in price_data:
                         status = "error"
 
-                result = {
-                    "hotel_id": hotel_id,
-                    "hotel_name": hotel_name,
-                    "location": location,
-                    "status": status,
-                    "price_data": price_data,
-                    "check_in": check_in,
-                    "adults": adults,
-                }
-
-                results.append(result)
-                return result
+                    result = {
+                        "hotel_id": hotel_id,
+                        "hotel_name": hotel_name,
+                        "location": location,
+                        "status": status,
+                        "price_data": price_data,
+                        "check_in": check_in,
+                        "adults": adults,
+                        "credit_spent": credit_spent,
+                    }
+                    if hotel.get("grid"):
+                        # Date grid cell (date_grid.py): keeps one result per date
+                        result["grid"] = hotel["grid"]
+
+                    results.append(result)
+                    # KAIZEN: Backpressure
+                    # Hand off while still holding the concurrency slot: if the
+                    # downstream consumer is saturated, new fetches wait too.
+                    if on_result:
+                        await on_result(result)
+                    return result
 
             except Exception as e:
                 print(f"[ScraperAgent] Critical Error processing {hotel_name}: {e}")
@@ -407,13 +597,26 @@ class ScraperAgent:
                     "hotel_name": hotel_name,
                     "status": "error",
                     "error": str(e),
+                    "credit_spent": credit_spent,
                 }
+                if hotel.get("grid"):
+                    error_result["grid"] = hotel["grid"]
                 results.append(error_result)
+                if on_result:
+                    await on_result(error_result)
                 return error_result
 
-        # Run all hotels in parallel with semaphore control
+        # Run all hotels in parallel with adaptive concurrency control
         await asyncio.gather(*(fetch_hotel(h) for h in hotels))
 
+        await self.log_reasoning(
+            session_id,
+            "Concurrency",
+            f"Adaptive fan-out finished at limit {limiter.limit} (peak {limiter.peak_inflight} in flight)",
+            "info",
+            limiter.get_stats(),
+        )
+
         # HYPERSPEED: Batch flush all reasoning logs
         # EXPLANATION: Single Source of Truth Architecture
         # We previously experienced database collisions because both Scraper
@@ -48,6 +48,7 @@ from backend.services.admin_service import (
     get_scheduler_queue_logic,
     get_admin_providers_logic,
     trigger_all_overdue_logic,
+    get_scheduler_plan_logic,
     cleanup_empty_scans_logic,
 )
 from backend.services.provider_factory import ProviderFactory
@@ -474,6 +475,15 @@ async def trigger_all_overdue(admin=Depends(get_current_admin_user)):
     return await trigger_all_overdue_logic()
 
 
+@router.get("/scheduler/plan")
+async def get_scheduler_plan(admin=Depends(get_current_admin_user)):
+    """
+    Dry run of the scheduler: who is due, who would be deferred by the credit
+    budget, and the projected wall-clock time and credit use. Writes nothing.
+    """
+    return await get_scheduler_plan_logic()
+
+
 @router.delete("/scans/cleanup-empty")
 async def cleanup_empty_scans(
     admin=Depends(get_current_admin_user), db: Client = Depends(get_supabase)
@@ -2,7 +2,7 @@ from fastapi import APIRouter, Depends
 from typing import List
 from uuid import UUID
 from supabase import Client
-from backend.utils.db import get_supabase
+from backend.utils.db import get_supabase, execute_async
 from backend.services.auth_service import get_current_active_user  # noqa: F401
 from backend.models.schemas import Alert
 
@@ -27,7 +27,7 @@ async def list_alerts(
         query = db.table("alerts").select("*").eq("user_id", str(user_id))
         if unread_only:
             query = query.eq("is_read", False)
-        result = query.order("created_at", desc=True).limit(50).execute()
+        result = await execute_async(query.order("created_at", desc=True).limit(50))
         return result.data or []
     except Exception:
         return []
@@ -35,7 +35,9 @@ async def list_alerts(
 
 @router.patch("/{alert_id}/read")
 async def mark_alert_read(alert_id: UUID, db: Client = Depends(get_supabase)):
-    db.table("alerts").update({"is_read": True}).eq("id", str(alert_id)).execute()
+    await execute_async(
+        db.table("alerts").update({"is_read": True}).eq("id", str(alert_id))
+    )
     return {"status": "marked_read"}
 
 
@@ -47,7 +49,7 @@ async def clear_all_alerts(user_id: UUID, db: Client = Depends(get_supabase)):
     soft-deletes (is_read) for performance and storage efficiency.
     """
     try:
-        db.table("alerts").delete().eq("user_id", str(user_id)).execute()
+        await execute_async(db.table("alerts").delete().eq("user_id", str(user_id)))
         return {"status": "cleared", "user_id": user_id}
     except Exception as e:
         from fastapi import HTTPException
@@ -58,5 +60,5 @@ async def clear_all_alerts(user_id: UUID, db: Client = Depends(get_supabase)):
 @router.delete("/{alert_id}")
 async def delete_alert(alert_id: UUID, db: Client = Depends(get_supabase)):
     """Removes a single alert by ID."""
-    db.table("alerts").delete().eq("id", str(alert_id)).execute()
+    await execute_async(db.table("alerts").delete().eq("id", str(alert_id)))
     return {"status": "deleted", "alert_id": alert_id}
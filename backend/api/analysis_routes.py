@@ -2,7 +2,7 @@ from fastapi import APIRouter, HTTPException, Depends
 from typing import Optional
 from uuid import UUID
 from supabase import Client
-from backend.utils.db import get_supabase
+from backend.utils.db import get_supabase, execute_async
 from backend.services.auth_service import get_current_active_user
 
 # from backend.agents.analyst_agent import AnalystAgent  # Lazy loaded below
@@ -64,14 +64,16 @@ async def get_market_intelligence(
     All business logic (legacy log merging, pgvector room matching, price aggregation)
     has been moved to analysis_service.get_market_intelligence_data().
     This route only handles HTTP concerns: dependency injection, response formatting, errors.
+    The result is served from the user's precomputed snapshot while no new
+    price data has landed (market_snapshot.py).
     """
-    from backend.services.analysis_service import get_market_intelligence_data
+    from backend.services.market_snapshot import get_market_intelligence
 
     try:
         if not db:
             raise HTTPException(503, "Database unavailable")
 
-        analysis_data = await get_market_intelligence_data(
+        analysis_data = await get_market_intelligence(
             db=db,
             user_id=str(user_id),
             room_type=room_type,
@@ -97,8 +99,8 @@ async def discover_competitors_trigger(
         from backend.agents.analyst_agent import AnalystAgent
 
         analyst = AnalystAgent(db)
-        hotel = (
-            db.table("hotels").select("*").eq("id", str(hotel_id)).single().execute()
+        hotel = await execute_async(
+            db.table("hotels").select("*").eq("id", str(hotel_id)).single()
         )
         if not hotel.data:
             raise HTTPException(404, "Hotel not found")
@@ -127,13 +129,12 @@ async def get_sentiment_history(
     try:
         # Fetch history records
         # Note: We filter by hotel_id and limit by days
-        res = (
+        res = await execute_async(
             db.table("sentiment_history")
             .select("*")
             .eq("hotel_id", hotel_id)
             .order("created_at", desc=True)
             .limit(days)
-            .execute()
         )
 
         history = []
@@ -183,11 +184,10 @@ async def debug_analysis_data(
         diag = {"user_id": str(user_id), "timestamp": datetime.utcnow().isoformat()}
 
         # 1. Hotels for this user
-        hotels_res = (
+        hotels_res = await execute_async(
             db.table("hotels")
             .select("id, name, is_target_hotel, location, serp_api_id")
             .eq("user_id", str(user_id))
-            .execute()
         )
         hotels = hotels_res.data or []
         diag["hotel_count"] = len(hotels)
@@ -208,33 +208,30 @@ async def debug_analysis_data(
         hotel_ids = [str(h["id"]) for h in hotels]
 
         # 2. Price logs count (all time)
-        all_time = (
+        all_time = await execute_async(
             db.table("price_logs")
             .select("id", count="exact")
             .in_("hotel_id", hotel_ids)
-            .execute()
         )
         diag["price_logs_all_time"] = all_time.count
 
         # 3. Price logs count (90 day window - what analysis actually uses)
         cutoff = (datetime.utcnow() - timedelta(days=90)).isoformat()
-        windowed = (
+        windowed = await execute_async(
             db.table("price_logs")
             .select("id", count="exact")
             .in_("hotel_id", hotel_ids)
             .gte("recorded_at", cutoff)
-            .execute()
         )
         diag["price_logs_90_days"] = windowed.count
 
         # 4. Recent price logs (last 5)
-        recent = (
+        recent = await execute_async(
             db.table("price_logs")
             .select("hotel_id, price, currency, recorded_at, source, is_estimated")
             .in_("hotel_id", hotel_ids)
             .order("recorded_at", desc=True)
             .limit(5)
-            .execute()
         )
         diag["recent_logs"] = []
         for r in recent.data or []:
@@ -258,13 +255,12 @@ async def debug_analysis_data(
 
         # 5. Scan sessions (last 3)
         try:
-            sessions = (
+            sessions = await execute_async(
                 db.table("scan_sessions")
                 .select("id, status, created_at, completed_at, reasoning_trace")
                 .eq("user_id", str(user_id))
                 .order("created_at", desc=True)
                 .limit(3)
-                .execute()
             )
             diag["recent_scans"] = []
             for s in sessions.data or []:
@@ -322,15 +318,13 @@ async def stream_market_intelligence(
     KAIZEN: AI Business Intelligence Stream (SSE)
     Streams market data followed by real-time generated narratives.
     """
-    from backend.services.analysis_service import (
-        get_market_intelligence_data,
-        stream_narrative_gen,
-    )
+    from backend.services.analysis_service import stream_narrative_gen
+    from backend.services.market_snapshot import get_market_intelligence
 
     async def event_generator():
         try:
-            # 1. Immediate Market Stats
-            analysis_data = await get_market_intelligence_data(
+            # 1. Immediate Market Stats (precomputed snapshot when still valid)
+            analysis_data = await get_market_intelligence(
                 db=db,
                 user_id=str(user_id),
                 room_type=room_type,
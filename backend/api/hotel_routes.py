@@ -2,7 +2,7 @@ from fastapi import APIRouter, HTTPException, Depends, Query
 from typing import List, Optional
 from uuid import UUID
 from supabase import Client
-from backend.utils.db import get_supabase
+from backend.utils.db import get_supabase, execute_async
 from backend.services.auth_service import get_current_active_user
 from backend.models.schemas import Hotel, HotelCreate, HotelUpdate, LocationRegistry
 from backend.services.hotel_service import (
@@ -58,7 +58,7 @@ async def list_hotels(
     if not include_deleted:
         query = query.is_("deleted_at", "null")
 
-    result = query.execute()
+    result = await execute_async(query)
     return result.data or []
 
 
@@ -131,28 +131,29 @@ async def create_hotel(
         raise HTTPException(status_code=403, detail=reason)
 
     if hotel.serp_api_id:
-        dup = (
+        dup = await execute_async(
             db.table("hotels")
             .select("*")
             .eq("user_id", str(user_id))
             .eq("serp_api_id", hotel.serp_api_id)
-            .execute()
         )
         if dup.data:
             return dup.data[0]
 
     if hotel.is_target_hotel:
-        db.table("hotels").update({"is_target_hotel": False}).eq(
-            "user_id", str(user_id)
-        ).eq("is_target_hotel", True).execute()
+        await execute_async(
+            db.table("hotels").update({"is_target_hotel": False}).eq(
+                "user_id", str(user_id)
+            ).eq("is_target_hotel", True)
+        )
 
     hotel_data = hotel.model_dump()
     hotel_data["name"] = hotel_data["name"].title().strip()
     if hotel_data.get("location"):
         hotel_data["location"] = hotel_data["location"].title().strip()
 
-    result = (
-        db.table("hotels").insert({"user_id": str(user_id), **hotel_data}).execute()
+    result = await execute_async(
+        db.table("hotels").insert({"user_id": str(user_id), **hotel_data})
     )
 
     if result.data:
@@ -167,21 +168,23 @@ async def create_hotel(
         # Automatically populates the global directory with high-quality metadata
         # (coordinates, ratings, images) to benefit the entire system.
         try:
-            db.table("hotel_directory").upsert(
-                {
-                    "name": hotel_data["name"],
-                    "location": hotel_data.get("location"),
-                    "serp_api_id": hotel_data.get("serp_api_id"),
-                    "latitude": hotel_data.get("latitude"),
-                    "longitude": hotel_data.get("longitude"),
-                    "rating": hotel_data.get("rating"),
-                    "stars": hotel_data.get("stars"),
-                    "image_url": hotel_data.get("image_url"),
-                    "review_count": hotel_data.get("review_count"),
-                    "last_verified_at": datetime.now().isoformat(),
-                },
-                on_conflict="serp_api_id",
-            ).execute()
+            await execute_async(
+                db.table("hotel_directory").upsert(
+                    {
+                        "name": hotel_data["name"],
+                        "location": hotel_data.get("location"),
+                        "serp_api_id": hotel_data.get("serp_api_id"),
+                        "latitude": hotel_data.get("latitude"),
+                        "longitude": hotel_data.get("longitude"),
+                        "rating": hotel_data.get("rating"),
+                        "stars": hotel_data.get("stars"),
+                        "image_url": hotel_data.get("image_url"),
+                        "review_count": hotel_data.get("review_count"),
+                        "last_verified_at": datetime.now().isoformat(),
+                    },
+                    on_conflict="serp_api_id",
+                )
+            )
         except Exception as e:
             print(f"Directory Auto-Sync Warning: {e}")
 
@@ -197,12 +200,11 @@ async def update_hotel(
 ):
     # KAIZEN: Ownership Verification for specific resource
     try:
-        current_res = (
+        current_res = await execute_async(
             db.table("hotels")
             .select("user_id")
             .eq("id", str(hotel_id))
             .single()
-            .execute()
         )
         if not current_res.data:
             raise HTTPException(status_code=404, detail="Hotel not found")
@@ -218,11 +220,15 @@ async def update_hotel(
 
     if update_data.get("is_target_hotel"):
         uid = current_res.data["user_id"]
-        db.table("hotels").update({"is_target_hotel": False}).eq(
-            "user_id", uid
-        ).execute()
+        await execute_async(
+            db.table("hotels").update({"is_target_hotel": False}).eq(
+                "user_id", uid
+            )
+        )
 
-    result = db.table("hotels").update(update_data).eq("id", str(hotel_id)).execute()
+    result = await execute_async(
+        db.table("hotels").update(update_data).eq("id", str(hotel_id))
+    )
     return result.data[0] if result.data else None
 
 
@@ -234,12 +240,11 @@ async def delete_hotel(
 ):
     # KAIZEN: Ownership Verification
     try:
-        current_res = (
+        current_res = await execute_async(
             db.table("hotels")
             .select("user_id")
             .eq("id", str(hotel_id))
             .single()
-            .execute()
         )
         if not current_res.data:
             raise HTTPException(status_code=404, detail="Hotel not found")
@@ -253,5 +258,7 @@ async def delete_hotel(
     # Instead of a hard DELETE, we set 'deleted_at'. This preserves
     # historical price_logs and allows for easy data recovery if needed.
     now_iso = datetime.now(timezone.utc).isoformat().replace("+00:00", "Z")
-    db.table("hotels").update({"deleted_at": now_iso}).eq("id", str(hotel_id)).execute()
+    await execute_async(
+        db.table("hotels").update({"deleted_at": now_iso}).eq("id", str(hotel_id))
+    )
     return {"status": "archived", "message": "Hotel successfully archived"}
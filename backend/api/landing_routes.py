@@ -8,7 +8,7 @@ Supports multi-language content fetching and upserting via the 'locale' dimensio
 from fastapi import APIRouter, Depends, HTTPException
 from typing import List, Dict, Any
 from supabase import Client
-from backend.utils.db import get_supabase
+from backend.utils.db import get_supabase, execute_async
 from backend.services.auth_service import get_current_admin_user
 from pydantic import BaseModel
 
@@ -24,11 +24,10 @@ class ConfigUpdate(BaseModel):
 async def get_landing_config(locale: str = "tr", db: Client = Depends(get_supabase)):
     """Public endpoint to fetch all landing page configurations for a specific locale."""
     try:
-        res = (
+        res = await execute_async(
             db.table("landing_page_config")
             .select("key, content")
             .eq("locale", locale)
-            .execute()
         )
         # Convert list of {key, content} to dict {key: content} for easier frontend use
         config_dict = {item["key"]: item["content"] for item in res.data}
@@ -45,12 +44,11 @@ async def get_admin_landing_config(
 ):
     """Admin endpoint to fetch raw configuration for editing."""
     try:
-        res = (
+        res = await execute_async(
             db.table("landing_page_config")
             .select("*")
             .eq("locale", locale)
             .order("key")
-            .execute()
         )
         return res.data
     except Exception as e:
@@ -67,10 +65,12 @@ async def update_landing_config(
     try:
         # Perform upserts for each config item
         for item in data.configs:
-            db.table("landing_page_config").upsert(
-                {"key": item["key"], "locale": data.locale, "content": item["content"]},
-                on_conflict="key,locale",
-            ).execute()
+            await execute_async(
+                db.table("landing_page_config").upsert(
+                    {"key": item["key"], "locale": data.locale, "content": item["content"]},
+                    on_conflict="key,locale",
+                )
+            )
 
         return {
             "status": "success",
@@ -2,7 +2,7 @@ from fastapi import APIRouter, Depends, Query, BackgroundTasks, Request
 from typing import List, Optional
 from uuid import UUID
 from supabase import Client
-from backend.utils.db import get_supabase
+from backend.utils.db import get_supabase, execute_async
 from backend.services.auth_service import get_current_active_user
 from backend.models.schemas import MonitorResult, ScanOptions, QueryLog
 from backend.services.monitor_service import (
@@ -65,7 +65,9 @@ async def check_scheduled_scan(
         # to return triggered:false while the UI still showed "Scan triggered!".
 
         # 1. Settings Check
-        settings_res = db.table("settings").select("*").eq("user_id", uid).execute()
+        settings_res = await execute_async(
+            db.table("settings").select("*").eq("user_id", uid)
+        )
         if not settings_res.data:
             return {"triggered": False, "reason": "NO_SETTINGS"}
 
@@ -75,12 +77,11 @@ async def check_scheduled_scan(
             return {"triggered": False, "reason": "MANUAL_ONLY"}
 
         # 2. Hotels Check
-        hotels_res = (
+        hotels_res = await execute_async(
             db.table("hotels")
             .select("*")
             .eq("user_id", uid)
             .is_("deleted_at", "null")
-            .execute()
         )
         hotels = hotels_res.data or []
         if not hotels:
@@ -88,14 +89,13 @@ async def check_scheduled_scan(
 
         # 3. Pending/Running Check (Anti-Collision — skipped when force=True)
         if not force:
-            pending_res = (
+            pending_res = await execute_async(
                 db.table("scan_sessions")
                 .select("created_at")
                 .eq("user_id", uid)
                 .in_("status", ["pending", "running"])
                 .order("created_at", desc=True)
                 .limit(1)
-                .execute()
             )
             if pending_res.data:
                 pending_time = datetime.fromisoformat(
@@ -107,13 +107,12 @@ async def check_scheduled_scan(
         # 4. Due Check (skipped entirely when force=True)
         should_run = force
         if not should_run:
-            last_log = (
+            last_log = await execute_async(
                 db.table("price_logs")
                 .select("recorded_at")
                 .eq("user_id", uid)
                 .order("recorded_at", desc=True)
                 .limit(1)
-                .execute()
             )
             if not last_log.data:
                 should_run = True
@@ -129,7 +128,7 @@ async def check_scheduled_scan(
         if should_run:
             session_id = None
             try:
-                session_result = (
+                session_result = await execute_async(
                     db.table("scan_sessions")
                     .insert(
                         {
@@ -139,7 +138,6 @@ async def check_scheduled_scan(
                             "status": "pending",
                         }
                     )
-                    .execute()
                 )
                 if session_result.data:
                     session_id = session_result.data[0]["id"]
@@ -147,14 +145,20 @@ async def check_scheduled_scan(
             except Exception as e:
                 print(f"[TriggerScan] Session create failed: {e}")
 
-            background_tasks.add_task(
-                run_monitor_background,
-                user_id=user_id,
-                hotels=hotels,
-                options=None,
-                db=db,
-                session_id=session_id,
-            )
+            # Durable queue first; direct BackgroundTasks only without migration 032
+            from backend.services.scan_queue import enqueue_scan, kick_scan_worker
+
+            if await enqueue_scan(db, session_id, hotels):
+                background_tasks.add_task(kick_scan_worker, db)
+            else:
+                background_tasks.add_task(
+                    run_monitor_background,
+                    user_id=user_id,
+                    hotels=hotels,
+                    options=None,
+                    db=db,
+                    session_id=session_id,
+                )
             return {"triggered": True, "session_id": session_id}
 
         return {"triggered": False, "reason": "NOT_DUE"}
@@ -171,8 +175,8 @@ async def check_scheduled_scan(
 async def get_session(session_id: UUID, db: Client = Depends(get_supabase)):
     """Fetch a single scan session by ID for live status/reasoning updates."""
     try:
-        result = (
-            db.table("scan_sessions").select("*").eq("id", str(session_id)).execute()
+        result = await execute_async(
+            db.table("scan_sessions").select("*").eq("id", str(session_id))
         )
         if result.data:
             return result.data[0]
@@ -186,12 +190,11 @@ async def get_session(session_id: UUID, db: Client = Depends(get_supabase)):
 async def get_session_logs(session_id: UUID, db: Client = Depends(get_supabase)):
     """Fetch all query logs linked to a specific scan session."""
     try:
-        result = (
+        result = await execute_async(
             db.table("query_logs")
             .select("*")
             .eq("session_id", str(session_id))
             .order("created_at", desc=True)
-            .execute()
         )
         return result.data or []
     except Exception as e:
@@ -210,7 +213,7 @@ async def delete_log(
     Supports frontend's cleanup functionality.
     """
     try:
-        db.table("query_logs").delete().eq("id", str(log_id)).execute()
+        await execute_async(db.table("query_logs").delete().eq("id", str(log_id)))
         return {"status": "success"}
     except Exception as e:
         print(f"Error deleting log: {e}")
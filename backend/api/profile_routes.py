@@ -2,7 +2,7 @@ from fastapi import APIRouter, HTTPException, Depends
 from uuid import UUID
 from typing import Optional
 from supabase import Client
-from backend.utils.db import get_supabase
+from backend.utils.db import get_supabase, execute_async
 from backend.services.auth_service import get_current_active_user
 from backend.models.schemas import (
     UserProfile,
@@ -104,7 +104,9 @@ async def get_settings(
     try:
         if not db:
             return safe_defaults
-        result = db.table("settings").select("*").eq("user_id", str(user_id)).execute()
+        result = await execute_async(
+            db.table("settings").select("*").eq("user_id", str(user_id))
+        )
         if not result.data:
             insert_data = {
                 "user_id": str(user_id),
@@ -114,7 +116,7 @@ async def get_settings(
                 "push_enabled": False,
                 "currency": "USD",
             }
-            result = db.table("settings").insert(insert_data).execute()
+            result = await execute_async(db.table("settings").insert(insert_data))
             return result.data[0]
         return result.data[0]
     except Exception as e:
@@ -151,7 +153,9 @@ async def update_settings(
             "created_at": datetime.now(timezone.utc),
             "updated_at": datetime.now(timezone.utc),
         }
-    existing = db.table("settings").select("*").eq("user_id", str(user_id)).execute()
+    existing = await execute_async(
+        db.table("settings").select("*").eq("user_id", str(user_id))
+    )
     update_data = settings.model_dump(exclude_unset=True)
     update_data["updated_at"] = datetime.now(timezone.utc).isoformat()
     if existing.data:
@@ -163,21 +167,19 @@ async def update_settings(
             del update_data["push_subscription"]
 
         try:
-            result = (
+            result = await execute_async(
                 db.table("settings")
                 .update(update_data)
                 .eq("user_id", str(user_id))
-                .execute()
             )
         except Exception as e:
             # If update fails (e.g. column missing), try fallback without push_subscription
             if "push_subscription" in update_data:
                 del update_data["push_subscription"]
-                result = (
+                result = await execute_async(
                     db.table("settings")
                     .update(update_data)
                     .eq("user_id", str(user_id))
-                    .execute()
                 )
             else:
                 raise e
@@ -189,18 +191,16 @@ async def update_settings(
         ):
             del update_data["push_subscription"]
         try:
-            result = (
+            result = await execute_async(
                 db.table("settings")
                 .insert({"user_id": str(user_id), **update_data})
-                .execute()
             )
         except Exception as e:
             if "push_subscription" in update_data:
                 del update_data["push_subscription"]
-                result = (
+                result = await execute_async(
                     db.table("settings")
                     .insert({"user_id": str(user_id), **update_data})
-                    .execute()
                 )
             else:
                 raise e
@@ -213,9 +213,11 @@ async def update_settings(
             next_run = (
                 (now_dt + timedelta(minutes=freq)).isoformat().replace("+00:00", "Z")
             )
-            db.table("profiles").update({"next_scan_at": next_run}).eq(
-                "id", str(user_id)
-            ).execute()
+            await execute_async(
+                db.table("profiles").update({"next_scan_at": next_run}).eq(
+                    "id", str(user_id)
+                )
+            )
             print(f"[Settings] Synced next_scan_at for {user_id} to {next_run}")
         except Exception as e:
             print(f"[Settings] Profile sync failed: {e}")
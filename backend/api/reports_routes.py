@@ -3,7 +3,7 @@ from typing import Optional
 from uuid import UUID
 from datetime import datetime
 from supabase import Client
-from backend.utils.db import get_supabase
+from backend.utils.db import get_supabase, execute_async
 from backend.services.auth_service import (
     get_current_active_user,
     get_current_admin_user,
@@ -60,13 +60,12 @@ async def get_briefing_detail(
     """
     Fetches the full details of a saved Agentic Briefing.
     """
-    res = (
+    res = await execute_async(
         db.table("reports")
         .select("*")
         .eq("id", str(report_id))
         .eq("created_by", str(current_user.id))
         .single()
-        .execute()
     )
     if not res.data:
         raise HTTPException(status_code=404, detail="Briefing not found")
@@ -86,13 +85,12 @@ async def export_saved_briefing_pdf(
     from xhtml2pdf import pisa
     import io
 
-    res = (
+    res = await execute_async(
         db.table("reports")
         .select("*")
         .eq("id", str(report_id))
         .eq("created_by", str(current_user.id))
         .single()
-        .execute()
     )
     if not res.data:
         raise HTTPException(status_code=404, detail="Briefing not found")
@@ -323,8 +321,8 @@ async def export_report_pdf(
     Generate and stream a PDF for a specific report (Admin view).
     """
     try:
-        report = (
-            db.table("reports").select("*").eq("id", str(report_id)).single().execute()
+        report = await execute_async(
+            db.table("reports").select("*").eq("id", str(report_id)).single()
         )
         if not report.data:
             raise HTTPException(status_code=404, detail="Report not found")
@@ -6,6 +6,7 @@ Main entry point using modular routers.
 # ruff: noqa
 import os
 import sys
+from contextlib import asynccontextmanager
 from datetime import datetime, timezone
 
 # Ensure backend module is resolvable
@@ -20,7 +21,14 @@ from fastapi.exceptions import RequestValidationError
 from fastapi.responses import JSONResponse
 from dotenv import load_dotenv
 from supabase import Client
-from backend.utils.db import get_supabase
+from backend.utils.db import (
+    get_supabase,
+    execute_async,
+    init_supabase,
+    close_supabase_clients,
+    shutdown_db_executor,
+)
+from backend.utils.http_client import close_http_client
 
 # Load environment variables
 load_dotenv()
@@ -53,7 +61,19 @@ from backend.api import (
 # because our routers already include the "/api" prefix. Setting it
 # causes FastAPI to strip "/api" from incoming requests, making them
 # fail to match the registered routes (Double Prefixing Conflict).
-app = FastAPI(title="Hotel Rate Sentinel API", version="2026.02")
+# EXPLANATION: Lifespan-Managed Shared Resources
+# The pooled SerpApi HTTP client lives for the whole worker process. We close it
+# on shutdown so keep-alive sockets are released cleanly instead of leaking.
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    init_supabase()
+    yield
+    await close_http_client()
+    shutdown_db_executor(wait=False)
+    close_supabase_clients()
+
+
+app = FastAPI(title="Hotel Rate Sentinel API", version="2026.02", lifespan=lifespan)
 
 # DIAGNOSTIC MIDDLEWARE: Log every request path to identify Vercel prefix issues
 @app.middleware("http")
@@ -186,7 +206,7 @@ async def system_report(db: Client = Depends(get_supabase)):
         for table in tables_to_check:
             try:
                 # Just check if we can select 1 record
-                res = db.table(table).select("*").limit(1).execute()
+                res = await execute_async(db.table(table).select("*").limit(1))
                 db_results[table] = {"status": "OK", "count_hint": len(res.data or [])}
             except Exception as e:
                 db_results[table] = {"status": "FAILED", "error": str(e)}
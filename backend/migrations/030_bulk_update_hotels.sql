@@ -0,0 +1,49 @@
+-- Migration 030: Batched hotel metadata updates
+-- Run in Supabase SQL Editor
+-- Used by backend/utils/bulk_writes.py (AnalystAgent end-of-analysis flush).
+--
+-- p_rows: [{"id": "<hotel uuid>", "patch": {"column": value, ...}}, ...]
+-- Each patch is applied in its own sub-transaction so one bad row (type error,
+-- constraint violation) does not roll back the others. Unknown columns are ignored.
+-- Returns one (id, ok, error) row per input element.
+
+CREATE OR REPLACE FUNCTION bulk_update_hotels(p_rows jsonb)
+RETURNS TABLE (id uuid, ok boolean, error text)
+LANGUAGE plpgsql AS $$
+DECLARE
+    item jsonb;
+    set_clause text;
+    affected int;
+BEGIN
+    FOR item IN SELECT * FROM jsonb_array_elements(p_rows) LOOP
+        id := (item->>'id')::uuid;
+        BEGIN
+            SELECT string_agg(format('%I = r.%I', c.column_name, c.column_name), ', ')
+              INTO set_clause
+              FROM information_schema.columns c
+             WHERE c.table_schema = 'public'
+               AND c.table_name = 'hotels'
+               AND c.column_name <> 'id'
+               AND (item->'patch') ? c.column_name;
+
+            IF set_clause IS NULL THEN
+                ok := false; error := 'empty patch';
+            ELSE
+                EXECUTE format(
+                    'UPDATE hotels h SET %s FROM jsonb_populate_record(NULL::hotels, $1) r WHERE h.id = $2',
+                    set_clause
+                ) USING item->'patch', id;
+                GET DIAGNOSTICS affected = ROW_COUNT;
+                ok := affected > 0;
+                error := CASE WHEN affected > 0 THEN NULL ELSE 'not found' END;
+            END IF;
+        EXCEPTION WHEN OTHERS THEN
+            ok := false; error := SQLERRM;
+        END;
+        RETURN NEXT;
+    END LOOP;
+END;
+$$;
+
+-- Also notify PostgREST to reload its schema cache
+NOTIFY pgrst, 'reload schema';
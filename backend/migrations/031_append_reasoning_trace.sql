@@ -0,0 +1,20 @@
+-- Migration 031: Server-side append for scan_sessions.reasoning_trace
+-- Run in Supabase SQL Editor
+-- Used by backend/services/trace_sink.py (Scraper/Analyst/Notifier reasoning logs).
+--
+-- Agents used to read the whole trace, extend it in Python and write it back, so
+-- concurrent writers lost each other's entries and every write re-sent the full
+-- array. This appends a batch of entries in a single atomic UPDATE (row lock).
+
+CREATE OR REPLACE FUNCTION append_reasoning_trace(p_session_id uuid, p_entries jsonb)
+RETURNS integer
+LANGUAGE sql AS $$
+    UPDATE scan_sessions
+       SET reasoning_trace = COALESCE(reasoning_trace, '[]'::jsonb) || p_entries,
+           updated_at = now()
+     WHERE id = p_session_id
+    RETURNING jsonb_array_length(reasoning_trace);
+$$;
+
+-- Also notify PostgREST to reload its schema cache
+NOTIFY pgrst, 'reload schema';
@@ -0,0 +1,83 @@
+-- Migration 032: Durable scan queue on scan_sessions
+-- Run in Supabase SQL Editor
+-- Used by backend/services/scan_queue.py (manual / on-demand scans).
+--
+-- Scans used to run only inside FastAPI BackgroundTasks: a process restart lost
+-- the scan and left a "zombie" scan_sessions row for the 2-hour cleanup. A session
+-- with job_options set is now also a queue job. Workers claim jobs with
+-- FOR UPDATE SKIP LOCKED (no two workers get the same row), hold a lease
+-- (locked_until) that they renew while running, and a job whose lease expires is
+-- picked up again by another worker, resuming after completed_hotel_ids.
+
+ALTER TABLE scan_sessions
+ADD COLUMN IF NOT EXISTS job_options JSONB,
+    ADD COLUMN IF NOT EXISTS attempts INTEGER DEFAULT 0,
+    ADD COLUMN IF NOT EXISTS max_attempts INTEGER DEFAULT 3,
+    ADD COLUMN IF NOT EXISTS run_after TIMESTAMPTZ DEFAULT now(),
+    ADD COLUMN IF NOT EXISTS locked_by TEXT,
+    ADD COLUMN IF NOT EXISTS locked_until TIMESTAMPTZ,
+    ADD COLUMN IF NOT EXISTS last_error TEXT,
+    ADD COLUMN IF NOT EXISTS completed_hotel_ids JSONB DEFAULT '[]';
+
+COMMENT ON COLUMN scan_sessions.job_options IS 'Queue payload ({hotel_ids, options}); NULL for sessions run outside the queue';
+COMMENT ON COLUMN scan_sessions.locked_until IS 'Visibility timeout: the job is re-claimable once this passes';
+COMMENT ON COLUMN scan_sessions.completed_hotel_ids IS 'Hotels already analysed and persisted; skipped when the job resumes';
+
+CREATE INDEX IF NOT EXISTS idx_scan_sessions_queue
+    ON scan_sessions(run_after, created_at)
+    WHERE job_options IS NOT NULL AND status IN ('pending', 'running');
+
+-- Claim the next runnable job (queued and due, or running with an expired lease)
+CREATE OR REPLACE FUNCTION claim_scan_job(p_worker_id text, p_visibility_s integer DEFAULT 900)
+RETURNS SETOF scan_sessions
+LANGUAGE plpgsql AS $$
+BEGIN
+    -- Jobs whose lease expired on their last attempt are given up
+    UPDATE scan_sessions
+       SET status = 'failed',
+           completed_at = now(),
+           locked_by = NULL,
+           last_error = COALESCE(last_error, 'visibility timeout')
+     WHERE job_options IS NOT NULL
+       AND status = 'running'
+       AND locked_until < now()
+       AND attempts >= max_attempts;
+
+    RETURN QUERY
+    UPDATE scan_sessions s
+       SET status = 'running',
+           locked_by = p_worker_id,
+           locked_until = now() + make_interval(secs => p_visibility_s),
+           attempts = s.attempts + 1,
+           updated_at = now()
+     WHERE s.id = (
+            SELECT id
+              FROM scan_sessions
+             WHERE job_options IS NOT NULL
+               AND attempts < max_attempts
+               AND ((status = 'pending' AND run_after <= now())
+                    OR (status = 'running' AND locked_until < now()))
+             ORDER BY run_after, created_at
+             FOR UPDATE SKIP LOCKED
+             LIMIT 1
+           )
+    RETURNING s.*;
+END;
+$$;
+
+-- Record hotels whose results are persisted (set union, order-independent)
+CREATE OR REPLACE FUNCTION checkpoint_scan_hotels(p_session_id uuid, p_hotel_ids jsonb)
+RETURNS integer
+LANGUAGE sql AS $$
+    UPDATE scan_sessions
+       SET completed_hotel_ids = (
+               SELECT COALESCE(jsonb_agg(DISTINCT v), '[]'::jsonb)
+                 FROM jsonb_array_elements(COALESCE(completed_hotel_ids, '[]'::jsonb) || p_hotel_ids) AS v
+           ),
+           updated_at = now()
+     WHERE id = p_session_id
+    RETURNING jsonb_array_length(completed_hotel_ids);
+$$;
+
+-- Also notify PostgREST to reload its schema cache
+NOTIFY pgrst, 'reload schema';
@@ -0,0 +1,30 @@
+-- Migration 033: Per-hotel scan checkpoints
+-- Run in Supabase SQL Editor
+-- Used by backend/services/scan_checkpoints.py (every scan with a session).
+--
+-- A crash midway through a scan used to discard every price already fetched,
+-- because the analyst only persists whole batches. Each successful fetch is now
+-- stored on the session as it arrives:
+--   hotel_checkpoints = { "<hotel_id>": {"fetched_at": ..., "result": {...}} }
+-- A resumed session skips hotels persisted within the freshness window, replays
+-- fresh-but-unpersisted results into the analyst and refetches only the rest.
+-- Scheduled scans that are split across cron runs wait in status 'paused'.
+
+ALTER TABLE scan_sessions
+ADD COLUMN IF NOT EXISTS hotel_checkpoints JSONB DEFAULT '{}';
+
+COMMENT ON COLUMN scan_sessions.hotel_checkpoints IS 'Fetched results per hotel ({hotel_id: {fetched_at, result}}) used to resume a scan without paying for them again';
+
+-- Merge checkpoints (top-level keys are hotel ids, so concurrent fetches never collide)
+CREATE OR REPLACE FUNCTION checkpoint_scan_fetches(p_session_id uuid, p_checkpoints jsonb)
+RETURNS integer
+LANGUAGE sql AS $$
+    UPDATE scan_sessions
+       SET hotel_checkpoints = COALESCE(hotel_checkpoints, '{}'::jsonb) || p_checkpoints,
+           updated_at = now()
+     WHERE id = p_session_id
+    RETURNING (SELECT count(*)::integer FROM jsonb_object_keys(hotel_checkpoints));
+$$;
+
+-- Also notify PostgREST to reload its schema cache
+NOTIFY pgrst, 'reload schema';
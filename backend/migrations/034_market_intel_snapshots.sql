@@ -0,0 +1,100 @@
+-- Migration 034: Precomputed market intelligence snapshots
+-- Run in Supabase SQL Editor
+-- Used by backend/services/market_snapshot.py (/api/analysis/{user_id} and the
+-- /api/v2/analysis/stream SSE endpoint).
+--
+-- get_market_intelligence_data pulls 90 days of price_logs (local + global),
+-- the query_logs fallback and the room catalog matches, then runs the whole
+-- market analysis on every request. The result is now stored per
+-- (user, room type, currency, date range) and served until the user's data
+-- changes:
+--   market_data_versions   one counter per user, bumped by the triggers below
+--                          whenever price_logs rows land for any of the user's
+--                          hotels (by hotel_id or by shared serp_api_id) or the
+--                          user's hotels change
+--   market_intel_snapshots the analysis payload and the version it was built from;
+--                          a snapshot is valid only while the versions match
+
+CREATE TABLE IF NOT EXISTS market_data_versions (
+    user_id UUID PRIMARY KEY,
+    version BIGINT NOT NULL DEFAULT 0,
+    updated_at TIMESTAMPTZ DEFAULT now()
+);
+
+CREATE TABLE IF NOT EXISTS market_intel_snapshots (
+    user_id UUID NOT NULL,
+    snapshot_key TEXT NOT NULL,
+    params JSONB NOT NULL DEFAULT '{}',
+    payload JSONB NOT NULL,
+    data_version BIGINT NOT NULL DEFAULT 0,
+    computed_at TIMESTAMPTZ DEFAULT now(),
+    PRIMARY KEY (user_id, snapshot_key)
+);
+
+COMMENT ON TABLE market_intel_snapshots IS 'Materialised market analysis per (user, room_type, currency, date range); valid while data_version matches market_data_versions';
+
+-- Global Pulse rows are matched by serp_api_id, so both lookups need an index
+CREATE INDEX IF NOT EXISTS idx_hotels_serp_api_id ON hotels (serp_api_id);
+
+CREATE OR REPLACE FUNCTION bump_market_data_version_from_price_logs()
+RETURNS trigger
+LANGUAGE plpgsql
+SECURITY DEFINER
+AS $$
+BEGIN
+    INSERT INTO market_data_versions AS v (user_id, version, updated_at)
+    SELECT DISTINCT owners.user_id, 1, now()
+      FROM (
+            SELECT h.user_id FROM new_rows n JOIN hotels h ON h.id = n.hotel_id
+            UNION
+            SELECT h.user_id FROM new_rows n JOIN hotels h ON h.serp_api_id = n.serp_api_id
+             WHERE n.serp_api_id IS NOT NULL
+           ) owners
+     WHERE owners.user_id IS NOT NULL
+    ON CONFLICT (user_id) DO UPDATE
+       SET version = v.version + 1,
+           updated_at = now();
+    RETURN NULL;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS price_logs_bump_market_data_version ON price_logs;
+CREATE TRIGGER price_logs_bump_market_data_version
+AFTER INSERT ON price_logs
+REFERENCING NEW TABLE AS new_rows
+FOR EACH STATEMENT
+EXECUTE FUNCTION bump_market_data_version_from_price_logs();
+
+-- Added, removed or edited hotels change the competitor set and hotel fields
+CREATE OR REPLACE FUNCTION bump_market_data_version_from_hotels()
+RETURNS trigger
+LANGUAGE plpgsql
+SECURITY DEFINER
+AS $$
+DECLARE
+    owner UUID;
+BEGIN
+    IF TG_OP = 'DELETE' THEN
+        owner := OLD.user_id;
+    ELSE
+        owner := NEW.user_id;
+    END IF;
+    IF owner IS NOT NULL THEN
+        INSERT INTO market_data_versions AS v (user_id, version, updated_at)
+        VALUES (owner, 1, now())
+        ON CONFLICT (user_id) DO UPDATE
+           SET version = v.version + 1,
+               updated_at = now();
+    END IF;
+    RETURN NULL;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS hotels_bump_market_data_version ON hotels;
+CREATE TRIGGER hotels_bump_market_data_version
+AFTER INSERT OR UPDATE OR DELETE ON hotels
+FOR EACH ROW
+EXECUTE FUNCTION bump_market_data_version_from_hotels();
+
+-- Also notify PostgREST to reload its schema cache
+NOTIFY pgrst, 'reload schema';
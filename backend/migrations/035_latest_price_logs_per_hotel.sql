@@ -0,0 +1,45 @@
+-- Migration 035: Latest N price_logs per hotel
+-- Run in Supabase SQL Editor
+-- Used by backend/services/latest_price_logs.py (dashboard price cards, admin
+-- Intelligence price recovery, AnalystAgent rival baselines).
+--
+-- Those call sites fetched `price_logs ... in (hotel_ids) order by recorded_at desc
+-- limit K` and kept the first few rows per hotel in Python, so one hotel with many
+-- recent logs could fill the whole limit and starve the others. This returns
+-- exactly the newest p_per_hotel rows of every hotel (the same rows as
+-- row_number() over (partition by hotel_id order by recorded_at desc) <= N), as a
+-- per-hotel top-N on the index below instead of ranking every row of those hotels.
+--
+-- p_columns limits each row to the named columns (NULL = all columns).
+-- Rows come back grouped by hotel in p_hotel_ids order, newest first.
+
+CREATE INDEX IF NOT EXISTS idx_price_logs_hotel_recorded
+    ON price_logs (hotel_id, recorded_at DESC);
+
+CREATE OR REPLACE FUNCTION latest_price_logs_per_hotel(
+    p_hotel_ids uuid[],
+    p_per_hotel integer DEFAULT 10,
+    p_columns text[] DEFAULT NULL
+)
+RETURNS SETOF jsonb
+LANGUAGE sql STABLE AS $$
+    SELECT CASE
+               WHEN p_columns IS NULL THEN to_jsonb(pl)
+               ELSE (
+                   SELECT jsonb_object_agg(c, to_jsonb(pl) -> c)
+                     FROM unnest(p_columns) AS c
+               )
+           END
+      FROM unnest(p_hotel_ids) WITH ORDINALITY AS h(id, ord)
+     CROSS JOIN LATERAL (
+           SELECT *
+             FROM price_logs
+            WHERE hotel_id = h.id
+            ORDER BY recorded_at DESC
+            LIMIT GREATEST(p_per_hotel, 0)
+     ) pl
+     ORDER BY h.ord, pl.recorded_at DESC;
+$$;
+
+-- Also notify PostgREST to reload its schema cache
+NOTIFY pgrst, 'reload schema';
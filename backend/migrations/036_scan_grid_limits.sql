@@ -0,0 +1,21 @@
+-- Migration 036: Date grid cost accounting
+-- Run in Supabase SQL Editor
+-- Used by backend/services/monitor_service.py (trigger_monitor_logic).
+--
+-- A manual date grid scan (ScanOptions.grid_days) fetches one hotel x check-in
+-- date cell per hotel and date, and each cell can cost one SerpApi credit. The
+-- session now records that cell count next to hotels_count, and plans can cap
+-- the number of dates (NULL = the backend DEFAULT_TIERS value for the tier).
+
+ALTER TABLE scan_sessions
+ADD COLUMN IF NOT EXISTS cells_count INTEGER;
+
+COMMENT ON COLUMN scan_sessions.cells_count IS 'Hotel x check-in date cells scanned (hotels_count for a single-date scan)';
+
+ALTER TABLE membership_plans
+ADD COLUMN IF NOT EXISTS grid_days_limit INTEGER;
+
+COMMENT ON COLUMN membership_plans.grid_days_limit IS 'Max check-in dates per manual date grid scan; NULL = backend default for the tier';
+
+-- Also notify PostgREST to reload its schema cache
+NOTIFY pgrst, 'reload schema';
@@ -0,0 +1,54 @@
+-- Migration 037: Scan checkpoints as rows
+-- Run in Supabase SQL Editor
+-- Used by backend/services/scan_checkpoints.py (every scan with a session).
+--
+-- Migration 033 merged every fetched result into scan_sessions.hotel_checkpoints
+-- with `||`. Each fetch rewrote the whole TOASTed jsonb (O(n^2) bytes for a
+-- 900-cell date grid), all fetches of a session queued on its row lock, nothing
+-- ever cleared the blob, and every select("*") on scan_sessions (the session
+-- modal poll, the dashboard, the admin lists) shipped all raw results.
+--
+-- Checkpoints are now one row per (session, cell):
+--   scan_checkpoints(session_id, cell_key, fetched_at, result)
+-- cell_key is the hotel id, or "<hotel_id>@<check_in>" for date grid cells.
+-- The rows are deleted as soon as their session reaches a final status.
+
+CREATE TABLE IF NOT EXISTS scan_checkpoints (
+    session_id UUID NOT NULL REFERENCES scan_sessions(id) ON DELETE CASCADE,
+    cell_key TEXT NOT NULL,
+    fetched_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+    result JSONB NOT NULL,
+    PRIMARY KEY (session_id, cell_key)
+);
+
+COMMENT ON TABLE scan_checkpoints IS 'Fetched scraper results per (session, hotel/cell) used to resume a scan without paying for them again; cleared when the session finishes';
+
+-- Backend (service role) only: raw provider results never reach the client
+ALTER TABLE scan_checkpoints ENABLE ROW LEVEL SECURITY;
+
+-- A finished session will never be resumed, so its checkpoints are dropped
+CREATE OR REPLACE FUNCTION clear_scan_checkpoints()
+RETURNS trigger
+LANGUAGE plpgsql
+SECURITY DEFINER
+AS $$
+BEGIN
+    DELETE FROM scan_checkpoints WHERE session_id = NEW.id;
+    RETURN NULL;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS scan_sessions_clear_checkpoints ON scan_sessions;
+CREATE TRIGGER scan_sessions_clear_checkpoints
+AFTER UPDATE OF status ON scan_sessions
+FOR EACH ROW
+WHEN (NEW.status IN ('completed', 'partial', 'failed', 'cancelled')
+      AND NEW.status IS DISTINCT FROM OLD.status)
+EXECUTE FUNCTION clear_scan_checkpoints();
+
+-- Retire the 033 blob and its merge RPC
+DROP FUNCTION IF EXISTS checkpoint_scan_fetches(uuid, jsonb);
+ALTER TABLE scan_sessions DROP COLUMN IF EXISTS hotel_checkpoints;
+
+-- Also notify PostgREST to reload its schema cache
+NOTIFY pgrst, 'reload schema';
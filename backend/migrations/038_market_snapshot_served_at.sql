@@ -0,0 +1,20 @@
+-- Migration 038: Track when market intelligence snapshots are served
+-- Run in Supabase SQL Editor
+-- Used by backend/services/market_snapshot.py.
+--
+-- The post-scan refresh picked the user's views by computed_at, which the
+-- refresh itself rewrites, so a view opened once stayed "recent" forever and
+-- every scan recomputed up to six full analyses for users who never came back.
+-- A view is now stamped with last_served_at whenever it is served, and only
+-- views served within MARKET_SNAPSHOT_REFRESH_WINDOW_S are refreshed.
+
+ALTER TABLE market_intel_snapshots
+ADD COLUMN IF NOT EXISTS last_served_at TIMESTAMPTZ;
+
+COMMENT ON COLUMN market_intel_snapshots.last_served_at IS 'Last time this view was returned to the user; the post-scan refresh only rebuilds recently served views';
+
+CREATE INDEX IF NOT EXISTS idx_market_intel_snapshots_served
+    ON market_intel_snapshots (user_id, last_served_at DESC);
+
+-- Also notify PostgREST to reload its schema cache
+NOTIFY pgrst, 'reload schema';
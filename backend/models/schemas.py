@@ -278,6 +278,7 @@ class ScanSession(BaseModel):
     session_type: Optional[str] = "manual"
     status: str  # "queued", "processing", "completed", "failed", "partial_success"
     hotels_count: int = 0
+    cells_count: Optional[int] = None  # hotels x check-in dates (date grid)
     created_at: datetime
     completed_at: Optional[datetime] = None
     check_in_date: Optional[date] = None
@@ -315,6 +316,9 @@ class ScanOptions(BaseModel):
     check_out: Optional[date] = None
     adults: int = Field(default=2, ge=1, le=10)
     currency: Optional[str] = "TRY"
+    # Date grid mode: scan `grid_days` consecutive check-in dates from check_in
+    # (see backend/services/date_grid.py)
+    grid_days: Optional[int] = Field(default=None, ge=1, le=90)
 
 
 class MonitorResult(BaseModel):
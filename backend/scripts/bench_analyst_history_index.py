@@ -0,0 +1,166 @@
+"""
+Benchmark: Per-Hotel History Queries vs the Scan-Wide PriceHistoryIndex
+=======================================================================
+Runs `AnalystAgent.analyze_results` over N hotels against a fake Supabase client
+that counts round trips (see fake_supabase.py) and reports the number of READ
+queries against `price_logs` and `hotels`.
+
+- per-hotel: the history index is swapped for a shim that issues the exact
+             per-hotel queries the analyst used to run (drop safeguard, Smart
+             Continuity x2, shallow depth, room carry-forward, hotels row,
+             volatility) - i.e. O(~8 * N) round trips.
+- indexed:   the real `PriceHistoryIndex` - one paged price_logs query with
+             light columns, one hotels query, and one heavy-column hydration
+             per HYDRATE_CHUNK of the hotels' newest logs.
+
+Half of the hotels come back without a price (Continuity path), all results are
+shallow with empty room types and dynamic thresholds are on, so every lookup fires.
+
+USAGE:
+    export PYTHONPATH=$PYTHONPATH:.
+    python3 backend/scripts/bench_analyst_history_index.py --hotels 10 30 100 --latency-ms 5
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+from datetime import date, datetime, timedelta
+from unittest.mock import patch
+
+path = os.path.abspath(os.path.join(os.path.dirname(__file__), "../.."))
+if path not in sys.path:
+    sys.path.append(path)
+
+from backend.agents.analyst_agent import AnalystAgent  # noqa: E402
+from backend.scripts.fake_supabase import FakeSupabase  # noqa: E402
+from backend.services.global_pulse_cache import global_pulse_cache  # noqa: E402
+from backend.services.price_history_index import PriceHistoryIndex  # noqa: E402
+
+
+class PerHotelQueryIndex:
+    """Same interface as PriceHistoryIndex, but every lookup is a DB round trip."""
+
+    def __init__(self, db):
+        self.db = db
+
+    @classmethod
+    def load(cls, db, hotel_ids, **_):
+        return cls(db)
+
+    @classmethod
+    async def load_async(cls, db, hotel_ids, **_):
+        return cls(db)
+
+    async def hydrate(self, db, hotel_ids):
+        pass  # every lookup already selects "*"
+
+    async def hydrate_rows(self, db, rows):
+        pass
+
+    def add(self, rows):
+        pass
+
+    def _logs(self, hotel_id, limit, since=None, **eq):
+        q = self.db.table("price_logs").select("*").eq("hotel_id", hotel_id)
+        for col, val in eq.items():
+            q = q.eq(col, val)
+        if since is not None:
+            q = q.gt("recorded_at", since)
+        return q.order("recorded_at", desc=True).limit(limit).execute().data or []
+
+    def recent(self, hotel_id, limit, since=None):
+        return self._logs(hotel_id, limit, since)
+
+    def latest(self, hotel_id, since=None, check_in_date=None):
+        eq = {"check_in_date": check_in_date} if check_in_date else {}
+        rows = self._logs(hotel_id, 1, since, **eq)
+        return rows[0] if rows else None
+
+    def valid_prices(self, hotel_id, currency, limit=10):
+        res = (
+            self.db.table("price_logs")
+            .select("price")
+            .eq("hotel_id", hotel_id)
+            .eq("currency", currency)
+            .gt("price", 0)
+            .order("recorded_at", desc=True)
+            .limit(limit)
+            .execute()
+        )
+        return [r["price"] for r in res.data or []]
+
+    def hotel(self, hotel_id):
+        return None  # forces the analyst's per-hotel `.single()` read
+
+
+def build_fixture(hotel_count: int, logs_per_hotel: int = 12):
+    now = datetime.now()
+    check_in = str(date.today() + timedelta(days=1))
+    hotels, logs, results = [], [], []
+    for i in range(hotel_count):
+        hid = f"h{i:04d}"
+        hotels.append({"id": hid, "user_id": "user-1", "name": f"Hotel {i}", "sentiment_breakdown": []})
+        for j in range(logs_per_hotel):
+            logs.append(
+                {
+                    "id": f"{hid}-{j}",
+                    "hotel_id": hid,
+                    "price": 1000.0 + (j % 3) * 25,
+                    "currency": "TRY",
+                    "check_in_date": check_in,
+                    "vendor": "Booking.com",
+                    "parity_offers": [],
+                    "room_types": [{"name": "Standard", "price": 1000.0}] if j == 3 else [],
+                    "metadata": {"is_shallow": j < 2},
+                    "recorded_at": (now - timedelta(hours=6 * (j + 1))).isoformat(),
+                }
+            )
+        priced = i % 2 == 0
+        results.append(
+            {
+                "hotel_id": hid,
+                "hotel_name": f"Hotel {i}",
+                "status": "success" if priced else "not_found",
+                "check_in": check_in,
+                "price_data": {"price": 990.0, "currency": "TRY", "offers": [], "room_types": []}
+                if priced
+                else None,
+            }
+        )
+    return hotels, logs, results
+
+
+async def run(hotel_count: int, latency_ms: float, index_cls):
+    hotels, logs, results = build_fixture(hotel_count)
+    global_pulse_cache.clear()
+    db = FakeSupabase({"hotels": hotels, "price_logs": logs}, latency_ms=latency_ms, max_rows=1000)
+    agent = AnalystAgent(db)
+    settings = {"dynamic_threshold_enabled": True}
+    start = time.perf_counter()
+    with patch("backend.agents.analyst_agent.PriceHistoryIndex", index_cls):
+        summary = await agent.analyze_results("user-1", results, 2.0, settings=settings)
+    wall = time.perf_counter() - start
+    reads = db.queries_by_op["price_logs.select"] + db.queries_by_op["hotels.select"]
+    return reads, wall, summary["prices_updated"]
+
+
+async def bench(hotel_counts, latency_ms: float):
+    print(f"Simulated latency: {latency_ms}ms per round trip (read queries only)")
+    for n in hotel_counts:
+        legacy = await run(n, latency_ms, PerHotelQueryIndex)
+        indexed = await run(n, latency_ms, PriceHistoryIndex)
+        print(
+            f"  hotels={n:>4}  per-hotel reads={legacy[0]:>5} ({legacy[0] / n:.1f}/hotel) "
+            f"wall={legacy[1]:.3f}s  |  indexed reads={indexed[0]:>3} wall={indexed[1]:.3f}s"
+        )
+        assert legacy[2] == indexed[2], "Both paths must process every hotel"
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--hotels", type=int, nargs="+", default=[10, 30, 100])
+    parser.add_argument("--latency-ms", type=float, default=5.0)
+    args = parser.parse_args()
+    asyncio.run(bench(args.hotels, args.latency_ms))
@@ -0,0 +1,93 @@
+"""
+Load Test: Event-Loop Lag While a Scan Is Analysed
+==================================================
+Runs `AnalystAgent.analyze_results` over N hotels against a fake Supabase client
+whose round trips BLOCK for `--latency-ms` (like supabase-py's sync `.execute()`),
+while a heartbeat coroutine measures how late the event loop wakes it up.
+
+- inline:   DB_OFFLOAD_ENABLED=0 - every `.execute()` runs on the loop thread
+- offload:  the bounded thread pool behind `backend.utils.db.run_db`
+
+With inline calls the loop stalls for every query; with the pool the heartbeat
+lag stays flat (a few ms) no matter how long the scan's DB work takes.
+
+USAGE:
+    export PYTHONPATH=$PYTHONPATH:.
+    python3 backend/scripts/bench_event_loop_lag.py --hotels 40 --latency-ms 15
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+
+path = os.path.abspath(os.path.join(os.path.dirname(__file__), "../.."))
+if path not in sys.path:
+    sys.path.append(path)
+
+from backend.agents.analyst_agent import AnalystAgent  # noqa: E402
+from backend.scripts.bench_analyst_history_index import build_fixture  # noqa: E402
+from backend.scripts.fake_supabase import FakeSupabase  # noqa: E402
+from backend.services.global_pulse_cache import global_pulse_cache  # noqa: E402
+from backend.utils.db import get_db_pool_stats, shutdown_db_executor  # noqa: E402
+
+TICK_S = 0.005
+
+
+async def heartbeat(stop: asyncio.Event, lags: list):
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(TICK_S)
+        lags.append((time.perf_counter() - start - TICK_S) * 1000)
+
+
+async def run(hotel_count: int, latency_ms: float, offload: bool):
+    os.environ["DB_OFFLOAD_ENABLED"] = "1" if offload else "0"
+    hotels, logs, results = build_fixture(hotel_count)
+    for r in results:
+        r["hotel_name"] = r["hotel_id"]
+    global_pulse_cache.clear()
+    db = FakeSupabase(
+        {"hotels": hotels, "price_logs": logs, "scan_sessions": [{"id": "s1", "reasoning_trace": []}]},
+        latency_ms=latency_ms,
+    )
+    stop, lags = asyncio.Event(), []
+    beat = asyncio.create_task(heartbeat(stop, lags))
+    await asyncio.sleep(0)  # let the heartbeat arm its first timer
+    start = time.perf_counter()
+    await AnalystAgent(db).analyze_results("user-1", results, 2.0, session_id="s1")
+    wall = time.perf_counter() - start
+    stop.set()
+    await beat
+    lags.sort()
+    return {
+        "queries": db.query_count,
+        "wall_s": round(wall, 2),
+        "lag_p50_ms": round(statistics.median(lags), 1) if lags else 0.0,
+        "lag_p99_ms": round(lags[int(len(lags) * 0.99) - 1], 1) if lags else 0.0,
+        "lag_max_ms": round(lags[-1], 1) if lags else 0.0,
+        "ticks": len(lags),
+    }
+
+
+async def bench(hotel_count: int, latency_ms: float):
+    print(f"Hotels: {hotel_count} | Blocking DB latency: {latency_ms}ms | Heartbeat: {TICK_S * 1000:.0f}ms")
+    for label, offload in (("inline", False), ("offload", True)):
+        r = await run(hotel_count, latency_ms, offload)
+        print(
+            f"  {label:<8} queries={r['queries']:>4} wall={r['wall_s']:>5}s  "
+            f"loop lag p50={r['lag_p50_ms']:>6}ms p99={r['lag_p99_ms']:>6}ms "
+            f"max={r['lag_max_ms']:>6}ms  heartbeats={r['ticks']}"
+        )
+    print(f"  pool: {get_db_pool_stats()}")
+    shutdown_db_executor()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--hotels", type=int, default=40)
+    parser.add_argument("--latency-ms", type=float, default=15.0)
+    args = parser.parse_args()
+    asyncio.run(bench(args.hotels, args.latency_ms))
@@ -0,0 +1,113 @@
+"""
+Benchmark: Batched Global Pulse Lookup
+======================================
+Compares per-hotel `_check_global_cache` queries against the scan-wide batched
+lookup used by `ScraperAgent.run_scan`, using a fake Supabase client that
+counts round trips (see fake_supabase.py). Half of the hotels have a fresh
+pulse in `price_logs`; the other half are misses.
+
+USAGE:
+    export PYTHONPATH=$PYTHONPATH:.
+    python3 backend/scripts/bench_global_pulse_batch.py --hotels 50 --latency-ms 20
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+from datetime import date, datetime, timedelta
+from unittest.mock import patch
+
+path = os.path.abspath(os.path.join(os.path.dirname(__file__), "../.."))
+if path not in sys.path:
+    sys.path.append(path)
+
+from backend.agents.scraper_agent import ScraperAgent  # noqa: E402
+from backend.scripts.fake_supabase import FakeSupabase  # noqa: E402
+from backend.services.global_pulse_cache import global_pulse_cache  # noqa: E402
+
+
+class _StubProvider:
+    def get_provider_name(self):
+        return "Stub"
+
+    async def fetch_price(self, **kwargs):
+        return {"price": 100.0, "currency": kwargs.get("currency"), "status": "success"}
+
+
+def build_fixture(hotel_count: int):
+    check_in = date.today() + timedelta(days=1)
+    hotels, logs = [], []
+    for i in range(hotel_count):
+        hotels.append(
+            {"id": f"h{i}", "name": f"Hotel {i}", "location": "Izmir", "serp_api_id": f"tok{i}"}
+        )
+        if i % 2 == 0:
+            logs.append(
+                {
+                    "hotel_id": f"other-{i}",
+                    "serp_api_id": f"tok{i}",
+                    "check_in_date": str(check_in),
+                    "price": 100.0 + i,
+                    "currency": "TRY",
+                    "vendor": "Booking.com",
+                    "room_types": [],
+                    "recorded_at": (datetime.now() - timedelta(minutes=30)).isoformat(),
+                }
+            )
+    return hotels, logs, check_in
+
+
+async def bench(hotel_count: int, latency_ms: float):
+    hotels, logs, check_in = build_fixture(hotel_count)
+
+    # 1. Legacy: one price_logs query per hotel
+    global_pulse_cache.clear()
+    db = FakeSupabase({"price_logs": logs}, latency_ms=latency_ms)
+    agent = ScraperAgent(db)
+    start = time.perf_counter()
+    legacy_hits = 0
+    for h in hotels:
+        if await agent._check_global_cache(h["serp_api_id"], check_in):
+            legacy_hits += 1
+    legacy = (db.queries_by_table["price_logs"], time.perf_counter() - start)
+
+    # 2. Batched: one query for the whole scan, sliced in memory
+    global_pulse_cache.clear()
+    db = FakeSupabase({"price_logs": logs}, latency_ms=latency_ms)
+    agent = ScraperAgent(db)
+    start = time.perf_counter()
+    prefetched = await agent._prefetch_global_cache(
+        [(h["serp_api_id"], check_in) for h in hotels]
+    )
+    batched_hits = 0
+    for h in hotels:
+        if await agent._check_global_cache(h["serp_api_id"], check_in, prefetched=prefetched):
+            batched_hits += 1
+    batched = (db.queries_by_table["price_logs"], time.perf_counter() - start)
+
+    # 3. End-to-end run_scan (stub provider, no session)
+    global_pulse_cache.clear()
+    db = FakeSupabase({"price_logs": logs}, latency_ms=latency_ms)
+    agent = ScraperAgent(db)
+    with patch(
+        "backend.agents.scraper_agent.ProviderFactory.get_provider",
+        return_value=_StubProvider(),
+    ):
+        await agent.run_scan("user-1", hotels, None)
+    run_scan_queries = db.queries_by_table["price_logs"]
+
+    print(f"Hotels: {hotel_count} | Simulated latency: {latency_ms}ms")
+    print(f"  per-hotel  price_logs queries={legacy[0]:>4}  hits={legacy_hits:>3}  wall={legacy[1]:.3f}s")
+    print(f"  batched    price_logs queries={batched[0]:>4}  hits={batched_hits:>3}  wall={batched[1]:.3f}s")
+    print(f"  run_scan   price_logs queries={run_scan_queries:>4}")
+    assert legacy_hits == batched_hits, "Batched lookup must find the same pulses"
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--hotels", type=int, default=50)
+    parser.add_argument("--latency-ms", type=float, default=20.0)
+    args = parser.parse_args()
+    asyncio.run(bench(args.hotels, args.latency_ms))
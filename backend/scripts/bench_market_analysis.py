@@ -0,0 +1,134 @@
+"""
+Benchmark: Market Analysis over a dense calendar
+================================================
+Runs `perform_market_analysis` on a synthetic price_logs window: N hotels,
+D days of history, S scans per day. Every scan logs each hotel for that day's
+check-in date, and a share of scans fail (sold-out or unmatched rooms), which
+forces the Smart Continuity fallbacks. Every third hotel sells no suites, so for
+a Suite request none of its logs ever match: the worst case for the any-date
+fallback. The calendar window covers the whole history.
+
+Timings are printed for growing history lengths, so the growth rate is visible:
+a linear calendar build roughly doubles when the history doubles.
+
+USAGE:
+    export PYTHONPATH=$PYTHONPATH:.
+    python3 backend/scripts/bench_market_analysis.py --hotels 30 --days 90 --scans-per-day 4
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+
+path = os.path.abspath(os.path.join(os.path.dirname(__file__), "../.."))
+if path not in sys.path:
+    sys.path.append(path)
+
+from backend.services.analysis_service import (  # noqa: E402
+    perform_market_analysis,
+    price_log_sort_key,
+)
+
+ROOM_NAMES = ["Standard Room", "Deluxe Room", "Junior Suite", "Family Room"]
+
+
+def build_fixture(hotel_count: int, days: int, scans_per_day: int, fail_rate: float, seed: int = 11):
+    rng = random.Random(seed)
+    now = datetime.now(timezone.utc).replace(microsecond=0)
+    hotels = [
+        {
+            "id": f"h{i}",
+            "name": f"Hotel {i}",
+            "rating": 4.0 + (i % 10) / 10,
+            "review_count": 100 + i,
+            "is_target_hotel": i == 0,
+        }
+        for i in range(hotel_count)
+    ]
+    logs = []
+    for day in range(days):
+        scan_date = now - timedelta(days=day)
+        for scan in range(scans_per_day):
+            recorded = scan_date - timedelta(hours=scan * (24 // max(1, scans_per_day)))
+            for h in hotels:
+                failed = rng.random() < fail_rate
+                base = 2000 + int(h["id"][1:]) * 40
+                logs.append(
+                    {
+                        "id": f"{h['id']}-{day}-{scan}",
+                        "hotel_id": h["id"],
+                        "price": 0 if failed else base,
+                        "currency": "TRY",
+                        "vendor": "Booking.com",
+                        "check_in_date": scan_date.date().isoformat(),
+                        "recorded_at": recorded.isoformat(),
+                        "room_types": []
+                        if failed
+                        else [
+                            {"name": name, "price": base + k * 350 + rng.randint(-50, 50)}
+                            for k, name in enumerate(ROOM_NAMES)
+                            if not (name == "Junior Suite" and int(h["id"][1:]) % 3 == 1)
+                        ],
+                        "parity_offers": [
+                            {"vendor": "Expedia", "price": base + rng.randint(-80, 80)}
+                        ],
+                    }
+                )
+    logs.sort(key=price_log_sort_key, reverse=True)
+    prices_map = {}
+    for log in logs:
+        prices_map.setdefault(log["hotel_id"], []).append(log)
+    start = (now - timedelta(days=days - 1)).date().isoformat()
+    return hotels, prices_map, len(logs), start, now.date().isoformat()
+
+
+async def run(hotels, prices_map, start, end, room_type):
+    return await perform_market_analysis(
+        user_id="bench",
+        hotels=hotels,
+        hotel_prices_map=prices_map,
+        display_currency="TRY",
+        room_type=room_type,
+        start_date=start,
+        end_date=end,
+        allowed_room_names_map={},
+    )
+
+
+async def bench(hotel_count: int, days: int, scans_per_day: int, fail_rate: float, room_type: str, repeat: int):
+    print(
+        f"Hotels: {hotel_count} | scans/day: {scans_per_day} | failed scans: {fail_rate:.0%} | room_type={room_type!r}"
+    )
+    steps = sorted({max(1, days // 4), max(1, days // 2), days})
+    for d in steps:
+        hotels, prices_map, log_count, start, end = build_fixture(
+            hotel_count, d, scans_per_day, fail_rate
+        )
+        best = float("inf")
+        for _ in range(repeat):
+            t0 = time.perf_counter()
+            result = await run(hotels, prices_map, start, end, room_type)
+            best = min(best, time.perf_counter() - t0)
+        filled = sum(1 for day in result["daily_prices"] if day["price"] is not None)
+        print(
+            f"  {d:>3} days  logs={log_count:>6}  calendar days filled={filled:>3}  "
+            f"perform_market_analysis={best * 1000:8.1f} ms  ({best / log_count * 1e6:.1f} us/log)"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--hotels", type=int, default=30)
+    parser.add_argument("--days", type=int, default=90)
+    parser.add_argument("--scans-per-day", type=int, default=4)
+    parser.add_argument("--fail-rate", type=float, default=0.3)
+    parser.add_argument("--room-type", default="Standard")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+    asyncio.run(
+        bench(args.hotels, args.days, args.scans_per_day, args.fail_rate, args.room_type, args.repeat)
+    )
@@ -0,0 +1,151 @@
+"""
+Benchmark: Columnar Price Log Frame
+===================================
+Times the analytics passes that moved onto `PriceLogFrame` against the per-row
+loops they replaced (kept below as reference implementations), on one synthetic
+price_logs window. Every pair must return identical results.
+
+- calendar cells: `_summarize_checkin_frame` vs `_summarize_checkin_logs` per
+  (hotel, check-in date) group, as perform_market_analysis called it
+- volatility: `volatility_from_logs` vs the list-based percentage changes
+
+USAGE:
+    export PYTHONPATH=$PYTHONPATH:.
+    python3 backend/scripts/bench_price_frame.py --hotels 30 --days 90 --scans-per-day 4
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+
+path = os.path.abspath(os.path.join(os.path.dirname(__file__), "../.."))
+if path not in sys.path:
+    sys.path.append(path)
+
+from backend.services.analysis_service import (  # noqa: E402
+    RoomPriceMatcher,
+    _checkin_key,
+    _summarize_checkin_frame,
+    _summarize_checkin_logs,
+    price_log_sort_key,
+)
+from backend.services.predictive_service import predictive_service  # noqa: E402
+from backend.services.price_frame import PriceLogFrame  # noqa: E402
+
+ROOM_NAMES = ["Standard Room", "Deluxe Room", "Junior Suite", "Family Room"]
+
+
+def build_fixture(hotel_count: int, days: int, scans_per_day: int, seed: int = 5):
+    rng = random.Random(seed)
+    now = datetime.now(timezone.utc).replace(microsecond=0)
+    logs = []
+    for day in range(days):
+        for scan in range(scans_per_day):
+            recorded = now - timedelta(days=day, hours=scan * (24 // max(1, scans_per_day)))
+            for h in range(hotel_count):
+                failed = rng.random() < 0.3
+                base = 2000 + h * 40
+                logs.append(
+                    {
+                        "id": f"h{h}-{day}-{scan}",
+                        "hotel_id": f"h{h}",
+                        "price": 0 if failed else base + rng.choice([0, 25, 49.5]),
+                        "currency": "TRY",
+                        "vendor": "Booking.com",
+                        "search_rank": rng.choice([None, 1, 2, 5, 9]),
+                        "check_in_date": (now - timedelta(days=day - rng.randint(0, 2))).date().isoformat(),
+                        "recorded_at": recorded.isoformat(),
+                        "room_types": []
+                        if failed
+                        else [{"name": n, "price": base + k * 350} for k, n in enumerate(ROOM_NAMES)],
+                        "parity_offers": [
+                            {"vendor": v, "price": base + rng.randint(-120, 80)}
+                            for v in rng.sample(["Expedia", "Agoda", "Hotels.com"], rng.randint(0, 3))
+                        ],
+                    }
+                )
+    logs.sort(key=price_log_sort_key, reverse=True)
+    return logs
+
+
+def legacy_cells(prices_map, matcher, room_type):
+    cells = []
+    for prices in prices_map.values():
+        groups = {}
+        for p in prices:
+            d = _checkin_key(p)
+            if d:
+                groups.setdefault(d, []).append(p)
+        for logs in groups.values():
+            cells.append(_summarize_checkin_logs(logs, matcher.price, room_type))
+    return cells
+
+
+def legacy_volatility(logs):
+    prices = [row["price"] for row in logs if row["price"] > 0]
+    if len(prices) < 5:
+        return 0.0
+    pct = [abs((prices[i] - prices[i + 1]) / prices[i + 1]) * 100 for i in range(len(prices) - 1)]
+    return round(float(np.std(pct)), 2)
+
+
+def best_of(repeat, fn, *args):
+    best, result = float("inf"), None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        result = fn(*args)
+        best = min(best, time.perf_counter() - t0)
+    return best, result
+
+
+def report(name, legacy, columnar):
+    (t_old, r_old), (t_new, r_new) = legacy, columnar
+    assert r_old == r_new, f"{name}: columnar result differs from the per-row loop"
+    print(f"  {name:<18} per-row {t_old * 1000:8.1f} ms   frame {t_new * 1000:8.1f} ms   x{t_old / t_new:.1f}")
+
+
+def bench(hotel_count: int, days: int, scans_per_day: int, room_type: str, repeat: int):
+    logs = build_fixture(hotel_count, days, scans_per_day)
+    print(f"Logs: {len(logs)} | hotels: {hotel_count} | room_type={room_type!r}")
+
+    prices_map = {}
+    for log in logs:
+        prices_map.setdefault(log["hotel_id"], []).append(log)
+    matcher = RoomPriceMatcher(room_type, {}, memoize=True)
+    for log in logs:
+        matcher.price(log)  # both sides read memoized matches
+
+    def columnar_cells():
+        frame = PriceLogFrame.from_hotel_map(prices_map, price=matcher.price)
+        return [cell[3:] for cell in _summarize_checkin_frame(frame, room_type)]
+
+    report(
+        "calendar cells",
+        best_of(repeat, lambda: sorted(map(repr, legacy_cells(prices_map, matcher, room_type)))),
+        best_of(repeat, lambda: sorted(map(repr, columnar_cells()))),
+    )
+
+    def each_hotel(fn):
+        return [fn(p) for p in prices_map.values()]
+
+    report(
+        "volatility",
+        best_of(repeat, each_hotel, legacy_volatility),
+        best_of(repeat, each_hotel, predictive_service.volatility_from_logs),
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--hotels", type=int, default=30)
+    parser.add_argument("--days", type=int, default=90)
+    parser.add_argument("--scans-per-day", type=int, default=4)
+    parser.add_argument("--room-type", default="Standard")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+    bench(args.hotels, args.days, args.scans_per_day, args.room_type, args.repeat)
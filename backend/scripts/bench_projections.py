@@ -0,0 +1,190 @@
+"""
+Benchmark: Column Projections
+=============================
+Measures what the dashboard and market analysis reads cost on the wire with
+`select("*")` (QUERY_PROJECTIONS_ENABLED off) versus the named projections in
+backend/utils/projections.py, on hotels rows that carry their two 768-dim
+vectors and reviews, and price_logs rows with metadata, rooms and offers.
+
+Each query result is serialized to JSON (the PostgREST response body) and then
+decoded again, so the numbers are response bytes and client-side JSON decode
+time per endpoint call. Database latency is not simulated.
+
+USAGE:
+    export PYTHONPATH=$PYTHONPATH:.
+    python3 backend/scripts/bench_projections.py --hotels 12 --days 30 --scans-per-day 4
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import time
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+
+path = os.path.abspath(os.path.join(os.path.dirname(__file__), "../.."))
+if path not in sys.path:
+    sys.path.append(path)
+
+from backend.scripts.fake_supabase import FakeSupabase  # noqa: E402
+from backend.services.analysis_service import get_market_intelligence_data  # noqa: E402
+from backend.services.dashboard_service import get_dashboard_logic  # noqa: E402
+from backend.services.market_engine import market_engines  # noqa: E402
+from backend.utils import projections  # noqa: E402
+
+ROOM_NAMES = ["Standard Room", "Deluxe Room", "Junior Suite", "Family Room"]
+VENDORS = ["Booking.com", "Expedia", "Agoda", "Hotels.com", "Trip.com"]
+
+
+class MeteredSupabase(FakeSupabase):
+    """Counts JSON response bytes and decode time per table."""
+
+    def __init__(self, tables):
+        super().__init__(tables)
+        self.bytes_by_table: Counter = Counter()
+        self.decode_s = 0.0
+
+    def _meter(self, name, builder):
+        execute = builder.execute
+
+        def metered():
+            res = execute()
+            body = json.dumps(res.data, default=str)
+            t0 = time.perf_counter()
+            json.loads(body)
+            self.decode_s += time.perf_counter() - t0
+            self.bytes_by_table[name] += len(body.encode())
+            return res
+
+        builder.execute = metered
+        return builder
+
+    def table(self, name):
+        query = super().table(name)
+        select = query.select
+
+        def metered_select(*args, **kwargs):
+            return self._meter(name, select(*args, **kwargs))
+
+        query.select = metered_select
+        return query
+
+    def rpc(self, name, params=None):
+        return self._meter(f"rpc:{name}", super().rpc(name, params))
+
+
+def build_fixture(hotel_count: int, days: int, scans_per_day: int, seed: int = 11):
+    rng = random.Random(seed)
+    now = datetime.now(timezone.utc).replace(microsecond=0)
+    hotels = []
+    for h in range(hotel_count):
+        hotels.append(
+            {
+                "id": f"00000000-0000-0000-0000-{h:012d}",
+                "user_id": "u",
+                "name": f"Hotel {h}",
+                "is_target_hotel": h == 0,
+                "location": "Balikesir",
+                "serp_api_id": f"serp{h}",
+                "property_token": f"tok{h}",
+                "rating": round(rng.uniform(3.8, 4.9), 1),
+                "review_count": rng.randint(50, 2000),
+                "stars": rng.choice([3, 4, 5]),
+                "current_price": 2000 + h * 40,
+                "preferred_currency": "TRY",
+                "image_url": f"https://img.example/{h}.jpg",
+                "images": [{"thumbnail": f"https://img.example/{h}/{i}.jpg"} for i in range(8)],
+                "amenities": ["Free Wi-Fi", "Pool", "Spa", "Parking", "Breakfast"],
+                "sentiment_breakdown": [{"name": n, "total_score": rng.randint(1, 5)} for n in ("Room", "Service", "Location")],
+                "guest_mentions": [{"keyword": "clean", "count": rng.randint(1, 40)}],
+                "pricing_dna_text": "Mid-scale resort with seasonal demand.",
+                "reviews": [
+                    {"text": "Lovely stay, the staff were helpful and the room was spotless. " * 3, "rating": 5}
+                    for _ in range(20)
+                ],
+                "sentiment_embedding": [rng.uniform(-1, 1) for _ in range(768)],
+                "pricing_dna": [rng.uniform(-1, 1) for _ in range(768)],
+                "deleted_at": None,
+                "updated_at": now.isoformat(),
+            }
+        )
+
+    logs = []
+    for day in range(days):
+        for scan in range(scans_per_day):
+            recorded = now - timedelta(days=day, hours=scan * (24 // max(1, scans_per_day)))
+            for h, hotel in enumerate(hotels):
+                base = 2000 + h * 40
+                logs.append(
+                    {
+                        "id": f"{hotel['id'][:-4]}{day:02d}{scan:02d}-{h}",
+                        "hotel_id": hotel["id"],
+                        "serp_api_id": hotel["serp_api_id"],
+                        "price": base + rng.choice([0, 25, 49.5]),
+                        "currency": "TRY",
+                        "vendor": "Booking.com",
+                        "source": "serpapi",
+                        "search_rank": rng.randint(1, 20),
+                        "is_estimated": False,
+                        "session_id": None,
+                        "check_in_date": (now + timedelta(days=rng.randint(0, 6))).date().isoformat(),
+                        "recorded_at": recorded.isoformat(),
+                        "room_types": [{"name": n, "price": base + k * 350, "currency": "TRY"} for k, n in enumerate(ROOM_NAMES)],
+                        "parity_offers": [{"vendor": v, "price": base + rng.randint(-120, 80)} for v in VENDORS],
+                        "offers": [{"vendor": v, "price": base + rng.randint(-120, 80), "link": f"https://x.example/{v}"} for v in VENDORS],
+                        "metadata": {"raw_serp": {"prices": [{"source": v, "rate": base} for v in VENDORS] * 4}},
+                    }
+                )
+    profiles = [{"id": "u", "next_scan_at": (now + timedelta(hours=6)).isoformat()}]
+    return {"hotels": hotels, "price_logs": logs, "query_logs": [], "profiles": profiles}
+
+
+async def measure(fixture, projected: bool):
+    projections.QUERY_PROJECTIONS_ENABLED = projected
+    projections._select_all.clear()
+    out = {}
+    for name in ("dashboard", "analysis"):
+        market_engines.clear()
+        db = MeteredSupabase(fixture)
+        t0 = time.perf_counter()
+        if name == "dashboard":
+            result = await get_dashboard_logic("u", "u", "bench@example.com", db)
+            assert not result.get("error"), result.get("error")
+        else:
+            await get_market_intelligence_data(db, "u")
+        out[name] = (sum(db.bytes_by_table.values()), db.decode_s, time.perf_counter() - t0, db.bytes_by_table)
+    return out
+
+
+async def bench(hotel_count: int, days: int, scans_per_day: int):
+    fixture = build_fixture(hotel_count, days, scans_per_day)
+    print(f"Hotels: {hotel_count} | price_logs: {len(fixture['price_logs'])}")
+
+    before = await measure(fixture, projected=False)
+    after = await measure(fixture, projected=True)
+    projections.QUERY_PROJECTIONS_ENABLED = True
+
+    for name in ("dashboard", "analysis"):
+        (b_bytes, b_dec, b_total, b_tables), (a_bytes, a_dec, a_total, a_tables) = before[name], after[name]
+        print(f"\n  {name}")
+        print(f"    response bytes  select * {b_bytes / 1024:9.1f} KiB   projected {a_bytes / 1024:9.1f} KiB   -{100 * (1 - a_bytes / b_bytes):.0f}%")
+        print(f"    JSON decode     select * {b_dec * 1000:9.2f} ms    projected {a_dec * 1000:9.2f} ms    x{b_dec / max(a_dec, 1e-9):.1f}")
+        print(f"    call total      select * {b_total * 1000:9.1f} ms    projected {a_total * 1000:9.1f} ms")
+        for table in sorted(t for t in set(b_tables) | set(a_tables) if b_tables[t] or a_tables[t]):
+            print(f"      {table:<36} {b_tables[table] / 1024:9.1f} KiB -> {a_tables[table] / 1024:9.1f} KiB")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--hotels", type=int, default=12)
+    parser.add_argument("--days", type=int, default=30)
+    parser.add_argument("--scans-per-day", type=int, default=4)
+    args = parser.parse_args()
+    asyncio.run(bench(args.hotels, args.days, args.scans_per_day))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""
+Benchmark: Compiled Room Price Matcher
+======================================
+Matches every log of a synthetic price_logs window against a room type, once
+with a `get_price_for_room` call per log (a fresh matcher per call, so the
+allowed-name set is lower-cased again for every log), once with a single
+`RoomPriceMatcher`, and once memoized over the 4 reads per log that
+`perform_market_analysis` makes. All must return identical (price, name, score)
+tuples; tests/test_room_price_matcher.py pins them to a golden file.
+
+USAGE:
+    export PYTHONPATH=$PYTHONPATH:.
+    python3 backend/scripts/bench_room_matcher.py --logs 20000 --room-type Deluxe
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+path = os.path.abspath(os.path.join(os.path.dirname(__file__), "../.."))
+if path not in sys.path:
+    sys.path.append(path)
+
+from backend.services.analysis_service import (  # noqa: E402
+    RoomPriceMatcher,
+    get_price_for_room,
+)
+
+ROOM_NAMES = [
+    "Standard Room", "Standart Oda", "Deluxe Room", "Superior Sea View",
+    "Junior Suite", "King Suite", "Family Room", "Economy Double", "Promo Rate",
+]
+
+
+def build_fixture(log_count: int, hotel_count: int = 30, seed: int = 7):
+    rng = random.Random(seed)
+    logs = []
+    for i in range(log_count):
+        logs.append(
+            {
+                "hotel_id": f"h{i % hotel_count}",
+                "price": rng.choice([None, 2100.0]),
+                "room_types": [
+                    {"name": name, "price": rng.choice([1800, "2.450,00", 3100.5, None])}
+                    for name in rng.sample(ROOM_NAMES, rng.randint(2, 6))
+                ],
+            }
+        )
+    allowed = {
+        f"h{h}": set(rng.sample(ROOM_NAMES, 3)) for h in range(hotel_count)
+    }
+    return logs, allowed
+
+
+def bench(log_count: int, room_type: str, repeat: int):
+    logs, allowed = build_fixture(log_count)
+
+    start = time.perf_counter()
+    for _ in range(repeat):
+        legacy = [get_price_for_room(log, room_type, allowed) for log in logs]
+    per_call = (time.perf_counter() - start) / repeat
+
+    start = time.perf_counter()
+    for _ in range(repeat):
+        matcher = RoomPriceMatcher(room_type, allowed)
+        compiled = [matcher.match(log) for log in logs]
+    once = (time.perf_counter() - start) / repeat
+
+    # perform_market_analysis reads most logs 3-4 times (grouping, fallbacks, seeds)
+    start = time.perf_counter()
+    for _ in range(repeat):
+        matcher = RoomPriceMatcher(room_type, allowed, memoize=True)
+        for _pass in range(4):
+            memoized = [matcher.match(log) for log in logs]
+    memo = (time.perf_counter() - start) / repeat
+
+    assert legacy == compiled == memoized, "Compiled matcher must return identical results"
+    matched = sum(1 for r in compiled if r[0] is not None)
+    print(f"Logs: {log_count} | room_type={room_type!r} | matched={matched}")
+    print(f"  get_price_for_room per log   {per_call * 1000:8.1f} ms  ({per_call / log_count * 1e6:.2f} us/log)")
+    print(f"  RoomPriceMatcher (compiled)  {once * 1000:8.1f} ms  ({once / log_count * 1e6:.2f} us/log)")
+    print(f"  memoized, 4 reads per log    {memo * 1000:8.1f} ms  (legacy equivalent ~{per_call * 4000:.1f} ms)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--logs", type=int, default=20000)
+    parser.add_argument("--room-type", default="Deluxe")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+    bench(args.logs, args.room_type, args.repeat)
@@ -0,0 +1,133 @@
+"""
+Benchmark: Pooled vs Per-Request HTTP Clients for SerpApi Traffic
+================================================================
+Spins up a local stub server that mimics SerpApi and counts how many TCP
+connections each strategy opens. Every new connection pays an artificial
+handshake delay (--handshake-ms) to stand in for the TCP + TLS round trips
+we pay against serpapi.com in production.
+
+USAGE:
+    export PYTHONPATH=$PYTHONPATH:.
+    python3 backend/scripts/bench_serpapi_pool.py --hotels 200 --concurrency 10
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+
+path = os.path.abspath(os.path.join(os.path.dirname(__file__), "../.."))
+if path not in sys.path:
+    sys.path.append(path)
+
+import httpx  # noqa: E402
+
+from backend.utils.http_client import build_http_client  # noqa: E402
+
+STUB_BODY = json.dumps(
+    {"properties": [{"name": "Stub Hotel", "rate_per_night": {"extracted_lowest": 100}}]}
+).encode()
+
+
+class StubServer:
+    """Minimal HTTP/1.1 keep-alive server that records connection count."""
+
+    def __init__(self, handshake_ms: float):
+        self.handshake_s = handshake_ms / 1000.0
+        self.connections = 0
+        self.requests = 0
+        self._server = None
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.connections += 1
+        await asyncio.sleep(self.handshake_s)
+        try:
+            while True:
+                head = await reader.readuntil(b"\r\n\r\n")
+                if not head:
+                    break
+                self.requests += 1
+                writer.write(
+                    b"HTTP/1.1 200 OK\r\n"
+                    b"Content-Type: application/json\r\n"
+                    b"Connection: keep-alive\r\n"
+                    + f"Content-Length: {len(STUB_BODY)}\r\n\r\n".encode()
+                    + STUB_BODY
+                )
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionResetError):
+            pass
+        finally:
+            writer.close()
+
+    async def start(self) -> str:
+        self._server = await asyncio.start_server(self._handle, "127.0.0.1", 0)
+        port = self._server.sockets[0].getsockname()[1]
+        return f"http://127.0.0.1:{port}/search"
+
+    async def stop(self):
+        self._server.close()
+        await self._server.wait_closed()
+
+
+async def run_per_request(url: str, hotels: int, concurrency: int):
+    """Legacy behaviour: a fresh AsyncClient for every hotel."""
+    sem = asyncio.Semaphore(concurrency)
+
+    async def one(i: int):
+        async with sem:
+            async with httpx.AsyncClient(timeout=30.0) as client:
+                await client.get(url, params={"q": f"hotel {i}"})
+
+    await asyncio.gather(*(one(i) for i in range(hotels)))
+
+
+async def run_pooled(url: str, hotels: int, concurrency: int):
+    """New behaviour: one shared keep-alive client for the whole scan."""
+    sem = asyncio.Semaphore(concurrency)
+    client = build_http_client()
+
+    async def one(i: int):
+        async with sem:
+            await client.get(url, params={"q": f"hotel {i}"})
+
+    try:
+        await asyncio.gather(*(one(i) for i in range(hotels)))
+    finally:
+        await client.aclose()
+
+
+async def bench(hotels: int, concurrency: int, handshake_ms: float):
+    results = {}
+    for label, runner in [("per_request", run_per_request), ("pooled", run_pooled)]:
+        server = StubServer(handshake_ms)
+        url = await server.start()
+        start = time.perf_counter()
+        await runner(url, hotels, concurrency)
+        elapsed = time.perf_counter() - start
+        await server.stop()
+        results[label] = {
+            "wall_s": round(elapsed, 3),
+            "connections": server.connections,
+            "requests": server.requests,
+        }
+
+    print(f"Hotels: {hotels} | Concurrency: {concurrency} | Handshake: {handshake_ms}ms")
+    for label, r in results.items():
+        print(
+            f"  {label:<12} wall={r['wall_s']:>7}s  connections={r['connections']:>4}  requests={r['requests']}"
+        )
+    saved = results["per_request"]["connections"] - results["pooled"]["connections"]
+    print(f"  Handshakes saved: {saved}")
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--hotels", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--handshake-ms", type=float, default=40.0)
+    args = parser.parse_args()
+    asyncio.run(bench(args.hotels, args.concurrency, args.handshake_ms))
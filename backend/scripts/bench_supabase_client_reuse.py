@@ -0,0 +1,114 @@
+"""
+Microbenchmark: Per-Request vs Shared Supabase Client
+=====================================================
+Calls the real `GET /api/hotels/{user_id}` route through FastAPI's TestClient
+against a local stub PostgREST server (auth dependency overridden), comparing:
+
+- per-request: `get_supabase` builds a fresh client every call (legacy behaviour)
+- shared:      the process-wide cached client from `backend.utils.db`
+
+Every new TCP connection to the stub pays --handshake-ms to stand in for the
+TCP + TLS setup we pay against Supabase in production.
+
+USAGE:
+    export PYTHONPATH=$PYTHONPATH:.
+    python3 backend/scripts/bench_supabase_client_reuse.py --requests 200 --handshake-ms 20
+"""
+
+import argparse
+import os
+import socket
+import statistics
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+path = os.path.abspath(os.path.join(os.path.dirname(__file__), "../.."))
+if path not in sys.path:
+    sys.path.append(path)
+
+from fastapi import FastAPI  # noqa: E402
+from fastapi.testclient import TestClient  # noqa: E402
+from supabase import create_client  # noqa: E402
+
+from backend.api import hotel_routes  # noqa: E402
+from backend.services.auth_service import get_current_active_user  # noqa: E402
+from backend.utils import db as db_utils  # noqa: E402
+
+USER_ID = "00000000-0000-0000-0000-000000000001"
+STUB_KEY = "stub.service.key"
+
+
+class _StubPostgrest(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    handshake_s = 0.0
+    connections = 0
+
+    def setup(self):
+        type(self).connections += 1
+        time.sleep(self.handshake_s)
+        # Avoid Nagle/delayed-ACK stalls between the header and body writes
+        self.request.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        super().setup()
+
+    def do_GET(self):
+        body = b"[]"
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def run(label, client: TestClient, requests: int):
+    _StubPostgrest.connections = 0
+    timings = []
+    for _ in range(requests):
+        start = time.perf_counter()
+        res = client.get(f"/api/hotels/{USER_ID}")
+        timings.append((time.perf_counter() - start) * 1000)
+        assert res.status_code == 200, res.text
+    print(
+        f"  {label:<12} mean={statistics.mean(timings):7.2f}ms  "
+        f"p50={statistics.median(timings):7.2f}ms  "
+        f"connections={_StubPostgrest.connections}"
+    )
+
+
+def bench(requests: int, handshake_ms: float):
+    _StubPostgrest.handshake_s = handshake_ms / 1000.0
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _StubPostgrest)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_address[1]}"
+    os.environ["NEXT_PUBLIC_SUPABASE_URL"] = url
+    os.environ["SUPABASE_SERVICE_ROLE_KEY"] = STUB_KEY
+
+    app = FastAPI()
+    app.include_router(hotel_routes.router)
+    app.dependency_overrides[get_current_active_user] = lambda: {"id": USER_ID}
+    client = TestClient(app)
+
+    print(f"Requests: {requests} | Simulated handshake: {handshake_ms}ms")
+    app.dependency_overrides[db_utils.get_supabase] = lambda: create_client(url, STUB_KEY)
+    run("per-request", client, requests)
+
+    del app.dependency_overrides[db_utils.get_supabase]
+    db_utils.close_supabase_clients()
+    db_utils.init_supabase()
+    run("shared", client, requests)
+
+    db_utils.close_supabase_clients()
+    db_utils.shutdown_db_executor()
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--handshake-ms", type=float, default=20.0)
+    args = parser.parse_args()
+    bench(args.requests, args.handshake_ms)
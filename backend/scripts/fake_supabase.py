@@ -0,0 +1,238 @@
+"""
+Fake Supabase Client (Benchmarks)
+=================================
+In-memory stand-in for the supabase-py query builder that counts round trips.
+Only the subset of the PostgREST builder the agents actually use is supported.
+
+Each `.execute()` (and each `.rpc(...).execute()`) counts as one round trip,
+optionally sleeping `latency_ms` to mimic network cost.
+
+Read-only RPCs that the services call on every request (see DEFAULT_RPC_HANDLERS)
+are emulated over the in-memory tables; others need an `rpc_handlers` entry.
+
+USAGE:
+    db = FakeSupabase({"price_logs": rows}, latency_ms=5)
+    ...
+    print(db.query_count, db.queries_by_table)
+"""
+
+import copy
+import time
+import uuid
+from collections import Counter
+from typing import Any, Callable, Dict, List, Optional
+
+
+class _Result:
+    def __init__(self, data, count=None):
+        self.data = data
+        self.count = count
+
+
+class _Query:
+    def __init__(self, client: "FakeSupabase", table: str):
+        self._client = client
+        self._table = table
+        self._op = "select"
+        self._payload: Any = None
+        self._filters: List[Callable[[Dict[str, Any]], bool]] = []
+        self._order: List[tuple] = []
+        self._limit: Optional[int] = None
+        self._offset = 0
+        self._single = False
+        self._columns: Optional[List[str]] = None
+        self._on_conflict: Optional[str] = None
+
+    # --- Verbs ---
+    def select(self, columns: str = "*", count: Optional[str] = None):
+        self._op = "select"
+        cols = [c.strip() for c in columns.split(",") if c.strip()]
+        self._columns = None if cols == ["*"] else cols
+        return self
+
+    def insert(self, payload):
+        self._op, self._payload = "insert", payload
+        return self
+
+    def upsert(self, payload, on_conflict: Optional[str] = None, **_):
+        self._op, self._payload, self._on_conflict = "upsert", payload, on_conflict
+        return self
+
+    def update(self, payload):
+        self._op, self._payload = "update", payload
+        return self
+
+    def delete(self):
+        self._op = "delete"
+        return self
+
+    # --- Filters ---
+    def eq(self, col, val):
+        self._filters.append(lambda r: str(r.get(col)) == str(val))
+        return self
+
+    def neq(self, col, val):
+        self._filters.append(lambda r: str(r.get(col)) != str(val))
+        return self
+
+    def in_(self, col, vals):
+        allowed = {str(v) for v in vals}
+        self._filters.append(lambda r: str(r.get(col)) in allowed)
+        return self
+
+    def gt(self, col, val):
+        self._filters.append(lambda r: r.get(col) is not None and str(r.get(col)) > str(val))
+        return self
+
+    def gte(self, col, val):
+        self._filters.append(lambda r: r.get(col) is not None and str(r.get(col)) >= str(val))
+        return self
+
+    def lt(self, col, val):
+        self._filters.append(lambda r: r.get(col) is not None and str(r.get(col)) < str(val))
+        return self
+
+    def lte(self, col, val):
+        self._filters.append(lambda r: r.get(col) is not None and str(r.get(col)) <= str(val))
+        return self
+
+    def is_(self, col, val):
+        if val == "null":
+            self._filters.append(lambda r: r.get(col) is None)
+        return self
+
+    def order(self, col, desc: bool = False):
+        self._order.append((col, desc))
+        return self
+
+    def limit(self, n: int):
+        self._limit = n
+        return self
+
+    def range(self, start: int, end: int):
+        self._offset, self._limit = start, end - start + 1
+        return self
+
+    def single(self):
+        self._single = True
+        return self
+
+    # --- Execution ---
+    def _matches(self, row):
+        return all(f(row) for f in self._filters)
+
+    def execute(self):
+        self._client._record(self._table, self._op)
+        rows = self._client.tables.setdefault(self._table, [])
+
+        if self._op in ("insert", "upsert"):
+            payload = self._payload if isinstance(self._payload, list) else [self._payload]
+            out = []
+            for item in payload:
+                row = copy.deepcopy(item)
+                row.setdefault("id", str(uuid.uuid4()))
+                if self._op == "upsert":
+                    keys = (self._on_conflict or "id").split(",")
+                    existing = next(
+                        (r for r in rows if all(str(r.get(k)) == str(row.get(k)) for k in keys)),
+                        None,
+                    )
+                    if existing is not None:
+                        existing.update(row)
+                        out.append(copy.deepcopy(existing))
+                        continue
+                rows.append(row)
+                out.append(copy.deepcopy(row))
+            return _Result(out)
+
+        matched = [r for r in rows if self._matches(r)]
+
+        if self._op == "update":
+            for r in matched:
+                r.update(copy.deepcopy(self._payload))
+            return _Result(copy.deepcopy(matched))
+
+        if self._op == "delete":
+            self._client.tables[self._table] = [r for r in rows if not self._matches(r)]
+            return _Result(copy.deepcopy(matched))
+
+        for col, desc in reversed(self._order):
+            matched.sort(key=lambda r: (r.get(col) is None, str(r.get(col))), reverse=desc)
+        # Like PostgREST, count="exact" reports the total before limit/range
+        total = len(matched)
+        if self._limit is not None or self._offset:
+            end = None if self._limit is None else self._offset + self._limit
+            matched = matched[self._offset : end]
+        if self._client.max_rows is not None:
+            matched = matched[: self._client.max_rows]
+        if self._columns:
+            matched = [{c: r.get(c) for c in self._columns} for r in matched]
+        data = copy.deepcopy(matched)
+        if self._single:
+            data = data[0] if data else None
+        return _Result(data, count=total)
+
+
+class _Rpc:
+    def __init__(self, client: "FakeSupabase", name: str, params: Dict[str, Any]):
+        self._client, self._name, self._params = client, name, params
+
+    def execute(self):
+        self._client._record(f"rpc:{self._name}", "rpc")
+        handler = self._client.rpc_handlers.get(self._name)
+        return _Result(handler(self._client, self._params) if handler else [])
+
+
+def latest_price_logs_per_hotel(client: "FakeSupabase", params: Dict[str, Any]):
+    """Migration 035: newest p_per_hotel price_logs per hotel, optionally projected."""
+    ids = [str(h) for h in params.get("p_hotel_ids") or []]
+    per_hotel = params.get("p_per_hotel", 10)
+    columns = params.get("p_columns")
+    rows = client.tables.get("price_logs", [])
+    out = []
+    for hid in ids:
+        logs = [r for r in rows if str(r.get("hotel_id")) == hid]
+        logs.sort(key=lambda r: (r.get("recorded_at") is None, str(r.get("recorded_at"))), reverse=True)
+        for r in logs[: max(per_hotel, 0)]:
+            out.append({c: r.get(c) for c in columns} if columns else r)
+    return copy.deepcopy(out)
+
+
+DEFAULT_RPC_HANDLERS: Dict[str, Callable] = {
+    "latest_price_logs_per_hotel": latest_price_logs_per_hotel,
+}
+
+
+class FakeSupabase:
+    def __init__(
+        self,
+        tables: Optional[Dict[str, List[Dict[str, Any]]]] = None,
+        latency_ms: float = 0.0,
+        rpc_handlers: Optional[Dict[str, Callable]] = None,
+        max_rows: Optional[int] = None,
+    ):
+        self.tables = {k: copy.deepcopy(v) for k, v in (tables or {}).items()}
+        self.latency_s = latency_ms / 1000.0
+        self.rpc_handlers = {**DEFAULT_RPC_HANDLERS, **(rpc_handlers or {})}
+        self.max_rows = max_rows  # PostgREST `db-max-rows` cap (None = unlimited)
+        self.query_count = 0
+        self.queries_by_table: Counter = Counter()
+        self.queries_by_op: Counter = Counter()
+
+    def _record(self, table: str, op: str):
+        self.query_count += 1
+        self.queries_by_table[table] += 1
+        self.queries_by_op[f"{table}.{op}"] += 1
+        if self.latency_s:
+            time.sleep(self.latency_s)
+
+    def table(self, name: str) -> _Query:
+        return _Query(self, name)
+
+    def rpc(self, name: str, params: Optional[Dict[str, Any]] = None) -> _Rpc:
+        return _Rpc(self, name, params or {})
+
+    def reset_counts(self):
+        self.query_count = 0
+        self.queries_by_table.clear()
+        self.queries_by_op.clear()
@@ -14,6 +14,10 @@ if path not in sys.path:
 from backend.services.monitor_service import run_scheduler_check_logic
 
 if __name__ == "__main__":
+    # --dry-run: report projected wall-clock time and credit use, write nothing
+    dry_run = "--dry-run" in sys.argv
     print("Starting manual scheduler trigger...")
-    asyncio.run(run_scheduler_check_logic())
+    plan = asyncio.run(run_scheduler_check_logic(dry_run=dry_run))
+    if dry_run:
+        print(plan)
     print("Manual scheduler trigger complete.")
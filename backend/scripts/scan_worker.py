@@ -0,0 +1,70 @@
+"""
+Scan Queue Worker
+=================
+Long-running worker for the durable scan queue (backend/services/scan_queue.py).
+Claims queued scans from `scan_sessions` with SKIP LOCKED, so any number of
+these processes (and the API's BackgroundTasks kicks) can share one queue.
+
+USAGE:
+    export PYTHONPATH=$PYTHONPATH:.
+    python3 backend/scripts/scan_worker.py --concurrency 2
+    python3 backend/scripts/scan_worker.py --drain      # run what is queued, then exit
+"""
+
+import argparse
+import asyncio
+import os
+import signal
+import sys
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+path = os.path.abspath(os.path.join(os.path.dirname(__file__), "../.."))
+if path not in sys.path:
+    sys.path.append(path)
+
+from backend.services.scan_queue import ScanQueueWorker  # noqa: E402
+from backend.utils.db import (  # noqa: E402
+    close_supabase_clients,
+    get_service_client,
+    shutdown_db_executor,
+)
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--concurrency", type=int, default=1, help="Worker loops in this process")
+    parser.add_argument("--drain", action="store_true", help="Exit once the queue is empty")
+    args = parser.parse_args()
+
+    db = get_service_client()
+    if not db:
+        print("[ScanWorker] SUPABASE_SERVICE_ROLE_KEY is required")
+        return
+
+    workers = [ScanQueueWorker(db) for _ in range(max(1, args.concurrency))]
+    if args.drain:
+        ran = await asyncio.gather(*(w.drain() for w in workers))
+        print(f"[ScanWorker] Drained {sum(ran)} job(s)")
+        return
+
+    # Finish the current scan on SIGTERM/SIGINT; an unfinished one is re-claimed
+    # by another worker once its lease expires.
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(sig, stop.set)
+        except NotImplementedError:
+            pass
+    await asyncio.gather(*(w.run_forever(stop) for w in workers))
+
+
+if __name__ == "__main__":
+    try:
+        asyncio.run(main())
+    finally:
+        shutdown_db_executor(wait=False)
+        close_supabase_clients()
@@ -0,0 +1,144 @@
+"""
+Simulation: Reactive Rotation vs Proactive Token Buckets
+========================================================
+Replays a burst of SerpApi requests against a simulated upstream that enforces
+a per-key requests/second limit (sliding 1s window) and answers 429 when it is
+exceeded. Compares:
+
+- legacy:  `current_key` + `rotate_key(is_permanent=False)` on every 429
+           (the key then sits in the 15-minute cooldown)
+- bucket:  `await acquire()` with per-key token buckets tuned just under the
+           upstream limit
+
+Reports wasted (429) requests, reactive rotations, failed requests and wall time.
+
+USAGE:
+    export PYTHONPATH=$PYTHONPATH:.
+    python3 backend/scripts/sim_key_token_bucket.py --keys 3 --requests 300
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+from collections import defaultdict, deque
+
+path = os.path.abspath(os.path.join(os.path.dirname(__file__), "../.."))
+if path not in sys.path:
+    sys.path.append(path)
+
+from backend.services.serpapi_client import ApiKeyManager  # noqa: E402
+
+
+class SimulatedUpstream:
+    """Per-key sliding-window limiter standing in for serpapi.com."""
+
+    def __init__(self, limit_per_sec: int, latency_s: float):
+        self.limit = limit_per_sec
+        self.latency_s = latency_s
+        self.windows = defaultdict(deque)
+        self.ok = 0
+        self.rejected = 0
+
+    async def call(self, key: str) -> int:
+        now = time.monotonic()
+        window = self.windows[key]
+        while window and now - window[0] > 1.0:
+            window.popleft()
+        if len(window) >= self.limit:
+            self.rejected += 1
+            await asyncio.sleep(self.latency_s / 4)
+            return 429
+        window.append(now)
+        await asyncio.sleep(self.latency_s)
+        self.ok += 1
+        return 200
+
+
+async def run_legacy(keys, upstream, requests, concurrency):
+    mgr = ApiKeyManager(list(keys))
+    sem = asyncio.Semaphore(concurrency)
+    failed = 0
+
+    async def one():
+        nonlocal failed
+        async with sem:
+            key = mgr.current_key
+            status = await upstream.call(key)
+            while status == 429:
+                if not mgr.rotate_key(reason="rate_limit", is_permanent=False, key=key):
+                    failed += 1
+                    return
+                key = mgr.current_key
+                status = await upstream.call(key)
+
+    await asyncio.gather(*(one() for _ in range(requests)))
+    return mgr, failed
+
+
+async def run_bucket(keys, upstream, requests, concurrency):
+    mgr = ApiKeyManager(list(keys))
+    sem = asyncio.Semaphore(concurrency)
+    failed = 0
+
+    async def one():
+        nonlocal failed
+        async with sem:
+            key = await mgr.acquire()
+            status = await upstream.call(key)
+            while status == 429:
+                if not mgr.rotate_key(reason="rate_limit", is_permanent=False, key=key):
+                    failed += 1
+                    return
+                key = await mgr.acquire()
+                status = await upstream.call(key)
+
+    await asyncio.gather(*(one() for _ in range(requests)))
+    return mgr, failed
+
+
+async def simulate(key_count, requests, concurrency, limit_per_sec, latency_ms):
+    keys = [f"sim-key-{i:02d}-xxxxxx" for i in range(key_count)]
+    results = {}
+    for label, runner in [("legacy", run_legacy), ("bucket", run_bucket)]:
+        # Against a sliding 1s window, burst + one second of refill must stay
+        # under the upstream limit, so we size the bucket to ~95% of it.
+        os.environ["SERPAPI_KEY_RATE_PER_SEC"] = str(limit_per_sec * 0.7)
+        os.environ["SERPAPI_KEY_BURST"] = str(max(1, int(limit_per_sec * 0.25)))
+        upstream = SimulatedUpstream(limit_per_sec, latency_ms / 1000.0)
+        start = time.perf_counter()
+        mgr, failed = await runner(keys, upstream, requests, concurrency)
+        results[label] = {
+            "wall_s": round(time.perf_counter() - start, 2),
+            "ok": upstream.ok,
+            "wasted_429": upstream.rejected,
+            "rotations": mgr.rotation_events,
+            "failed": failed,
+            "throttle_waits": mgr.throttle_waits,
+        }
+
+    print(
+        f"Keys: {key_count} | Requests: {requests} | Concurrency: {concurrency} | "
+        f"Upstream limit: {limit_per_sec}/s per key"
+    )
+    for label, r in results.items():
+        print(
+            f"  {label:<7} ok={r['ok']:>4}  wasted_429={r['wasted_429']:>4}  "
+            f"rotations={r['rotations']:>3}  failed={r['failed']:>4}  "
+            f"throttle_waits={r['throttle_waits']:>4}  wall={r['wall_s']}s"
+        )
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--keys", type=int, default=3)
+    parser.add_argument("--requests", type=int, default=300)
+    parser.add_argument("--concurrency", type=int, default=30)
+    parser.add_argument("--limit-per-sec", type=int, default=20)
+    parser.add_argument("--latency-ms", type=float, default=50.0)
+    args = parser.parse_args()
+    asyncio.run(
+        simulate(args.keys, args.requests, args.concurrency, args.limit_per_sec, args.latency_ms)
+    )
@@ -0,0 +1,231 @@
+"""
+Simulation: Fixed-Interval vs Priority Scan Scheduling
+======================================================
+Replays a price history hour by hour and lets two schedulers spend the same
+daily credit budget on it:
+
+- fixed:     every run scans the least recently scanned pairs (the old
+             fixed-frequency rotation, at equal cost)
+- priority:  every run scans the best-scoring pairs from scan_priority.py,
+             using only the prices it has observed itself
+
+A "change" is a move of at least --threshold % in the true price of a
+(hotel, check-in) pair. It is covered if a scan sees the new price before it
+changes again. Reports credits spent, coverage (overall and for stays within
+7 days) and the median detection delay for each daily budget given. The
+priority policy stops spending once nothing left is worth a credit
+(SCAN_PRIORITY_MIN_SCORE), so at generous budgets it can spend less.
+
+History comes from a synthetic market (default) or from `price_logs`
+(--source db, needs SUPABASE_SERVICE_ROLE_KEY); logged prices are treated as a
+step function between their timestamps.
+
+USAGE:
+    export PYTHONPATH=$PYTHONPATH:.
+    python3 backend/scripts/sim_scan_priority.py --hotels 60 --days 14 --budget 60 120 240
+    python3 backend/scripts/sim_scan_priority.py --source db --days 30 --budget 500
+"""
+
+import argparse
+import bisect
+import os
+import random
+import statistics
+import sys
+from collections import defaultdict
+from datetime import date, datetime, timedelta, timezone
+
+path = os.path.abspath(os.path.join(os.path.dirname(__file__), "../.."))
+if path not in sys.path:
+    sys.path.append(path)
+
+from backend.services.scan_priority import (  # noqa: E402
+    VOLATILITY_WINDOW,
+    ScanCandidate,
+    daily_volatility,
+    run_allowance,
+    select_pairs,
+)
+
+START = datetime(2026, 1, 5, tzinfo=timezone.utc)
+
+
+def synthetic_market(hotels, days, seed=11):
+    """{(hotel_id, check_in): [(ts, price), ...]} with mixed volatility regimes."""
+    rng = random.Random(seed)
+    series = {}
+    for i in range(hotels):
+        daily_vol = rng.choice([0.3, 0.3, 1.5, 4.0, 8.0])  # % per day
+        check_in = (START + timedelta(days=rng.randint(2, 60))).date()
+        price = rng.uniform(1500, 9000)
+        points = [(START, round(price))]
+        change_p = 0.15  # chance the price moves in any given hour
+        for hour in range(1, days * 24):
+            ts = START + timedelta(hours=hour)
+            if ts.date() >= check_in:
+                break
+            # Prices get jumpier as the stay approaches
+            days_left = (check_in - ts.date()).days
+            vol = daily_vol * (1 + 2.0 / (1 + days_left))
+            if rng.random() < change_p:
+                step = rng.gauss(0, vol / (24 * change_p) ** 0.5)
+                price = max(100.0, price * (1 + step / 100))
+                points.append((ts, round(price)))
+        series[(f"h{i}", check_in)] = points
+    return series
+
+
+def db_market(days):
+    from backend.utils.db import get_service_client
+
+    db = get_service_client()
+    if not db:
+        sys.exit("SUPABASE_SERVICE_ROLE_KEY is required for --source db")
+    cutoff = (datetime.now(timezone.utc) - timedelta(days=days)).isoformat()
+    rows, page = [], 0
+    while True:
+        res = (
+            db.table("price_logs")
+            .select("hotel_id, check_in_date, price, recorded_at")
+            .gte("recorded_at", cutoff)
+            .gt("price", 0)
+            .order("recorded_at")
+            .range(page * 1000, page * 1000 + 999)
+            .execute()
+        )
+        rows += res.data or []
+        if len(res.data or []) < 1000:
+            break
+        page += 1
+    series = defaultdict(list)
+    for r in rows:
+        if not r.get("check_in_date"):
+            continue
+        ts = datetime.fromisoformat(r["recorded_at"].replace("Z", "+00:00"))
+        ts = ts if ts.tzinfo else ts.replace(tzinfo=timezone.utc)
+        series[(r["hotel_id"], date.fromisoformat(r["check_in_date"]))].append((ts, r["price"]))
+    return {k: v for k, v in series.items() if len(v) >= 2}
+
+
+def price_at(points, times, ts):
+    i = bisect.bisect_right(times, ts) - 1
+    return points[i][1] if i >= 0 else None
+
+
+def change_events(points, threshold):
+    """[(start, end)] windows during which a >= threshold % move was visible."""
+    events, level = [], points[0][1]
+    for i in range(1, len(points)):
+        ts, price = points[i]
+        if level and abs(price - level) / level * 100 >= threshold:
+            end = points[i + 1][0] if i + 1 < len(points) else None
+            events.append((ts, end))
+        level = price
+    return events
+
+
+def simulate(series, policy, budget, runs_per_day, threshold):
+    pairs = list(series)
+    times = {k: [p[0] for p in v] for k, v in series.items()}
+    start = min(v[0][0] for v in series.values())
+    end = max(v[-1][0] for v in series.values())
+    interval = 24 * 60 / runs_per_day
+    observed = {k: [] for k in pairs}  # newest first, like price_logs queries
+    scans = defaultdict(list)
+    spent_by_day = defaultdict(int)
+
+    now = start
+    while now <= end:
+        live = [k for k in pairs if now.date() < k[1] and series[k][0][0] <= now]
+        allowance = run_allowance(budget, spent_by_day[now.date()], now, interval)
+        if policy == "fixed":
+            live.sort(key=lambda k: scans[k][-1] if scans[k] else start - timedelta(days=1))
+            chosen = live[:allowance]
+        else:
+            candidates = []
+            for k in live:
+                logs = observed[k][:VOLATILITY_WINDOW]
+                candidates.append(
+                    ScanCandidate(
+                        hotel={"id": k[0]},
+                        check_in=k[1],
+                        volatility=daily_volatility(logs),
+                        last_scanned_at=scans[k][-1] if scans[k] else None,
+                    )
+                )
+            selected, _ = select_pairs(candidates, allowance, now)
+            chosen = [(c.hotel["id"], c.check_in) for c in selected]
+        for k in chosen:
+            observed[k].insert(
+                0, {"price": price_at(series[k], times[k], now), "recorded_at": now}
+            )
+            scans[k].append(now)
+        spent_by_day[now.date()] += len(chosen)
+        now += timedelta(minutes=interval)
+
+    covered = near_total = near_covered = total = 0
+    delays = []
+    for k, points in series.items():
+        for ev_start, ev_end in change_events(points, threshold):
+            if ev_start > end:
+                continue
+            total += 1
+            near = (k[1] - ev_start.date()).days <= 7
+            near_total += near
+            hit = next(
+                (s for s in scans[k] if s >= ev_start and (ev_end is None or s < ev_end)),
+                None,
+            )
+            if hit:
+                covered += 1
+                near_covered += near
+                delays.append((hit - ev_start).total_seconds() / 3600)
+    return {
+        "credits": sum(spent_by_day.values()),
+        "days": len(spent_by_day),
+        "changes": total,
+        "coverage": covered / total if total else 0.0,
+        "near_coverage": near_covered / near_total if near_total else 0.0,
+        "median_delay_h": statistics.median(delays) if delays else float("nan"),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--source", choices=["synthetic", "db"], default="synthetic")
+    parser.add_argument("--hotels", type=int, default=60, help="Synthetic hotels")
+    parser.add_argument("--days", type=int, default=14)
+    parser.add_argument(
+        "--budget", type=int, nargs="+", default=[60, 120, 240, 480],
+        help="Daily credits for the key set (several values = a cost sweep)",
+    )
+    parser.add_argument("--runs-per-day", type=int, default=24)
+    parser.add_argument("--threshold", type=float, default=2.0, help="Min % move that counts")
+    parser.add_argument("--seed", type=int, default=11)
+    args = parser.parse_args()
+
+    series = (
+        db_market(args.days)
+        if args.source == "db"
+        else synthetic_market(args.hotels, args.days, args.seed)
+    )
+    if not series:
+        sys.exit("No price history to replay")
+    print(
+        f"Replaying {len(series)} (hotel, check-in) pairs, {args.runs_per_day} runs/day, "
+        f"changes >= {args.threshold}%\n"
+    )
+    print(
+        f"{'budget/day':>10}  {'policy':<10}{'credits':>9}{'changes':>9}"
+        f"{'coverage':>10}{'<=7d':>8}{'median delay':>14}"
+    )
+    for budget in args.budget:
+        for policy in ("fixed", "priority"):
+            r = simulate(series, policy, budget, args.runs_per_day, args.threshold)
+            print(
+                f"{budget:>10}  {policy:<10}{r['credits']:>9}{r['changes']:>9}{r['coverage']:>10.1%}"
+                f"{r['near_coverage']:>8.1%}{r['median_delay_h']:>12.1f} h"
+            )
+
+if __name__ == "__main__":
+    main()
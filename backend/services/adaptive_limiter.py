@@ -0,0 +1,187 @@
+"""
+Adaptive Concurrency Limiter (AIMD)
+===================================
+Replaces the fixed `asyncio.Semaphore(10)` + 60s timeout in `ScraperAgent.run_scan`.
+
+WHY: A fixed fan-out is either too timid (one key, fast responses: we leave
+throughput on the table) or too aggressive (many hotels, slow upstream: we trip
+SerpApi 429s and park a key in the 15-minute rate-limit cooldown).
+
+HOW (Additive Increase / Multiplicative Decrease, as in TCP congestion control):
+- Every healthy provider call (no error, latency under target) grows the limit
+  by 1/limit, i.e. roughly +1 slot per "window" of successful calls.
+- A 429 (observed via `ApiKeyManager.rate_limit_events`, bumped by
+  `rotate_key(is_permanent=False)`), an error or a slow response halves the limit.
+  Decreases are spaced out so one burst of failures only backs off once.
+- The ceiling scales with `ApiKeyManager.active_keys`: more healthy keys, more
+  parallel requests.
+- The per-call timeout follows observed latency (EWMA x multiplier) instead of a
+  flat 60s, clamped to [floor, ceiling].
+
+TUNING (environment variables):
+    SCAN_CONCURRENCY_INITIAL    Starting limit (default 10)
+    SCAN_CONCURRENCY_PER_KEY    Max concurrent calls per active key (default 10)
+    SCAN_CONCURRENCY_MAX        Absolute ceiling (default 50)
+    SCAN_TARGET_LATENCY_S       Latency above which we back off (default 10)
+"""
+
+import asyncio
+import os
+import time
+from contextlib import asynccontextmanager
+from typing import Any, Dict, Optional
+
+from backend.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+def _env_float(name: str, default: float) -> float:
+    try:
+        return float(os.getenv(name, default))
+    except (TypeError, ValueError):
+        return default
+
+
+class AdaptiveConcurrencyLimiter:
+    """AIMD limiter for provider fan-out. Create one per scan (loop-bound)."""
+
+    def __init__(
+        self,
+        key_manager: Optional[Any] = None,
+        initial: Optional[int] = None,
+        min_limit: int = 1,
+        per_key: Optional[int] = None,
+        max_limit: Optional[int] = None,
+        target_latency: Optional[float] = None,
+        timeout_floor: float = 15.0,
+        timeout_ceiling: float = 60.0,
+        timeout_multiplier: float = 4.0,
+        backoff_factor: float = 0.5,
+    ):
+        self._key_manager = key_manager
+        self.min_limit = max(1, min_limit)
+        self.per_key = per_key or int(_env_float("SCAN_CONCURRENCY_PER_KEY", 10))
+        self.max_limit = max_limit or int(_env_float("SCAN_CONCURRENCY_MAX", 50))
+        self.target_latency = target_latency or _env_float("SCAN_TARGET_LATENCY_S", 10.0)
+        self.timeout_floor = timeout_floor
+        self.timeout_ceiling = timeout_ceiling
+        self.timeout_multiplier = timeout_multiplier
+        self.backoff_factor = backoff_factor
+
+        start = initial or int(_env_float("SCAN_CONCURRENCY_INITIAL", 10))
+        self._limit = float(max(self.min_limit, min(start, self.ceiling)))
+        self._inflight = 0
+        self._cond = asyncio.Condition()
+        self._ewma_latency: Optional[float] = None
+        self._last_decrease = 0.0
+        self._seen_rate_limits = self._rate_limit_events()
+
+        self.increases = 0
+        self.decreases = 0
+        self.rate_limit_backoffs = 0
+        self.peak_inflight = 0
+
+    # --- Signals from the key manager ---
+    def _rate_limit_events(self) -> int:
+        return getattr(self._key_manager, "rate_limit_events", 0) if self._key_manager else 0
+
+    def _active_keys(self) -> int:
+        if not self._key_manager:
+            return 1
+        try:
+            return max(1, int(self._key_manager.active_keys))
+        except Exception:
+            return 1
+
+    # --- Limits ---
+    @property
+    def ceiling(self) -> int:
+        return max(self.min_limit, min(self.max_limit, self.per_key * self._active_keys()))
+
+    @property
+    def limit(self) -> int:
+        return int(max(self.min_limit, min(self._limit, self.ceiling)))
+
+    @property
+    def timeout(self) -> float:
+        """Per-call timeout derived from observed latency."""
+        if self._ewma_latency is None:
+            return self.timeout_ceiling
+        return max(
+            self.timeout_floor,
+            min(self.timeout_ceiling, self._ewma_latency * self.timeout_multiplier),
+        )
+
+    # --- Slot management ---
+    async def acquire(self):
+        async with self._cond:
+            await self._cond.wait_for(lambda: self._inflight < self.limit)
+            self._inflight += 1
+            self.peak_inflight = max(self.peak_inflight, self._inflight)
+
+    async def release(self):
+        async with self._cond:
+            self._inflight -= 1
+            self._cond.notify_all()
+
+    @asynccontextmanager
+    async def slot(self):
+        await self.acquire()
+        try:
+            yield self
+        finally:
+            await self.release()
+
+    # --- Feedback ---
+    def _decrease(self, reason: str):
+        now = time.monotonic()
+        # One backoff per "round trip": a burst of failures from the same window
+        # should not collapse the limit to the floor.
+        spacing = max(1.0, self._ewma_latency or 1.0)
+        if now - self._last_decrease < spacing:
+            return
+        self._last_decrease = now
+        old = self.limit
+        self._limit = max(float(self.min_limit), self._limit * self.backoff_factor)
+        self.decreases += 1
+        logger.info(f"[AIMD] Backing off ({reason}): {old} -> {self.limit}")
+
+    def observe(self, latency: float, ok: bool = True):
+        """Record the outcome of one provider call."""
+        events = self._rate_limit_events()
+        rate_limited = events > self._seen_rate_limits
+        self._seen_rate_limits = events
+
+        if ok:
+            self._ewma_latency = (
+                latency
+                if self._ewma_latency is None
+                else 0.8 * self._ewma_latency + 0.2 * latency
+            )
+
+        if rate_limited:
+            self.rate_limit_backoffs += 1
+            self._decrease("rate_limit")
+        elif not ok:
+            self._decrease("error")
+        elif latency > self.target_latency:
+            self._decrease("latency")
+        else:
+            ceiling = self.ceiling
+            if self._limit < ceiling:
+                self._limit = min(float(ceiling), self._limit + 1.0 / max(self._limit, 1.0))
+                self.increases += 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "limit": self.limit,
+            "ceiling": self.ceiling,
+            "inflight": self._inflight,
+            "peak_inflight": self.peak_inflight,
+            "ewma_latency_s": round(self._ewma_latency, 3) if self._ewma_latency else None,
+            "timeout_s": round(self.timeout, 1),
+            "increases": self.increases,
+            "decreases": self.decreases,
+            "rate_limit_backoffs": self.rate_limit_backoffs,
+        }
@@ -10,7 +10,7 @@ from datetime import datetime, timezone, timedelta
 from typing import List, Dict, Any, Optional
 from uuid import UUID
 from fastapi import HTTPException
-from supabase import create_client, Client
+from supabase import Client
 
 from backend.models.schemas import (
     AdminStats,
@@ -25,10 +25,12 @@ from backend.models.schemas import (
     PlanUpdate,
 )
 from backend.services.serpapi_client import serpapi_client
+from backend.services.latest_price_logs import latest_logs_per_hotel
 from fastapi.responses import StreamingResponse, JSONResponse
 from fastapi.encoders import jsonable_encoder
 import csv
 import io
+from backend.utils.db import execute_async, get_service_client
 
 
 async def search_admin_directory_logic(db: Client, q: str) -> List[Dict[str, Any]]:
@@ -36,7 +38,9 @@ async def search_admin_directory_logic(db: Client, q: str) -> List[Dict[str, Any
     Search directory with admin privileges.
     """
     try:
-        res = db.table("hotel_directory").select("*").ilike("name", f"%{q}%").execute()
+        res = await execute_async(
+            db.table("hotel_directory").select("*").ilike("name", f"%{q}%")
+        )
         return res.data or []
     except Exception as e:
         print(f"Admin: Directory search failure: {e}")
@@ -48,22 +52,30 @@ async def get_admin_stats_logic(db: Client) -> AdminStats:
     try:
         # Count Users (approx via settings or profiles)
         users_count = (
-            db.table("settings").select("user_id", count="exact").execute().count or 0
+            (await execute_async(
+                db.table("settings").select("user_id", count="exact")
+            )).count or 0
         )
 
         # Count Hotels
         hotels_count = (
-            db.table("hotels").select("id", count="exact").execute().count or 0
+            (await execute_async(
+                db.table("hotels").select("id", count="exact")
+            )).count or 0
         )
 
         # Count Scans
         scans_count = (
-            db.table("scan_sessions").select("id", count="exact").execute().count or 0
+            (await execute_async(
+                db.table("scan_sessions").select("id", count="exact")
+            )).count or 0
         )
 
         # Count Directory
         directory_count = (
-            db.table("hotel_directory").select("id", count="exact").execute().count or 0
+            (await execute_async(
+                db.table("hotel_directory").select("id", count="exact")
+            )).count or 0
         )
 
         # API Calls (Today)
@@ -71,11 +83,10 @@ async def get_admin_stats_logic(db: Client) -> AdminStats:
             hour=0, minute=0, second=0, microsecond=0
         )
         api_calls = 0
-        recent_scans = (
+        recent_scans = await execute_async(
             db.table("scan_sessions")
             .select("hotels_count")
             .gte("created_at", today_start.isoformat())
-            .execute()
         )
         if recent_scans.data:
             api_calls = sum(s.get("hotels_count", 0) for s in recent_scans.data)
@@ -86,13 +97,12 @@ async def get_admin_stats_logic(db: Client) -> AdminStats:
         # scans over the last 24 hours. This allows administrators to quickly
         # identify if an external provider (like SerpApi) is experiencing global issues.
         last_24h = (datetime.now(timezone.utc) - timedelta(days=1)).isoformat()
-        recent_sessions_health = (
+        recent_sessions_health = await execute_async(
             db.table("scan_sessions")
             .select("status, created_at, completed_at")
             .gte("created_at", last_24h)
             .order("created_at", desc=True)
             .limit(100)
-            .execute()
         )
         health = 100.0
         avg_latency = 0.0
@@ -156,12 +166,11 @@ async def get_api_key_status_logic(db: Client) -> Dict[str, Any]:
         now = datetime.now()
         first_of_month = datetime(now.year, now.month, 1).isoformat()
 
-        usage_res = (
+        usage_res = await execute_async(
             db.table("scan_sessions")
             .select("id", count="exact")
             .gte("created_at", first_of_month)
             .in_("status", ["completed", "partial"])
-            .execute()
         )
         monthly_usage = usage_res.count if usage_res.count is not None else 0
 
@@ -285,22 +294,28 @@ async def admin_update_user_logic(
             profile_fields["subscription_status"] = updates.subscription_status
 
         if profile_fields:
-            db.table("user_profiles").update(profile_fields).eq(
-                "user_id", user_id_str
-            ).execute()
+            await execute_async(
+                db.table("user_profiles").update(profile_fields).eq(
+                    "user_id", user_id_str
+                )
+            )
             if "plan_type" in profile_fields or "subscription_status" in profile_fields:
                 sub_update = {
                     k: v
                     for k, v in profile_fields.items()
                     if k in ["plan_type", "subscription_status"]
                 }
-                db.table("profiles").update(sub_update).eq("id", user_id_str).execute()
+                await execute_async(
+                    db.table("profiles").update(sub_update).eq("id", user_id_str)
+                )
 
         # 2. Update Settings Fields
         if updates.check_frequency_minutes is not None:
-            db.table("settings").update(
-                {"check_frequency_minutes": updates.check_frequency_minutes}
-            ).eq("user_id", user_id_str).execute()
+            await execute_async(
+                db.table("settings").update(
+                    {"check_frequency_minutes": updates.check_frequency_minutes}
+                ).eq("user_id", user_id_str)
+            )
             
             # KAİZEN: Synchronize next_scan_at in profiles if frequency changed
             try:
@@ -310,9 +325,11 @@ async def admin_update_user_logic(
                     .isoformat()
                     .replace("+00:00", "Z")
                 )
-                db.table("profiles").update({"next_scan_at": next_run}).eq(
-                    "id", user_id_str
-                ).execute()
+                await execute_async(
+                    db.table("profiles").update({"next_scan_at": next_run}).eq(
+                        "id", user_id_str
+                    )
+                )
                 print(f"[Admin] Synced next_scan_at for {user_id_str} to {next_run}")
             except Exception as e:
                 print(f"[Admin] Profile frequency sync failed: {e}")
@@ -321,7 +338,7 @@ async def admin_update_user_logic(
         admin_key = os.getenv("SUPABASE_SERVICE_ROLE_KEY")
         url = os.getenv("NEXT_PUBLIC_SUPABASE_URL")
         if admin_key and url:
-            admin_db = create_client(url, admin_key)
+            admin_db = get_service_client()
             auth_updates = {}
             if updates.email:
                 auth_updates["email"] = updates.email
@@ -349,13 +366,15 @@ async def get_admin_users_logic(db: Client) -> List[AdminUser]:
     # user data is split across multiple tables (Supabase Auth vs Public Profiles).
     try:
         # Fetch profiles, settings, and subscription info
-        profiles_res = db.table("user_profiles").select("*").execute()
+        profiles_res = await execute_async(db.table("user_profiles").select("*"))
         profiles_data = profiles_res.data or []
 
-        db.table("settings").select("user_id, check_frequency_minutes").execute()
+        await execute_async(
+            db.table("settings").select("user_id, check_frequency_minutes")
+        )
 
-        sub_res = (
-            db.table("profiles").select("id, plan_type, subscription_status").execute()
+        sub_res = await execute_async(
+            db.table("profiles").select("id, plan_type, subscription_status")
         )
         sub_map = {s["id"]: s for s in (sub_res.data or [])}
 
@@ -389,18 +408,20 @@ async def get_admin_users_logic(db: Client) -> List[AdminUser]:
             try:
                 # Optimized count fetch (In production use a view/RPC)
                 h_count = (
-                    db.table("hotels")
-                    .select("id", count="exact")
-                    .eq("user_id", uid)
-                    .execute()
+                    (await execute_async(
+                        db.table("hotels")
+                        .select("id", count="exact")
+                        .eq("user_id", uid)
+                    ))
                     .count
                     or 0
                 )
                 s_count = (
-                    db.table("scan_sessions")
-                    .select("id", count="exact")
-                    .eq("user_id", uid)
-                    .execute()
+                    (await execute_async(
+                        db.table("scan_sessions")
+                        .select("id", count="exact")
+                        .eq("user_id", uid)
+                    ))
                     .count
                     or 0
                 )
@@ -436,7 +457,7 @@ async def create_admin_user_logic(user: AdminUserCreate, db: Client) -> Dict[str
     if not admin_key or not url:
         raise HTTPException(status_code=500, detail="Admin credentials missing")
 
-    admin_db = create_client(url, admin_key)
+    admin_db = get_service_client()
     try:
         res = admin_db.auth.admin.create_user(
             {"email": user.email, "password": user.password, "email_confirm": True}
@@ -448,15 +469,17 @@ async def create_admin_user_logic(user: AdminUserCreate, db: Client) -> Dict[str
             )
 
         # 2. Add Profile
-        admin_db.table("user_profiles").insert(
-            {
-                "user_id": str(new_user.id),
-                "display_name": user.display_name or user.email.split("@")[0],
-                "email": user.email,
-                "plan_type": user.plan_type,
-                "subscription_status": user.subscription_status,
-            }
-        ).execute()
+        await execute_async(
+            admin_db.table("user_profiles").insert(
+                {
+                    "user_id": str(new_user.id),
+                    "display_name": user.display_name or user.email.split("@")[0],
+                    "email": user.email,
+                    "plan_type": user.plan_type,
+                    "subscription_status": user.subscription_status,
+                }
+            )
+        )
 
         # 3. Add to Profiles (for subscription lookup)
         now = datetime.now(timezone.utc)
@@ -464,24 +487,28 @@ async def create_admin_user_logic(user: AdminUserCreate, db: Client) -> Dict[str
         # Initialize next scan for 24h from now (matching daily default)
         next_scan = (now + timedelta(days=1)).isoformat().replace("+00:00", "Z")
         
-        admin_db.table("profiles").insert(
-            {
-                "id": str(new_user.id),
-                "plan_type": user.plan_type,
-                "subscription_status": user.subscription_status,
-                "current_period_end": trial_end if user.subscription_status == "trial" else None,
-                "next_scan_at": next_scan
-            }
-        ).execute()
+        await execute_async(
+            admin_db.table("profiles").insert(
+                {
+                    "id": str(new_user.id),
+                    "plan_type": user.plan_type,
+                    "subscription_status": user.subscription_status,
+                    "current_period_end": trial_end if user.subscription_status == "trial" else None,
+                    "next_scan_at": next_scan
+                }
+            )
+        )
 
         # 4. Add default Settings
-        admin_db.table("settings").insert(
-            {
-                "user_id": str(new_user.id),
-                "check_frequency_minutes": 1440,  # Daily default
-                "currency": "TRY",
-            }
-        ).execute()
+        await execute_async(
+            admin_db.table("settings").insert(
+                {
+                    "user_id": str(new_user.id),
+                    "check_frequency_minutes": 1440,  # Daily default
+                    "currency": "TRY",
+                }
+            )
+        )
 
         return {"status": "success", "user_id": str(new_user.id)}
     except Exception as e:
@@ -497,7 +524,7 @@ async def delete_admin_user_logic(user_id: str, db: Client) -> Dict[str, Any]:
     if not admin_key or not url:
         raise HTTPException(status_code=500, detail="Admin credentials missing")
 
-    admin_db = create_client(url, admin_key)
+    admin_db = get_service_client()
     tables = [
         "hotels",
         "scan_sessions",
@@ -508,7 +535,9 @@ async def delete_admin_user_logic(user_id: str, db: Client) -> Dict[str, Any]:
     ]
     for table in tables:
         try:
-            admin_db.table(table).delete().eq("user_id", str(user_id)).execute()
+            await execute_async(
+                admin_db.table(table).delete().eq("user_id", str(user_id))
+            )
         except Exception:
             pass
 
@@ -525,12 +554,11 @@ async def get_admin_logs_logic(db: Client, limit: int = 50) -> List[AdminLog]:
     Fetch recent system activity logs.
     """
     try:
-        result = (
+        result = await execute_async(
             db.table("scan_sessions")
             .select("*")
             .order("created_at", desc=True)
             .limit(limit)
-            .execute()
         )
         logs = []
         for session in result.data or []:
@@ -567,7 +595,7 @@ async def get_admin_directory_logic(
     )
     if city:
         query = query.ilike("location", f"%{city}%")
-    result = query.execute()
+    result = await execute_async(query)
     entries = []
     for item in result.data or []:
         entries.append(
@@ -585,13 +613,15 @@ async def get_admin_directory_logic(
 async def add_admin_directory_entry_logic(entry: dict, db: Client) -> Dict[str, Any]:
     """Add a directory entry manually."""
     try:
-        db.table("hotel_directory").insert(
-            {
-                "name": entry["name"],
-                "location": entry["location"],
-                "serp_api_id": entry.get("serp_api_id"),
-            }
-        ).execute()
+        await execute_async(
+            db.table("hotel_directory").insert(
+                {
+                    "name": entry["name"],
+                    "location": entry["location"],
+                    "serp_api_id": entry.get("serp_api_id"),
+                }
+            )
+        )
         return {"status": "success"}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -600,7 +630,7 @@ async def add_admin_directory_entry_logic(entry: dict, db: Client) -> Dict[str,
 async def delete_admin_directory_logic(entry_id: str, db: Client) -> Dict[str, Any]:
     """Delete a directory entry."""
     try:
-        db.table("hotel_directory").delete().eq("id", entry_id).execute()
+        await execute_async(db.table("hotel_directory").delete().eq("id", entry_id))
         return {"status": "success"}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -615,7 +645,9 @@ async def update_admin_directory_logic(
             k: v for k, v in updates.items() if k in ["name", "location", "serp_api_id"]
         }
         if update_data:
-            db.table("hotel_directory").update(update_data).eq("id", entry_id).execute()
+            await execute_async(
+                db.table("hotel_directory").update(update_data).eq("id", entry_id)
+            )
         return {"status": "success", "id": entry_id}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -623,9 +655,11 @@ async def update_admin_directory_logic(
 
 async def get_admin_hotels_logic(db: Client, limit: int = 100) -> List[Dict[str, Any]]:
     """List all hotels with user info."""
-    hotels = db.table("hotels").select("*").limit(limit).execute().data or []
+    hotels = (await execute_async(db.table("hotels").select("*").limit(limit))).data or []
     users = (
-        db.table("user_profiles").select("user_id, display_name, email").execute().data
+        (await execute_async(
+            db.table("user_profiles").select("user_id, display_name, email")
+        )).data
         or []
     )
     user_map = {u["user_id"]: u for u in users}
@@ -665,7 +699,7 @@ async def update_admin_hotel_logic(
     update_data = {k: v for k, v in updates.items() if k in allowed}
     if update_data:
         update_data["updated_at"] = datetime.now(timezone.utc).isoformat()
-        db.table("hotels").update(update_data).eq("id", hotel_id).execute()
+        await execute_async(db.table("hotels").update(update_data).eq("id", hotel_id))
     return {"status": "success", "hotel_id": hotel_id}
 
 
@@ -674,8 +708,8 @@ async def delete_admin_hotel_logic(hotel_id: str, db: Client) -> Dict[str, Any]:
     # SAFEGUARD: Price logs are NOT deleted.
     # Historical pricing data is valuable and should persist even if the hotel
     # is removed. If the hotel is re-added later, the data reconnects via hotel_id.
-    db.table("alerts").delete().eq("hotel_id", hotel_id).execute()
-    db.table("hotels").delete().eq("id", hotel_id).execute()
+    await execute_async(db.table("alerts").delete().eq("hotel_id", hotel_id))
+    await execute_async(db.table("hotels").delete().eq("id", hotel_id))
     return {"status": "success"}
 
 
@@ -684,12 +718,11 @@ async def get_admin_feed_logic(
 ) -> List[Dict[str, Any]]:
     """Get live agent feed logs."""
     try:
-        logs_res = (
+        logs_res = await execute_async(
             db.table("query_logs")
             .select("id, hotel_name, action_type, status, created_at, price, currency")
             .order("created_at", desc=True)
             .limit(limit)
-            .execute()
         )
         return logs_res.data or []
     except Exception:
@@ -700,13 +733,12 @@ async def get_reports_logic(user_id: UUID, db: Client) -> JSONResponse:
     """Fetch data for reporting."""
     try:
         # 1. Fetch Scan Sessions (Traditional reports)
-        sessions_res = (
+        sessions_res = await execute_async(
             db.table("scan_sessions")
             .select("*")
             .eq("user_id", str(user_id))
             .order("created_at", desc=True)
             .limit(50)
-            .execute()
         )
 
         sessions = [
@@ -714,14 +746,13 @@ async def get_reports_logic(user_id: UUID, db: Client) -> JSONResponse:
         ]
 
         # 2. Fetch Agentic Briefings (Phase 4 saved reports)
-        briefings_res = (
+        briefings_res = await execute_async(
             db.table("reports")
             .select("id, title, report_type, created_at")
             .eq("report_type", "briefing")
             .eq("created_by", str(user_id))
             .order("created_at", desc=True)
             .limit(50)
-            .execute()
         )
 
         briefings = briefings_res.data or []
@@ -751,19 +782,22 @@ async def export_report_logic(user_id: UUID, format: str, db: Client) -> Any:
         return {"status": "error", "message": "Only CSV supported"}
 
     hotels = (
-        db.table("hotels").select("id, name").eq("user_id", str(user_id)).execute().data
+        (await execute_async(
+            db.table("hotels").select("id, name").eq("user_id", str(user_id))
+        )).data
         or []
     )
     hotel_map = {h["id"]: h["name"] for h in hotels}
     hotel_ids = list(hotel_map.keys())
 
     logs = (
-        db.table("price_logs")
-        .select("*")
-        .in_("hotel_id", hotel_ids)
-        .order("recorded_at", desc=True)
-        .limit(1000)
-        .execute()
+        (await execute_async(
+            db.table("price_logs")
+            .select("*")
+            .in_("hotel_id", hotel_ids)
+            .order("recorded_at", desc=True)
+            .limit(1000)
+        ))
         .data
         or []
     )
@@ -792,20 +826,20 @@ async def export_report_logic(user_id: UUID, format: str, db: Client) -> Any:
 async def get_admin_scans_logic(db: Client, limit: int = 50) -> List[Dict[str, Any]]:
     """List recent scan sessions."""
     sessions = (
-        db.table("scan_sessions")
-        .select("*")
-        .order("created_at", desc=True)
-        .limit(limit)
-        .execute()
+        (await execute_async(
+            db.table("scan_sessions")
+            .select("*")
+            .order("created_at", desc=True)
+            .limit(limit)
+        ))
         .data
         or []
     )
     user_ids = list(set(s["user_id"] for s in sessions))
-    profiles = (
+    profiles = await execute_async(
         db.table("user_profiles")
         .select("user_id, display_name")
         .in_("user_id", user_ids)
-        .execute()
     )
     users_map = {
         p["user_id"]: p.get("display_name", "Unknown") for p in (profiles.data or [])
@@ -832,21 +866,23 @@ async def get_admin_scan_details_logic(scan_id: UUID, db: Client) -> Dict[str, A
     """Fetch detailed logs and results for a specific scan."""
     try:
         session = (
-            db.table("scan_sessions")
-            .select("*")
-            .eq("id", str(scan_id))
-            .single()
-            .execute()
+            (await execute_async(
+                db.table("scan_sessions")
+                .select("*")
+                .eq("id", str(scan_id))
+                .single()
+            ))
             .data
         )
         if not session:
             raise HTTPException(404, "Scan session not found")
 
         logs = (
-            db.table("query_logs")
-            .select("*")
-            .eq("session_id", str(scan_id))
-            .execute()
+            (await execute_async(
+                db.table("query_logs")
+                .select("*")
+                .eq("session_id", str(scan_id))
+            ))
             .data
             or []
         )
@@ -859,7 +895,9 @@ async def get_admin_scan_details_logic(scan_id: UUID, db: Client) -> Dict[str, A
 async def get_admin_plans_logic(db: Client) -> List[Dict[str, Any]]:
     """List all available membership plans."""
     try:
-        res = db.table("membership_plans").select("*").order("price_monthly").execute()
+        res = await execute_async(
+            db.table("membership_plans").select("*").order("price_monthly")
+        )
         return res.data or []
     except Exception:
         # Fallback to defaults if table doesn't exist yet
@@ -879,7 +917,7 @@ async def create_admin_plan_logic(plan: PlanCreate, db: Client) -> Dict[str, Any
     """Create a new membership plan."""
     try:
         data = plan.model_dump()
-        res = db.table("membership_plans").insert(data).execute()
+        res = await execute_async(db.table("membership_plans").insert(data))
         return res.data[0] if res.data else {"status": "success"}
     except Exception as e:
         raise HTTPException(500, str(e))
@@ -891,7 +929,9 @@ async def update_admin_plan_logic(
     """Update an existing membership plan."""
     try:
         data = plan.model_dump(exclude_unset=True)
-        res = db.table("membership_plans").update(data).eq("id", str(id)).execute()
+        res = await execute_async(
+            db.table("membership_plans").update(data).eq("id", str(id))
+        )
         return res.data[0] if res.data else {"status": "success"}
     except Exception as e:
         raise HTTPException(500, str(e))
@@ -900,7 +940,7 @@ async def update_admin_plan_logic(
 async def delete_admin_plan_logic(id: UUID, db: Client) -> Dict[str, Any]:
     """Delete a membership plan."""
     try:
-        db.table("membership_plans").delete().eq("id", str(id)).execute()
+        await execute_async(db.table("membership_plans").delete().eq("id", str(id)))
         return {"status": "success"}
     except Exception as e:
         raise HTTPException(500, str(e))
@@ -908,7 +948,7 @@ async def delete_admin_plan_logic(id: UUID, db: Client) -> Dict[str, Any]:
 
 async def get_admin_settings_logic(db: Client) -> AdminSettings:
     """Fetch global settings."""
-    res = db.table("admin_settings").select("*").limit(1).execute()
+    res = await execute_async(db.table("admin_settings").select("*").limit(1))
     if res.data:
         return AdminSettings(**res.data[0])
     return AdminSettings(
@@ -928,7 +968,7 @@ async def sync_hotel_directory_logic(db: Client) -> Dict[str, Any]:
     """
     try:
         # 1. Fetch all hotels from active 'hotels' table
-        hotels_res = db.table("hotels").select("*").execute()
+        hotels_res = await execute_async(db.table("hotels").select("*"))
         active_hotels = hotels_res.data or []
 
         synced_count = 0
@@ -942,21 +982,19 @@ async def sync_hotel_directory_logic(db: Client) -> Dict[str, Any]:
 
             existing = None
             if serp_id:
-                existing_res = (
+                existing_res = await execute_async(
                     db.table("hotel_directory")
                     .select("*")
                     .eq("serp_api_id", serp_id)
-                    .execute()
                 )
                 existing = existing_res.data[0] if existing_res.data else None
 
             if not existing:
-                existing_res = (
+                existing_res = await execute_async(
                     db.table("hotel_directory")
                     .select("*")
                     .eq("name", hotel["name"])
                     .eq("location", hotel["location"])
-                    .execute()
                 )
                 existing = existing_res.data[0] if existing_res.data else None
 
@@ -973,20 +1011,24 @@ async def sync_hotel_directory_logic(db: Client) -> Dict[str, Any]:
 
             if existing:
                 # Update directory logic
-                db.table("hotel_directory").update(dir_data).eq(
-                    "id", existing["id"]
-                ).execute()
+                await execute_async(
+                    db.table("hotel_directory").update(dir_data).eq(
+                        "id", existing["id"]
+                    )
+                )
                 updated_count += 1
 
                 # KAİZEN: Re-align hotel token if directory has a better one
                 dir_serp_id = existing.get("serp_api_id")
                 if dir_serp_id and dir_serp_id != serp_id:
-                    db.table("hotels").update({"serp_api_id": dir_serp_id}).eq(
-                        "id", hid
-                    ).execute()
+                    await execute_async(
+                        db.table("hotels").update({"serp_api_id": dir_serp_id}).eq(
+                            "id", hid
+                        )
+                    )
                     token_backfills += 1
             else:
-                db.table("hotel_directory").insert(dir_data).execute()
+                await execute_async(db.table("hotel_directory").insert(dir_data))
                 synced_count += 1
 
         return {
@@ -1008,13 +1050,15 @@ async def cleanup_test_data_logic(db: Client) -> Dict[str, Any]:
     try:
         # Delete items with 'test' or 'dummy' in name (CAUTION: Admin only)
         # For safety, we only delete from hotels table specifically marked or known test hotels
-        test_hotels = db.table("hotels").select("id").ilike("name", "%test%").execute()
+        test_hotels = await execute_async(
+            db.table("hotels").select("id").ilike("name", "%test%")
+        )
         hotel_ids = [h["id"] for h in (test_hotels.data or [])]
 
         if hotel_ids:
             # SAFEGUARD: Price logs are NOT deleted — historical data is preserved.
-            db.table("alerts").delete().in_("hotel_id", hotel_ids).execute()
-            db.table("hotels").delete().in_("id", hotel_ids).execute()
+            await execute_async(db.table("alerts").delete().in_("hotel_id", hotel_ids))
+            await execute_async(db.table("hotels").delete().in_("id", hotel_ids))
 
         return {"status": "success", "deleted_count": len(hotel_ids)}
     except Exception as e:
@@ -1045,7 +1089,7 @@ async def get_admin_market_intelligence_logic(
         )
         if city:
             query = query.ilike("location", f"%{city}%")
-        dir_result = query.execute()
+        dir_result = await execute_async(query)
         directory_hotels = dir_result.data or []
 
         # 2. Fetch latest prices from tracked hotels in the same city
@@ -1053,7 +1097,7 @@ async def get_admin_market_intelligence_logic(
         hotels_query = db.table("hotels").select("id, name, location, serp_api_id")
         if city:
             hotels_query = hotels_query.ilike("location", f"%{city}%")
-        tracked_result = hotels_query.limit(200).execute()
+        tracked_result = await execute_async(hotels_query.limit(200))
         tracked_hotels = tracked_result.data or []
 
         # Build map of latest prices and coordinates from tracked hotels
@@ -1075,22 +1119,20 @@ async def get_admin_market_intelligence_logic(
         price_map = {hid: meta["price"] for hid, meta in tracked_meta.items()}
 
         if tracked_hotels:
-            # Batch fetch latest price for all target hotels to reduce DB roundtrips
-            recent_logs = (
-                db.table("price_logs")
-                .select("hotel_id, price")
-                .in_("hotel_id", [str(h["id"]) for h in tracked_hotels])
-                .order("recorded_at", desc=True)
-                .limit(len(tracked_hotels) * 10)
-                .execute()
+            # Batch fetch the 10 latest logs of every target hotel in one roundtrip
+            recent_logs = await latest_logs_per_hotel(
+                db,
+                [h["id"] for h in tracked_hotels],
+                per_hotel=10,
+                columns="hotel_id, price",
             )
 
-            for log in recent_logs.data or []:
-                hid = str(log["hotel_id"])
-                # Only update if we haven't found a 'more recent' one in this batch
-                # (since they are ordered by date DESC)
-                if hid not in price_map or price_map[hid] == 0:
-                    price_map[hid] = log.get("price", 0)
+            for hid, logs in recent_logs.items():
+                for log in logs:
+                    # Only update if we haven't found a 'more recent' one in this batch
+                    # (since they are ordered by date DESC)
+                    if hid not in price_map or price_map[hid] == 0:
+                        price_map[hid] = log.get("price", 0)
 
         # 3. Build unified hotel list from directory entries
         #    If a directory hotel has a matching tracked hotel (by serp_api_id or name),
@@ -1201,13 +1243,12 @@ async def get_admin_market_intelligence_logic(
                 thirty_days_ago = (datetime.now() - timedelta(days=30)).isoformat()
 
                 # KAİZEN: Use batch query to avoid N+1 lookups for city-wide visibility
-                vis_query = (
+                vis_query = await execute_async(
                     db.table("price_logs")
                     .select("recorded_at, search_rank, price")
                     .in_("hotel_id", hotel_ids_for_vis)
                     .gte("recorded_at", thirty_days_ago)
                     .order("recorded_at", desc=False)
-                    .execute()
                 )
 
                 raw_vis = vis_query.data or []
@@ -1274,13 +1315,12 @@ async def get_admin_market_intelligence_logic(
         try:
             hotel_ids_for_curr = [str(h["id"]) for h in tracked_hotels]
             if hotel_ids_for_curr:
-                curr_res = (
+                curr_res = await execute_async(
                     db.table("price_logs")
                     .select("currency")
                     .in_("hotel_id", hotel_ids_for_curr)
                     .not_.is_("currency", "null")
                     .limit(1)
-                    .execute()
                 )
                 if curr_res.data:
                     detected_currency = curr_res.data[0].get("currency", "TRY")
@@ -1384,11 +1424,10 @@ async def get_scheduler_queue_logic(db: Client) -> List[Dict[str, Any]]:
         now = datetime.now(timezone.utc)
 
         # 1. Fetch all profiles that have a next_scan_at (these are scheduled users)
-        profiles_res = (
+        profiles_res = await execute_async(
             db.table("profiles")
             .select("id, next_scan_at, scan_frequency_minutes")
             .not_.is_("next_scan_at", "null")
-            .execute()
         )
         profiles = profiles_res.data or []
 
@@ -1398,11 +1437,10 @@ async def get_scheduler_queue_logic(db: Client) -> List[Dict[str, Any]]:
         user_ids = [p["id"] for p in profiles]
 
         # 2. Fetch display names from user_profiles
-        names_res = (
+        names_res = await execute_async(
             db.table("user_profiles")
             .select("user_id, display_name, email")
             .in_("user_id", user_ids)
-            .execute()
         )
         names_map = {
             n["user_id"]: n.get("display_name") or n.get("email", "Unknown")
@@ -1410,11 +1448,10 @@ async def get_scheduler_queue_logic(db: Client) -> List[Dict[str, Any]]:
         }
 
         # 3. Fetch settings for check_frequency_minutes (authoritative source)
-        settings_res = (
+        settings_res = await execute_async(
             db.table("settings")
             .select("user_id, check_frequency_minutes")
             .in_("user_id", user_ids)
-            .execute()
         )
         settings_map = {
             s["user_id"]: s.get("check_frequency_minutes", 0)
@@ -1422,11 +1459,10 @@ async def get_scheduler_queue_logic(db: Client) -> List[Dict[str, Any]]:
         }
 
         # 4. Fetch hotel names per user
-        hotels_res = (
+        hotels_res = await execute_async(
             db.table("hotels")
             .select("user_id, name")
             .in_("user_id", user_ids)
-            .execute()
         )
         hotels_map: Dict[str, List[str]] = {}
         for h in hotels_res.data or []:
@@ -1439,14 +1475,13 @@ async def get_scheduler_queue_logic(db: Client) -> List[Dict[str, Any]]:
         last_scan_map: Dict[str, str] = {}
         for uid in user_ids:
             try:
-                scan_res = (
+                scan_res = await execute_async(
                     db.table("scan_sessions")
                     .select("completed_at")
                     .eq("user_id", uid)
                     .eq("status", "completed")
                     .order("completed_at", desc=True)
                     .limit(1)
-                    .execute()
                 )
                 if scan_res.data:
                     last_scan_map[uid] = scan_res.data[0]["completed_at"]
@@ -1508,7 +1543,7 @@ async def update_admin_settings_logic(
     update_data = updates.model_dump(exclude_unset=True)
     update_data["updated_at"] = datetime.now(timezone.utc).isoformat()
     data_to_upsert = {**current.model_dump(), **update_data, "id": str(current.id)}
-    res = db.table("admin_settings").upsert(data_to_upsert).execute()
+    res = await execute_async(db.table("admin_settings").upsert(data_to_upsert))
     return (
         AdminSettings(**res.data[0])
         if res.data
@@ -1534,6 +1569,21 @@ async def trigger_all_overdue_logic() -> Dict[str, Any]:
         return {"error": str(e)}
 
 
+async def get_scheduler_plan_logic() -> Dict[str, Any]:
+    """
+    Dry run of the background scheduler (no sessions, no next_scan_at updates).
+    Reports projected wall-clock time and SerpApi credit use for the due users.
+    """
+    try:
+        from backend.services.monitor_service import run_scheduler_check_logic
+
+        plan = await run_scheduler_check_logic(dry_run=True)
+        return plan or {"error": "Scheduler plan unavailable"}
+    except Exception as e:
+        print(f"Scheduler Plan Error: {e}")
+        return {"error": str(e)}
+
+
 async def cleanup_empty_scans_logic(db: Client) -> Dict[str, Any]:
     """
     Identifies and removes scan sessions that have no results.
@@ -1543,20 +1593,19 @@ async def cleanup_empty_scans_logic(db: Client) -> Dict[str, Any]:
     """
     try:
         # 1. Get all failed sessions
-        failed_res = (
-            db.table("scan_sessions").select("id").eq("status", "failed").execute()
+        failed_res = await execute_async(
+            db.table("scan_sessions").select("id").eq("status", "failed")
         )
         failed_ids = [s["id"] for s in (failed_res.data or [])]
 
         # 2. Get all completed/partial sessions and check their result count
         # This is more intensive, so we limit to last 7 days for safety
         cutoff = (datetime.now() - timedelta(days=7)).isoformat()
-        sessions_res = (
+        sessions_res = await execute_async(
             db.table("scan_sessions")
             .select("id")
             .in_("status", ["completed", "partial"])
             .gte("created_at", cutoff)
-            .execute()
         )
 
         potential_empty_ids = [s["id"] for s in (sessions_res.data or [])]
@@ -1564,11 +1613,10 @@ async def cleanup_empty_scans_logic(db: Client) -> Dict[str, Any]:
 
         for sid in potential_empty_ids:
             # Check if there are any successful logs for this session
-            logs_res = (
+            logs_res = await execute_async(
                 db.table("price_logs")
                 .select("id", count="exact")
                 .eq("session_id", sid)
-                .execute()
             )
             if logs_res.count == 0:
                 empty_ids.append(sid)
@@ -1583,7 +1631,7 @@ async def cleanup_empty_scans_logic(db: Client) -> Dict[str, Any]:
             }
 
         # 3. Delete sessions
-        db.table("scan_sessions").delete().in_("id", all_to_delete).execute()
+        await execute_async(db.table("scan_sessions").delete().in_("id", all_to_delete))
 
         return {
             "status": "success",
@@ -8,7 +8,9 @@ import re
 from datetime import datetime, date, timedelta
 import asyncio
 import os
-from typing import Optional, List, Dict, Any, Tuple
+from functools import lru_cache
+from itertools import repeat
+from typing import Optional, List, Dict, Any, Tuple, Callable, Iterable, NamedTuple
 from supabase import Client
 from backend.utils.helpers import convert_currency
 from backend.utils.sentiment_utils import (
@@ -19,6 +21,21 @@ from backend.utils.sentiment_utils import (
     calculate_stability,
 )
 from backend.utils.logger import get_logger
+from backend.utils.db import execute_async
+from backend.utils.projections import (
+    HOTEL_ANALYSIS,
+    PRICE_LOG_ANALYSIS,
+    select_projected_async,
+)
+from backend.services.price_frame import (
+    PriceLogFrame,
+    first_extreme_per_group,
+    first_per_group,
+    float_column,
+    group_runs,
+)
+
+import numpy as np
 
 # EXPLANATION: Module-level logger replaces raw print() for structured output
 logger = get_logger(__name__)
@@ -32,13 +49,12 @@ async def get_sentiment_trends(
     Analyzes historical sentiment data to determine momentum and stability.
     """
     try:
-        res = (
+        res = await execute_async(
             db.table("sentiment_history")
             .select("rating, recorded_at")
             .eq("hotel_id", hotel_id)
             .order("recorded_at", desc=True)
             .limit(limit)
-            .execute()
         )
 
         history = res.data or []
@@ -151,140 +167,67 @@ def _extract_price(raw: Any) -> Optional[float]:
 # This prevents "N/A" issues caused by data-source mismatches.
 
 
-def get_price_for_room(
-    price_log: Dict[str, Any],
-    target_room_type: str,
-    allowed_room_names_map: Dict[str, List[str]],
-) -> Tuple[Optional[float], Optional[str], float]:
-    """
-    Finds the best matching room price within a price log.
+_STANDARD_KEYS = ("standard", "standart")
+_DELUXE_KEYS = ("deluxe", "superior", "premium")
+
+# KAIZEN: "Premium Shield"
+# Even if a request is treated as Standard, we must ensure the candidate room
+# doesn't contain heavy premium keywords that might have been miscategorized.
+_PREMIUM_SHIELDS = (
+    "presidential",
+    "başkanlık",
+    "kral",
+    "king suite",
+    "queen suite",
+    "balayı",
+    "honeymoon",
+    "dubleks",
+    "duplex",
+)
+_PREMIUM_SHIELD_RE = re.compile("|".join(re.escape(k) for k in _PREMIUM_SHIELDS))
 
-    Why: Hotel listings have many room types (Standard, Deluxe, etc.).
-    We use high-confidence semantic matching to compare apples-to-apples.
-    """
-    r_types = price_log.get("room_types") or []
-    if not isinstance(r_types, list):
-        return None, None, 0.0
+_NO_MATCH: Tuple[Optional[float], Optional[str], float] = (None, None, 0.0)
 
-    # 1. Check for Semantic Match first (if map exists)
-    hid = str(price_log.get("hotel_id", ""))
-    allowed_names = allowed_room_names_map.get(hid)
 
-    if allowed_names:
-        # Convert allowed_names to lowercase set for O(1) case-insensitive lookup
-        allowed_lower = {a.lower().strip() for a in allowed_names}
-        for r in r_types:
-            if isinstance(r, dict):
-                r_name = r.get("name", "")
-                if r_name.lower().strip() in allowed_lower:
-                    # KAIZEN: "Strict Category Guards"
-                    # We ensure that a match actually belongs to the requested category.
-                    r_name = r.get("name", "")
-                    t_lower = target_room_type.lower()
-                    r_lower = r_name.lower()
-
-                    is_standard_t = any(s in t_lower for s in ["standard", "standart"])
-                    is_standard_r = any(s in r_lower for s in ["standard", "standart"])
-
-                    # 1. Suite Guard: If asking for Suite, offer MUST have "suite" or "süit"
-                    if "suite" in t_lower and not any(
-                        k in r_lower for k in ["suite", "süit"]
-                    ):
-                        continue
+class _RoomTypeSpec(NamedTuple):
+    """Everything `get_price_for_room` derives from the requested room type alone."""
 
-                    # 2. Deluxe Guard: If asking for Deluxe, reject plain Standard rooms
-                    if (
-                        any(k in t_lower for k in ["deluxe", "superior", "premium"])
-                        and is_standard_r
-                        and "deluxe" not in r_lower
-                    ):
-                        continue
+    room_type: str
+    is_standard: bool
+    has_suite: bool
+    is_deluxe: bool
+    is_std_code: bool
+    variants: "re.Pattern[str]"
+    is_standard_request: bool
 
-                    # 3. Standard Leak Guard: If asking for specific non-standard type, reject plain Standard
-                    if not is_standard_t and is_standard_r:
-                        # Exception: "Standard Suite" is fine if asking for Suite
-                        if not ("suite" in t_lower and "suite" in r_lower):
-                            continue
 
-                    return (
-                        _extract_price(r.get("price")),
-                        r_name,
-                        0.82 + (0.1 * int(r_name == target_room_type)),
-                    )
+@lru_cache(maxsize=256)
+def _compile_room_type(target_room_type: str) -> _RoomTypeSpec:
+    t_lower = target_room_type.lower()
 
     # 2. Fallback: String Match (Substring) with Turkish/English variant support
     # We check for common "standard" room variants in both languages.
-    target_variants = [target_room_type.lower()]
+    target_variants = [t_lower]
     # Improved check: detect 'standard' even if it's 'Standard Room'
-    if any(s in target_room_type.lower() for s in ["standard", "standart"]):
+    if any(s in t_lower for s in _STANDARD_KEYS):
         target_variants.extend(
-            [
-                "standard",
-                "standart",
-                "klasik",
-                "classic",
-                "ekonomik",
-                "economy",
-                "promo",
-            ]
+            ["standard", "standart", "klasik", "classic", "ekonomik", "economy", "promo"]
         )
     # Kaizen: Add Suite synonyms (Turkish)
-    if "suite" in target_room_type.lower():
+    if "suite" in t_lower:
         target_variants.append("süit")
     # Kaizen: Add Deluxe/Superior synonyms
-    if any(k in target_room_type.lower() for k in ["deluxe", "superior", "premium"]):
+    if any(k in t_lower for k in _DELUXE_KEYS):
         target_variants.extend(["deluxe", "superior", "premium", "corner"])
     # Kaizen: Add Family synonyms
-    if any(k in target_room_type.lower() for k in ["family", "aile"]):
-        target_variants.extend(
-            ["family", "aile", "connection", "connected", "bağlantılı"]
-        )
-
-    for r in r_types:
-        if not isinstance(r, dict):
-            continue
-        r_name = (r.get("name") or "").lower()
-        c_name = (r.get("canonical_name") or "").lower()
-        c_code = (r.get("canonical_code") or "").upper()
-
-        # Priority 1: Canonical Code Match (Highest confidence)
-        if target_room_type.lower() in ["standard", "standart"] and c_code == "STD":
-            return _extract_price(r.get("price")), r.get("name") or "Standard", 0.95
-
-        # Priority 2: Canonical Name Match
-        if any(v in c_name for v in target_variants):
-            # Apply guards even to substring matches
-            if "suite" in target_room_type.lower() and not any(
-                k in c_name for k in ["suite", "süit"]
-            ):
-                continue
-            return _extract_price(r.get("price")), r.get("name") or "Standard", 0.9
-
-        # Priority 3: Name Substring Match
-        if any(v in r_name for v in target_variants):
-            # Apply guards: If asking for Suite/Deluxe, don't match a plain Standard
-            t_low = target_room_type.lower()
-            is_std_t = any(s in t_low for s in ["standard", "standart"])
-            is_std_r = any(s in r_name for s in ["standard", "standart"])
-
-            if "suite" in t_low and not any(k in r_name for k in ["suite", "süit"]):
-                continue
-            if (
-                not is_std_t
-                and is_std_r
-                and "deluxe" not in r_name
-                and "superior" not in r_name
-            ):
-                continue
-
-            return _extract_price(r.get("price")), r.get("name") or "Standard", 0.85
+    if any(k in t_lower for k in ["family", "aile"]):
+        target_variants.extend(["family", "aile", "connection", "connected", "bağlantılı"])
 
     # --- FALLBACK LOGIC ---
-
     # 1. Define Request Type (Standard vs Specific)
     # We treat it as a Standard request if the prompt is empty or contains base keywords (Standard, Classic, etc.)
     # and DOES NOT contain specific premium keywords (Suite, Deluxe, Family).
-    target_low = target_room_type.lower().strip()
+    target_low = t_lower.strip()
     is_premium = any(
         k in target_low
         for k in [
@@ -304,64 +247,193 @@ def get_price_for_room(
         or target_low == "oda"
         or any(
             v in target_low
-            for v in [
-                "standard",
-                "standart",
-                "base",
-                "klasik",
-                "classic",
-                "eco",
-                "promo",
-            ]
+            for v in ["standard", "standart", "base", "klasik", "classic", "eco", "promo"]
         )
     )
 
-    # A request is "Standard" if it's explicitly base OR empty, and NOT specifically premium.
-    is_standard_request = (is_base and not is_premium) or not target_room_type
-
-    # KAIZEN: "Premium Shield"
-    # Even if is_standard_request is True, we must ensure the candidate room
-    # doesn't contain heavy premium keywords that might have been miscategorized.
-    premium_shields = [
-        "presidential",
-        "başkanlık",
-        "kral",
-        "king suite",
-        "queen suite",
-        "balayı",
-        "honeymoon",
-        "dubleks",
-        "duplex",
-    ]
-
-    # 2. Standard Fallback: Lowest price in room_types (for Standard requests only)
-    if is_standard_request and r_types:
-        valid_prices = []
+    return _RoomTypeSpec(
+        room_type=target_room_type,
+        is_standard=any(s in t_lower for s in _STANDARD_KEYS),
+        has_suite="suite" in t_lower,
+        is_deluxe=any(k in t_lower for k in _DELUXE_KEYS),
+        is_std_code=t_lower in ("standard", "standart"),
+        # One regex search replaces any(v in name for v in target_variants)
+        variants=re.compile("|".join(re.escape(v) for v in target_variants)),
+        # A request is "Standard" if it's explicitly base OR empty, and NOT specifically premium.
+        is_standard_request=(is_base and not is_premium) or not target_room_type,
+    )
+
+
+class RoomPriceMatcher:
+    """
+    `get_price_for_room` compiled for one (room_type, allowed_room_names_map).
+
+    Why: Analysis matches every log of a 90-day window, most of them several
+    times (rank list, calendar groups, continuity fallbacks, seeds). The room
+    type's variants and guard flags are derived once, allowed names are
+    lower-cased once per hotel, and with memoize=True each log is matched once
+    for the life of the matcher (one analysis pass).
+    """
+
+    def __init__(
+        self,
+        target_room_type: str,
+        allowed_room_names_map: Dict[str, Any],
+        memoize: bool = False,
+    ):
+        self.target_room_type = target_room_type
+        self.allowed_room_names_map = allowed_room_names_map
+        self._spec = _compile_room_type(target_room_type)
+        self._allowed_lower: Dict[str, set] = {}
+        self._memo: Optional[Dict[int, Tuple[Dict[str, Any], Tuple]]] = (
+            {} if memoize else None
+        )
+
+    def price(self, price_log: Dict[str, Any]) -> Optional[float]:
+        return self.match(price_log)[0]
+
+    def match(
+        self, price_log: Dict[str, Any]
+    ) -> Tuple[Optional[float], Optional[str], float]:
+        """Same (price, matched_name, score) as `get_price_for_room`."""
+        memo = self._memo
+        if memo is None:
+            return self._match(price_log)
+        # Keyed by identity; the stored log keeps the id from being reused
+        hit = memo.get(id(price_log))
+        if hit is not None and hit[0] is price_log:
+            return hit[1]
+        result = self._match(price_log)
+        memo[id(price_log)] = (price_log, result)
+        return result
+
+    def _match(
+        self, price_log: Dict[str, Any]
+    ) -> Tuple[Optional[float], Optional[str], float]:
+        spec = self._spec
+        r_types = price_log.get("room_types") or []
+        if not isinstance(r_types, list):
+            return _NO_MATCH
+
+        # 1. Check for Semantic Match first (if map exists)
+        hid = str(price_log.get("hotel_id", ""))
+        allowed_names = self.allowed_room_names_map.get(hid)
+
+        if allowed_names:
+            allowed_lower = self._allowed_lower.get(hid)
+            if allowed_lower is None:
+                # Lowercase set for O(1) case-insensitive lookup, built once per hotel
+                allowed_lower = {a.lower().strip() for a in allowed_names}
+                self._allowed_lower[hid] = allowed_lower
+            for r in r_types:
+                if not isinstance(r, dict):
+                    continue
+                r_name = r.get("name", "")
+                if r_name.lower().strip() not in allowed_lower:
+                    continue
+                # KAIZEN: "Strict Category Guards"
+                # We ensure that a match actually belongs to the requested category.
+                r_lower = r_name.lower()
+                is_standard_r = "standard" in r_lower or "standart" in r_lower
+
+                # 1. Suite Guard: If asking for Suite, offer MUST have "suite" or "süit"
+                if spec.has_suite and "suite" not in r_lower and "süit" not in r_lower:
+                    continue
+
+                # 2. Deluxe Guard: If asking for Deluxe, reject plain Standard rooms
+                if spec.is_deluxe and is_standard_r and "deluxe" not in r_lower:
+                    continue
+
+                # 3. Standard Leak Guard: If asking for specific non-standard type, reject plain Standard
+                if not spec.is_standard and is_standard_r:
+                    # Exception: "Standard Suite" is fine if asking for Suite
+                    if not (spec.has_suite and "suite" in r_lower):
+                        continue
+
+                return (
+                    _extract_price(r.get("price")),
+                    r_name,
+                    0.82 + (0.1 * int(r_name == spec.room_type)),
+                )
+
+        # 2. Fallback: String Match (Substring) with Turkish/English variant support
+        has_variant = spec.variants.search
         for r in r_types:
             if not isinstance(r, dict):
                 continue
             r_name = (r.get("name") or "").lower()
+            c_name = (r.get("canonical_name") or "").lower()
+            c_code = (r.get("canonical_code") or "").upper()
 
-            # Skip rooms that hit the premium shield
-            if any(k in r_name for k in premium_shields):
-                continue
+            # Priority 1: Canonical Code Match (Highest confidence)
+            if spec.is_std_code and c_code == "STD":
+                return _extract_price(r.get("price")), r.get("name") or "Standard", 0.95
+
+            # Priority 2: Canonical Name Match
+            if has_variant(c_name):
+                # Apply guards even to substring matches
+                if spec.has_suite and "suite" not in c_name and "süit" not in c_name:
+                    continue
+                return _extract_price(r.get("price")), r.get("name") or "Standard", 0.9
+
+            # Priority 3: Name Substring Match
+            if has_variant(r_name):
+                # Apply guards: If asking for Suite/Deluxe, don't match a plain Standard
+                is_std_r = "standard" in r_name or "standart" in r_name
+                if spec.has_suite and "suite" not in r_name and "süit" not in r_name:
+                    continue
+                if (
+                    not spec.is_standard
+                    and is_std_r
+                    and "deluxe" not in r_name
+                    and "superior" not in r_name
+                ):
+                    continue
 
-            p = _extract_price(r.get("price"))
-            if p is not None:
-                valid_prices.append((p, r.get("name") or "Standard (Min)"))
-        if valid_prices:
-            valid_prices.sort(key=lambda x: x[0])
-            return valid_prices[0][0], valid_prices[0][1], 0.65
+                return _extract_price(r.get("price")), r.get("name") or "Standard", 0.85
 
-    # 3. Legacy Fallback: Top-level price if rooms are empty (for Standard requests only)
-    if is_standard_request and not r_types:
+        # 4. Final Fail: no specific room match for non-Standard requests.
+        # We return None to indicate no data for this specific room type, preventing leakage.
+        if not spec.is_standard_request:
+            return _NO_MATCH
+
+        # 2. Standard Fallback: Lowest price in room_types (for Standard requests only)
+        if r_types:
+            best: Optional[Tuple[float, str]] = None
+            for r in r_types:
+                if not isinstance(r, dict):
+                    continue
+                # Skip rooms that hit the premium shield
+                if _PREMIUM_SHIELD_RE.search((r.get("name") or "").lower()):
+                    continue
+                p = _extract_price(r.get("price"))
+                # Strict '<' keeps the first of equal prices, like the former stable sort
+                if p is not None and (best is None or p < best[0]):
+                    best = (p, r.get("name") or "Standard (Min)")
+            if best is not None:
+                return best[0], best[1], 0.65
+            return _NO_MATCH
+
+        # 3. Legacy Fallback: Top-level price if rooms are empty (for Standard requests only)
         top_p = _extract_price(price_log.get("price"))
         if top_p is not None and top_p > 0:
             return top_p, "Standard (Legacy)", 0.7
+        return _NO_MATCH
+
+
+def get_price_for_room(
+    price_log: Dict[str, Any],
+    target_room_type: str,
+    allowed_room_names_map: Dict[str, List[str]],
+) -> Tuple[Optional[float], Optional[str], float]:
+    """
+    Finds the best matching room price within a price log.
 
-    # 4. Final Fail: If we reach here, we have no specific room match.
-    # We return None to indicate no data for this specific room type, preventing leakage.
-    return None, None, 0.0
+    Why: Hotel listings have many room types (Standard, Deluxe, etc.).
+    We use high-confidence semantic matching to compare apples-to-apples.
+    For many logs, build one `RoomPriceMatcher` and reuse it instead.
+    """
+    return RoomPriceMatcher(target_room_type, allowed_room_names_map).match(price_log)
 
 
 def generate_synthetic_narrative(
@@ -635,33 +707,36 @@ def generate_audit_checklist(target_h: dict, market_avg_scores: dict) -> list:
     return checklist[:3]  # Max 3 items
 
 
-async def perform_market_analysis(
-    user_id: str,
-    hotels: List[Dict[str, Any]],
-    hotel_prices_map: Dict[str, List[Dict[str, Any]]],
-    display_currency: str,
-    room_type: str,
-    start_date: Optional[str],
-    end_date: Optional[str],
-    allowed_room_names_map: Dict[str, List[str]],
-) -> Dict[str, Any]:
+def price_log_sort_key(log: Dict[str, Any]) -> Tuple[str, str]:
     """
-    Executes the core market analysis logic.
+    Newest-first ordering key for price logs (use with reverse=True).
 
-    Why: This is the heavy lifting of the Dashboard. It calculates Price Rank,
-    Market Average, Sentiment Index, and the Quadrant Status.
-    Extracted from main.py to improve AI responsiveness and modularity.
+    Why: `perform_market_analysis` treats each hotel's list as sorted by
+    recorded_at DESC. The id breaks ties so the full and incremental
+    (market_engine) paths always agree on which log is "latest".
     """
-    current_prices: List[float] = []
+    return (str(log.get("recorded_at") or ""), str(log.get("id") or ""))
+
+
+def _checkin_key(log: Dict[str, Any]) -> str:
+    return str(log.get("check_in_date", "")).split("T")[0]
+
+
+def _is_standard_request(room_type: str) -> bool:
+    return not room_type or any(
+        s in room_type.lower() for s in ["standard", "standart"]
+    )
+
+
+def _select_target(
+    hotels: List[Dict[str, Any]],
+) -> Tuple[Optional[str], str, float, List[float]]:
+    """Returns (target_hotel_id, target_hotel_name, target_sentiment, market_sentiments)."""
     market_sentiments: List[float] = []
-    target_history: List[Dict[str, Any]] = []
-    target_price: Optional[float] = None
     target_hotel_id: Optional[str] = None
     target_hotel_name: str = "Unknown Hotel"
     target_sentiment: float = 0.0
-    price_rank_list: List[Dict[str, Any]] = []
 
-    # 1. Map Prices and Find Target
     # [KAIZEN] Consistent Target Selection: We pick the FIRST target hotel
     # encountered in the sorted list to ensure it matches the ID used for log mapping.
     for hotel in hotels:
@@ -686,28 +761,35 @@ async def perform_market_analysis(
         target_hotel_name = hotels[0].get("name") or "Unknown"
         target_sentiment = float(hotels[0].get("rating") or 0.0)
 
-    # 2. Build price rank list
-    available_room_types = set()
+    return target_hotel_id, target_hotel_name, target_sentiment, market_sentiments
+
+
+def _rank_hotels(
+    hotels: List[Dict[str, Any]],
+    hotel_prices_map: Dict[str, List[Dict[str, Any]]],
+    target_hotel_id: Optional[str],
+    matcher: RoomPriceMatcher,
+    display_currency: str,
+) -> Tuple[List[Dict[str, Any]], List[float], Optional[float], List[Dict[str, Any]]]:
+    """
+    Builds the price rank list from each hotel's latest log.
+    Only reads the first 30 logs per hotel.
+    Returns (price_rank_list, current_prices, target_price, target_history).
+    """
+    current_prices: List[float] = []
+    target_history: List[Dict[str, Any]] = []
+    target_price: Optional[float] = None
+    price_rank_list: List[Dict[str, Any]] = []
 
     for hotel in hotels:
         hid = str(hotel["id"])
         is_target = hid == target_hotel_id
         prices = hotel_prices_map.get(hid, [])
 
-        # Track all room types for filter UI
-        for p in prices:
-            rt = p.get("room_types")
-            if isinstance(rt, list):
-                for r in rt:
-                    if isinstance(r, dict) and r.get("name"):
-                        available_room_types.add(r["name"])
-
         if prices:
             try:
                 lead_currency = prices[0].get("currency") or "USD"
-                orig_price, matched_room, match_score = get_price_for_room(
-                    prices[0], room_type, allowed_room_names_map
-                )
+                orig_price, matched_room, match_score = matcher.match(prices[0])
 
                 if orig_price is not None:
                     # Detect Sellout (0.0 or less)
@@ -742,9 +824,7 @@ async def perform_market_analysis(
                         # Explicitly slice prices to avoid linter issues
                         p_subset = prices[:30]
                         for p in p_subset:
-                            hist_price, _, _ = get_price_for_room(
-                                p, room_type, allowed_room_names_map
-                            )
+                            hist_price, _, _ = matcher.match(p)
                             if hist_price is not None:
                                 target_history.append(
                                     {
@@ -763,7 +843,16 @@ async def perform_market_analysis(
     for i, item in enumerate(price_rank_list):
         item["rank"] = i + 1
 
-    # 2.5 Build Competitors List (Needed for Calendar Columns & Continuity)
+    return price_rank_list, current_prices, target_price, target_history
+
+
+def _competitor_list(
+    hotels: List[Dict[str, Any]],
+    hotel_prices_map: Dict[str, List[Dict[str, Any]]],
+    target_hotel_id: Optional[str],
+    matcher: RoomPriceMatcher,
+    display_currency: str,
+) -> List[Dict[str, Any]]:
     # EXPLANATION: All-inclusive Competitor List
     # We include EVERY tracked competitor in the top-level list, even if their latest scan
     # matched no price for the current filter. This ensures the Rate Intelligence Grid
@@ -781,9 +870,7 @@ async def perform_market_analysis(
 
         if p:
             try:
-                latest_p, latest_room, latest_score = get_price_for_room(
-                    p[0], room_type, allowed_room_names_map
-                )
+                latest_p, latest_room, latest_score = matcher.match(p[0])
                 if latest_p is not None:
                     latest_comp_price = convert_currency(
                         latest_p, p[0].get("currency") or "USD", display_currency
@@ -809,349 +896,455 @@ async def perform_market_analysis(
                 "match_score": c_score,
             }
         )
+    return comp_list
 
-    # 3. Build Daily Prices for Calendar (Smart Continuity)
-    daily_prices: List[Dict[str, Any]] = []
-    if target_hotel_id:
-        # EXPLANATION: Smart Continuity (Read-Time Vertical Fill)
-        # We group logs by hotel and check-in date. For each date:
-        # 1. We take the latest scan result.
-        # 2. If it failed (price=0 or None), we look back at previous scans for that SAME check-in date.
-        # 3. If a successful scan is found within history, we use it and mark as 'Estimated'.
-        date_price_map: Dict[str, Dict[str, Any]] = {}
 
-        today_date = date.today()
-        for hid, prices in hotel_prices_map.items():
-            # prices are sorted by recorded_at DESC
-            # Group by check-in date
-            checkin_groups = {}
-            for p in prices:
-                d = str(p.get("check_in_date", "")).split("T")[0]
-                if not d:
-                    continue
-                if d not in checkin_groups:
-                    checkin_groups[d] = []
-                checkin_groups[d].append(p)
-
-            for d_str, logs in checkin_groups.items():
-                if d_str not in date_price_map:
-                    date_price_map[d_str] = {
-                        "target": None,
-                        "target_is_estimated": False,
-                        "target_intraday": [],
-                        "competitors": [],
-                    }
+def _summarize_checkin_logs(
+    logs: List[Dict[str, Any]],
+    price_of: Callable[[Dict[str, Any]], Optional[float]],
+    room_type: str,
+) -> Tuple[Optional[float], bool, List[Dict[str, Any]]]:
+    """
+    Calendar cell for one hotel and check-in date, from its logs (newest first).
 
-                # EXPLANATION: Intraday Event Collection
-                # We collect ALL unique successful scan prices for this check-in date
-                # to show the "price story" of the day in the UI.
-                # [KAİZEN] Multi-Vendor Price Milestone Extraction (Refined)
-                # Why: Showing every single scan creates clutter. We now only show
-                # the "story" by picking the Highest, Lowest, and most recent pulses.
-                all_raw_events = []
-                for log_entry in logs:
-                    # 1. Primary Matched Price
-                    lp, _, _ = get_price_for_room(log_entry, room_type, allowed_room_names_map)
-                    if lp and lp > 0:
-                        all_raw_events.append(
-                            {
-                                "price": round(float(lp), 2),
-                                "recorded_at": log_entry.get("recorded_at"),
-                                "vendor": log_entry.get("vendor") or "Primary",
-                            }
-                        )
+    Returns (price, is_estimated, intraday_events) before the any-date fallback,
+    which needs the hotel's other check-in dates.
+    """
+    # EXPLANATION: Intraday Event Collection
+    # We collect ALL unique successful scan prices for this check-in date
+    # to show the "price story" of the day in the UI.
+    # [KAİZEN] Multi-Vendor Price Milestone Extraction (Refined)
+    # Why: Showing every single scan creates clutter. We now only show
+    # the "story" by picking the Highest, Lowest, and most recent pulses.
+    is_std_req = _is_standard_request(room_type)
+    all_raw_events = []
+    for log_entry in logs:
+        # 1. Primary Matched Price
+        lp = price_of(log_entry)
+        if lp and lp > 0:
+            all_raw_events.append(
+                {
+                    "price": round(float(lp), 2),
+                    "recorded_at": log_entry.get("recorded_at"),
+                    "vendor": log_entry.get("vendor") or "Primary",
+                }
+            )
 
-                    # 2. Market Low Price (Standard rooms only)
-                    is_std_req = not room_type or any(
-                        s in room_type.lower() for s in ["standard", "standart"]
+        # 2. Market Low Price (Standard rooms only)
+        if is_std_req:
+            other_offers = log_entry.get("parity_offers") or log_entry.get("offers") or []
+            parity_prices = []
+            for offer in other_offers:
+                op = _extract_price(offer.get("price"))
+                if op and op > 0:
+                    parity_prices.append(
+                        (
+                            round(float(op), 2),
+                            offer.get("vendor") or "Market",
+                        )
                     )
-                    if is_std_req:
-                        other_offers = log_entry.get("parity_offers") or log_entry.get("offers") or []
-                        parity_prices = []
-                        for offer in other_offers:
-                            op = _extract_price(offer.get("price"))
-                            if op and op > 0:
-                                parity_prices.append(
-                                    (
-                                        round(float(op), 2),
-                                        offer.get("vendor") or "Market",
-                                    )
-                                )
 
-                        if parity_prices:
-                            min_p, min_v = min(parity_prices, key=lambda x: x[0])
-                            all_raw_events.append(
-                                {
-                                    "price": min_p,
-                                    "recorded_at": log_entry.get("recorded_at"),
-                                    "vendor": f"Min: {min_v}",
-                                }
-                            )
-
-                intraday_events = []
-                if all_raw_events:
-                    # Select Milestone: Highest, Lowest, and Last
-                    # 1. Last (Latest scan time)
-                    last_event = max(
-                        all_raw_events, key=lambda x: x["recorded_at"] or ""
-                    )
-                    # 2. Highest price
-                    high_event = max(all_raw_events, key=lambda x: x["price"])
-                    # 3. Lowest price
-                    low_event = min(all_raw_events, key=lambda x: x["price"])
-
-                    # Deduplicate milestones and attach labels
-                    ms_map = {}
-                    for ev, label in [
-                        (high_event, "High"),
-                        (low_event, "Low"),
-                        (last_event, "Last"),
-                    ]:
-                        ms_key = (ev["price"], (ev["recorded_at"] or "")[:16])
-                        if ms_key not in ms_map:
-                            # Create a copy to avoid mutating the same dict multiple times
-                            ms_map[ms_key] = dict(ev)
-                            ms_map[ms_key]["label"] = label
-                        else:
-                            # Append label if not already present
-                            if label not in ms_map[ms_key]["label"]:
-                                ms_map[ms_key]["label"] += f"/{label}"
-
-                    # Convert map back to chronological list
-                    intraday_events = list(ms_map.values())
-                    intraday_events.sort(key=lambda x: x["recorded_at"] or "")
-
-                # 1. Analyze the logs for this specific check-in date
-                latest = logs[0]
-                price_val, _, _ = get_price_for_room(
-                    latest, room_type, allowed_room_names_map
+            if parity_prices:
+                min_p, min_v = min(parity_prices, key=lambda x: x[0])
+                all_raw_events.append(
+                    {
+                        "price": min_p,
+                        "recorded_at": log_entry.get("recorded_at"),
+                        "vendor": f"Min: {min_v}",
+                    }
                 )
-                is_est = latest.get("is_estimated", False)
 
-                # 1. Look back for SAME check-in date (Same-Date Continuity)
-                if (price_val is None or price_val <= 0) and len(logs) > 1:
-                    try:
-                        latest_str = latest.get("recorded_at", "").replace(
-                            "Z", "+00:00"
-                        )
-                        latest_time = datetime.fromisoformat(latest_str)
+    intraday_events = []
+    if all_raw_events:
+        # Select Milestone: Highest, Lowest, and Last
+        # 1. Last (Latest scan time)
+        last_event = max(all_raw_events, key=lambda x: x["recorded_at"] or "")
+        # 2. Highest price
+        high_event = max(all_raw_events, key=lambda x: x["price"])
+        # 3. Lowest price
+        low_event = min(all_raw_events, key=lambda x: x["price"])
+
+        # Deduplicate milestones and attach labels
+        ms_map = {}
+        for ev, label in [
+            (high_event, "High"),
+            (low_event, "Low"),
+            (last_event, "Last"),
+        ]:
+            ms_key = (ev["price"], (ev["recorded_at"] or "")[:16])
+            if ms_key not in ms_map:
+                # Create a copy to avoid mutating the same dict multiple times
+                ms_map[ms_key] = dict(ev)
+                ms_map[ms_key]["label"] = label
+            else:
+                # Append label if not already present
+                if label not in ms_map[ms_key]["label"]:
+                    ms_map[ms_key]["label"] += f"/{label}"
 
-                        for prev in logs[1:]:
-                            prev_str = prev.get("recorded_at", "").replace(
-                                "Z", "+00:00"
-                            )
-                            prev_time = datetime.fromisoformat(prev_str)
+        # Convert map back to chronological list
+        intraday_events = list(ms_map.values())
+        intraday_events.sort(key=lambda x: x["recorded_at"] or "")
 
-                            if (latest_time - prev_time).days <= 7:
-                                prev_p, _, _ = get_price_for_room(
-                                    prev, room_type, allowed_room_names_map
-                                )
-                                if prev_p and prev_p > 0:
-                                    price_val = prev_p
-                                    is_est = True
-                                    break
-                    except Exception:
-                        pass
-
-                # 2. Global Fallback for this Hotel (Any-Date Continuity) - RESTRICTED
-                # Why: We only use cross-date continuity for dates in the past or today.
-                # For future dates, we ONLY show data if a scan exists for that specific check-in date.
-                # KAİZEN: Re-enabled for all types, but strict matching in get_price_for_room
-                # prevents Standard leakage into non-Standard views.
-                if (price_val is None or price_val <= 0) and datetime.strptime(
-                    d_str, "%Y-%m-%d"
-                ).date() <= today_date:
-                    all_hotel_logs = hotel_prices_map.get(hid, [])
-                    for fallback_log in all_hotel_logs:
-                        fb_p, _, _ = get_price_for_room(
-                            fallback_log, room_type, allowed_room_names_map
-                        )
-                        if fb_p and fb_p > 0:
-                            price_val = fb_p
-                            is_est = True
-                            break
-
-                if price_val is not None:
-                    converted_price = convert_currency(
-                        price_val, latest.get("currency") or "USD", display_currency
-                    )
-                    hotel_name = next(
-                        (h["name"] for h in hotels if str(h["id"]) == hid), "Unknown"
-                    )
+    # 1. Analyze the logs for this specific check-in date
+    latest = logs[0]
+    price_val = price_of(latest)
+    is_est = latest.get("is_estimated", False)
 
-                    if hid == target_hotel_id:
-                        date_price_map[d_str]["target"] = converted_price
-                        date_price_map[d_str]["target_is_estimated"] = is_est
-                        date_price_map[d_str]["target_intraday"] = intraday_events
-                    else:
-                        date_price_map[d_str]["competitors"].append(
-                            {
-                                "name": hotel_name,
-                                "price": converted_price,
-                                "is_estimated": is_est,
-                                "intraday_events": intraday_events,
-                            }
-                        )
+    # Look back for SAME check-in date (Same-Date Continuity)
+    if (price_val is None or price_val <= 0) and len(logs) > 1:
+        try:
+            latest_str = latest.get("recorded_at", "").replace("Z", "+00:00")
+            latest_time = datetime.fromisoformat(latest_str)
+
+            for prev in logs[1:]:
+                prev_str = prev.get("recorded_at", "").replace("Z", "+00:00")
+                prev_time = datetime.fromisoformat(prev_str)
+
+                if (latest_time - prev_time).days <= 7:
+                    prev_p = price_of(prev)
+                    if prev_p and prev_p > 0:
+                        price_val = prev_p
+                        is_est = True
+                        break
+        except Exception:
+            pass
 
-        range_start = datetime.now()
-        if start_date:
-            try:
-                ds = str(start_date).split("T")[0]
-                range_start = datetime.strptime(ds, "%Y-%m-%d")
-            except Exception:
-                pass
+    return price_val, is_est, intraday_events
 
-        range_end = range_start + timedelta(days=30)
-        if end_date:
-            try:
-                de = str(end_date).split("T")[0]
-                range_end = datetime.strptime(de, "%Y-%m-%d")
-            except Exception:
-                pass
 
-        curr = range_start
-        # EXPLANATION: Relative-Date Continuity Seeding
-        # We find the most recent scan BEFORE our window starts to avoid the "sticky price"
-        # issue where navigating backwards still shows today's prices.
-        last_known_target = None
-        target_logs = hotel_prices_map.get(target_hotel_id, [])
-        for log in target_logs:
-            log_date = str(log.get("check_in_date", "")).split("T")[0]
-            if log_date <= range_start.strftime("%Y-%m-%d"):
-                lp, _, _ = get_price_for_room(log, room_type, allowed_room_names_map)
-                if lp and lp > 0:
-                    last_known_target = convert_currency(
-                        lp, log.get("currency") or "USD", display_currency
-                    )
-                    break
+_SAME_DATE_LOOKBACK_US = 8 * 86400 * 1_000_000  # timedelta.days <= 7
 
-        # If still None, fall back to the very latest known price for this room_type
-        if last_known_target is None:
-            last_known_target = target_price
-        # Relative Seeding for Competitors
-        # We find the most recent scan for each competitor BEFORE our window starts.
-        competitor_states: Dict[str, Dict[str, Any]] = {}
-        for h in hotels:
-            if str(h["id"]) == target_hotel_id:
-                continue
-            h_name = h.get("name")
-            h_logs = hotel_prices_map.get(str(h["id"]), [])
-            for log in h_logs:
-                log_date = str(log.get("check_in_date", "")).split("T")[0]
-                if log_date <= range_start.strftime("%Y-%m-%d"):
-                    lp, _, _ = get_price_for_room(
-                        log, room_type, allowed_room_names_map
-                    )
-                    if lp and lp > 0:
-                        competitor_states[h_name] = {
-                            "price": convert_currency(
-                                lp, log.get("currency") or "USD", display_currency
-                            ),
-                            "is_estimated": True,
-                        }
-                        break
 
-        # Fallback to comp_list (latest overall) for any competitors still missing
-        for c in comp_list:
-            if c["name"] not in competitor_states:
-                competitor_states[c["name"]] = {
-                    "price": c["price"],
-                    "is_estimated": True,
-                }
+def _round_cents(values: np.ndarray) -> np.ndarray:
+    """round(v, 2) per value; whole-number prices (the common case) stay in NumPy."""
+    out = values.copy()
+    frac = np.flatnonzero(out != np.floor(out))
+    if len(frac):
+        out[frac] = [round(v, 2) for v in values[frac].tolist()]
+    return out
 
-        today_date = datetime.now().date()
-        while curr.date() <= range_end.date():
-            current_date = curr.date()
-            d_str = curr.strftime("%Y-%m-%d")
-            data = date_price_map.get(d_str)
-
-            comp_avg = 0.0
-            vs_comp = 0.0
-            unique_competitors = []
-            target_val = None
-
-            # 1. Target Logic (Primary + Conditional Forward Fill)
-            # EXPLANATION: Restricted Forward Fill (Kaizen)
-            # Why: The user wants to avoid misleading 'estimated' prices for future dates.
-            # We only forward-fill missing grid days if the date is in the past OR
-            # if we have actual scan data for that specific future date.
-            if data and data["target"] is not None:
-                last_known_target = float(data["target"])
-                target_val = last_known_target
-            elif last_known_target is not None and current_date <= today_date:
-                # [KAİZEN] Carry forward ONLY for past/today to fill gaps in historical records.
-                # For future dates, we leave it empty if no specific scan exists.
-                target_val = last_known_target
-
-            # 2. Competitor Logic (Conditional Full Fill)
-            daily_comps = (data.get("competitors") if data else []) or []
-
-            # Update state for current check-in date matches
-            for c in daily_comps:
-                competitor_states[c["name"]] = {
-                    "price": c["price"],
-                    "is_estimated": c.get("is_estimated", False),
-                }
 
-            seen_competitors = set()
-            for c in daily_comps:
-                if c["name"] not in seen_competitors:
-                    unique_competitors.append(c)
-                    seen_competitors.add(c["name"])
-
-            # Horizontal Continuity (Competitor Fill) - RESTRICTED TO PAST/TODAY
-            for name, state in competitor_states.items():
-                if name not in seen_competitors:
-                    # Carry competitor prices forward ONLY for past/today dates.
-                    if current_date <= today_date:
-                        unique_competitors.append(
-                            {
-                                "name": name,
-                                "price": state["price"],
-                                "is_estimated": True,
-                            }
-                        )
-                        seen_competitors.add(name)
-
-            if unique_competitors:
-                valid_comp_prices = [
-                    float(c["price"])
-                    for c in unique_competitors
-                    if c.get("price") is not None
-                ]
-                if valid_comp_prices:
-                    comp_avg = sum(valid_comp_prices) / len(valid_comp_prices)
-
-                if target_val:
-                    vs_comp = (
-                        ((target_val - comp_avg) / comp_avg) * 100
-                        if comp_avg > 0
-                        else 0.0
-                    )
+def _cheapest_parity_offers(
+    frame: PriceLogFrame, rows: np.ndarray
+) -> Tuple[np.ndarray, np.ndarray, List[Any]]:
+    """
+    For each of `rows`, its cheapest offer with a valid price, as the intraday
+    "Min:" event picks it. Returns (offer index per frame row or -1, rounded
+    offer prices, offers).
+    """
+    off_rows, offers = frame.offers(include_legacy=True, rows=rows)
+    prices = float_column(
+        list(map(dict.get, offers, repeat("price"))), _extract_price
+    )
+    valid = np.flatnonzero(prices > 0)
+    rounded = np.full(len(offers), np.nan)
+    rounded[valid] = _round_cents(prices[valid])
+    cheapest = first_extreme_per_group(
+        off_rows[valid], rounded[valid], len(frame), largest=False
+    )
+    has = cheapest >= 0
+    cheapest[has] = valid[cheapest[has]]
+    return cheapest, rounded, offers
 
-            # KAİZEN: Sellout Detection for Calendar
-            # If the final target_val is 0, we mark the DAY as sellout.
-            # (Note: target_val might be None if restricted due to future date)
-            is_day_sellout = target_val is not None and target_val <= 0
 
-            daily_prices.append(
-                {
-                    "date": d_str,
-                    "price": round(float(target_val), 2)
-                    if target_val is not None
-                    else None,
-                    "is_estimated_target": data.get("target_is_estimated", False)
-                    if data
-                    else False,
-                    "intraday_events": data.get("target_intraday", []) if data else [],
-                    "is_sellout": is_day_sellout,  # Tag for frontend "Possible Sellout"
-                    "comp_avg": round(float(comp_avg), 2),
-                    "vs_comp": round(float(vs_comp), 1),
-                    "competitors": unique_competitors,
-                }
+def _summarize_checkin_frame(
+    frame: PriceLogFrame, room_type: str
+) -> List[Tuple[int, int, int, Optional[float], Any, List[Dict[str, Any]]]]:
+    """
+    `_summarize_checkin_logs` for every (hotel, check-in date) group of `frame`
+    at once; `frame.price` must be the matched room price.
+
+    Returns (hotel code, check-in code, latest row, price, is_estimated,
+    intraday_events) per group, ordered by hotel code. Rows without a check-in
+    date are skipped, as in the per-group loop.
+    """
+    rows = frame.rows
+    price = frame.price
+    valid = price > 0
+    labels = frame.checkin_dates
+    keep = frame.checkin != (0 if labels and labels[0] == "" else -1)
+    sel = np.flatnonzero(keep)
+    order, starts, ends = group_runs(frame.hotel[sel], frame.checkin[sel])
+    if not len(starts):
+        return []
+    order = sel[order]
+    n_groups = len(starts)
+    gid = np.repeat(np.arange(n_groups), ends - starts)
+    first = order[starts]
+
+    # Intraday events, in the order the per-group loop emits them: per log
+    # (newest first) its matched price, then its cheapest parity offer.
+    primary = np.flatnonzero(valid[order])
+    ev_pos = 2 * primary
+    ev_price = _round_cents(price[order[primary]])
+    offers: List[Any] = []
+    if _is_standard_request(room_type):
+        cheapest, offer_prices, offers = _cheapest_parity_offers(frame, sel)
+        parity = np.flatnonzero(cheapest[order] >= 0)
+        ev_pos = np.concatenate((ev_pos, 2 * parity + 1))
+        ev_price = np.concatenate((ev_price, offer_prices[cheapest[order[parity]]]))
+        by_pos = np.argsort(ev_pos, kind="stable")
+        ev_pos, ev_price = ev_pos[by_pos], ev_price[by_pos]
+    ev_rows = order[ev_pos // 2]
+    ev_groups = gid[ev_pos // 2]
+    high = first_extreme_per_group(ev_groups, ev_price, n_groups, largest=True)
+    low = first_extreme_per_group(ev_groups, ev_price, n_groups, largest=False)
+    last = first_extreme_per_group(
+        ev_groups, frame.recorded_rank[ev_rows], n_groups, largest=True
+    )
+
+    ev_rows_l, ev_pos_l, ev_price_l = ev_rows.tolist(), ev_pos.tolist(), ev_price.tolist()
+
+    def event(k: int) -> Dict[str, Any]:
+        row = rows[ev_rows_l[k]]
+        if ev_pos_l[k] & 1:
+            vendor = f"Min: {offers[cheapest[ev_rows_l[k]]].get('vendor') or 'Market'}"
+        else:
+            vendor = row.get("vendor") or "Primary"
+        return {
+            "price": ev_price_l[k],
+            "recorded_at": row.get("recorded_at"),
+            "vendor": vendor,
+        }
+
+    # Same-Date Continuity for groups whose latest scan failed: the first older
+    # log within 7 days with a valid price. A recorded_at that does not parse (or
+    # mixes naive and aware) ended the look-back in the loop, so it stops here too.
+    fallback = np.full(n_groups, -1, dtype=np.int64)
+    need = ~valid[first] & (ends - starts > 1)
+    if need.any():
+        positions = np.flatnonzero(need[gid])
+        us = np.zeros(len(order), dtype=np.int64)
+        aware = np.zeros(len(order), dtype=bool)
+        ok = np.zeros(len(order), dtype=bool)
+        us[positions], aware[positions], ok[positions] = frame.recorded_epoch_us(
+            order[positions]
+        )
+        heads = starts[gid]
+        stop = np.zeros(len(order), dtype=bool)
+        stop[positions] = (positions != heads[positions]) & (
+            ~ok[positions]
+            | (aware[positions] != aware[heads[positions]])
+            | (
+                (us[heads[positions]] - us[positions] < _SAME_DATE_LOOKBACK_US)
+                & valid[order[positions]]
             )
-            curr += timedelta(days=1)
+        )
+        first_stop = first_per_group(gid, n_groups, stop)
+        hit = need & ok[starts] & (first_stop >= 0)
+        hit[hit] &= ok[first_stop[hit]] & (aware[first_stop[hit]] == aware[starts[hit]])
+        hit[hit] &= valid[order[first_stop[hit]]]
+        fallback[hit] = order[first_stop[hit]]
+
+    prices = price.tolist()
+    hotel = frame.hotel[first].tolist()
+    checkin = frame.checkin[first].tolist()
+    milestones = zip(high.tolist(), low.tolist(), last.tolist())
+    cells = []
+    for i, fb, (k_high, k_low, k_last), h_code, d_code in zip(
+        first.tolist(), fallback.tolist(), milestones, hotel, checkin
+    ):
+        latest = rows[i]
+        price_val = prices[i] if prices[i] == prices[i] else None
+        is_est = latest.get("is_estimated", False)
+        if fb >= 0:
+            price_val = prices[fb]
+            is_est = True
+
+        intraday_events = []
+        if k_high >= 0:
+            # Deduplicate milestones and attach labels
+            ms_map: Dict[Tuple[float, str], Dict[str, Any]] = {}
+            for k, label in ((k_high, "High"), (k_low, "Low"), (k_last, "Last")):
+                ev = event(k)
+                ms_key = (ev["price"], (ev["recorded_at"] or "")[:16])
+                if ms_key not in ms_map:
+                    ev["label"] = label
+                    ms_map[ms_key] = ev
+                elif label not in ms_map[ms_key]["label"]:
+                    ms_map[ms_key]["label"] += f"/{label}"
+            intraday_events = list(ms_map.values())
+            intraday_events.sort(key=lambda x: x["recorded_at"] or "")
+
+        cells.append((h_code, d_code, i, price_val, is_est, intraday_events))
+    return cells
+
+
+def _add_calendar_price(
+    date_price_map: Dict[str, Dict[str, Any]],
+    d_str: str,
+    hid: str,
+    target_hotel_id: Optional[str],
+    hotel_name: str,
+    converted_price: float,
+    is_est: bool,
+    intraday_events: List[Dict[str, Any]],
+) -> None:
+    if hid == target_hotel_id:
+        date_price_map[d_str]["target"] = converted_price
+        date_price_map[d_str]["target_is_estimated"] = is_est
+        date_price_map[d_str]["target_intraday"] = intraday_events
+    else:
+        date_price_map[d_str]["competitors"].append(
+            {
+                "name": hotel_name,
+                "price": converted_price,
+                "is_estimated": is_est,
+                "intraday_events": intraday_events,
+            }
+        )
+
+
+def _empty_calendar_day() -> Dict[str, Any]:
+    return {
+        "target": None,
+        "target_is_estimated": False,
+        "target_intraday": [],
+        "competitors": [],
+    }
+
+
+def _calendar_window(
+    start_date: Optional[str], end_date: Optional[str]
+) -> Tuple[datetime, datetime]:
+    range_start = datetime.now()
+    if start_date:
+        try:
+            ds = str(start_date).split("T")[0]
+            range_start = datetime.strptime(ds, "%Y-%m-%d")
+        except Exception:
+            pass
+
+    range_end = range_start + timedelta(days=30)
+    if end_date:
+        try:
+            de = str(end_date).split("T")[0]
+            range_end = datetime.strptime(de, "%Y-%m-%d")
+        except Exception:
+            pass
+    return range_start, range_end
+
+
+def _build_daily_prices(
+    date_price_map: Dict[str, Dict[str, Any]],
+    last_known_target: Optional[float],
+    competitor_states: Dict[str, Dict[str, Any]],
+    range_start: datetime,
+    range_end: datetime,
+) -> List[Dict[str, Any]]:
+    """Walks the calendar window, forward-filling target and competitor prices."""
+    daily_prices: List[Dict[str, Any]] = []
+    curr = range_start
+    today_date = datetime.now().date()
+    while curr.date() <= range_end.date():
+        current_date = curr.date()
+        d_str = curr.strftime("%Y-%m-%d")
+        data = date_price_map.get(d_str)
+
+        comp_avg = 0.0
+        vs_comp = 0.0
+        unique_competitors = []
+        target_val = None
+
+        # 1. Target Logic (Primary + Conditional Forward Fill)
+        # EXPLANATION: Restricted Forward Fill (Kaizen)
+        # Why: The user wants to avoid misleading 'estimated' prices for future dates.
+        # We only forward-fill missing grid days if the date is in the past OR
+        # if we have actual scan data for that specific future date.
+        if data and data["target"] is not None:
+            last_known_target = float(data["target"])
+            target_val = last_known_target
+        elif last_known_target is not None and current_date <= today_date:
+            # [KAİZEN] Carry forward ONLY for past/today to fill gaps in historical records.
+            # For future dates, we leave it empty if no specific scan exists.
+            target_val = last_known_target
+
+        # 2. Competitor Logic (Conditional Full Fill)
+        daily_comps = (data.get("competitors") if data else []) or []
+
+        # Update state for current check-in date matches
+        for c in daily_comps:
+            competitor_states[c["name"]] = {
+                "price": c["price"],
+                "is_estimated": c.get("is_estimated", False),
+            }
+
+        seen_competitors = set()
+        for c in daily_comps:
+            if c["name"] not in seen_competitors:
+                unique_competitors.append(c)
+                seen_competitors.add(c["name"])
+
+        # Horizontal Continuity (Competitor Fill) - RESTRICTED TO PAST/TODAY
+        for name, state in competitor_states.items():
+            if name not in seen_competitors:
+                # Carry competitor prices forward ONLY for past/today dates.
+                if current_date <= today_date:
+                    unique_competitors.append(
+                        {
+                            "name": name,
+                            "price": state["price"],
+                            "is_estimated": True,
+                        }
+                    )
+                    seen_competitors.add(name)
+
+        if unique_competitors:
+            valid_comp_prices = [
+                float(c["price"])
+                for c in unique_competitors
+                if c.get("price") is not None
+            ]
+            if valid_comp_prices:
+                comp_avg = sum(valid_comp_prices) / len(valid_comp_prices)
+
+            if target_val:
+                vs_comp = (
+                    ((target_val - comp_avg) / comp_avg) * 100
+                    if comp_avg > 0
+                    else 0.0
+                )
+
+        # KAİZEN: Sellout Detection for Calendar
+        # If the final target_val is 0, we mark the DAY as sellout.
+        # (Note: target_val might be None if restricted due to future date)
+        is_day_sellout = target_val is not None and target_val <= 0
+
+        daily_prices.append(
+            {
+                "date": d_str,
+                "price": round(float(target_val), 2)
+                if target_val is not None
+                else None,
+                "is_estimated_target": data.get("target_is_estimated", False)
+                if data
+                else False,
+                "intraday_events": data.get("target_intraday", []) if data else [],
+                "is_sellout": is_day_sellout,  # Tag for frontend "Possible Sellout"
+                "comp_avg": round(float(comp_avg), 2),
+                "vs_comp": round(float(vs_comp), 1),
+                "competitors": unique_competitors,
+            }
+        )
+        curr += timedelta(days=1)
+    return daily_prices
+
 
+def _compose_market_analysis(
+    hotels: List[Dict[str, Any]],
+    target_hotel_id: Optional[str],
+    target_hotel_name: str,
+    target_sentiment: float,
+    market_sentiments: List[float],
+    current_prices: List[float],
+    target_price: Optional[float],
+    price_rank_list: List[Dict[str, Any]],
+    daily_prices: List[Dict[str, Any]],
+    comp_list: List[Dict[str, Any]],
+    target_history: List[Dict[str, Any]],
+    available_room_types: Iterable[str],
+) -> Dict[str, Any]:
+    """Derives ARI, sentiment index, quadrant and audit data from the priced market."""
     # EXPLANATION: ARI & Sentiment Index Calculation
     # ARI (Average Rate Index) = (your price / market avg) × 100.
     # Sentiment Index = (your weighted rating / market avg rating) × 100.
@@ -1323,91 +1516,224 @@ async def perform_market_analysis(
     }
 
 
-async def get_market_intelligence_data(
-    db: Client,
+async def perform_market_analysis(
     user_id: str,
-    room_type: str = "Standard",
-    display_currency: str = "TRY",
-    currency: Optional[str] = None,
-    start_date: Optional[str] = None,
-    end_date: Optional[str] = None,
+    hotels: List[Dict[str, Any]],
+    hotel_prices_map: Dict[str, List[Dict[str, Any]]],
+    display_currency: str,
+    room_type: str,
+    start_date: Optional[str],
+    end_date: Optional[str],
+    allowed_room_names_map: Dict[str, List[str]],
 ) -> Dict[str, Any]:
     """
-    Orchestrates the data gathering for market intelligence.
+    Executes the core market analysis logic.
 
-    EXPLANATION: Single-Source Data Path (Cleaned Up)
-    Previously this function fetched from both 'price_logs' (active) AND 'query_logs'
-    (legacy) tables, then merged them. This doubled query cost and added complexity.
-    Now uses ONLY 'price_logs' with a 90-day time window instead of a hardcoded
-    limit(5000), providing predictable scaling as data grows.
+    Why: This is the heavy lifting of the Dashboard. It calculates Price Rank,
+    Market Average, Sentiment Index, and the Quadrant Status.
+    Extracted from main.py to improve AI responsiveness and modularity.
+
+    This is the full recomputation; `market_engine.MarketAnalysisEngine`
+    produces the same result incrementally and is tested against it.
     """
-    # Currency Alias
-    if currency:
-        display_currency = currency
+    # Compiled once per analysis; each log is matched once however often it is read
+    matcher = RoomPriceMatcher(room_type, allowed_room_names_map, memoize=True)
+    price_of = matcher.price
 
-    hotels_result = (
-        db.table("hotels")
-        .select("*")
-        .eq("user_id", str(user_id))
-        .is_("deleted_at", "null")
-        .execute()
+    # 1. Map Prices and Find Target
+    target_hotel_id, target_hotel_name, target_sentiment, market_sentiments = (
+        _select_target(hotels)
     )
-    hotels = hotels_result.data or []
 
-    # EXPLANATION: Deterministic Hotel Ordering (Deduplication Guard)
-    # Why: If multiple local records share the same serp_api_id, we MUST ensure
-    # all analysis and mapping logic picks the SAME record (the active target).
-    # We sort by is_target_hotel DESC, then updated_at DESC.
-    hotels.sort(
-        key=lambda x: (bool(x.get("is_target_hotel")), x.get("updated_at", "")),
-        reverse=True,
+    # 2. Build price rank list
+    # Track all room types for filter UI
+    available_room_types = set()
+    for hotel in hotels:
+        for p in hotel_prices_map.get(str(hotel["id"]), []):
+            rt = p.get("room_types")
+            if isinstance(rt, list):
+                for r in rt:
+                    if isinstance(r, dict) and r.get("name"):
+                        available_room_types.add(r["name"])
+
+    price_rank_list, current_prices, target_price, target_history = _rank_hotels(
+        hotels, hotel_prices_map, target_hotel_id, matcher, display_currency
     )
 
-    # DIAGNOSTIC: Log hotel count for this user
-    logger.info(f"[DIAG] User {user_id}: Found {len(hotels)} hotels")
+    # 2.5 Build Competitors List (Needed for Calendar Columns & Continuity)
+    comp_list = _competitor_list(
+        hotels, hotel_prices_map, target_hotel_id, matcher, display_currency
+    )
 
-    if not hotels:
-        logger.warning(f"[DIAG] User {user_id}: No hotels found, returning empty")
-        return {"summary": {}, "hotels": []}
+    # 3. Build Daily Prices for Calendar (Smart Continuity)
+    daily_prices: List[Dict[str, Any]] = []
+    if target_hotel_id:
+        # EXPLANATION: Smart Continuity (Read-Time Vertical Fill)
+        # We group logs by hotel and check-in date. For each date:
+        # 1. We take the latest scan result.
+        # 2. If it failed (price=0 or None), we look back at previous scans for that SAME check-in date.
+        # 3. If a successful scan is found within history, we use it and mark as 'Estimated'.
+        date_price_map: Dict[str, Dict[str, Any]] = {}
 
-    # EXPLANATION: Time-Windowed Price Fetching (replaces limit(5000))
-    # A 90-day rolling window is more predictable than a fixed row count.
-    # As data grows, limit(5000) would either miss data or cause memory spikes.
-    # The time window scales linearly with calendar time, not data volume.
-    cutoff_date = (datetime.utcnow() - timedelta(days=90)).isoformat()
+        # Columnar view of every log (prices sorted by recorded_at DESC per hotel):
+        # grouping by hotel and check-in date, latest-per-key lookups and the
+        # intraday milestones run as array operations instead of per-log loops.
+        frame = PriceLogFrame.from_hotel_map(hotel_prices_map, price=price_of)
+        frame_hotels = frame.hotel_ids
+        checkin_dates = frame.checkin_dates
+        currencies = frame.currencies
+        valid = frame.price > 0
+        hotel_names: Dict[str, Any] = {}
+        for h in hotels:
+            hotel_names.setdefault(str(h["id"]), h.get("name"))
+        # Each hotel's newest valid price, any check-in date
+        latest_valid_row = first_per_group(frame.hotel, len(frame_hotels), valid)
+
+        today_date = date.today()
+        is_past_or_today: Dict[str, bool] = {}
+        for h_code, d_code, latest_row, price_val, is_est, intraday_events in (
+            _summarize_checkin_frame(frame, room_type)
+        ):
+            hid = frame_hotels[h_code]
+            d_str = checkin_dates[d_code]
+            if d_str not in date_price_map:
+                date_price_map[d_str] = _empty_calendar_day()
+
+            # 2. Global Fallback for this Hotel (Any-Date Continuity) - RESTRICTED
+            # Why: We only use cross-date continuity for dates in the past or today.
+            # For future dates, we ONLY show data if a scan exists for that specific check-in date.
+            # KAİZEN: Re-enabled for all types, but strict matching in get_price_for_room
+            # prevents Standard leakage into non-Standard views.
+            if price_val is None or price_val <= 0:
+                if d_str not in is_past_or_today:
+                    is_past_or_today[d_str] = (
+                        datetime.strptime(d_str, "%Y-%m-%d").date() <= today_date
+                    )
+                fb_row = latest_valid_row[h_code]
+                if is_past_or_today[d_str] and fb_row >= 0:
+                    price_val = frame.price[fb_row].item()
+                    is_est = True
+
+            if price_val is not None:
+                converted_price = convert_currency(
+                    price_val, currencies[frame.currency[latest_row]], display_currency
+                )
+                _add_calendar_price(
+                    date_price_map,
+                    d_str,
+                    hid,
+                    target_hotel_id,
+                    hotel_names.get(hid, "Unknown"),
+                    converted_price,
+                    is_est,
+                    intraday_events,
+                )
+
+        range_start, range_end = _calendar_window(start_date, end_date)
+        window_start = range_start.strftime("%Y-%m-%d")
 
-    # EXPLANATION: Global Price Retrieval (Pillar of Global Pulse)
-    # We now fetch prices based on BOTH local hotel_id and global serp_api_id.
-    # This ensures that as long as ANY user scans a hotel, EVERY user tracking it
-    # gets the fresh data in their Rate Calendar.
+        # EXPLANATION: Relative-Date Continuity Seeding
+        # We find the most recent scan BEFORE our window starts to avoid the "sticky price"
+        # issue where navigating backwards still shows today's prices.
+        before_window = np.array([d <= window_start for d in checkin_dates], dtype=bool)
+        seed_row = first_per_group(
+            frame.hotel, len(frame_hotels), valid & before_window[frame.checkin]
+        )
+        hotel_code = {hid: i for i, hid in enumerate(frame_hotels)}
+
+        def seed_price(hid: Optional[str]) -> Optional[float]:
+            row = seed_row[hotel_code[hid]] if hid in hotel_code else -1
+            if row < 0:
+                return None
+            return convert_currency(
+                frame.price[row].item(),
+                currencies[frame.currency[row]],
+                display_currency,
+            )
+
+        last_known_target = seed_price(target_hotel_id)
+
+        # If still None, fall back to the very latest known price for this room_type
+        if last_known_target is None:
+            last_known_target = target_price
+        # Relative Seeding for Competitors
+        # We find the most recent scan for each competitor BEFORE our window starts.
+        competitor_states: Dict[str, Dict[str, Any]] = {}
+        for h in hotels:
+            if str(h["id"]) == target_hotel_id:
+                continue
+            seed = seed_price(str(h["id"]))
+            if seed is not None:
+                competitor_states[h.get("name")] = {
+                    "price": seed,
+                    "is_estimated": True,
+                }
+
+        # Fallback to comp_list (latest overall) for any competitors still missing
+        for c in comp_list:
+            if c["name"] not in competitor_states:
+                competitor_states[c["name"]] = {
+                    "price": c["price"],
+                    "is_estimated": True,
+                }
+
+        daily_prices = _build_daily_prices(
+            date_price_map, last_known_target, competitor_states, range_start, range_end
+        )
+
+    return _compose_market_analysis(
+        hotels=hotels,
+        target_hotel_id=target_hotel_id,
+        target_hotel_name=target_hotel_name,
+        target_sentiment=target_sentiment,
+        market_sentiments=market_sentiments,
+        current_prices=current_prices,
+        target_price=target_price,
+        price_rank_list=price_rank_list,
+        daily_prices=daily_prices,
+        comp_list=comp_list,
+        target_history=target_history,
+        available_room_types=available_room_types,
+    )
+
+
+async def _fetch_price_logs(
+    db: Client, user_id: str, hotels: List[Dict[str, Any]], since: str
+) -> List[Dict[str, Any]]:
+    """
+    price_logs recorded since `since` for the user's hotels, newest first.
+
+    EXPLANATION: Global Price Retrieval (Pillar of Global Pulse)
+    We fetch prices based on BOTH local hotel_id and global serp_api_id.
+    This ensures that as long as ANY user scans a hotel, EVERY user tracking it
+    gets the fresh data in their Rate Calendar.
+    """
     hotel_ids_list = [str(h["id"]) for h in hotels]
     serp_ids_list = [h.get("serp_api_id") for h in hotels if h.get("serp_api_id")]
 
     logger.info(
-        f"[DIAG] User {user_id}: Querying price_logs for {len(hotel_ids_list)} local IDs and {len(serp_ids_list)} global IDs since {cutoff_date[:10]}"
+        f"[DIAG] User {user_id}: Querying price_logs for {len(hotel_ids_list)} local IDs and {len(serp_ids_list)} global IDs since {since[:10]}"
     )
 
     # Building a combined OR query is complex in postgrest, so we fetch both and merge
     # Step 1: Local ID logs
-    price_logs_res = (
-        db.table("price_logs")
-        .select("*")
-        .in_("hotel_id", hotel_ids_list)
-        .gte("recorded_at", cutoff_date)
-        .order("recorded_at", desc=True)
-        .execute()
+    price_logs_res = await select_projected_async(
+        db,
+        PRICE_LOG_ANALYSIS,
+        lambda q: q.in_("hotel_id", hotel_ids_list)
+        .gte("recorded_at", since)
+        .order("recorded_at", desc=True),
     )
     logs_data = price_logs_res.data or []
 
     # Step 2: Global ID logs (Pulse Data)
     if serp_ids_list:
-        global_logs_res = (
-            db.table("price_logs")
-            .select("*")
-            .in_("serp_api_id", serp_ids_list)
-            .gte("recorded_at", cutoff_date)
-            .order("recorded_at", desc=True)
-            .execute()
+        global_logs_res = await select_projected_async(
+            db,
+            PRICE_LOG_ANALYSIS,
+            lambda q: q.in_("serp_api_id", serp_ids_list)
+            .gte("recorded_at", since)
+            .order("recorded_at", desc=True),
         )
 
         # Merge global logs, ensuring we don't have duplicates
@@ -1434,11 +1760,167 @@ async def get_market_intelligence_data(
             if local_id:
                 log["hotel_id"] = local_id  # Map to local
 
+    # Global rows were appended after the local ones; restore newest-first so
+    # each hotel's first log really is its latest scan.
+    logs_data.sort(key=price_log_sort_key, reverse=True)
+    return logs_data
+
+
+async def _allowed_room_names(
+    db: Client, hotels: List[Dict[str, Any]], room_type: str
+) -> Dict[str, Any]:
+    """Room Type Slicing Logic (pgvector): room names per hotel that match `room_type`."""
+    allowed_room_names_map = {}
+    try:
+        # EXPLANATION: Smart Catalog Search
+        # We first try to find the exact embedding for the requested room type.
+        # If that fails, we extract core keywords (Suite, Deluxe, Family)
+        # to find the best representative embedding from the catalog.
+        catalog_res = await execute_async(
+            db.table("room_type_catalog")
+            .select("embedding")
+            .ilike("normalized_name", f"%{room_type}%")
+            .limit(1)
+        )
+
+        if not catalog_res.data:
+            # Keyword-based fallback search in catalog
+            keywords = []
+            rt_low = room_type.lower()
+            if "suite" in rt_low or "süit" in rt_low:
+                keywords.append("Suite")
+            elif any(k in rt_low for k in ["deluxe", "superior", "premium"]):
+                keywords.append("Deluxe")
+            elif any(k in rt_low for k in ["family", "aile"]):
+                keywords.append("Family")
+
+            if keywords:
+                catalog_res = await execute_async(
+                    db.table("room_type_catalog")
+                    .select("embedding")
+                    .in_("normalized_name", keywords)
+                    .limit(1)
+                )
+
+        # Fallback for Standard/Standart mismatch in catalog
+        is_std = any(s in room_type.lower() for s in ["standard", "standart"])
+        if not catalog_res.data and is_std:
+            # Try searching for the other variant specifically
+            alt = "standart" if "standard" in room_type.lower() else "standard"
+            catalog_res = await execute_async(
+                db.table("room_type_catalog")
+                .select("embedding")
+                .ilike("normalized_name", f"%{alt}%")
+                .limit(1)
+            )
+
+        if catalog_res.data:
+            embedding = catalog_res.data[0]["embedding"]
+            matches_res = await execute_async(
+                db.rpc(
+                    "match_room_types",
+                    {
+                        "query_embedding": embedding,
+                        "match_threshold": 0.82,
+                        "match_count": 100,
+                    },
+                )
+            )
+            for match in matches_res.data or []:
+                hid = str(match["hotel_id"])
+                if hid not in allowed_room_names_map:
+                    allowed_room_names_map[hid] = set()
+                allowed_room_names_map[hid].add(match["original_name"])
+            for h in hotels:
+                hid = str(h["id"])
+                if hid not in allowed_room_names_map:
+                    allowed_room_names_map[hid] = set()
+                allowed_room_names_map[hid].add(room_type)
+    except Exception:
+        pass
+    return allowed_room_names_map
+
+
+async def get_market_intelligence_data(
+    db: Client,
+    user_id: str,
+    room_type: str = "Standard",
+    display_currency: str = "TRY",
+    currency: Optional[str] = None,
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+) -> Dict[str, Any]:
+    """
+    Orchestrates the data gathering for market intelligence.
+
+    EXPLANATION: Single-Source Data Path (Cleaned Up)
+    Previously this function fetched from both 'price_logs' (active) AND 'query_logs'
+    (legacy) tables, then merged them. This doubled query cost and added complexity.
+    Now uses ONLY 'price_logs' with a 90-day time window instead of a hardcoded
+    limit(5000), providing predictable scaling as data grows.
+    """
+    # Currency Alias
+    if currency:
+        display_currency = currency
+
+    hotels_result = await select_projected_async(
+        db,
+        HOTEL_ANALYSIS,
+        lambda q: q.eq("user_id", str(user_id)).is_("deleted_at", "null"),
+    )
+    hotels = hotels_result.data or []
+
+    # EXPLANATION: Deterministic Hotel Ordering (Deduplication Guard)
+    # Why: If multiple local records share the same serp_api_id, we MUST ensure
+    # all analysis and mapping logic picks the SAME record (the active target).
+    # We sort by is_target_hotel DESC, then updated_at DESC.
+    hotels.sort(
+        key=lambda x: (bool(x.get("is_target_hotel")), x.get("updated_at", "")),
+        reverse=True,
+    )
+
+    # DIAGNOSTIC: Log hotel count for this user
+    logger.info(f"[DIAG] User {user_id}: Found {len(hotels)} hotels")
+
+    if not hotels:
+        logger.warning(f"[DIAG] User {user_id}: No hotels found, returning empty")
+        return {"summary": {}, "hotels": []}
+
+    # EXPLANATION: Time-Windowed Price Fetching (replaces limit(5000))
+    # A 90-day rolling window is more predictable than a fixed row count.
+    # As data grows, limit(5000) would either miss data or cause memory spikes.
+    # The time window scales linearly with calendar time, not data volume.
+    cutoff_date = (datetime.utcnow() - timedelta(days=90)).isoformat()
+
+    # EXPLANATION: Incremental Engine
+    # If this view was analysed recently, only logs newer than what the engine
+    # holds are read, and only the calendar cells they touch are recomputed.
+    from backend.services import market_engine
+
+    engine_key = market_engine.market_engines.make_key(
+        str(user_id), room_type, display_currency, start_date, end_date
+    )
+    engine = None
+    if market_engine.MARKET_ENGINE_ENABLED:
+        engine = market_engine.market_engines.get(engine_key, hotels)
+
+    if engine is not None:
+        engine.apply(
+            await _fetch_price_logs(db, user_id, hotels, engine.resume_from(cutoff_date))
+        )
+        engine.expire(cutoff_date)
+        log_count = engine.log_count
+    else:
+        logs_data = await _fetch_price_logs(db, user_id, hotels, cutoff_date)
+        log_count = len(logs_data)
+
     # DIAGNOSTIC: Log price_logs count and sample data
     logger.info(
-        f"[DIAG] User {user_id}: Combined {len(logs_data)} price_logs including global data"
+        f"[DIAG] User {user_id}: Combined {log_count} price_logs including global data"
     )
 
+    allowed_room_names_map = await _allowed_room_names(db, hotels, room_type)
+
     # SAFEGUARD: Proactive query_logs integration
     # We pull query_logs if:
     # 1. Our dataset is "thin" (< 5 logs per hotel)
@@ -1451,8 +1933,29 @@ async def get_market_intelligence_data(
                 is_historical_request = True
         except Exception:
             pass
-
-    if is_historical_request or len(logs_data) < (len(hotels) * 5):
+    needs_fallback = is_historical_request or log_count < (len(hotels) * 5)
+
+    # The engine only models price_logs; fallback rows take the full path.
+    if market_engine.MARKET_ENGINE_ENABLED:
+        if engine is None:
+            engine = market_engine.MarketAnalysisEngine(
+                hotels=hotels,
+                display_currency=display_currency,
+                room_type=room_type,
+                start_date=start_date,
+                end_date=end_date,
+                allowed_room_names_map=allowed_room_names_map,
+            )
+            engine.apply(logs_data)
+            market_engine.market_engines.put(engine_key, engine)
+        else:
+            engine.set_allowed_room_names_map(allowed_room_names_map)
+            if needs_fallback:
+                logs_data = engine.logs()
+        if not needs_fallback:
+            return engine.result()
+
+    if needs_fallback:
         logger.info(
             f"[SAFEGUARD] Pulling historical query_logs for user {user_id} (Historical={is_historical_request}, Thin={len(logs_data)})"
         )
@@ -1460,13 +1963,12 @@ async def get_market_intelligence_data(
         hotel_name_to_id = {h["name"].lower().strip(): str(h["id"]) for h in hotels}
         fallback_cutoff = (datetime.utcnow() - timedelta(days=180)).isoformat()
 
-        ql_res = (
+        ql_res = await execute_async(
             db.table("query_logs")
             .select("hotel_name, price, currency, vendor, created_at, check_in_date")
             .eq("user_id", str(user_id))
             .gte("created_at", fallback_cutoff)
             .order("created_at", desc=True)
-            .execute()
         )
 
         fallback_count = 0
@@ -1600,77 +2102,6 @@ async def get_market_intelligence_data(
         if hid not in hotel_prices_map:
             hotel_prices_map[hid] = []
 
-    # Room Type Slicing Logic (pgvector)
-    allowed_room_names_map = {}
-    try:
-        # EXPLANATION: Smart Catalog Search
-        # We first try to find the exact embedding for the requested room type.
-        # If that fails, we extract core keywords (Suite, Deluxe, Family)
-        # to find the best representative embedding from the catalog.
-        catalog_res = (
-            db.table("room_type_catalog")
-            .select("embedding")
-            .ilike("normalized_name", f"%{room_type}%")
-            .limit(1)
-            .execute()
-        )
-
-        if not catalog_res.data:
-            # Keyword-based fallback search in catalog
-            keywords = []
-            rt_low = room_type.lower()
-            if "suite" in rt_low or "süit" in rt_low:
-                keywords.append("Suite")
-            elif any(k in rt_low for k in ["deluxe", "superior", "premium"]):
-                keywords.append("Deluxe")
-            elif any(k in rt_low for k in ["family", "aile"]):
-                keywords.append("Family")
-
-            if keywords:
-                catalog_res = (
-                    db.table("room_type_catalog")
-                    .select("embedding")
-                    .in_("normalized_name", keywords)
-                    .limit(1)
-                    .execute()
-                )
-
-        # Fallback for Standard/Standart mismatch in catalog
-        is_std = any(s in room_type.lower() for s in ["standard", "standart"])
-        if not catalog_res.data and is_std:
-            # Try searching for the other variant specifically
-            alt = "standart" if "standard" in room_type.lower() else "standard"
-            catalog_res = (
-                db.table("room_type_catalog")
-                .select("embedding")
-                .ilike("normalized_name", f"%{alt}%")
-                .limit(1)
-                .execute()
-            )
-
-        if catalog_res.data:
-            embedding = catalog_res.data[0]["embedding"]
-            matches_res = db.rpc(
-                "match_room_types",
-                {
-                    "query_embedding": embedding,
-                    "match_threshold": 0.82,
-                    "match_count": 100,
-                },
-            ).execute()
-            for match in matches_res.data or []:
-                hid = str(match["hotel_id"])
-                if hid not in allowed_room_names_map:
-                    allowed_room_names_map[hid] = set()
-                allowed_room_names_map[hid].add(match["original_name"])
-            for h in hotels:
-                hid = str(h["id"])
-                if hid not in allowed_room_names_map:
-                    allowed_room_names_map[hid] = set()
-                allowed_room_names_map[hid].add(room_type)
-    except Exception:
-        pass
-
     return await perform_market_analysis(
         user_id=str(user_id),
         hotels=hotels,
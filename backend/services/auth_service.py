@@ -6,7 +6,7 @@ Handles role-based access control (RBAC) and user session verification.
 import traceback
 from fastapi import Request, HTTPException, Depends
 from supabase import Client
-from backend.utils.db import get_supabase
+from backend.utils.db import get_supabase, execute_async
 from backend.utils.logger import get_logger
 
 # EXPLANATION: Module-level logger replaces raw print() for structured output
@@ -50,12 +50,11 @@ async def get_current_admin_user(request: Request, db: Client = Depends(get_supa
 
         # Verify admin role in database
         try:
-            profile_res = (
+            profile_res = await execute_async(
                 db.table("user_profiles")
                 .select("role")
                 .eq("user_id", user_id)
                 .limit(1)
-                .execute()
             )
             if profile_res.data and profile_res.data[0].get("role") in [
                 "admin",
@@ -114,23 +113,21 @@ async def get_current_active_user(request: Request, db: Client = Depends(get_sup
         status = "pending_approval"
         try:
             # Check 'profiles' table first (legacy consistency)
-            res = (
+            res = await execute_async(
                 db.table("profiles")
                 .select("subscription_status")
                 .eq("id", str(user_id))
                 .maybe_single()
-                .execute()
             )
             if res.data:
                 status = res.data.get("subscription_status")
             else:
                 # Fallback to 'user_profiles'
-                res2 = (
+                res2 = await execute_async(
                     db.table("user_profiles")
                     .select("subscription_status")
                     .eq("user_id", str(user_id))
                     .maybe_single()
-                    .execute()
                 )
                 if res2.data:
                     status = res2.data.get("subscription_status")
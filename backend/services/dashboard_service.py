@@ -19,6 +19,15 @@ from backend.utils.sentiment_utils import (
     synthesize_value_score,
 )
 from backend.services.analysis_service import generate_synthetic_narrative
+from backend.services.latest_price_logs import latest_logs_per_hotel
+from backend.utils.db import execute_async, run_db
+from backend.utils.projections import (
+    HOTEL_DASHBOARD,
+    PRICE_LOG_CARD,
+    PRICE_LOG_HISTORY,
+    hydrate,
+    select_projected_async,
+)
 
 logger = get_logger(__name__)
 
@@ -55,12 +64,11 @@ async def get_dashboard_logic(
     is_authorized = str(current_user_id) == str(user_id)
     if not is_authorized:
         # Check if current user is admin
-        profile_res = (
+        profile_res = await execute_async(
             db.table("user_profiles")
             .select("role")
             .eq("user_id", str(current_user_id))
             .limit(1)
-            .execute()
         )
         if profile_res.data and profile_res.data[0].get("role") in [
             "admin",
@@ -79,7 +87,7 @@ async def get_dashboard_logic(
         # We fetch all secondary data concurrently while processing hotels.
         tasks = [
             # 1. User Profile
-            asyncio.to_thread(
+            run_db(
                 lambda: (
                     db.table("user_profiles")
                     .select("*")
@@ -89,7 +97,7 @@ async def get_dashboard_logic(
                 )
             ),
             # 2. User Settings
-            asyncio.to_thread(
+            run_db(
                 lambda: (
                     db.table("settings")
                     .select("*")
@@ -99,7 +107,7 @@ async def get_dashboard_logic(
                 )
             ),
             # 3. Unread Alerts
-            asyncio.to_thread(
+            run_db(
                 lambda: (
                     db.table("alerts")
                     .select("id", count="exact")
@@ -109,7 +117,7 @@ async def get_dashboard_logic(
                 )
             ),
             # 4. Recent Searches
-            asyncio.to_thread(
+            run_db(
                 lambda: (
                     db.table("query_logs")
                     .select("*")
@@ -119,19 +127,8 @@ async def get_dashboard_logic(
                     .execute()
                 )
             ),
-            # 5. Scan History
-            asyncio.to_thread(
-                lambda: (
-                    db.table("price_logs")
-                    .select("*")
-                    .eq("user_id", str(user_id))
-                    .order("recorded_at", desc=True)
-                    .limit(10)
-                    .execute()
-                )
-            ),
-            # 6. Recent Sessions
-            asyncio.to_thread(
+            # 5. Recent Sessions
+            run_db(
                 lambda: (
                     db.table("scan_sessions")
                     .select("*")
@@ -141,18 +138,14 @@ async def get_dashboard_logic(
                     .execute()
                 )
             ),
-            # 7. Hotels (Bulk Fetch)
-            asyncio.to_thread(
-                lambda: (
-                    db.table("hotels")
-                    .select("*")
-                    .eq("user_id", str(user_id))
-                    .is_("deleted_at", "null")
-                    .execute()
-                )
+            # 6. Hotels (Bulk Fetch, card columns only: no embedding vectors)
+            select_projected_async(
+                db,
+                HOTEL_DASHBOARD,
+                lambda q: q.eq("user_id", str(user_id)).is_("deleted_at", "null"),
             ),
-            # 8. Core Profile (for next_scan_at)
-            asyncio.to_thread(
+            # 7. Core Profile (for next_scan_at)
+            run_db(
                 lambda: (
                     db.table("profiles")
                     .select("next_scan_at")
@@ -170,10 +163,9 @@ async def get_dashboard_logic(
         settings_res = results[1] if not isinstance(results[1], Exception) else None
         alerts_res = results[2] if not isinstance(results[2], Exception) else None
         searches_res = results[3] if not isinstance(results[3], Exception) else None
-        results[4] if not isinstance(results[4], Exception) else None
-        sessions_res = results[5] if not isinstance(results[5], Exception) else None
-        hotels_res = results[6] if not isinstance(results[6], Exception) else None
-        core_profile_res = results[7] if not isinstance(results[7], Exception) else None
+        sessions_res = results[4] if not isinstance(results[4], Exception) else None
+        hotels_res = results[5] if not isinstance(results[5], Exception) else None
+        core_profile_res = results[6] if not isinstance(results[6], Exception) else None
 
         user_profile = (
             profile_res.data if profile_res and hasattr(profile_res, "data") else {}
@@ -200,13 +192,10 @@ async def get_dashboard_logic(
         scan_history = []
         if all_hotels:
             hids = [str(h["id"]) for h in all_hotels]
-            hist_res = (
-                db.table("price_logs")
-                .select("*")
-                .in_("hotel_id", hids)
-                .order("recorded_at", desc=True)
-                .limit(10)
-                .execute()
+            hist_res = await select_projected_async(
+                db,
+                PRICE_LOG_HISTORY,
+                lambda q: q.in_("hotel_id", hids).order("recorded_at", desc=True).limit(10),
             )
             scan_history = hist_res.data or []
 
@@ -226,33 +215,29 @@ async def get_dashboard_logic(
         )
         directory_map = {}
         if serp_ids:
-            dir_res = (
+            dir_res = await execute_async(
                 db.table("hotel_directory")
                 .select("*")
                 .in_("serp_api_id", serp_ids)
-                .execute()
             )
             for drecord in dir_res.data or []:
                 directory_map[drecord["serp_api_id"]] = drecord
 
         # 3. Batch Fetch Price Logs for all hotels
+        # Exactly the 10 newest logs per hotel (a frequently scanned hotel can no
+        # longer crowd the others out of a shared limit), card columns only.
+        # Offers and room types are only shown for the current log, so they are
+        # hydrated for that one row per hotel.
         hotel_ids = [str(h["id"]) for h in all_hotels]
-        hotel_prices_map = {}
-        all_prices_res = (
-            db.table("price_logs")
-            .select("*")
-            .in_("hotel_id", hotel_ids)
-            .order("recorded_at", desc=True)
-            .limit(200)
-            .execute()
+        hotel_prices_map = await latest_logs_per_hotel(
+            db, hotel_ids, per_hotel=10, columns=PRICE_LOG_CARD.select()
+        )
+        await hydrate(
+            db,
+            PRICE_LOG_CARD,
+            [logs[0] for logs in hotel_prices_map.values()],
+            PRICE_LOG_CARD.heavy,
         )
-
-        for p in all_prices_res.data or []:
-            hid = str(p["hotel_id"])
-            if hid not in hotel_prices_map:
-                hotel_prices_map[hid] = []
-            if len(hotel_prices_map[hid]) < 10:
-                hotel_prices_map[hid].append(p)
 
         # 4. Process Hotel Data
         enriched_hotels = []
@@ -470,13 +455,12 @@ async def get_recent_wins(db: Client, limit: int = 10) -> List[Dict[str, Any]]:
     Fetches anonymized recent price drops discovered by the Global Pulse network.
     """
     try:
-        res = (
+        res = await execute_async(
             db.table("alerts")
             .select("hotel_id, message, old_price, new_price, created_at")
             .ilike("message", "%Global Pulse%")
             .order("created_at", desc=True)
             .limit(limit)
-            .execute()
         )
 
         raw_alerts = res.data or []
@@ -484,12 +468,11 @@ async def get_recent_wins(db: Client, limit: int = 10) -> List[Dict[str, Any]]:
             return []
 
         hotel_ids = list(set([a["hotel_id"] for a in raw_alerts]))
-        hotels_res = (
+        hotels_res = await execute_async(
             db.table("hotels")
             .select("id, name")
             .in_("id", hotel_ids)
             .is_("deleted_at", "null")
-            .execute()
         )
         hotel_name_map = {h["id"]: h["name"] for h in hotels_res.data}
 
@@ -0,0 +1,98 @@
+"""
+Date Grid Scans (multi-date rate shopping)
+==========================================
+Expands one scan session over N consecutive check-in dates for every tracked
+hotel (`ScanOptions.grid_days`), so the Rate Calendar fills from a single scan
+instead of one manual scan per date.
+
+HOW:
+- `expand_date_grid` turns each hotel into one "cell" per check-in date: a copy
+  of the hotel row with `fixed_check_in` / `fixed_check_out` set to that date
+  and a `grid` marker ({"date", "primary"}). The rest of the Agent-Mesh runs
+  unchanged on the cells:
+    * ScraperAgent resolves each cell's dates from the fixed dates, looks up
+      every (serp_api_id, date) in the Global Pulse cache in one batched query,
+      and only fetches the misses, under the same adaptive concurrency limit.
+    * Results are analysed and written in bulk batches of SCAN_GRID_BATCH_SIZE.
+    * Checkpoints are kept per cell (`cell_key`), so a resumed grid scan only
+      refetches the missing dates.
+- Only the first date is the hotel's "primary" cell: it alone updates the
+  hotel's current price and feeds Global Pulse notifications. Every other cell
+  compares against history for its own check-in date, never against another
+  date's price.
+- The grid is capped at SCAN_GRID_MAX_CELLS (hotels x dates) by shortening it;
+  each cell can cost one SerpApi credit. Manual scans are first capped at the
+  plan's grid_days_limit (trigger_monitor_logic), and the session records the
+  cell count (scan_sessions.cells_count, migration 036).
+
+TUNING (environment variables):
+    SCAN_GRID_MAX_CELLS    Max hotel x date cells per session (default 900)
+    SCAN_GRID_BATCH_SIZE   Results per analyst batch for grid scans (default 50)
+"""
+
+import os
+from datetime import date, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+
+from backend.models.schemas import ScanOptions
+from backend.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return int(os.getenv(name, default))
+    except (TypeError, ValueError):
+        return default
+
+
+SCAN_GRID_MAX_CELLS = max(1, _env_int("SCAN_GRID_MAX_CELLS", 900))
+SCAN_GRID_BATCH_SIZE = max(1, _env_int("SCAN_GRID_BATCH_SIZE", 50))
+
+
+def cell_key(hotel_id: Any, grid: Optional[Dict[str, Any]] = None) -> str:
+    """Checkpoint key: the hotel id, or `<hotel_id>@<check_in>` for a grid cell."""
+    return f"{hotel_id}@{grid['date']}" if grid else str(hotel_id)
+
+
+def grid_dates(options: ScanOptions, hotel_count: int, today: Optional[date] = None) -> List[date]:
+    """Check-in dates of the grid, shortened so hotels x dates fits the cell cap."""
+    start = options.check_in or (today or date.today()) + timedelta(days=1)
+    days = min(options.grid_days or 1, max(1, SCAN_GRID_MAX_CELLS // max(1, hotel_count)))
+    if days < (options.grid_days or 1):
+        logger.warning(
+            f"Date grid shortened to {days} dates ({hotel_count} hotels, "
+            f"SCAN_GRID_MAX_CELLS={SCAN_GRID_MAX_CELLS})"
+        )
+    return [start + timedelta(days=i) for i in range(days)]
+
+
+def expand_date_grid(
+    hotels: List[Dict[str, Any]], options: ScanOptions, today: Optional[date] = None
+) -> Tuple[List[Dict[str, Any]], ScanOptions]:
+    """
+    Returns (cells, cell_options). `cell_options` drops the session dates so each
+    cell's own fixed dates win in ScraperAgent._resolve_search_params.
+    """
+    nights = 1
+    if options.check_in and options.check_out and options.check_out > options.check_in:
+        nights = (options.check_out - options.check_in).days
+
+    dates = grid_dates(options, len(hotels), today)
+    cells = []
+    # Date-major order: the nearest night fills first for every hotel
+    for i, check_in in enumerate(dates):
+        for hotel in hotels:
+            cells.append(
+                {
+                    **hotel,
+                    "fixed_check_in": check_in.isoformat(),
+                    "fixed_check_out": (check_in + timedelta(days=nights)).isoformat(),
+                    "grid": {"date": check_in.isoformat(), "primary": i == 0},
+                }
+            )
+    cell_options = options.model_copy(
+        update={"check_in": None, "check_out": None, "grid_days": None}
+    )
+    return cells, cell_options
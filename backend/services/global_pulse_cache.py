@@ -0,0 +1,184 @@
+"""
+[Global Pulse] — In-Memory Cache Tier
+Process-local LRU/TTL tier that sits in front of the `price_logs` Global Pulse lookup.
+
+EXPLANATION:
+`ScraperAgent._check_global_cache` used to query `price_logs` for every hotel in
+every scan, even when nothing fresh existed. This tier keeps the latest pulse per
+(serp_api_id, check_in_date) in memory:
+- Tier 1: this cache (zero DB round trips on a hit)
+- Tier 2: `price_logs` (the original query), whose result back-fills tier 1
+- Writers: `AnalystAgent.analyze_results` pushes every freshly inserted log here
+
+Eviction is LRU, bounded by both entry count and approximate payload bytes.
+Entries expire on the same 180-minute freshness window the DB tier uses.
+
+TUNING (environment variables):
+    PULSE_CACHE_MAX_ENTRIES   Max cached pulses (default 2000)
+    PULSE_CACHE_MAX_BYTES     Max approximate payload bytes (default 32 MB)
+"""
+
+import copy
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from datetime import date, datetime
+from typing import Any, Dict, Iterable, Optional, Tuple, Union
+
+from backend.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+PULSE_TTL_SECONDS = 180 * 60  # Matches the 3-hour Global Pulse window
+
+PulseKey = Tuple[str, str]
+
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return int(os.getenv(name, default))
+    except (TypeError, ValueError):
+        return default
+
+
+def _recorded_epoch(row: Dict[str, Any]) -> float:
+    """Best-effort epoch for a log's `recorded_at`; falls back to 'now'."""
+    raw = row.get("recorded_at")
+    if not raw:
+        return time.time()
+    try:
+        if isinstance(raw, datetime):
+            return raw.timestamp()
+        return datetime.fromisoformat(str(raw).replace("Z", "+00:00")).timestamp()
+    except (TypeError, ValueError):
+        return time.time()
+
+
+def _estimate_bytes(row: Dict[str, Any]) -> int:
+    try:
+        return len(json.dumps(row, default=str))
+    except (TypeError, ValueError):
+        return 1024
+
+
+class GlobalPulseCache:
+    """Thread-safe LRU/TTL map of (serp_api_id, check_in_date) -> latest price log."""
+
+    def __init__(
+        self,
+        max_entries: Optional[int] = None,
+        max_bytes: Optional[int] = None,
+        ttl_seconds: int = PULSE_TTL_SECONDS,
+    ):
+        self.max_entries = max_entries or _env_int("PULSE_CACHE_MAX_ENTRIES", 2000)
+        self.max_bytes = max_bytes or _env_int(
+            "PULSE_CACHE_MAX_BYTES", 32 * 1024 * 1024
+        )
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        # key -> (recorded_epoch, size_bytes, row)
+        self._entries: "OrderedDict[PulseKey, Tuple[float, int, Dict[str, Any]]]" = (
+            OrderedDict()
+        )
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.stale = 0
+        self.evictions = 0
+
+    @staticmethod
+    def make_key(serp_api_id: str, check_in_date: Union[date, str]) -> PulseKey:
+        return (str(serp_api_id), str(check_in_date))
+
+    def _drop_locked(self, key: PulseKey):
+        entry = self._entries.pop(key, None)
+        if entry:
+            self._bytes -= entry[1]
+
+    def get(
+        self, serp_api_id: str, check_in_date: Union[date, str]
+    ) -> Optional[Dict[str, Any]]:
+        """Returns a private copy of the fresh pulse row, or None (miss/stale)."""
+        key = self.make_key(serp_api_id, check_in_date)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            recorded, _, row = entry
+            if time.time() - recorded > self.ttl_seconds:
+                self.stale += 1
+                self._drop_locked(key)
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+        # Callers mutate price_data (room normalization), so never hand out our copy.
+        return copy.deepcopy(row)
+
+    def put(self, row: Dict[str, Any]) -> bool:
+        """
+        Stores a price log if it is fresh and at least as new as what we hold.
+        Returns True when the entry was stored.
+        """
+        serp_api_id = row.get("serp_api_id")
+        check_in = row.get("check_in_date")
+        if not serp_api_id or not check_in:
+            return False
+
+        recorded = _recorded_epoch(row)
+        if time.time() - recorded > self.ttl_seconds:
+            return False
+
+        key = self.make_key(serp_api_id, check_in)
+        snapshot = copy.deepcopy(row)
+        size = _estimate_bytes(snapshot)
+        if size > self.max_bytes:
+            return False
+
+        with self._lock:
+            existing = self._entries.get(key)
+            if existing and existing[0] > recorded:
+                return False
+            self._drop_locked(key)
+            self._entries[key] = (recorded, size, snapshot)
+            self._bytes += size
+
+            while self._entries and (
+                len(self._entries) > self.max_entries or self._bytes > self.max_bytes
+            ):
+                _, (_, evicted_size, _) = self._entries.popitem(last=False)
+                self._bytes -= evicted_size
+                self.evictions += 1
+        return True
+
+    def put_many(self, rows: Iterable[Dict[str, Any]]) -> int:
+        return sum(1 for row in rows if self.put(row))
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+            self.hits = self.misses = self.stale = self.evictions = 0
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses + self.stale
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_entries": self.max_entries,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "stale": self.stale,
+                "evictions": self.evictions,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "miss_rate": round(self.misses / lookups, 4) if lookups else 0.0,
+                "stale_rate": round(self.stale / lookups, 4) if lookups else 0.0,
+            }
+
+
+# Global instance
+global_pulse_cache = GlobalPulseCache()
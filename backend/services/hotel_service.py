@@ -10,6 +10,7 @@ from supabase import Client
 from fastapi import HTTPException
 from backend.services.serpapi_client import serpapi_client
 from backend.utils.helpers import log_query
+from backend.utils.db import execute_async
 
 
 async def search_hotel_directory_logic(
@@ -59,7 +60,7 @@ async def search_hotel_directory_logic(
             conditions.append(f"name.ilike.%{w}%")
             conditions.append(f"location.ilike.%{w}%")
 
-    result = query.or_(",".join(conditions)).limit(100).execute()
+    result = await execute_async(query.or_(",".join(conditions)).limit(100))
 
     local_results = []
     for h in result.data or []:
@@ -142,11 +143,10 @@ async def sync_directory_manual_logic(db: Client) -> Dict[str, Any]:
     existed becomes shared and searchable by others.
     """
     # Fetch unique hotels from the main table
-    hotels_res = (
+    hotels_res = await execute_async(
         db.table("hotels")
         .select("name, location, serp_api_id")
         .is_("deleted_at", "null")
-        .execute()
     )
     if not hotels_res.data:
         return {"status": "success", "count": 0}
@@ -167,9 +167,11 @@ async def sync_directory_manual_logic(db: Client) -> Dict[str, Any]:
     for h_data in unique_hotels.values():
         try:
             # Persistent check to avoid duplicates in the shared directory
-            db.table("hotel_directory").upsert(
-                h_data, on_conflict="serp_api_id"
-            ).execute()
+            await execute_async(
+                db.table("hotel_directory").upsert(
+                    h_data, on_conflict="serp_api_id"
+                )
+            )
             count += 1
         except Exception:
             continue
@@ -202,12 +204,11 @@ async def add_hotel_to_account_logic(
             location = hotel_data.get("location")
             if name:
                 # KAİZEN: Use available columns (hotel_directory lacks review_count)
-                dir_res = (
+                dir_res = await execute_async(
                     db.table("hotel_directory")
                     .select("serp_api_id, rating, image_url")
                     .eq("name", name)
                     .eq("location", location)
-                    .execute()
                 )
                 if dir_res.data:
                     d = dir_res.data[0]
@@ -230,7 +231,7 @@ async def add_hotel_to_account_logic(
         }
 
         # Insert into user's hotels list
-        result = db.table("hotels").insert(data).execute()
+        result = await execute_async(db.table("hotels").insert(data))
 
         if result.data:
             await log_query(
@@ -245,20 +246,22 @@ async def add_hotel_to_account_logic(
             # When a user tracks a new property, we capture its latest signature
             # (coordinates, images, ratings) and share it with the global directory.
             try:
-                db.table("hotel_directory").upsert(
-                    {
-                        "name": data["name"],
-                        "location": data.get("location"),
-                        "serp_api_id": data.get("serp_api_id"),
-                        "latitude": hotel_data.get("latitude"),
-                        "longitude": hotel_data.get("longitude"),
-                        "rating": hotel_data.get("rating"),
-                        "stars": hotel_data.get("stars"),
-                        "image_url": hotel_data.get("image_url"),
-                        "last_verified_at": datetime.now().isoformat(),
-                    },
-                    on_conflict="serp_api_id",
-                ).execute()
+                await execute_async(
+                    db.table("hotel_directory").upsert(
+                        {
+                            "name": data["name"],
+                            "location": data.get("location"),
+                            "serp_api_id": data.get("serp_api_id"),
+                            "latitude": hotel_data.get("latitude"),
+                            "longitude": hotel_data.get("longitude"),
+                            "rating": hotel_data.get("rating"),
+                            "stars": hotel_data.get("stars"),
+                            "image_url": hotel_data.get("image_url"),
+                            "last_verified_at": datetime.now().isoformat(),
+                        },
+                        on_conflict="serp_api_id",
+                    )
+                )
             except Exception as e:
                 print(f"Directory Auto-Sync Warning: {e}")
 
@@ -0,0 +1,91 @@
+"""
+Latest Price Logs per Hotel
+===========================
+"Newest N price_logs of each of these hotels" in one round trip, through the
+`latest_price_logs_per_hotel` RPC (migration 035).
+
+WHY: The dashboard, the admin Intelligence price recovery and the AnalystAgent
+rival baselines each ran `in_(hotel_ids).order(recorded_at desc).limit(K)` and
+kept the first rows per hotel in Python. A hotel that was scanned often (date
+grids, retries) filled the whole limit, so quieter hotels lost their price card
+or baseline, and every call shipped up to K full rows to keep a handful.
+
+HOW:
+- The RPC returns exactly `per_hotel` rows per hotel, newest first, with only
+  the requested columns.
+- Rows are grouped into `{hotel_id: [logs]}`. Hotels without logs are absent,
+  like they were from the Python grouping.
+- If the RPC is not deployed yet, it switches itself off for the process and the
+  old limited query is used (same shape, without the per-hotel guarantee).
+"""
+
+from typing import Any, Dict, Iterable, List, Optional
+
+from backend.utils.db import execute_async
+from backend.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+RPC_NAME = "latest_price_logs_per_hotel"
+
+# Flipped off for the process when migration 035 is not deployed
+_rpc_available = {RPC_NAME: True}
+
+
+def _columns_list(columns: str) -> Optional[List[str]]:
+    cols = [c.strip() for c in columns.split(",") if c.strip()]
+    return None if cols == ["*"] else cols
+
+
+def group_by_hotel(
+    rows: Iterable[Dict[str, Any]], per_hotel: int
+) -> Dict[str, List[Dict[str, Any]]]:
+    """{hotel_id: first `per_hotel` rows} in the given (newest first) order."""
+    grouped: Dict[str, List[Dict[str, Any]]] = {}
+    for row in rows:
+        bucket = grouped.setdefault(str(row["hotel_id"]), [])
+        if len(bucket) < per_hotel:
+            bucket.append(row)
+    return grouped
+
+
+async def latest_logs_per_hotel(
+    db, hotel_ids: Iterable[Any], per_hotel: int = 10, columns: str = "*"
+) -> Dict[str, List[Dict[str, Any]]]:
+    """
+    Newest `per_hotel` price_logs rows of each hotel, as {hotel_id: [logs]}
+    (newest first). `columns` is a select list; hotel_id and recorded_at are
+    always included.
+    """
+    ids = list(dict.fromkeys(str(h) for h in hotel_ids))
+    if not ids or per_hotel <= 0:
+        return {}
+
+    cols = _columns_list(columns)
+    if cols is not None:
+        cols = list(dict.fromkeys(["hotel_id", "recorded_at", *cols]))
+
+    if _rpc_available[RPC_NAME]:
+        try:
+            res = await execute_async(
+                db.rpc(
+                    RPC_NAME,
+                    {"p_hotel_ids": ids, "p_per_hotel": per_hotel, "p_columns": cols},
+                )
+            )
+            return group_by_hotel(res.data or [], per_hotel)
+        except Exception as e:
+            if RPC_NAME in str(e) or "PGRST202" in str(e):
+                logger.warning(f"{RPC_NAME} RPC missing; using the limited price_logs query")
+                _rpc_available[RPC_NAME] = False
+            else:
+                raise
+
+    res = await execute_async(
+        db.table("price_logs")
+        .select("*" if cols is None else ", ".join(cols))
+        .in_("hotel_id", ids)
+        .order("recorded_at", desc=True)
+        .limit(len(ids) * per_hotel)
+    )
+    return group_by_hotel(res.data or [], per_hotel)
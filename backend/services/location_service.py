@@ -6,6 +6,7 @@ Handles tracking and deduplication of countries, cities, and towns.
 from typing import List
 from datetime import datetime
 from supabase import Client
+from backend.utils.db import execute_async
 
 
 class LocationService:
@@ -16,11 +17,10 @@ class LocationService:
         """Fetch unique countries and their cities from the registry."""
         try:
             # Get unique countries and cities ordered by popularity
-            res = (
+            res = await execute_async(
                 self.db.table("location_registry")
                 .select("country, city, district, occurrence_count")
                 .order("occurrence_count", desc=True)
-                .execute()
             )
 
             return res.data or []
@@ -44,7 +44,7 @@ class LocationService:
 
             # Attempt UPSERT
             # In Supabase/PostgREST, upsert uses the UNIQUE constraint
-            res = (
+            res = await execute_async(
                 self.db.table("location_registry")
                 .upsert(
                     {
@@ -55,7 +55,6 @@ class LocationService:
                     },
                     on_conflict="country, city, district",
                 )
-                .execute()
             )
 
             # Note: The increment logic might need a raw RPC or separate update
@@ -71,6 +70,6 @@ class LocationService:
         """Invoke the stored procedure to seed locations from existing hotels."""
         try:
             # Call the RPC function created in the migration
-            self.db.rpc("seed_location_registry", {}).execute()
+            await execute_async(self.db.rpc("seed_location_registry", {}))
         except Exception as e:
             print(f"Error seeding locations: {e}")
@@ -0,0 +1,498 @@
+"""
+Incremental Market Analysis
+===========================
+Keeps `perform_market_analysis` state per (user, view) in memory and applies only
+newly inserted `price_logs` rows, instead of re-reading and re-scanning the whole
+90-day window on every request.
+
+WHY: `get_market_intelligence_data` pulled every log of the window (local and
+global), matched every log against the room type and rebuilt every calendar
+cell. Between two requests usually only a handful of scans have landed.
+
+HOW:
+- Each hotel keeps its logs ordered by `price_log_sort_key`, the order the full
+  path sorts them in. Room matches are computed once per log.
+- Logs are grouped per (hotel, check-in date). A group's cell (latest price,
+  same-date continuity, High/Low/Last milestones) is recomputed only when a log
+  is added to or expires from that group, with the same helper the full path uses.
+- Per group we also keep the newest log with a valid price. The any-date
+  fallback and the window seeds are the newest of those across groups.
+- `result()` assembles the rank list, calendar and summary from that state. Its
+  cost scales with hotels x check-in dates, not with the number of logs.
+- Logs that fall out of the 90-day window are expired from the oldest end.
+
+`result()` is equal to `perform_market_analysis` over `hotel_prices_map()`
+(see tests/test_market_engine.py). An engine is dropped and rebuilt from a full
+read when the user's hotels (ids, order, serp ids, names, target flag) or the
+room matches change, or once it is older than MARKET_ENGINE_MAX_AGE_S (edits and deletes of existing logs are not streamed).
+
+TUNING (environment variables):
+    MARKET_ENGINE_ENABLED       Use incremental engines (default 1)
+    MARKET_ENGINE_MAX_ENTRIES   Engines kept per process, LRU (default 32)
+    MARKET_ENGINE_MAX_AGE_S     Rebuild engines older than this (default 3600)
+    MARKET_ENGINE_OVERLAP_S     Re-read window behind the newest log (default 300)
+"""
+
+import bisect
+import os
+import threading
+import time
+from collections import Counter, OrderedDict
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from backend.services.analysis_service import (
+    _add_calendar_price,
+    _build_daily_prices,
+    _calendar_window,
+    _checkin_key,
+    _competitor_list,
+    _compose_market_analysis,
+    _empty_calendar_day,
+    _rank_hotels,
+    _select_target,
+    _summarize_checkin_logs,
+    RoomPriceMatcher,
+    price_log_sort_key,
+)
+from backend.services.price_history_index import parse_timestamp
+from backend.utils.helpers import convert_currency
+from backend.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return int(os.getenv(name, default))
+    except (TypeError, ValueError):
+        return default
+
+
+MARKET_ENGINE_ENABLED = os.getenv("MARKET_ENGINE_ENABLED", "1") != "0"
+MARKET_ENGINE_MAX_AGE_S = _env_int("MARKET_ENGINE_MAX_AGE_S", 3600)
+MARKET_ENGINE_OVERLAP_S = _env_int("MARKET_ENGINE_OVERLAP_S", 300)
+
+# The rank list only reads a hotel's latest 30 logs (target price history)
+_HEAD_LOGS = 30
+
+
+class _Entry:
+    __slots__ = ("key", "row", "price")
+
+    def __init__(self, key: Tuple[str, str], row: Dict[str, Any], price: Optional[float]):
+        self.key = key
+        self.row = row
+        self.price = price
+
+
+def _entry_key(entry: _Entry) -> Tuple[str, str]:
+    return entry.key
+
+
+def hotel_identity(hotels: List[Dict[str, Any]]) -> Tuple[Tuple[str, Any, Any, bool], ...]:
+    """
+    What the held logs depend on: the ordered hotels (serp ids map global logs to
+    the first matching hotel), their names and the target flag. Prices, ratings
+    and mentions are re-read from the fresh rows by `result()`.
+    """
+    return tuple(
+        (str(h["id"]), h.get("serp_api_id"), h.get("name"), bool(h.get("is_target_hotel")))
+        for h in hotels
+    )
+
+
+def _is_valid(price: Optional[float]) -> bool:
+    return bool(price and price > 0)
+
+
+class _CheckinGroup:
+    """Logs of one hotel for one check-in date, oldest first."""
+
+    __slots__ = ("entries", "cell", "newest_valid")
+
+    def __init__(self):
+        self.entries: List[_Entry] = []
+        # (price, is_estimated, intraday_events) before the any-date fallback
+        self.cell: Optional[Tuple[Optional[float], bool, List[Dict[str, Any]]]] = None
+        self.newest_valid: Optional[_Entry] = None
+
+
+class MarketAnalysisEngine:
+    """`perform_market_analysis` for one user view, updated log by log."""
+
+    def __init__(
+        self,
+        hotels: List[Dict[str, Any]],
+        display_currency: str,
+        room_type: str,
+        start_date: Optional[str],
+        end_date: Optional[str],
+        allowed_room_names_map: Dict[str, Any],
+    ):
+        self.hotels = hotels
+        self.identity = hotel_identity(hotels)
+        self.display_currency = display_currency
+        self.room_type = room_type
+        self.start_date = start_date
+        self.end_date = end_date
+        self.allowed_room_names_map = allowed_room_names_map
+        self._matcher = RoomPriceMatcher(room_type, allowed_room_names_map)
+        self.created_at = time.monotonic()
+
+        self._hotel_ids = {str(h["id"]) for h in hotels}
+        self._names: Dict[str, str] = {}
+        for h in hotels:
+            self._names.setdefault(str(h["id"]), h.get("name"))
+
+        self._logs: Dict[str, List[_Entry]] = {}  # hid -> oldest first
+        self._groups: Dict[str, Dict[str, _CheckinGroup]] = {}
+        self._dirty: set = set()  # (hid, check-in key)
+        self._seen_ids: set = set()
+        self._room_names: Counter = Counter()
+        self.log_count = 0
+        self.newest_recorded_at: Optional[str] = None
+
+    # --- Updates -------------------------------------------------------------
+
+    def _match(self, row: Dict[str, Any]) -> Optional[float]:
+        return self._matcher.price(row)
+
+    def _room_names_of(self, row: Dict[str, Any]) -> List[str]:
+        rt = row.get("room_types")
+        if not isinstance(rt, list):
+            return []
+        return [r["name"] for r in rt if isinstance(r, dict) and r.get("name")]
+
+    def apply(self, rows: Iterable[Dict[str, Any]]) -> int:
+        """Adds new price_logs rows (already mapped to local hotel ids). Returns rows added."""
+        added = 0
+        for row in rows:
+            row_id = row.get("id")
+            if row_id is not None:
+                if row_id in self._seen_ids:
+                    continue
+                self._seen_ids.add(row_id)
+            hid = str(row["hotel_id"])
+            entry = _Entry(price_log_sort_key(row), row, self._match(row))
+            bisect.insort(self._logs.setdefault(hid, []), entry, key=_entry_key)
+
+            ck = _checkin_key(row)
+            group = self._groups.setdefault(hid, {}).setdefault(ck, _CheckinGroup())
+            bisect.insort(group.entries, entry, key=_entry_key)
+            self._dirty.add((hid, ck))
+
+            if hid in self._hotel_ids:
+                self._room_names.update(self._room_names_of(row))
+            recorded = entry.key[0]
+            if self.newest_recorded_at is None or recorded > self.newest_recorded_at:
+                self.newest_recorded_at = recorded
+            added += 1
+        self.log_count += added
+        return added
+
+    def expire(self, cutoff: str) -> int:
+        """Drops logs recorded before `cutoff` (ISO timestamp). Returns rows dropped."""
+        cut = parse_timestamp(cutoff)
+        if cut is None:
+            return 0
+        dropped = 0
+        for hid, entries in self._logs.items():
+            n = 0
+            for entry in entries:
+                ts = parse_timestamp(entry.row.get("recorded_at"))
+                if ts is None or ts >= cut:
+                    break
+                n += 1
+            if not n:
+                continue
+            for entry in entries[:n]:
+                ck = _checkin_key(entry.row)
+                group = self._groups[hid][ck]
+                group.entries.remove(entry)
+                if not group.entries:
+                    del self._groups[hid][ck]
+                    self._dirty.discard((hid, ck))
+                else:
+                    self._dirty.add((hid, ck))
+                if hid in self._hotel_ids:
+                    self._room_names.subtract(self._room_names_of(entry.row))
+                row_id = entry.row.get("id")
+                if row_id is not None:
+                    self._seen_ids.discard(row_id)
+            del entries[:n]
+            dropped += n
+        self._room_names = +self._room_names
+        self.log_count -= dropped
+        return dropped
+
+    def set_allowed_room_names_map(self, allowed_room_names_map: Dict[str, Any]) -> bool:
+        """Re-matches every held log if the semantic room matches changed."""
+        if allowed_room_names_map == self.allowed_room_names_map:
+            return False
+        self.allowed_room_names_map = allowed_room_names_map
+        self._matcher = RoomPriceMatcher(self.room_type, allowed_room_names_map)
+        for hid, entries in self._logs.items():
+            for entry in entries:
+                entry.price = self._match(entry.row)
+            for ck in self._groups.get(hid, {}):
+                self._dirty.add((hid, ck))
+        return True
+
+    # --- Views ---------------------------------------------------------------
+
+    def _hotel_order(self) -> List[str]:
+        """Hotels in the order the full path groups them: by newest log, then empty ones."""
+        with_logs = sorted(
+            (hid for hid, entries in self._logs.items() if entries),
+            key=lambda hid: self._logs[hid][-1].key,
+            reverse=True,
+        )
+        seen = set(with_logs)
+        order = list(with_logs)
+        for h in self.hotels:
+            hid = str(h["id"])
+            if hid not in seen:
+                seen.add(hid)
+                order.append(hid)
+        return order
+
+    def hotel_prices_map(self) -> Dict[str, List[Dict[str, Any]]]:
+        """The newest-first `hotel_prices_map` the full path would analyse."""
+        return {
+            hid: [e.row for e in reversed(self._logs.get(hid, []))]
+            for hid in self._hotel_order()
+        }
+
+    def logs(self) -> List[Dict[str, Any]]:
+        rows = [e.row for entries in self._logs.values() for e in entries]
+        rows.sort(key=price_log_sort_key, reverse=True)
+        return rows
+
+    def _flush(self) -> None:
+        for hid, ck in self._dirty:
+            group = self._groups[hid][ck]
+            group.newest_valid = next(
+                (e for e in reversed(group.entries) if _is_valid(e.price)), None
+            )
+            group.cell = None
+        self._dirty.clear()
+
+    def _cell(self, group: _CheckinGroup):
+        if group.cell is None:
+            prices = {id(e.row): e.price for e in group.entries}
+            group.cell = _summarize_checkin_logs(
+                [e.row for e in reversed(group.entries)],
+                lambda row: prices[id(row)],
+                self.room_type,
+            )
+        return group.cell
+
+    def _newest_valid(self, hid: str, max_checkin: Optional[str] = None) -> Optional[_Entry]:
+        best = None
+        for ck, group in self._groups.get(hid, {}).items():
+            if max_checkin is not None and ck > max_checkin:
+                continue
+            e = group.newest_valid
+            if e is not None and (best is None or e.key > best.key):
+                best = e
+        return best
+
+    def result(self) -> Dict[str, Any]:
+        """Same output as `perform_market_analysis` over `hotel_prices_map()`."""
+        self._flush()
+        display_currency = self.display_currency
+
+        target_hotel_id, target_hotel_name, target_sentiment, market_sentiments = (
+            _select_target(self.hotels)
+        )
+        order = self._hotel_order()
+        heads = {
+            hid: [e.row for e in reversed(self._logs.get(hid, [])[-_HEAD_LOGS:])]
+            for hid in order
+        }
+        price_rank_list, current_prices, target_price, target_history = _rank_hotels(
+            self.hotels, heads, target_hotel_id, self._matcher, display_currency
+        )
+        comp_list = _competitor_list(
+            self.hotels, heads, target_hotel_id, self._matcher, display_currency
+        )
+
+        daily_prices: List[Dict[str, Any]] = []
+        if target_hotel_id:
+            date_price_map: Dict[str, Dict[str, Any]] = {}
+            today_date = date.today()
+            for hid in order:
+                groups = self._groups.get(hid, {})
+                if not groups:
+                    continue
+                fallback = None
+                for ck, group in groups.items():
+                    if not ck:
+                        continue
+                    if ck not in date_price_map:
+                        date_price_map[ck] = _empty_calendar_day()
+                    price_val, is_est, intraday_events = self._cell(group)
+
+                    if (price_val is None or price_val <= 0) and datetime.strptime(
+                        ck, "%Y-%m-%d"
+                    ).date() <= today_date:
+                        if fallback is None:
+                            fallback = self._newest_valid(hid) or False
+                        if fallback:
+                            price_val = fallback.price
+                            is_est = True
+
+                    if price_val is not None:
+                        latest = group.entries[-1].row
+                        converted_price = convert_currency(
+                            price_val, latest.get("currency") or "USD", display_currency
+                        )
+                        _add_calendar_price(
+                            date_price_map,
+                            ck,
+                            hid,
+                            target_hotel_id,
+                            self._names.get(hid, "Unknown"),
+                            converted_price,
+                            is_est,
+                            intraday_events,
+                        )
+
+            range_start, range_end = _calendar_window(self.start_date, self.end_date)
+            window_start = range_start.strftime("%Y-%m-%d")
+
+            last_known_target = None
+            seed = self._newest_valid(target_hotel_id, window_start)
+            if seed is not None:
+                last_known_target = convert_currency(
+                    seed.price, seed.row.get("currency") or "USD", display_currency
+                )
+            if last_known_target is None:
+                last_known_target = target_price
+
+            competitor_states: Dict[str, Dict[str, Any]] = {}
+            for h in self.hotels:
+                if str(h["id"]) == target_hotel_id:
+                    continue
+                seed = self._newest_valid(str(h["id"]), window_start)
+                if seed is not None:
+                    competitor_states[h.get("name")] = {
+                        "price": convert_currency(
+                            seed.price, seed.row.get("currency") or "USD", display_currency
+                        ),
+                        "is_estimated": True,
+                    }
+            for c in comp_list:
+                if c["name"] not in competitor_states:
+                    competitor_states[c["name"]] = {
+                        "price": c["price"],
+                        "is_estimated": True,
+                    }
+
+            daily_prices = _build_daily_prices(
+                date_price_map, last_known_target, competitor_states, range_start, range_end
+            )
+
+        return _compose_market_analysis(
+            hotels=self.hotels,
+            target_hotel_id=target_hotel_id,
+            target_hotel_name=target_hotel_name,
+            target_sentiment=target_sentiment,
+            market_sentiments=market_sentiments,
+            current_prices=current_prices,
+            target_price=target_price,
+            price_rank_list=price_rank_list,
+            daily_prices=daily_prices,
+            comp_list=comp_list,
+            target_history=target_history,
+            available_room_types=self._room_names.keys(),
+        )
+
+    def resume_from(self, cutoff: str) -> str:
+        """Lower bound for the next delta read: a little behind the newest log held."""
+        newest = parse_timestamp(self.newest_recorded_at)
+        if newest is None:
+            return cutoff
+        since = newest - timedelta(seconds=MARKET_ENGINE_OVERLAP_S)
+        floor = parse_timestamp(cutoff)
+        if floor is not None and since < floor:
+            return cutoff
+        return since.isoformat()
+
+
+ViewKey = Tuple[str, str, str, Optional[str], Optional[str]]
+
+
+class MarketEngineRegistry:
+    """Process-local LRU of engines keyed by (user, room_type, currency, start, end)."""
+
+    def __init__(self, max_entries: Optional[int] = None):
+        self.max_entries = max_entries or _env_int("MARKET_ENGINE_MAX_ENTRIES", 32)
+        self._lock = threading.Lock()
+        self._engines: "OrderedDict[ViewKey, MarketAnalysisEngine]" = OrderedDict()
+        self.hits = 0
+        self.rebuilds = 0
+
+    @staticmethod
+    def make_key(
+        user_id: str,
+        room_type: str,
+        display_currency: str,
+        start_date: Optional[str],
+        end_date: Optional[str],
+    ) -> ViewKey:
+        return (str(user_id), room_type, display_currency, start_date, end_date)
+
+    def get(self, key: ViewKey, hotels: List[Dict[str, Any]]) -> Optional[MarketAnalysisEngine]:
+        """
+        The engine for this view, unless the hotel identities changed or it is too
+        old. Other hotel fields (current_price, rating, mentions...) are rewritten
+        by every scan, so the engine just takes the fresh rows.
+        """
+        with self._lock:
+            engine = self._engines.get(key)
+            if engine is None:
+                return None
+            if (
+                engine.identity != hotel_identity(hotels)
+                or time.monotonic() - engine.created_at > MARKET_ENGINE_MAX_AGE_S
+            ):
+                del self._engines[key]
+                self.rebuilds += 1
+                return None
+            engine.hotels = hotels
+            self._engines.move_to_end(key)
+            self.hits += 1
+            return engine
+
+    def put(self, key: ViewKey, engine: MarketAnalysisEngine) -> None:
+        with self._lock:
+            self._engines[key] = engine
+            self._engines.move_to_end(key)
+            while len(self._engines) > self.max_entries:
+                self._engines.popitem(last=False)
+
+    def invalidate_user(self, user_id: Any) -> None:
+        with self._lock:
+            for key in [k for k in self._engines if k[0] == str(user_id)]:
+                del self._engines[key]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._engines.clear()
+            self.hits = self.rebuilds = 0
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "engines": len(self._engines),
+                "max_entries": self.max_entries,
+                "logs": sum(e.log_count for e in self._engines.values()),
+                "hits": self.hits,
+                "rebuilds": self.rebuilds,
+            }
+
+
+# Global instance
+market_engines = MarketEngineRegistry()
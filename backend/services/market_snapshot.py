@@ -0,0 +1,352 @@
+"""
+Market Intelligence Snapshots
+=============================
+Serves `/api/analysis/{user_id}` and the SSE stream from a precomputed
+`analysis_service.get_market_intelligence_data` result (migration 034).
+
+WHY: Every request re-pulled 90 days of price_logs (local and global), the
+query_logs fallback, the room catalog and the `match_room_types` RPC, then ran
+the full `perform_market_analysis` pass, although the answer only changes when
+a scan lands new prices.
+
+HOW:
+- A snapshot is stored per (user, room_type, currency, start, end) together
+  with the user's `market_data_versions.version` read *before* computing it.
+- Database triggers bump that version whenever price_logs rows land for any of
+  the user's hotels (by hotel_id or shared serp_api_id) or the hotels change.
+  A snapshot is served only while its version still matches, it was computed
+  today (UTC; several figures are relative to today) and it is younger than
+  MARKET_SNAPSHOT_MAX_AGE_S. A scan that writes while a snapshot is being
+  computed bumps the version, so that snapshot is never served.
+- Serving a snapshot stamps its `last_served_at` (migration 038), at most once
+  per SERVED_TOUCH_INTERVAL_S per view and process, in the background.
+- After each scan, `schedule_refresh` recomputes, off the scan path, the views
+  the user was actually served within MARKET_SNAPSHOT_REFRESH_WINDOW_S, so the
+  next page load is a hit. Users who never open the page cost nothing.
+  (`computed_at` cannot pick them: the refresh itself rewrites it.)
+- A miss computes live, stores the result and returns it: the endpoints never
+  serve stale data, they only get slower.
+
+If the tables are missing, snapshots switch themselves off for the process and
+every request computes live as before. Without the `last_served_at` column,
+snapshots are still served but never refreshed after scans.
+
+TUNING (environment variables):
+    MARKET_SNAPSHOTS_ENABLED            Serve and refresh snapshots (default 1)
+    MARKET_SNAPSHOT_MAX_AGE_S           Max age of a served snapshot (default 21600)
+    MARKET_SNAPSHOT_REFRESH_KEYS        Views recomputed per user after a scan (default 6)
+    MARKET_SNAPSHOT_REFRESH_WINDOW_S    Only views served this recently are
+                                        recomputed (default 259200, 3 days)
+"""
+
+import asyncio
+import os
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Optional, Set, Tuple
+
+from fastapi.encoders import jsonable_encoder
+
+from backend.utils.db import execute_async
+from backend.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+MARKET_SNAPSHOTS_ENABLED = os.getenv("MARKET_SNAPSHOTS_ENABLED", "1") != "0"
+try:
+    MARKET_SNAPSHOT_MAX_AGE_S = float(os.getenv("MARKET_SNAPSHOT_MAX_AGE_S", "21600"))
+except ValueError:
+    MARKET_SNAPSHOT_MAX_AGE_S = 21600.0
+try:
+    MARKET_SNAPSHOT_REFRESH_KEYS = max(1, int(os.getenv("MARKET_SNAPSHOT_REFRESH_KEYS", "6")))
+except ValueError:
+    MARKET_SNAPSHOT_REFRESH_KEYS = 6
+try:
+    MARKET_SNAPSHOT_REFRESH_WINDOW_S = float(
+        os.getenv("MARKET_SNAPSHOT_REFRESH_WINDOW_S", "259200")
+    )
+except ValueError:
+    MARKET_SNAPSHOT_REFRESH_WINDOW_S = 259200.0
+
+# A hit re-stamps last_served_at at most this often per view (per process)
+SERVED_TOUCH_INTERVAL_S = 600.0
+
+# Flipped off for the process when migration 034 / 038 is not deployed
+_tables_available = {"ok": True}
+_served_column = {"ok": True}
+
+_last_touched: Dict[Tuple[str, str], float] = {}
+# Strong references to fire-and-forget tasks (the loop only keeps weak ones)
+_background: Set[asyncio.Task] = set()
+_refreshing: Dict[str, asyncio.Task] = {}
+_refresh_again: Set[str] = set()
+
+DEFAULT_PARAMS = {
+    "room_type": "Standard",
+    "display_currency": "TRY",
+    "start_date": None,
+    "end_date": None,
+}
+
+
+def snapshot_params(
+    room_type: str = "Standard",
+    display_currency: str = "TRY",
+    currency: Optional[str] = None,
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+) -> Dict[str, Any]:
+    """The arguments that decide the analysis result (`currency` aliases display_currency)."""
+    return {
+        "room_type": room_type or "Standard",
+        "display_currency": (currency or display_currency or "TRY").upper(),
+        "start_date": str(start_date) if start_date else None,
+        "end_date": str(end_date) if end_date else None,
+    }
+
+
+def snapshot_key(params: Dict[str, Any]) -> str:
+    return "|".join(
+        [
+            params["room_type"].strip().lower(),
+            params["display_currency"],
+            params["start_date"] or "",
+            params["end_date"] or "",
+        ]
+    )
+
+
+def _parse_ts(value: Any) -> Optional[datetime]:
+    if not value:
+        return None
+    try:
+        ts = datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    return ts if ts.tzinfo else ts.replace(tzinfo=timezone.utc)
+
+
+def is_fresh(row: Dict[str, Any], version: int, now: Optional[datetime] = None) -> bool:
+    """A snapshot is served only if nothing it depends on has changed since."""
+    now = now or datetime.now(timezone.utc)
+    computed_at = _parse_ts(row.get("computed_at"))
+    return (
+        row.get("payload") is not None
+        and int(row.get("data_version") or 0) == version
+        and computed_at is not None
+        and computed_at.date() == now.date()
+        and (now - computed_at).total_seconds() <= MARKET_SNAPSHOT_MAX_AGE_S
+    )
+
+
+def _disable_if_missing(e: Exception) -> bool:
+    msg = str(e)
+    if any(s in msg for s in ("market_intel_snapshots", "market_data_versions", "PGRST205", "42P01")):
+        logger.warning("market snapshot tables missing; serving live analysis")
+        _tables_available["ok"] = False
+        return True
+    return False
+
+
+def _disable_served_if_missing(e: Exception) -> bool:
+    msg = str(e)
+    if "last_served_at" in msg or "42703" in msg:
+        logger.warning("market_intel_snapshots.last_served_at missing; post-scan refresh disabled")
+        _served_column["ok"] = False
+        return True
+    return False
+
+
+def _spawn(coro) -> asyncio.Task:
+    task = asyncio.get_running_loop().create_task(coro)
+    _background.add(task)
+    task.add_done_callback(_background.discard)
+    return task
+
+
+async def _touch(db, user_id: str, key: str) -> None:
+    try:
+        await execute_async(
+            db.table("market_intel_snapshots")
+            .update({"last_served_at": datetime.now(timezone.utc).isoformat()})
+            .eq("user_id", user_id)
+            .eq("snapshot_key", key)
+        )
+    except Exception as e:
+        if not (_disable_served_if_missing(e) or _disable_if_missing(e)):
+            logger.warning(f"Could not record snapshot use for {user_id}: {e}")
+
+
+def _record_served(db, user_id: str, key: str) -> None:
+    """Stamps last_served_at for a hit, throttled and without delaying the response."""
+    if not _served_column["ok"]:
+        return
+    now = time.monotonic()
+    if now - _last_touched.get((user_id, key), float("-inf")) < SERVED_TOUCH_INTERVAL_S:
+        return
+    if len(_last_touched) > 10000:
+        _last_touched.clear()
+    _last_touched[(user_id, key)] = now
+    _spawn(_touch(db, user_id, key))
+
+
+async def _data_version(db, user_id: str) -> int:
+    res = await execute_async(
+        db.table("market_data_versions").select("version").eq("user_id", user_id).limit(1)
+    )
+    return int(res.data[0]["version"] or 0) if res.data else 0
+
+
+async def _compute(db, user_id: str, params: Dict[str, Any]) -> Dict[str, Any]:
+    from backend.services.analysis_service import get_market_intelligence_data
+
+    data = await get_market_intelligence_data(db=db, user_id=user_id, **params)
+    return jsonable_encoder(data)
+
+
+async def _store(
+    db,
+    user_id: str,
+    params: Dict[str, Any],
+    payload: Dict[str, Any],
+    version: int,
+    served: bool = True,
+) -> None:
+    """Upserts a snapshot; `served=False` (a refresh) leaves last_served_at alone."""
+    now = datetime.now(timezone.utc).isoformat()
+    row = {
+        "user_id": user_id,
+        "snapshot_key": snapshot_key(params),
+        "params": params,
+        "payload": payload,
+        "data_version": version,
+        "computed_at": now,
+    }
+    if served and _served_column["ok"]:
+        row["last_served_at"] = now
+        _last_touched[(user_id, row["snapshot_key"])] = time.monotonic()
+    try:
+        await execute_async(
+            db.table("market_intel_snapshots").upsert(row, on_conflict="user_id,snapshot_key")
+        )
+    except Exception as e:
+        if "last_served_at" not in row or not _disable_served_if_missing(e):
+            raise
+        row.pop("last_served_at")
+        await execute_async(
+            db.table("market_intel_snapshots").upsert(row, on_conflict="user_id,snapshot_key")
+        )
+
+
+async def get_market_intelligence(db, user_id: str, **kwargs) -> Dict[str, Any]:
+    """
+    `get_market_intelligence_data` with the same arguments, served from the
+    user's snapshot when it is still valid.
+    """
+    user_id = str(user_id)
+    params = snapshot_params(**kwargs)
+    if not (MARKET_SNAPSHOTS_ENABLED and _tables_available["ok"]):
+        return await _compute(db, user_id, params)
+
+    try:
+        snap_res, version = await asyncio.gather(
+            execute_async(
+                db.table("market_intel_snapshots")
+                .select("payload, data_version, computed_at")
+                .eq("user_id", user_id)
+                .eq("snapshot_key", snapshot_key(params))
+                .limit(1)
+            ),
+            _data_version(db, user_id),
+        )
+    except Exception as e:
+        if not _disable_if_missing(e):
+            logger.warning(f"Snapshot lookup failed for {user_id}, computing live: {e}")
+        return await _compute(db, user_id, params)
+
+    if snap_res.data and is_fresh(snap_res.data[0], version):
+        _record_served(db, user_id, snapshot_key(params))
+        return snap_res.data[0]["payload"]
+
+    payload = await _compute(db, user_id, params)
+    try:
+        await _store(db, user_id, params, payload, version)
+    except Exception as e:
+        if not _disable_if_missing(e):
+            logger.warning(f"Snapshot write failed for {user_id}: {e}")
+    return payload
+
+
+async def refresh_user_snapshots(db, user_id: Any) -> int:
+    """
+    Recomputes the views the user was served within
+    MARKET_SNAPSHOT_REFRESH_WINDOW_S, most recently served first.
+    Returns the number of snapshots written.
+    """
+    user_id = str(user_id)
+    if not (MARKET_SNAPSHOTS_ENABLED and _tables_available["ok"] and _served_column["ok"]):
+        return 0
+    served_since = (
+        datetime.now(timezone.utc) - timedelta(seconds=MARKET_SNAPSHOT_REFRESH_WINDOW_S)
+    ).isoformat()
+    try:
+        version = await _data_version(db, user_id)
+        res = await execute_async(
+            db.table("market_intel_snapshots")
+            .select("params")
+            .eq("user_id", user_id)
+            .gte("last_served_at", served_since)
+            .order("last_served_at", desc=True)
+            .limit(MARKET_SNAPSHOT_REFRESH_KEYS)
+        )
+    except Exception as e:
+        if not (_disable_if_missing(e) or _disable_served_if_missing(e)):
+            logger.warning(f"Snapshot refresh skipped for {user_id}: {e}")
+        return 0
+
+    written = 0
+    for row in res.data or []:
+        params = {**DEFAULT_PARAMS, **(row.get("params") or {})}
+        try:
+            payload = await _compute(db, user_id, params)
+            await _store(db, user_id, params, payload, version, served=False)
+            written += 1
+        except Exception as e:
+            if _disable_if_missing(e):
+                break
+            logger.warning(f"Snapshot refresh failed for {user_id} {snapshot_key(params)}: {e}")
+    return written
+
+
+async def _refresh_in_background(db, user_id: str) -> None:
+    try:
+        while True:
+            _refresh_again.discard(user_id)
+            refreshed = await refresh_user_snapshots(db, user_id)
+            if refreshed:
+                logger.info(f"Refreshed {refreshed} market snapshots for {user_id}")
+            if user_id not in _refresh_again:
+                break
+    except Exception as e:
+        logger.warning(f"Market snapshot refresh failed for {user_id}: {e}")
+    finally:
+        _refreshing.pop(user_id, None)
+
+
+def schedule_refresh(db, user_id: Any) -> Optional[asyncio.Task]:
+    """
+    Fire-and-forget `refresh_user_snapshots` after a scan (the scan worker does
+    not wait for it). One refresh per user at a time: a scan landing during a
+    refresh makes it run once more. A refresh lost to shutdown only costs the
+    next request a live computation.
+    """
+    user_id = str(user_id)
+    if not (MARKET_SNAPSHOTS_ENABLED and _tables_available["ok"] and _served_column["ok"]):
+        return None
+    running = _refreshing.get(user_id)
+    if running is not None and not running.done():
+        _refresh_again.add(user_id)
+        return running
+    task = _spawn(_refresh_in_background(db, user_id))
+    _refreshing[user_id] = task
+    return task
@@ -4,15 +4,20 @@ Orchestrates the asynchronous background AI Agent-Mesh for price monitoring.
 """
 
 import os
+import asyncio
 import logging
+import time
 import traceback
 from datetime import date, datetime, timedelta, timezone
-from typing import List, Dict, Any, Optional
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
 from uuid import UUID
 from fastapi import BackgroundTasks
 from supabase import Client
 from backend.models.schemas import ScanOptions, MonitorResult
 from backend.utils.logger import get_logger
+from backend.utils.db import execute_async
+from backend.utils.projections import HOTEL_SCAN, select_projected_async
+from backend.services.trace_sink import trace_sink
 
 # EXPLANATION: Module-level logger replaces raw print() for structured output
 logger = get_logger(__name__)
@@ -76,12 +81,10 @@ async def trigger_monitor_logic(
     """
 
     # Get all active hotels for user (exclude soft-deleted)
-    hotels_result = (
-        db.table("hotels")
-        .select("*")
-        .eq("user_id", str(user_id))
-        .is_("deleted_at", "null")
-        .execute()
+    hotels_result = await select_projected_async(
+        db,
+        HOTEL_SCAN,
+        lambda q: q.eq("user_id", str(user_id)).is_("deleted_at", "null"),
     )
     hotels = hotels_result.data or []
 
@@ -89,13 +92,15 @@ async def trigger_monitor_logic(
         return MonitorResult(hotels_checked=0, prices_updated=0, alerts_generated=0)
 
     # 1. ADMIN BYPASS / LIMIT ENFORCEMENT
+    # Date grid allowance: stays 1 (no extra dates) unless the plan is read;
+    # None = admin, only SCAN_GRID_MAX_CELLS applies.
+    grid_days_limit: Optional[int] = 1
     try:
         is_admin = False
-        profile_res = (
+        profile_res = await execute_async(
             db.table("user_profiles")
             .select("role")
             .eq("user_id", str(current_user_id))
-            .execute()
         )
         if profile_res.data and profile_res.data[0].get("role") in [
             "admin",
@@ -103,6 +108,7 @@ async def trigger_monitor_logic(
             "market admin",
         ]:
             is_admin = True
+            grid_days_limit = None
 
         if not is_admin:
             # FIX: Use SubscriptionService (not legacy tier_configs) to check limits.
@@ -111,11 +117,10 @@ async def trigger_monitor_logic(
             # for trial users to have enterprise-level access).
             from backend.services.subscription import SubscriptionService
 
-            full_profile_res = (
+            full_profile_res = await execute_async(
                 db.table("profiles")
                 .select("plan_type, subscription_status, current_period_end")
                 .eq("id", str(user_id))
-                .execute()
             )
             profile_data = full_profile_res.data[0] if full_profile_res.data else {}
             access = await SubscriptionService.get_user_limits(db, profile_data)
@@ -130,6 +135,8 @@ async def trigger_monitor_logic(
                     errors=[f"SCAN_LOCKED: {reason}"],
                 )
 
+            grid_days_limit = SubscriptionService.grid_days_limit(access)
+
             # Enterprise/trial/pro users with can_scan_hourly have unlimited manual scans.
             # Only starter users without can_scan_hourly are rate-limited.
             limits = access.get("limits", {})
@@ -137,13 +144,12 @@ async def trigger_monitor_logic(
                 today_start = datetime.combine(
                     date.today(), datetime.min.time()
                 ).isoformat()
-                daily_manual_res = (
+                daily_manual_res = await execute_async(
                     db.table("scan_sessions")
                     .select("id", count="exact")
                     .eq("user_id", str(user_id))
                     .eq("session_type", "manual")
                     .gte("created_at", today_start)
-                    .execute()
                 )
                 current_daily_manual = daily_manual_res.count or 0
                 daily_manual_limit = 3  # Reasonable default for basic tiers
@@ -178,25 +184,51 @@ async def trigger_monitor_logic(
     adults = options.adults if options and options.adults else 2
     currency = options.currency if options and options.currency else "TRY"
 
+    # 2.5 DATE GRID COST GATE
+    # EXPLANATION: Every hotel x check-in date cell can cost one SerpApi credit,
+    # and the daily manual quota counts sessions, not cells. The plan caps the
+    # number of dates, then SCAN_GRID_MAX_CELLS caps hotels x dates.
+    errors: List[str] = []
+    grid_days = options.grid_days if options else None
+    if grid_days and grid_days_limit is not None and grid_days > grid_days_limit:
+        logger.warning(
+            f"Date grid for {user_id} limited to {grid_days_limit} of {grid_days} dates by plan"
+        )
+        errors.append(f"GRID_DAYS_LIMITED ({grid_days_limit})")
+        grid_days = grid_days_limit
+    cells_count = len(hotels)
+    if grid_days:
+        from backend.services.date_grid import grid_dates
+
+        grid_days = len(grid_dates(ScanOptions(check_in=check_in, grid_days=grid_days), len(hotels)))
+        cells_count = grid_days * len(hotels)
+
     # 3. Create Session
     session_id = None
+    session_row = {
+        "user_id": str(user_id),
+        "session_type": "manual",
+        "hotels_count": len(hotels),
+        "cells_count": cells_count,
+        "status": "pending",
+        "check_in_date": str(check_in),
+        "check_out_date": str(check_out),
+        "adults": adults,
+        "currency": currency,
+    }
     try:
-        session_result = (
-            db.table("scan_sessions")
-            .insert(
-                {
-                    "user_id": str(user_id),
-                    "session_type": "manual",
-                    "hotels_count": len(hotels),
-                    "status": "pending",
-                    "check_in_date": str(check_in),
-                    "check_out_date": str(check_out),
-                    "adults": adults,
-                    "currency": currency,
-                }
+        try:
+            session_result = await execute_async(
+                db.table("scan_sessions").insert(session_row)
+            )
+        except Exception as e:
+            # Column missing in some environments (migration 036)
+            if "cells_count" not in str(e):
+                raise
+            session_row.pop("cells_count")
+            session_result = await execute_async(
+                db.table("scan_sessions").insert(session_row)
             )
-            .execute()
-        )
         if session_result.data:
             session_id = session_result.data[0]["id"]
     except Exception as e:
@@ -204,29 +236,47 @@ async def trigger_monitor_logic(
 
     # Normalized Options for Background task
     normalized_options = ScanOptions(
-        check_in=check_in, check_out=check_out, adults=adults, currency=currency
+        check_in=check_in,
+        check_out=check_out,
+        adults=adults,
+        currency=currency,
+        grid_days=grid_days,
     )
 
-    # 4. Background Execution (Direct via BackgroundTasks)
+    # 4. Durable Execution (scan queue, BackgroundTasks fallback)
     # EXPLANATION: Lean Serverless Execution
     # Redis/Celery dependency has been removed to avoid Upstash free-tier limits.
-    # We now exclusively use FastAPI's BackgroundTasks for in-process execution.
+    # The scan is stored as a job on its scan_sessions row (scan_queue.py) and
+    # BackgroundTasks only kicks a worker, so a restart no longer loses the scan:
+    # any worker re-claims it once its lease expires. Without migration 032 we
+    # run the scan directly in BackgroundTasks as before.
+    from backend.services.scan_queue import enqueue_scan, kick_scan_worker
+
     try:
-        if background_tasks is not None:
-            trace_msg = "Executing scan directly via BackgroundTasks"
+        queued = await enqueue_scan(db, session_id, hotels, normalized_options)
+        if queued or background_tasks is not None:
+            trace_msg = (
+                "Scan queued; a worker will pick it up"
+                if queued
+                else "Executing scan directly via BackgroundTasks"
+            )
             logger.info(trace_msg)
 
             if session_id:
                 try:
-                    db.table("scan_sessions").update(
-                        {"reasoning_trace": [trace_msg]}
-                    ).eq("id", str(session_id)).execute()
+                    await execute_async(
+                        db.table("scan_sessions").update(
+                            {"reasoning_trace": [trace_msg]}
+                        ).eq("id", str(session_id))
+                    )
                 except Exception:
                     pass
 
-            # Lazy import
-            from backend.services.monitor_service import run_monitor_background
-
+        if queued:
+            if background_tasks is not None:
+                background_tasks.add_task(kick_scan_worker, db)
+            logger.info(f"Scan queued for session {session_id}")
+        elif background_tasks is not None:
             background_tasks.add_task(
                 run_monitor_background,
                 user_id=user_id,
@@ -248,8 +298,161 @@ async def trigger_monitor_logic(
         prices_updated=0,
         alerts_generated=0,
         session_id=UUID(session_id) if session_id else None,
-        errors=[],
+        errors=errors,
+    )
+
+
+# EXPLANATION: Streaming Agent-Mesh
+# The scraper used to finish every hotel before the analyst started, and the room
+# catalog waited on the analyst. Now each hotel result goes onto a bounded queue
+# as soon as its fetch returns; the consumer analyses, persists and catalogues it
+# in micro-batches (whatever has queued up while the previous batch was being
+# written, up to PIPELINE_BATCH_SIZE). When the queue is full the scraper blocks
+# inside its concurrency slot, so a slow database throttles new SerpApi calls.
+PIPELINE_QUEUE_SIZE = int(os.getenv("SCAN_PIPELINE_QUEUE_SIZE", "20"))
+PIPELINE_BATCH_SIZE = int(os.getenv("SCAN_PIPELINE_BATCH_SIZE", "10"))
+
+_PIPELINE_DONE = object()
+
+
+async def _run_streaming_pipeline(
+    db: Client,
+    scraper,
+    analyst,
+    user_id: UUID,
+    hotels: List[Dict[str, Any]],
+    options: Optional[ScanOptions],
+    session_id: Optional[UUID],
+    threshold: float,
+    settings: Dict[str, Any],
+    queue_size: Optional[int] = None,
+    batch_size: Optional[int] = None,
+    budget=None,
+    fetch_plan=None,
+    on_batch_persisted: Optional[Callable[[List[Dict[str, Any]]], Awaitable[None]]] = None,
+    checkpointer=None,
+    replay_results: Optional[List[Dict[str, Any]]] = None,
+    fetch_hotels: Optional[List[Dict[str, Any]]] = None,
+) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
+    """
+    Runs ScraperAgent.run_scan and AnalystAgent.analyze_results concurrently,
+    connected by a bounded asyncio.Queue. Returns (scraper_results, analysis).
+    `on_batch_persisted` is awaited with each batch the analyst has written.
+
+    Resume support: `replay_results` (checkpointed fetches) are analysed without
+    calling the scraper, which only fetches `fetch_hotels` (default: `hotels`).
+    `checkpointer` (ScanCheckpointer) records every fetch and persisted batch.
+
+    The analyst's PriceHistoryIndex is loaded once per scan, while the first
+    fetches run, and shared by every micro-batch.
+    """
+    from backend.services.price_history_index import PriceHistoryIndex
+    from backend.services.room_type_service import update_room_type_catalog
+
+    queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size or PIPELINE_QUEUE_SIZE)
+    batch_limit = batch_size or PIPELINE_BATCH_SIZE
+    scraper_results: List[Dict[str, Any]] = []
+    analysis: Dict[str, Any] = {"prices_updated": 0, "alerts": [], "target_price": None}
+    started = time.monotonic()
+    first_persisted_at: Optional[float] = None
+
+    async def on_result(result):
+        # Checkpoint before handing off: a crash after the write lands costs no
+        # credit. record_fetch only buffers, so the scraper slot is not held.
+        if checkpointer:
+            await checkpointer.record_fetch(result)
+        await queue.put(result)
+
+    async def produce():
+        try:
+            for result in replay_results or []:
+                await queue.put(result)
+            to_fetch = hotels if fetch_hotels is None else fetch_hotels
+            if to_fetch:
+                # Only scheduled runs share a cross-user budget and fetch plan
+                extra = {"budget": budget, "fetch_plan": fetch_plan}
+                extra = {k: v for k, v in extra.items() if v is not None}
+                await scraper.run_scan(
+                    user_id, to_fetch, options, session_id, on_result=on_result, **extra
+                )
+        finally:
+            await queue.put(_PIPELINE_DONE)
+
+    producer = asyncio.create_task(produce())
+    history_task: Optional[asyncio.Task] = asyncio.create_task(
+        PriceHistoryIndex.load_async(db, [h["id"] for h in hotels if h.get("id")])
     )
+    history = None
+
+    done = False
+    while not done:
+        batch = [await queue.get()]
+        while len(batch) < batch_limit and not queue.empty():
+            batch.append(queue.get_nowait())
+
+        items = [item for item in batch if item is not _PIPELINE_DONE]
+        done = len(items) != len(batch)
+        if not items:
+            continue
+
+        scraper_results.extend(items)
+        if history_task is not None:
+            try:
+                history = await history_task
+            except Exception as e:
+                # Each batch then loads its own window
+                logger.warning(f"Scan history pre-load failed: {e}")
+            history_task = None
+        try:
+            batch_analysis = await analyst.analyze_results(
+                user_id,
+                items,
+                threshold,
+                settings=settings,
+                options=options,
+                session_id=session_id,
+                history=history,
+            )
+            analysis["prices_updated"] += batch_analysis.get("prices_updated", 0)
+            analysis["alerts"].extend(batch_analysis.get("alerts", []))
+            if batch_analysis.get("write_failures"):
+                analysis.setdefault("write_failures", []).extend(
+                    batch_analysis["write_failures"]
+                )
+            if batch_analysis.get("target_price") is not None:
+                analysis["target_price"] = batch_analysis["target_price"]
+            if checkpointer:
+                await checkpointer.record_persisted(items)
+            if on_batch_persisted:
+                await on_batch_persisted(items)
+        except Exception as e:
+            logger.error(f"Analyst batch failure ({len(items)} hotels): {e}")
+
+        if first_persisted_at is None:
+            first_persisted_at = time.monotonic()
+            logger.info(
+                f"Time-to-first-price: {first_persisted_at - started:.2f}s "
+                f"({len(items)} hotel(s) in first batch)"
+            )
+
+        # 4.5 Room Type Cataloging
+        try:
+            await update_room_type_catalog(db, items, hotels)
+        except Exception as e:
+            logger.warning(f"Room Catalog failure: {e}")
+
+    # Surface scraper crashes (the sentinel is always delivered via finally)
+    try:
+        await producer
+    finally:
+        if history_task is not None:
+            history_task.cancel()
+        if checkpointer:
+            await checkpointer.flush()
+    logger.info(
+        f"Streaming pipeline finished {len(scraper_results)} hotels in {time.monotonic() - started:.2f}s"
+    )
+    return scraper_results, analysis
 
 
 async def run_monitor_background(
@@ -258,9 +461,22 @@ async def run_monitor_background(
     options: Optional[ScanOptions],
     db: Client,
     session_id: Optional[UUID],
-):
+    budget=None,
+    fetch_plan=None,
+    on_batch_persisted: Optional[Callable[[List[Dict[str, Any]]], Awaitable[None]]] = None,
+    raise_errors: bool = False,
+    resume: bool = False,
+) -> str:
     """
     Background orchestrator. Mission Control for specialized AI agents.
+    `budget` (FairShareBudget) and `fetch_plan` (SharedFetchPlan) are only set
+    by the scheduler when several users scan at once. The scan queue passes
+    `raise_errors` (it owns retries). With `resume`, hotels checkpointed on the
+    session within the freshness window are skipped or replayed, not refetched.
+    `options.grid_days` expands the scan over that many check-in dates
+    (date_grid.py). A scan that saved prices schedules a background rebuild of
+    the market intelligence snapshots the user recently viewed
+    (market_snapshot.py). Returns the final session status.
     """
     try:
         # 1. Initialize Agents (Lazy Loading)
@@ -276,11 +492,10 @@ async def run_monitor_background(
         threshold = 2.0
         settings = {}
         try:
-            settings_res = (
+            settings_res = await execute_async(
                 db.table("settings")
                 .select("*")
                 .eq("user_id", str(user_id))
-                .execute()
             )
             if settings_res.data:
                 settings = settings_res.data[0]
@@ -288,32 +503,75 @@ async def run_monitor_background(
         except Exception:
             pass
 
-        # 3. Phase 1: Scraper Agent
-        logger.info(f"Starting ScraperAgent for {len(hotels)} hotels...")
-        scraper_results = await scraper.run_scan(user_id, hotels, options, session_id)
+        # 2.4 Date grid: one cell per (hotel, check-in date), scanned as one session
+        batch_size = None
+        if options and options.grid_days:
+            from backend.services.date_grid import SCAN_GRID_BATCH_SIZE, expand_date_grid
 
-        # 4. Phase 2: Analyst Agent
-        logger.info("Starting AnalystAgent...")
-        analysis = await analyst.analyze_results(
-            user_id, scraper_results, threshold, settings=settings, options=options, session_id=session_id
+            hotel_count = len(hotels)
+            hotels, options = expand_date_grid(hotels, options)
+            batch_size = SCAN_GRID_BATCH_SIZE
+            if session_id:
+                await trace_sink.append(
+                    db,
+                    session_id,
+                    f"[Date Grid] {len(hotels) // max(1, hotel_count)} check-in dates x "
+                    f"{hotel_count} hotels = {len(hotels)} cells",
+                )
+
+        # 2.5 Per-hotel checkpoints (and resume from them)
+        from backend.services.scan_checkpoints import (
+            SCAN_CHECKPOINTS_ENABLED,
+            ResumePlan,
+            ScanCheckpointer,
         )
 
-        # 4.5 Room Type Cataloging
-        try:
-            from backend.services.room_type_service import update_room_type_catalog
+        checkpointer = (
+            ScanCheckpointer(db, session_id)
+            if session_id and SCAN_CHECKPOINTS_ENABLED
+            else None
+        )
+        resume_plan = ResumePlan(fetch=list(hotels))
+        if resume and checkpointer:
+            resume_plan = await checkpointer.load_plan(hotels)
+            if resume_plan.credits_saved:
+                await trace_sink.append(
+                    db,
+                    session_id,
+                    f"[Resume] Reusing {resume_plan.credits_saved} checkpointed hotels "
+                    f"({len(resume_plan.skip)} already saved, {len(resume_plan.replay)} replayed); "
+                    f"fetching {len(resume_plan.fetch)}",
+                )
 
-            await update_room_type_catalog(db, scraper_results, hotels)
-        except Exception as e:
-            logger.warning(f"Room Catalog failure: {e}")
+        # 3-4. Scraper -> Analyst -> Room Catalog (streamed)
+        logger.info(f"Starting streaming Agent-Mesh for {len(hotels)} hotels...")
+        scraper_results, analysis = await _run_streaming_pipeline(
+            db,
+            scraper,
+            analyst,
+            user_id,
+            hotels,
+            options,
+            session_id,
+            threshold,
+            settings,
+            budget=budget,
+            fetch_plan=fetch_plan,
+            on_batch_persisted=on_batch_persisted,
+            checkpointer=checkpointer,
+            replay_results=resume_plan.replay,
+            fetch_hotels=resume_plan.fetch,
+            batch_size=batch_size,
+            queue_size=batch_size,
+        )
 
         # 5. Phase 3: Notifier Agent
         if analysis.get("alerts"):
             try:
-                settings_res = (
+                settings_res = await execute_async(
                     db.table("settings")
                     .select("*")
                     .eq("user_id", str(user_id))
-                    .execute()
                 )
                 settings = settings_res.data[0] if settings_res.data else None
                 if settings:
@@ -330,37 +588,110 @@ async def run_monitor_background(
             final_status = "partial"
 
         if session_id:
-            db.table("scan_sessions").update(
-                {"status": final_status, "completed_at": datetime.now().isoformat()}
-            ).eq("id", str(session_id)).execute()
+            # Make sure every buffered reasoning entry lands before the UI sees "completed"
+            await trace_sink.flush(session_id)
+            await execute_async(
+                db.table("scan_sessions").update(
+                    {"status": final_status, "completed_at": datetime.now().isoformat()}
+                ).eq("id", str(session_id))
+            )
+
+        # 7. Rebuild the market intelligence snapshots the new prices invalidated
+        # (in the background: the scan worker and the scheduler run do not wait)
+        if analysis.get("prices_updated"):
+            from backend.services.market_snapshot import schedule_refresh
+
+            schedule_refresh(db, user_id)
+        return final_status
 
     except Exception as e:
         logger.critical(f"SYSTEM FAILURE: {e}")
         traceback.print_exc()
         if session_id:
             try:
-                # Capture Error in reasoning trace
-                res = (
-                    db.table("scan_sessions")
-                    .select("reasoning_trace")
-                    .eq("id", str(session_id))
-                    .execute()
+                # Capture Error in reasoning trace (flushes anything still buffered)
+                await trace_sink.append(
+                    db, session_id, f"[SYSTEM FAILURE] {str(e)}", flush=True
                 )
-                trace = res.data[0].get("reasoning_trace") or [] if res.data else []
-                trace.append(f"[SYSTEM FAILURE] {str(e)}")
-
-                db.table("scan_sessions").update(
-                    {
-                        "status": "failed",
-                        "reasoning_trace": trace,
-                        "completed_at": datetime.now().isoformat(),
-                    }
-                ).eq("id", str(session_id)).execute()
             except Exception:
                 pass
+        if raise_errors:
+            raise
+        if session_id:
+            try:
+                await execute_async(
+                    db.table("scan_sessions").update(
+                        {
+                            "status": "failed",
+                            "completed_at": datetime.now().isoformat(),
+                        }
+                    ).eq("id", str(session_id))
+                )
+            except Exception:
+                pass
+        return "failed"
+
 
+async def _drain_scan_queue(db, s_logger) -> int:
+    """Runs up to SCAN_QUEUE_CRON_DRAIN queued or lease-expired scan jobs."""
+    from backend.services.scan_queue import SCAN_QUEUE_CRON_DRAIN, ScanQueueWorker
 
-async def run_scheduler_check_logic():
+    if SCAN_QUEUE_CRON_DRAIN <= 0:
+        return 0
+    try:
+        ran = await ScanQueueWorker(db).drain(max_jobs=SCAN_QUEUE_CRON_DRAIN)
+        if ran:
+            s_logger.info(f"CRON: Ran {ran} queued scan job(s)")
+        return ran
+    except Exception as q_e:
+        s_logger.error(f"CRON: Scan queue drain failed: {q_e}")
+        return 0
+
+
+async def _resume_paused_session(db, user_id: str, s_logger):
+    """
+    Finds the user's latest 'paused' scheduled session (a scan split across cron
+    runs). Returns (session_id, True) if its checkpoints are still fresh;
+    a stale one is closed as 'partial' and (None, False) is returned.
+    """
+    from backend.services.scan_checkpoints import SCAN_CHECKPOINT_TTL_S, _parse_ts
+
+    try:
+        res = await execute_async(
+            db.table("scan_sessions")
+            .select("id, created_at")
+            .eq("user_id", user_id)
+            .eq("session_type", "scheduled")
+            .eq("status", "paused")
+            .order("created_at", desc=True)
+            .limit(1)
+        )
+    except Exception as e:
+        s_logger.warning(f"Paused session lookup failed for {user_id}: {e}")
+        return None, False
+    if not res.data:
+        return None, False
+
+    paused = res.data[0]
+    created_at = _parse_ts(paused.get("created_at"))
+    age_s = (datetime.now(timezone.utc) - created_at).total_seconds() if created_at else None
+    if age_s is not None and age_s <= SCAN_CHECKPOINT_TTL_S:
+        await execute_async(
+            db.table("scan_sessions").update({"status": "running"}).eq("id", paused["id"])
+        )
+        s_logger.info(f"User {user_id}: Resuming paused session {paused['id']}")
+        return paused["id"], True
+
+    # Too old to reuse its prices: keep what it saved and start over
+    await execute_async(
+        db.table("scan_sessions")
+        .update({"status": "partial", "completed_at": datetime.now().isoformat()})
+        .eq("id", paused["id"])
+    )
+    return None, False
+
+
+async def run_scheduler_check_logic(dry_run: bool = False) -> Optional[Dict[str, Any]]:
     """
     [CRITICAL BACKGROUND LOGIC]
     Core engine for the persistent background scheduler.
@@ -368,50 +699,72 @@ async def run_scheduler_check_logic():
     FEATURE OVERVIEW:
     - Resolves 'Lazy Cron' by running independently of frontend traffic.
     - Uses a multi-layered trigger (VM Cron + GitHub Actions).
-    - Ensures scans are dispatched to Celery workers for asynchronous processing.
+    - Runs due users concurrently under one fair-share SerpApi budget
+      (see backend/services/scan_scheduler.py).
 
     FLOW:
     1. Identifies active users whose 'next_scan_at' timestamp is in the past.
-    2. Calculates the 'next_run' interval based on user settings (default: 24h).
-    3. Updates 'next_scan_at' immediately to act as a soft-lock (preventing duplicate dispatches).
-    4. Dispatches the scan task to the Redis/Celery queue for VM-side execution.
+    2. Admits users under the per-run credit budget (the rest are deferred).
+    3. Calculates the 'next_run' interval based on user settings (default: 24h).
+    4. Updates 'next_scan_at' immediately to act as a soft-lock (preventing duplicate dispatches).
+    5. Runs the scans in-process, SCHEDULER_MAX_CONCURRENT_USERS at a time.
+
+    With SCHEDULER_PRIORITY_MODE=1, step 1 ranks the (hotel, check-in) pairs of
+    every active user instead and scans only the best ones that fit the daily
+    credit budget (see backend/services/scan_priority.py).
+
+    With `dry_run=True` nothing is written: the projected wall-clock time and
+    credit use of the run are returned instead.
     """
     s_logger = get_scheduler_logger()
-    s_logger.info("CRON: Starting scheduler check...")
+    s_logger.info(f"CRON: Starting scheduler check{' (dry run)' if dry_run else ''}...")
     from backend.utils.db import get_supabase
+    from backend.services import scan_scheduler
 
     try:
         supabase = get_supabase()
         if not supabase:
             logger.error("CRON: Database unavailable")
-            return
+            return None
 
         # 0. Cleanup Zombie Sessions
         # EXPLANATION: Long-running sessions (likely crashed/stalled) inflate the
         # "active" scan count and the system-wide error rate stats.
         # We mark sessions running for > 2 hours as failed to maintain signal integrity.
-        try:
-            zombie_cutoff = (
-                datetime.now(timezone.utc) - timedelta(hours=2)
-            ).isoformat()
-            zombies = (
-                supabase.table("scan_sessions")
-                .select("id")
-                .in_("status", ["pending", "running"])
-                .lt("created_at", zombie_cutoff)
-                .execute()
-            )
+        if not dry_run:
+            try:
+                zombie_cutoff = (
+                    datetime.now(timezone.utc) - timedelta(hours=2)
+                ).isoformat()
+                def zombie_query():
+                    return (
+                        supabase.table("scan_sessions")
+                        .select("id")
+                        .in_("status", ["pending", "running"])
+                        .lt("created_at", zombie_cutoff)
+                    )
 
-            if zombies.data:
-                z_ids = [z["id"] for z in zombies.data]
-                s_logger.warning(
-                    f"CRON: Cleaning up {len(z_ids)} zombie sessions: {z_ids}"
-                )
-                supabase.table("scan_sessions").update(
-                    {"status": "failed", "completed_at": datetime.now().isoformat()}
-                ).in_("id", z_ids).execute()
-        except Exception as z_e:
-            s_logger.error(f"CRON: Zombie cleanup failed: {z_e}")
+                # Queue jobs (job_options set) are governed by their lease, not
+                # their age; the plain query covers databases without migration 032
+                try:
+                    zombies = await execute_async(
+                        zombie_query().is_("job_options", "null")
+                    )
+                except Exception:
+                    zombies = await execute_async(zombie_query())
+
+                if zombies.data:
+                    z_ids = [z["id"] for z in zombies.data]
+                    s_logger.warning(
+                        f"CRON: Cleaning up {len(z_ids)} zombie sessions: {z_ids}"
+                    )
+                    await execute_async(
+                        supabase.table("scan_sessions").update(
+                            {"status": "failed", "completed_at": datetime.now().isoformat()}
+                        ).in_("id", z_ids)
+                    )
+            except Exception as z_e:
+                s_logger.error(f"CRON: Zombie cleanup failed: {z_e}")
 
         # 1. Get all active users with schedules due
         # KAİZEN: Robust ISO format for Supabase comparison (YYYY-MM-DDTHH:MM:SSZ)
@@ -420,39 +773,47 @@ async def run_scheduler_check_logic():
         s_logger.info(f"CRON: Checking for scans due before {now_iso}")
 
         # 1.1 Fetch all active profiles
-        result = (
+        # Priority mode ranks every active user's hotels, so nobody is filtered
+        # out by next_scan_at (see backend/services/scan_priority.py)
+        from backend.services import scan_priority
+
+        priority_mode = scan_priority.SCHEDULER_PRIORITY_MODE
+        profiles_query = (
             supabase.table("profiles")
             .select("id, next_scan_at, scan_frequency_minutes, subscription_status")
-            .lte("next_scan_at", now_iso)
             .in_("subscription_status", ["active", "trial"])
-            .execute()
         )
+        if not priority_mode:
+            profiles_query = profiles_query.lte("next_scan_at", now_iso)
+        result = await execute_async(profiles_query)
 
         active_due = result.data or []
-        s_logger.info(f"CRON: Found {len(active_due)} active profiles due for scan.")
+        s_logger.info(
+            f"CRON: Found {len(active_due)} active profiles "
+            f"{'to rank' if priority_mode else 'due for scan'}."
+        )
 
         if not active_due:
-            return
+            if not dry_run:
+                await _drain_scan_queue(supabase, s_logger)
+            return {"dry_run": dry_run, "users": 0, "deferred": 0}
 
         # 1.2 Fetch actual user settings for frequency override
         due_ids = [u["id"] for u in active_due]
-        settings_res = (
+        settings_res = await execute_async(
             supabase.table("settings")
             .select("user_id, check_frequency_minutes")
             .in_("user_id", due_ids)
-            .execute()
         )
         settings_map = {
             s["user_id"]: s["check_frequency_minutes"] for s in settings_res.data or []
         }
 
         # 1.3 Pool all hotels (active only)
-        hotels_res = (
-            supabase.table("hotels")
-            .select("*")
-            .in_("user_id", due_ids)
-            .is_("deleted_at", "null")
-            .execute()
+        hotels_res = await select_projected_async(
+            supabase,
+            HOTEL_SCAN,
+            lambda q: q.in_("user_id", due_ids).is_("deleted_at", "null"),
         )
         all_hotels = hotels_res.data or []
 
@@ -464,114 +825,228 @@ async def run_scheduler_check_logic():
                 user_hotels_map[uid] = []
             user_hotels_map[uid].append(h)
 
-        for user in active_due:
-            try:
-                user_id = user["id"]
-                s_logger.info(f"Processing user {user_id}...")
-
-                # 2. Update next_scan_at immediately (Locking mechanism)
-                # KAİZEN: Precise Scheduling (Anti-Drift)
-                # We calculate the NEXT scan relative to the INTENDED schedule time
-                # instead of now() to prevent the "creeping drift" problem where
-                # delays accumulate day over day.
-                freq = (
-                    settings_map.get(user_id)
-                    or user.get("scan_frequency_minutes")
-                    or 1440
-                )
-                intended_at_str = user.get("next_scan_at")
+        # 1.4 Priority mode: only the (hotel, check-in) pairs worth a credit this run
+        priority_report = None
+        if priority_mode:
+            user_hotels_map, priority_report = await scan_priority.plan_priority_scan(
+                supabase, user_hotels_map, now=now_dt
+            )
+            active_due = [u for u in active_due if user_hotels_map.get(u["id"])]
+            s_logger.info(
+                f"CRON: Priority mode picked {priority_report['selected']}/"
+                f"{priority_report['candidates']} pairs (allowance {priority_report['allowance']}, "
+                f"{priority_report['spent_today']}/{priority_report['daily_budget']} credits spent today)"
+            )
 
-                if intended_at_str:
-                    try:
-                        intended_at = datetime.fromisoformat(
-                            intended_at_str.replace("Z", "+00:00")
-                        )
-                        next_run_dt = intended_at + timedelta(minutes=freq)
-                        # Guard: If we are catastrophically behind (e.g. system was down for days),
-                        # don't schedule 1000 scans in the past. Re-anchor to now.
-                        if next_run_dt < now_dt:
-                            next_run_dt = now_dt + timedelta(minutes=freq)
-                    except Exception:
+        # 2. Credit budget: deferred users keep their next_scan_at and go first next run
+        admitted, deferred = scan_scheduler.plan_users(active_due, user_hotels_map)
+        if deferred:
+            s_logger.warning(
+                f"CRON: Credit budget reached, deferring {len(deferred)} users: "
+                f"{[u['id'] for u in deferred]}"
+            )
+
+        # 2.1 One global fetch plan: each unique (property, dates, adults, currency)
+        # is fetched once and fanned out to every user tracking it
+        fetch_plan = scan_scheduler.SharedFetchPlan.build(admitted, user_hotels_map)
+        projection = scan_scheduler.project_schedule(
+            [(u["id"], len(user_hotels_map.get(u["id"], []))) for u in admitted]
+        )
+        summary = {
+            "dry_run": dry_run,
+            "users": len(admitted),
+            "deferred": len(deferred),
+            "deferred_user_ids": [u["id"] for u in deferred],
+            "hotels": projection["hotels"],
+            "projected_credits": fetch_plan.unique_keys,
+            "projected_credits_saved": fetch_plan.planned_requests - fetch_plan.unique_keys,
+            "projected_wall_s": projection["projected_wall_s"],
+            "sequential_wall_s": projection["sequential_wall_s"],
+            "max_concurrent_users": scan_scheduler.SCHEDULER_MAX_CONCURRENT_USERS,
+            "global_concurrency": scan_scheduler.SCHEDULER_GLOBAL_CONCURRENCY,
+        }
+        if priority_report:
+            summary["priority"] = priority_report
+        s_logger.info(
+            f"CRON: Plan {summary['users']} users / {summary['hotels']} hotels, "
+            f"<= {fetch_plan.unique_keys} credits ({summary['projected_credits_saved']} deduplicated), "
+            f"projected {summary['projected_wall_s']}s "
+            f"(sequential {summary['sequential_wall_s']}s)"
+        )
+        if dry_run:
+            summary["per_user"] = projection["per_user"]
+            return summary
+
+        async def process_user(user, budget):
+            user_id = user["id"]
+            s_logger.info(f"Processing user {user_id}...")
+
+            # 3. Update next_scan_at immediately (Locking mechanism)
+            # KAİZEN: Precise Scheduling (Anti-Drift)
+            # We calculate the NEXT scan relative to the INTENDED schedule time
+            # instead of now() to prevent the "creeping drift" problem where
+            # delays accumulate day over day.
+            freq = (
+                settings_map.get(user_id)
+                or user.get("scan_frequency_minutes")
+                or 1440
+            )
+            intended_at_str = user.get("next_scan_at")
+
+            if intended_at_str:
+                try:
+                    intended_at = datetime.fromisoformat(
+                        intended_at_str.replace("Z", "+00:00")
+                    )
+                    next_run_dt = intended_at + timedelta(minutes=freq)
+                    # Guard: If we are catastrophically behind (e.g. system was down for days),
+                    # don't schedule 1000 scans in the past. Re-anchor to now.
+                    if next_run_dt < now_dt:
                         next_run_dt = now_dt + timedelta(minutes=freq)
-                else:
+                except Exception:
                     next_run_dt = now_dt + timedelta(minutes=freq)
+            else:
+                next_run_dt = now_dt + timedelta(minutes=freq)
 
-                next_run_iso = next_run_dt.isoformat().replace("+00:00", "Z")
+            next_run_iso = next_run_dt.isoformat().replace("+00:00", "Z")
 
+            await execute_async(
                 supabase.table("profiles").update({"next_scan_at": next_run_iso}).eq(
                     "id", user_id
-                ).execute()
-                s_logger.info(
-                    f"User {user_id}: Updated next_scan_at to {next_run_iso} (intended was {intended_at_str})"
                 )
+            )
+            s_logger.info(
+                f"User {user_id}: Updated next_scan_at to {next_run_iso} (intended was {intended_at_str})"
+            )
 
-                # 3. Execute scan DIRECTLY (self-sufficient — no external worker needed)
-                # EXPLANATION: Previous architecture dispatched to Celery/Redis, requiring
-                # a separate VM worker to be alive. If the worker was down, scans silently
-                # failed. Now we run the scan in-process so GitHub Actions is self-sufficient.
-                hotels = user_hotels_map.get(user_id, [])
-                if hotels:
-                    # Create a scan session for tracking
-                    session_id = None
-                    try:
-                        session_result = (
-                            supabase.table("scan_sessions")
-                            .insert(
-                                {
-                                    "user_id": user_id,
-                                    "session_type": "scheduled",
-                                    "hotels_count": len(hotels),
-                                    "status": "pending",
-                                }
-                            )
-                            .execute()
-                        )
-                        session_id = (
-                            session_result.data[0]["id"]
-                            if session_result.data
-                            else None
-                        )
-                    except Exception as se:
-                        s_logger.warning(
-                            f"Session creation failed for scheduled scan: {se}"
-                        )
+            # 4. Execute scan DIRECTLY (self-sufficient — no external worker needed)
+            # EXPLANATION: Previous architecture dispatched to Celery/Redis, requiring
+            # a separate VM worker to be alive. If the worker was down, scans silently
+            # failed. Now we run the scan in-process so GitHub Actions is self-sufficient.
+            hotels = user_hotels_map.get(user_id, [])
+            if not hotels:
+                return
 
-                    # KAİZEN: Direct Execution (eliminates Celery worker dependency)
-                    # Run the full scan pipeline in-process instead of dispatching to Redis.
-                    # This ensures scans complete even without an external VM worker.
-                    try:
-                        s_logger.info(
-                            f"Executing scan directly for user {user_id} ({len(hotels)} hotels)..."
-                        )
-                        await run_monitor_background(
-                            user_id=UUID(user_id),
-                            hotels=hotels,
-                            options=None,
-                            db=supabase,
-                            session_id=UUID(session_id) if session_id else None,
-                        )
-                        s_logger.info(
-                            f"Direct scan completed for user {user_id} (session={session_id})"
-                        )
-                    except Exception as direct_e:
-                        s_logger.error(
-                            f"Direct execution failed for {user_id}: {direct_e}"
+            # 4.1 Split scans: continue this user's paused session if it is still fresh
+            session_id, resume = await _resume_paused_session(supabase, user_id, s_logger)
+
+            # Create a scan session for tracking
+            if not session_id:
+                try:
+                    session_result = await execute_async(
+                        supabase.table("scan_sessions")
+                        .insert(
+                            {
+                                "user_id": user_id,
+                                "session_type": "scheduled",
+                                "hotels_count": len(hotels),
+                                "status": "pending",
+                            }
                         )
+                    )
+                    session_id = (
+                        session_result.data[0]["id"] if session_result.data else None
+                    )
+                except Exception as se:
+                    s_logger.warning(f"Session creation failed for scheduled scan: {se}")
+
+            # 4.2 Cap the hotels fetched this run; the rest wait on the paused session
+            run_hotels, later = hotels, []
+            if session_id and scan_scheduler.SCHEDULER_MAX_HOTELS_PER_SCAN:
+                from backend.services.scan_checkpoints import ScanCheckpointer
+
+                pending = (
+                    (await ScanCheckpointer(supabase, session_id).load_plan(hotels)).fetch
+                    if resume
+                    else hotels
+                )
+                run_hotels, later = scan_scheduler.split_scan(hotels, pending)
+
+            # KAİZEN: Direct Execution (eliminates Celery worker dependency)
+            # Run the full scan pipeline in-process instead of dispatching to Redis.
+            # This ensures scans complete even without an external VM worker.
+            try:
+                s_logger.info(
+                    f"Executing scan directly for user {user_id} ({len(run_hotels)} hotels"
+                    f"{f', {len(later)} left for the next run' if later else ''})..."
+                )
+                await run_monitor_background(
+                    user_id=UUID(user_id),
+                    hotels=run_hotels,
+                    options=None,
+                    db=supabase,
+                    session_id=UUID(session_id) if session_id else None,
+                    budget=budget,
+                    fetch_plan=fetch_plan,
+                    resume=resume,
+                )
+                s_logger.info(
+                    f"Direct scan completed for user {user_id} (session={session_id})"
+                )
+            except Exception as direct_e:
+                s_logger.error(f"Direct execution failed for {user_id}: {direct_e}")
+                return
+
+            if later:
+                # Pause the session and bring the user back soon instead of after `freq`
+                resume_at = now_dt + timedelta(
+                    minutes=scan_scheduler.SCHEDULER_RESUME_AFTER_MINUTES
+                )
+                await execute_async(
+                    supabase.table("scan_sessions")
+                    .update({"status": "paused", "completed_at": None})
+                    .eq("id", session_id)
+                )
+                await execute_async(
+                    supabase.table("profiles")
+                    .update({"next_scan_at": resume_at.isoformat().replace("+00:00", "Z")})
+                    .eq("id", user_id)
+                )
+                s_logger.info(
+                    f"User {user_id}: Paused session {session_id} with {len(later)} hotels left"
+                )
+
+        # 5. Concurrent execution
+        # KAIZEN: Fair-Share Scheduling
+        # Users used to run strictly one after another, so the run took the sum
+        # of all scans. Now they share one global SerpApi budget, smallest first.
+        started = time.monotonic()
+        budget = scan_scheduler.FairShareBudget()
+        outcomes = await scan_scheduler.run_users(admitted, process_user, budget)
+        for user, outcome in zip(admitted, outcomes):
+            if isinstance(outcome, Exception):
+                s_logger.error(f"Error processing user {user.get('id')}: {outcome}")
+
+        summary["wall_s"] = round(time.monotonic() - started, 1)
+        summary["budget"] = budget.get_stats()
+        summary["fetch_plan"] = fetch_plan.get_stats()
+        summary["credits_saved"] = fetch_plan.shared
+        s_logger.info(
+            f"CRON: Finished {len(admitted)} users in {summary['wall_s']}s "
+            f"(peak {budget.peak_inflight} SerpApi calls in flight, "
+            f"{fetch_plan.fetches} fetches, {fetch_plan.shared} credits saved by the fetch plan)"
+        )
 
-            except Exception as u_e:
-                s_logger.error(f"Error processing user {user.get('id')}: {u_e}")
+        # 6. Durable queue: resume manual scans orphaned by a restart
+        summary["queue_jobs_run"] = await _drain_scan_queue(supabase, s_logger)
+        return summary
 
     except Exception as e:
         s_logger.critical(f"CRON ERROR: {e}")
         s_logger.error(traceback.format_exc())
+        return None
 
 
 if __name__ == "__main__":
     # EXPLANATION: CLI Test Mode
     # Allows manual testing of the scheduler logic from the terminal.
     # Usage: export PYTHONPATH=$PYTHONPATH:. && python3 backend/services/monitor_service.py
+    # Add --dry-run to print the projected wall-clock time and credit use only.
     import asyncio
+    import sys
 
     print("Starting manual scheduler check...")
-    asyncio.run(run_scheduler_check_logic())
+    plan = asyncio.run(run_scheduler_check_logic(dry_run="--dry-run" in sys.argv))
+    if plan:
+        print(plan)
     print("Check complete. See scheduler.log for details.")
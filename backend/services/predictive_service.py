@@ -6,9 +6,11 @@ Calculates market volatility and suggests dynamic alert thresholds based on hist
 import numpy as np
 from uuid import UUID
 from datetime import datetime, timedelta
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List
 from supabase import Client
 from backend.utils.logger import get_logger
+from backend.utils.db import execute_async
+from backend.services.price_frame import PriceLogFrame
 
 logger = get_logger(__name__)
 
@@ -30,40 +32,40 @@ class PredictiveService:
         try:
             # Fetch recent price logs for this hotel
             # We want daily snapshots to calculate volatility accurately
-            res = (
+            res = await execute_async(
                 db.table("price_logs")
                 .select("price, recorded_at")
                 .eq("hotel_id", str(hotel_id))
                 .order("recorded_at", desc=True)
                 .limit(limit)
-                .execute()
             )
 
-            if not res.data or len(res.data) < 5:
-                return 0.0 # Not enough data for volatility
+            return self.volatility_from_logs(res.data)
 
-            prices = [row["price"] for row in res.data if row["price"] > 0]
-            if len(prices) < 5:
-                return 0.0
+        except Exception as e:
+            logger.error(f"Volatility calculation failed for {hotel_id}: {e}")
+            return 0.0
 
-            # Calculate daily percentage changes
-            pct_changes = []
-            for i in range(len(prices) - 1):
-                prev = prices[i+1]
-                curr = prices[i]
-                if prev > 0:
-                    pct_changes.append(abs((curr - prev) / prev) * 100)
+    def volatility_from_logs(self, logs: Optional[List[Dict[str, Any]]]) -> float:
+        """
+        Pure volatility computation over logs ordered newest first.
+        Shared by calculate_market_volatility and callers that already hold the
+        history in memory (e.g. AnalystAgent's per-scan PriceHistoryIndex).
+        """
+        if not logs or len(logs) < 5:
+            return 0.0 # Not enough data for volatility
 
-            if not pct_changes:
-                return 0.0
+        prices = PriceLogFrame(logs).price
+        prices = prices[prices > 0]
+        if len(prices) < 5:
+            return 0.0
 
-            # Volatility is the standard deviation of these changes
-            volatility = float(np.std(pct_changes))
-            return round(volatility, 2)
+        # Calculate daily percentage changes (newest first: prices[i] follows prices[i+1])
+        pct_changes = np.abs((prices[:-1] - prices[1:]) / prices[1:]) * 100
 
-        except Exception as e:
-            logger.error(f"Volatility calculation failed for {hotel_id}: {e}")
-            return 0.0
+        # Volatility is the standard deviation of these changes
+        volatility = float(np.std(pct_changes))
+        return round(volatility, 2)
 
     def get_smart_threshold(
         self, 
@@ -0,0 +1,327 @@
+"""
+Price Log Frame
+===============
+Columnar, in-memory view of a `price_logs` query result for analytics.
+
+WHY: The market analysis calendar and the volatility check walked lists of log
+dicts in Python for every group-by, "latest per key", mean and milestone. On a
+90-day, 30-hotel history that is tens of thousands of dict lookups per pass,
+repeated per calendar cell.
+
+HOW:
+- Scalar fields become NumPy columns, built on first use from the rows (a caller
+  only pays for the columns it reads):
+    price         float64, NaN where missing or not a number (or where a
+                  per-row price function returns None)
+    hotel         int32 index into `hotel_ids`
+    currency      int32 index into `currencies` (empty currency -> "USD")
+    checkin       int32 index into `checkin_dates`, the check-in date prefix.
+                  Labels are sorted, so codes compare like the dates.
+    recorded_day  int32 index into `recorded_days`, the recorded_at date prefix
+    search_rank   float64, NaN where missing
+- recorded_at is parsed to epoch microseconds only for the rows that need it
+  (`recorded_epoch_us`).
+- Nested parity_offers / room_types stay in `rows`; `offers()` flattens the
+  offers into a side table.
+- Row order is kept. Rows arrive newest first, so "latest per key" is the first
+  row of each key (`first_per_group`).
+
+Outputs stay bit-compatible with the loops they replace: labels are the exact
+strings those loops keyed their dicts by, and ties in "first max/min per group"
+resolve to the earliest row, like Python's max/min.
+"""
+
+from datetime import datetime, timezone
+from functools import cached_property
+from itertools import repeat
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+_EPOCH_AWARE = datetime(1970, 1, 1, tzinfo=timezone.utc)
+_EPOCH_NAIVE = datetime(1970, 1, 1)
+_ONE_US = datetime(1970, 1, 1, 0, 0, 0, 1) - _EPOCH_NAIVE
+
+
+_NUMBER_TYPES = frozenset((int, float, type(None)))
+
+
+def _labels(
+    values: Sequence[Any], normalize: Optional[Callable[[Any], Any]] = None
+) -> Tuple[List[Any], np.ndarray]:
+    """
+    Sorted distinct (normalized) values and each row's index into them.
+
+    Rows are coded by their raw value first, so `normalize` and the sort only
+    run once per distinct value (np.unique on an object array would sort every
+    row with Python comparisons).
+    """
+    distinct = dict.fromkeys(values)
+    if normalize is None:
+        labels = sorted(distinct)
+        index = {v: i for i, v in enumerate(labels)}
+    else:
+        normalized = {v: normalize(v) for v in distinct}
+        labels = sorted(set(normalized.values()))
+        position = {v: i for i, v in enumerate(labels)}
+        index = {v: position[n] for v, n in normalized.items()}
+    codes = np.fromiter(map(index.__getitem__, values), dtype=np.int32, count=len(values))
+    return labels, codes
+
+
+def _number_or_nan(value: Any) -> float:
+    # Only JSON numbers: a string price compared unequal to 0 in the loops
+    return float(value) if isinstance(value, (int, float)) else np.nan
+
+
+def _float_or_nan(value: Any) -> float:
+    if value is None:
+        return np.nan
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return np.nan
+
+
+def float_column(
+    values: List[Any], convert: Callable[[Any], Optional[float]]
+) -> np.ndarray:
+    """
+    float64 column of `values`, NaN for None. `convert` (None -> NaN) only runs
+    when something other than JSON numbers occurs.
+    """
+    if _NUMBER_TYPES.issuperset(map(type, values)):
+        return np.array(values, dtype=np.float64)
+    return np.fromiter(
+        (np.nan if v is None else v for v in map(convert, values)),
+        dtype=np.float64,
+        count=len(values),
+    )
+
+
+def first_per_group(
+    codes: np.ndarray, n_groups: int, mask: Optional[np.ndarray] = None
+) -> np.ndarray:
+    """First row index per group code (optionally among `mask` rows), -1 if none."""
+    rows = np.arange(len(codes)) if mask is None else np.flatnonzero(mask)
+    out = np.full(n_groups, -1, dtype=np.int64)
+    if len(rows):
+        keys, first = np.unique(codes[rows], return_index=True)
+        out[keys] = rows[first]
+    return out
+
+
+def first_extreme_per_group(
+    groups: np.ndarray, values: np.ndarray, n_groups: int, largest: bool
+) -> np.ndarray:
+    """
+    Position of the first max (largest=True) or min value per group, -1 if the
+    group is empty. Ties resolve to the earliest position, like Python's max/min.
+    """
+    out = np.full(n_groups, -1, dtype=np.int64)
+    if not len(groups):
+        return out
+    order = np.lexsort((np.arange(len(groups)), -values if largest else values, groups))
+    g_sorted = groups[order]
+    heads = np.flatnonzero(np.r_[True, g_sorted[1:] != g_sorted[:-1]])
+    out[g_sorted[heads]] = order[heads]
+    return out
+
+
+def group_runs(*keys: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Stable grouping by one or more int code columns.
+
+    Returns (order, starts, ends): `order[starts[g]:ends[g]]` are the rows of
+    group g in their original order. Groups are ordered by the keys, first key
+    most significant.
+    """
+    n = len(keys[0]) if keys else 0
+    if not n:
+        empty = np.zeros(0, dtype=np.int64)
+        return empty, empty, empty
+    order = np.lexsort(tuple(reversed(keys)))
+    change = np.zeros(n, dtype=bool)
+    change[0] = True
+    for key in keys:
+        k = key[order]
+        change[1:] |= k[1:] != k[:-1]
+    starts = np.flatnonzero(change)
+    ends = np.r_[starts[1:], n]
+    return order, starts, ends
+
+
+class PriceLogFrame:
+    """Columns over a list of price_logs rows (kept in the given order)."""
+
+    def __init__(
+        self,
+        rows: Iterable[Dict[str, Any]],
+        hotel_ids: Optional[Sequence[str]] = None,
+        price: Optional[Callable[[Dict[str, Any]], Optional[float]]] = None,
+    ):
+        self.rows: List[Dict[str, Any]] = list(rows)
+        self._hotel_ids = list(hotel_ids) if hotel_ids is not None else None
+        self._price_fn = price
+        self._hotel_codes: Optional[np.ndarray] = None
+
+    @classmethod
+    def from_hotel_map(
+        cls,
+        hotel_prices_map: Dict[str, List[Dict[str, Any]]],
+        price: Optional[Callable[[Dict[str, Any]], Optional[float]]] = None,
+    ) -> "PriceLogFrame":
+        """One frame over {hotel_id: logs}; `hotel` indexes the map's keys in order."""
+        rows: List[Dict[str, Any]] = []
+        codes: List[int] = []
+        for i, logs in enumerate(hotel_prices_map.values()):
+            rows.extend(logs)
+            codes.extend([i] * len(logs))
+        frame = cls(rows, hotel_ids=list(hotel_prices_map.keys()), price=price)
+        frame._hotel_codes = np.asarray(codes, dtype=np.int32)
+        return frame
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    # --- Columns ---
+
+    def _get(self, key: str, default: Any = None) -> List[Any]:
+        return list(map(dict.get, self.rows, repeat(key), repeat(default)))
+
+    @cached_property
+    def price(self) -> np.ndarray:
+        fn = self._price_fn
+        values = self._get("price") if fn is None else list(map(fn, self.rows))
+        return float_column(values, _number_or_nan)
+
+    @cached_property
+    def _hotel(self) -> Tuple[List[str], np.ndarray]:
+        if self._hotel_codes is not None:
+            return self._hotel_ids or [], self._hotel_codes
+        keys = list(map(str, self._get("hotel_id")))
+        if self._hotel_ids is None:
+            return _labels(keys)
+        index = {hid: i for i, hid in enumerate(self._hotel_ids)}
+        ids = list(self._hotel_ids)
+        for k in dict.fromkeys(keys):
+            if k not in index:
+                index[k] = len(ids)
+                ids.append(k)
+        return ids, np.fromiter(map(index.__getitem__, keys), dtype=np.int32, count=len(keys))
+
+    @property
+    def hotel_ids(self) -> List[str]:
+        return self._hotel[0]
+
+    @property
+    def hotel(self) -> np.ndarray:
+        return self._hotel[1]
+
+    @cached_property
+    def _currency(self) -> Tuple[List[str], np.ndarray]:
+        return _labels(self._get("currency"), lambda c: c or "USD")
+
+    @property
+    def currencies(self) -> List[str]:
+        return self._currency[0]
+
+    @property
+    def currency(self) -> np.ndarray:
+        return self._currency[1]
+
+    @cached_property
+    def _checkin(self) -> Tuple[List[str], np.ndarray]:
+        return _labels(
+            self._get("check_in_date", ""), lambda d: str(d).split("T")[0]
+        )
+
+    @property
+    def checkin_dates(self) -> List[str]:
+        return self._checkin[0]
+
+    @property
+    def checkin(self) -> np.ndarray:
+        return self._checkin[1]
+
+    @cached_property
+    def _recorded_day(self) -> Tuple[List[str], np.ndarray]:
+        # Rows without recorded_at get "" (callers skip them as the loops did)
+        days = [(r or "").partition("T")[0] for r in self._get("recorded_at")]
+        return _labels(days)
+
+    @property
+    def recorded_days(self) -> List[str]:
+        return self._recorded_day[0]
+
+    @property
+    def recorded_day(self) -> np.ndarray:
+        return self._recorded_day[1]
+
+    @cached_property
+    def recorded_rank(self) -> np.ndarray:
+        """Rank of each row's recorded_at string ('' when missing); compares like the strings."""
+        return _labels(self._get("recorded_at"), lambda r: r or "")[1]
+
+    @cached_property
+    def search_rank(self) -> np.ndarray:
+        return float_column(self._get("search_rank"), _float_or_nan)
+
+    def recorded_epoch_us(
+        self, idx: np.ndarray
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        recorded_at of rows `idx` as (epoch microseconds, tz-aware, parsed ok).
+
+        Parsed like the Smart Continuity look-back (`fromisoformat` after Z ->
+        +00:00). Differences between two rows are exact when both are aware or
+        both naive; mixing them raised in that loop, so callers check `aware`.
+        """
+        us: List[int] = []
+        aware: List[bool] = []
+        ok: List[bool] = []
+        rows = self.rows
+        for i in idx.tolist():
+            try:
+                dt = datetime.fromisoformat(
+                    rows[i].get("recorded_at", "").replace("Z", "+00:00")
+                )
+            except Exception:
+                us.append(0)
+                aware.append(False)
+                ok.append(False)
+                continue
+            if dt.tzinfo is not None:
+                us.append((dt - _EPOCH_AWARE) // _ONE_US)
+                aware.append(True)
+            else:
+                us.append((dt - _EPOCH_NAIVE) // _ONE_US)
+                aware.append(False)
+            ok.append(True)
+        return (
+            np.asarray(us, dtype=np.int64),
+            np.asarray(aware, dtype=bool),
+            np.asarray(ok, dtype=bool),
+        )
+
+    # --- Side tables ---
+
+    def offers(
+        self, include_legacy: bool = False, rows: Optional[np.ndarray] = None
+    ) -> Tuple[np.ndarray, List[Any]]:
+        """
+        parity_offers flattened to (row index per offer, offers), for all rows or
+        just `rows`. With include_legacy, rows without parity_offers fall back to
+        their `offers`.
+        """
+        index: List[int] = []
+        offers: List[Any] = []
+        for i in range(len(self.rows)) if rows is None else rows.tolist():
+            r = self.rows[i]
+            row_offers = r.get("parity_offers") or (
+                r.get("offers") if include_legacy else None
+            )
+            if row_offers:
+                index.extend([i] * len(row_offers))
+                offers.extend(row_offers)
+        return np.asarray(index, dtype=np.int64), offers
@@ -0,0 +1,261 @@
+"""
+Price History Index
+Per-scan, in-memory view of recent `price_logs` (and `hotels` metadata) for the
+hotels an AnalystAgent pass is about to process.
+
+EXPLANATION:
+`AnalystAgent.analyze_results` used to ask the database the same kind of question
+up to ~8 times per hotel: last 10 valid prices (drop safeguard), latest log for
+the same check-in date and for any date (Smart Continuity), last 2 logs (shallow
+depth), last room types (carry-forward), last 30 prices (volatility) and the
+hotel's sentiment row. For a 50-hotel scan that is hundreds of sequential,
+blocking round trips.
+
+This index loads one history window for ALL hotels up front (paged to respect
+PostgREST's max-rows cap) plus one `hotels` query, then answers every one of those
+checks from memory. Every lookup keeps the ordering (newest first) and filters of
+the query it replaces.
+
+The window carries light columns only (PRICE_LOG_ANALYST). The jsonb the analyst
+reads - offers and room types for continuity, metadata for market depth, room
+types for carry-forward - is only ever read from each hotel's newest logs, so
+`hydrate` fills it in for those HYDRATE_PER_HOTEL rows alone. The streaming
+pipeline loads the index once per scan and every micro-batch shares it; `add`
+merges each batch's own inserts so later batches see them like a reload would.
+
+Hotels with no logs inside the window fall back to their newest logs
+(latest_price_logs), so a hotel not scanned for a month keeps its drop-alert
+baseline.
+
+TUNING (environment variables):
+    ANALYST_HISTORY_DAYS   Look-back window loaded per scan (default 30)
+"""
+
+import os
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Iterable, List, Optional
+
+from backend.utils.db import run_db
+from backend.utils.logger import get_logger
+from backend.utils.projections import PRICE_LOG_ANALYST, hydrate, select_projected
+
+logger = get_logger(__name__)
+
+HISTORY_COLUMNS = ", ".join(PRICE_LOG_ANALYST.columns)
+HOTEL_COLUMNS = "id, sentiment_breakdown, image_url, rating, reviews"
+PAGE_SIZE = 1000  # Supabase/PostgREST default max rows per request
+MAX_PAGES = 50
+# Newest logs per hotel whose heavy columns are read (recent(..., 10) is the deepest)
+HYDRATE_PER_HOTEL = 10
+# Row ids per hydration query (keeps the in_() URL short)
+HYDRATE_CHUNK = 200
+
+
+def _history_days() -> int:
+    try:
+        return int(os.getenv("ANALYST_HISTORY_DAYS", "30"))
+    except ValueError:
+        return 30
+
+
+def parse_timestamp(value: Any) -> Optional[datetime]:
+    """Parse a Postgres/ISO timestamp; naive values are treated as UTC (like the DB)."""
+    if value is None:
+        return None
+    if isinstance(value, datetime):
+        dt = value
+    else:
+        try:
+            dt = datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+        except ValueError:
+            return None
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return dt
+
+
+class PriceHistoryIndex:
+    """Newest-first price_logs per hotel plus hotel metadata, built once per scan."""
+
+    def __init__(
+        self,
+        rows: Iterable[Dict[str, Any]] = (),
+        hotels: Iterable[Dict[str, Any]] = (),
+    ):
+        self._by_hotel: Dict[str, List[Dict[str, Any]]] = {}
+        self.add(rows)
+        self._hotels: Dict[str, Dict[str, Any]] = {
+            str(h["id"]): h for h in hotels if h.get("id") is not None
+        }
+        self.query_count = 0
+
+    def add(self, rows: Iterable[Dict[str, Any]]) -> None:
+        """Merge rows (e.g. a batch's own inserts), keeping every hotel newest first."""
+        touched = set()
+        for row in rows:
+            hid = row.get("hotel_id")
+            if hid is None:
+                continue
+            self._by_hotel.setdefault(str(hid), []).append(row)
+            touched.add(str(hid))
+        # Guarantee newest-first regardless of how rows were delivered
+        for hid in touched:
+            self._by_hotel[hid].sort(
+                key=lambda r: parse_timestamp(r.get("recorded_at"))
+                or datetime.min.replace(tzinfo=timezone.utc),
+                reverse=True,
+            )
+
+    # --- Loading ---
+    @classmethod
+    def load(
+        cls,
+        db,
+        hotel_ids: List[str],
+        days: Optional[int] = None,
+        include_hotels: bool = True,
+    ) -> "PriceHistoryIndex":
+        """One paged price_logs query + one hotels query for every hotel in the scan."""
+        ids = sorted({str(h) for h in hotel_ids if h})
+        if not ids:
+            return cls()
+
+        cutoff = (datetime.now() - timedelta(days=days or _history_days())).isoformat()
+        rows: List[Dict[str, Any]] = []
+        queries = 0
+        try:
+            for page in range(MAX_PAGES):
+                start = page * PAGE_SIZE
+                res = select_projected(
+                    db,
+                    PRICE_LOG_ANALYST,
+                    lambda q, start=start: q.in_("hotel_id", ids)
+                    .gte("recorded_at", cutoff)
+                    .order("recorded_at", desc=True)
+                    .range(start, start + PAGE_SIZE - 1),
+                )
+                queries += 1
+                data = res.data or []
+                rows.extend(data)
+                if len(data) < PAGE_SIZE:
+                    break
+        except Exception as e:
+            logger.warning(f"History pre-fetch failed: {e}")
+
+        hotels: List[Dict[str, Any]] = []
+        if include_hotels:
+            try:
+                res = db.table("hotels").select(HOTEL_COLUMNS).in_("id", ids).execute()
+                queries += 1
+                hotels = res.data or []
+            except Exception as e:
+                logger.warning(f"Hotel metadata pre-fetch failed: {e}")
+
+        index = cls(rows, hotels)
+        index.query_count = queries
+        logger.info(
+            f"Loaded history index: {len(rows)} logs for {len(ids)} hotels in {queries} queries"
+        )
+        return index
+
+    @classmethod
+    async def load_async(
+        cls, db, hotel_ids: List[str], days: Optional[int] = None
+    ) -> "PriceHistoryIndex":
+        """
+        `load` on the DB pool, plus the newest logs of hotels that have none in
+        the window (the per-hotel baselines this index replaced were unbounded).
+        """
+        from backend.services.latest_price_logs import latest_logs_per_hotel
+
+        index = await run_db(cls.load, db, hotel_ids, days)
+        quiet = sorted({str(h) for h in hotel_ids if h and not index.logs(h)})
+        if quiet:
+            try:
+                latest = await latest_logs_per_hotel(
+                    db, quiet, per_hotel=HYDRATE_PER_HOTEL, columns=HISTORY_COLUMNS
+                )
+                index.add(row for logs in latest.values() for row in logs)
+                index.query_count += 1
+            except Exception as e:
+                logger.warning(f"Baseline fallback for {len(quiet)} quiet hotels failed: {e}")
+        return index
+
+    async def hydrate(
+        self, db, hotel_ids: Iterable[str], per_hotel: int = HYDRATE_PER_HOTEL
+    ) -> None:
+        """Fill the heavy columns of each hotel's newest `per_hotel` logs."""
+        rows = [
+            row
+            for hid in dict.fromkeys(str(h) for h in hotel_ids)
+            for row in self.logs(hid)[:per_hotel]
+        ]
+        await self.hydrate_rows(db, rows)
+
+    async def hydrate_rows(self, db, rows: List[Dict[str, Any]]) -> None:
+        """Fill the heavy columns of `rows` that lack them (rows are shared, in place)."""
+        heavy = PRICE_LOG_ANALYST.heavy
+        missing = [
+            r
+            for r in rows
+            if r.get("id") is not None and any(c not in r for c in heavy)
+        ]
+        for i in range(0, len(missing), HYDRATE_CHUNK):
+            try:
+                await hydrate(db, PRICE_LOG_ANALYST, missing[i : i + HYDRATE_CHUNK], heavy)
+                self.query_count += 1
+            except Exception as e:
+                # Lookups treat absent jsonb as empty, like a log that had none
+                logger.warning(f"History hydration failed: {e}")
+
+    # --- Lookups (all newest first) ---
+    def logs(self, hotel_id: str) -> List[Dict[str, Any]]:
+        return self._by_hotel.get(str(hotel_id), [])
+
+    def recent(
+        self, hotel_id: str, limit: int, since: Optional[Any] = None
+    ) -> List[Dict[str, Any]]:
+        """Last `limit` logs, optionally only those recorded strictly after `since`."""
+        logs = self.logs(hotel_id)
+        if since is not None:
+            cutoff = parse_timestamp(since)
+            logs = [
+                r
+                for r in logs
+                if (parse_timestamp(r.get("recorded_at")) or cutoff) > cutoff
+            ]
+        return logs[:limit]
+
+    def latest(
+        self,
+        hotel_id: str,
+        since: Optional[Any] = None,
+        check_in_date: Optional[str] = None,
+    ) -> Optional[Dict[str, Any]]:
+        """Newest log after `since`, optionally for one check-in date."""
+        cutoff = parse_timestamp(since) if since is not None else None
+        for row in self.logs(hotel_id):
+            if check_in_date is not None and str(row.get("check_in_date")) != str(
+                check_in_date
+            ):
+                continue
+            if cutoff is not None:
+                recorded = parse_timestamp(row.get("recorded_at"))
+                if recorded is None or recorded <= cutoff:
+                    continue
+            return row
+        return None
+
+    def valid_prices(self, hotel_id: str, currency: str, limit: int = 10) -> List[float]:
+        """Last `limit` non-zero prices in `currency` (drop safeguard baseline)."""
+        prices = []
+        for row in self.logs(hotel_id):
+            price = row.get("price")
+            if row.get("currency") == currency and price is not None and price > 0:
+                prices.append(price)
+                if len(prices) >= limit:
+                    break
+        return prices
+
+    def hotel(self, hotel_id: str) -> Optional[Dict[str, Any]]:
+        return self._hotels.get(str(hotel_id))
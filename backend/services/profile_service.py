@@ -8,8 +8,9 @@ from datetime import datetime, timezone
 from uuid import UUID
 from typing import Optional, Dict, Any
 from fastapi import HTTPException
-from supabase import Client, create_client
+from supabase import Client
 from backend.models.schemas import UserProfileUpdate
+from backend.utils.db import execute_async, get_service_client
 
 
 async def get_enriched_profile_logic(
@@ -27,11 +28,10 @@ async def get_enriched_profile_logic(
     # 0. Fetch base metadata if not provided
     if base_data is None:
         try:
-            res = (
+            res = await execute_async(
                 db.table("user_profiles")
                 .select("*")
                 .eq("user_id", user_id_str)
-                .execute()
             )
             if res.data:
                 base_data = res.data[0]
@@ -52,13 +52,12 @@ async def get_enriched_profile_logic(
     try:
         viewer_db = db
         if admin_key and url:
-            viewer_db = create_client(url, admin_key)
+            viewer_db = get_service_client()
 
-        result = (
+        result = await execute_async(
             viewer_db.table("profiles")
             .select("plan_type, subscription_status")
             .eq("id", user_id_str)
-            .execute()
         )
         sub_data = result.data
     except Exception as e:
@@ -75,7 +74,7 @@ async def get_enriched_profile_logic(
         is_specific_admin = user_id_str == specific_admin_id
 
         if admin_key and url:
-            admin_db = create_client(url, admin_key)
+            admin_db = get_service_client()
             admin_email_found = None
             try:
                 user_auth = admin_db.auth.admin.get_user_by_id(user_id_str)
@@ -157,22 +156,20 @@ async def update_profile_logic(
     user_id_str = str(user_id)
 
     # Upsert logic: Check existence first to avoid Supabase insert conflicts where possible
-    existing = (
-        db.table("user_profiles").select("user_id").eq("user_id", user_id_str).execute()
+    existing = await execute_async(
+        db.table("user_profiles").select("user_id").eq("user_id", user_id_str)
     )
 
     if not existing.data:
-        result = (
+        result = await execute_async(
             db.table("user_profiles")
             .insert({"user_id": user_id_str, **update_data})
-            .execute()
         )
     else:
-        result = (
+        result = await execute_async(
             db.table("user_profiles")
             .update(update_data)
             .eq("user_id", user_id_str)
-            .execute()
         )
 
     if not result.data:
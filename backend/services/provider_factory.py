@@ -2,6 +2,8 @@ import os
 from typing import List
 from .data_provider_interface import HotelDataProvider
 from .providers.serpapi_provider import SerpApiProvider
+from .request_coalescer import CoalescingProvider, price_request_coalescer
+from .global_pulse_cache import global_pulse_cache
 from backend.utils.logger import get_logger
 
 logger = get_logger(__name__)
@@ -21,13 +23,18 @@ class ProviderFactory:
     def get_provider(cls, prefer: str = "primary") -> HotelDataProvider:
         """
         Get the most appropriate provider.
+
+        EXPLANATION: Single-Flight Wrapper
+        The returned provider is wrapped in a CoalescingProvider so concurrent,
+        identical fetch_price calls (same property, dates, adults, currency)
+        share one upstream request and one paid credit.
         """
         if not cls._providers:
             cls._register_providers()
 
         # Default to First Available (SerpApi)
         if cls._providers:
-            return cls._providers[0]
+            return CoalescingProvider(cls._providers[0], price_request_coalescer)
 
         raise Exception("No providers configured! Check your .env parameters.")
 
@@ -131,4 +138,36 @@ class ProviderFactory:
                     }
                 )
 
+        # 2. Single-Flight Coalescing Counters
+        stats = price_request_coalescer.get_stats()
+        report.append(
+            {
+                "name": "Request Coalescing",
+                "type": "Single-Flight",
+                "enabled": True,
+                "priority": 0,
+                "limit": f"{stats['inflight']} in-flight",
+                "refresh": f"{stats['total_calls']} lookups",
+                "latency": f"{stats['total_merged']} merged",
+                "health": "Active" if stats["total_merged"] else "Ready",
+                "coalescing": stats,
+            }
+        )
+
+        # 3. Global Pulse Memory Tier (hit / miss / stale rates)
+        pulse = global_pulse_cache.get_stats()
+        report.append(
+            {
+                "name": "Global Pulse Cache",
+                "type": "Memory Tier",
+                "enabled": True,
+                "priority": 0,
+                "limit": f"{pulse['entries']}/{pulse['max_entries']} entries",
+                "refresh": f"{pulse['bytes'] // 1024} KB",
+                "latency": f"{pulse['hit_rate']:.0%} hit / {pulse['stale_rate']:.0%} stale",
+                "health": "Active" if pulse["hits"] else "Ready",
+                "pulse_cache": pulse,
+            }
+        )
+
         return report
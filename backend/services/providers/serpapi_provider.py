@@ -5,6 +5,7 @@ import threading
 from typing import Optional, List, Dict, Any
 from datetime import date, timedelta, datetime
 from ..data_provider_interface import HotelDataProvider
+from backend.utils.http_client import get_http_client
 
 
 # --- ApiKeyManager (Moved from original client for reuse) ---
@@ -124,7 +125,7 @@ class SerpApiProvider(HotelDataProvider):
                 "currency": currency,
                 "gl": "tr" if currency == "TRY" else "us",
                 "hl": "tr" if currency == "TRY" else "en",
-                "api_key": self._serp_client.api_key,
+                "api_key": await self._serp_client.acquire_key(),
             }
 
             if token:
@@ -136,34 +137,35 @@ class SerpApiProvider(HotelDataProvider):
                     params["property_token"] = token
 
             try:
-                async with httpx.AsyncClient(timeout=30.0) as client:
-                    response = await client.get(self.BASE_URL, params=params)
-                    current_key_suffix = self._serp_client.api_key[-5:]
-
-                    if self._is_quota_error(response):
-                        # BATCH ROTATION: Try all available keys until success or exhaustion
-                        while self._is_quota_error(response):
-                            is_rate_limit = response.status_code == 429
-                            current_suffix = self._serp_client.api_key[-5:]
-                            print(
-                                f"[SerpApi] {'Rate limit' if is_rate_limit else 'Quota error'} on Key ...{current_suffix}"
-                            )
+                client = get_http_client()
+                response = await client.get(self.BASE_URL, params=params)
+                current_key_suffix = params["api_key"][-5:]
+
+                if self._is_quota_error(response):
+                    # BATCH ROTATION: Try all available keys until success or exhaustion
+                    while self._is_quota_error(response):
+                        is_rate_limit = response.status_code == 429
+                        current_suffix = params["api_key"][-5:]
+                        print(
+                            f"[SerpApi] {'Rate limit' if is_rate_limit else 'Quota error'} on Key ...{current_suffix}"
+                        )
 
-                            if self._serp_client._key_manager.rotate_key(
-                                reason="quota_exhausted"
-                                if not is_rate_limit
-                                else "rate_limit",
-                                is_permanent=not is_rate_limit,
-                            ):
-                                new_key = self._serp_client.api_key
-                                print(f"[SerpApi] Rotating to Key ...{new_key[-5:]}")
-                                params["api_key"] = new_key
-                                response = await client.get(
-                                    self.BASE_URL, params=params
-                                )
-                            else:
-                                print("[SerpApi] All configured keys exhausted.")
-                                return {"status": "error", "error": "quota_exhausted"}
+                        if self._serp_client._key_manager.rotate_key(
+                            reason="quota_exhausted"
+                            if not is_rate_limit
+                            else "rate_limit",
+                            is_permanent=not is_rate_limit,
+                            key=params["api_key"],
+                        ):
+                            new_key = await self._serp_client.acquire_key()
+                            print(f"[SerpApi] Rotating to Key ...{new_key[-5:]}")
+                            params["api_key"] = new_key
+                            response = await client.get(
+                                self.BASE_URL, params=params
+                            )
+                        else:
+                            print("[SerpApi] All configured keys exhausted.")
+                            return {"status": "error", "error": "quota_exhausted"}
 
                 if response.status_code == 200:
                     data = response.json()
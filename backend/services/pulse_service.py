@@ -16,6 +16,7 @@ from typing import Dict, Any
 from supabase import Client
 
 from backend.utils.logger import get_logger
+from backend.utils.db import execute_async
 
 logger = get_logger(__name__)
 
@@ -57,7 +58,7 @@ async def get_pulse_network_stats(db: Client) -> Dict[str, Any]:
         # 1. Active users: users who have at least 1 hotel
         active_users_count = 0
         try:
-            users_res = db.table("hotels").select("user_id").execute()
+            users_res = await execute_async(db.table("hotels").select("user_id"))
             unique_users = set(h["user_id"] for h in (users_res.data or []))
             active_users_count = len(unique_users)
         except Exception as e:
@@ -66,11 +67,10 @@ async def get_pulse_network_stats(db: Client) -> Dict[str, Any]:
         # 2. Monitored hotels: distinct serp_api_ids across all users
         hotels_monitored = 0
         try:
-            hotels_res = (
+            hotels_res = await execute_async(
                 db.table("hotels")
                 .select("serp_api_id")
                 .not_.is_("serp_api_id", "null")
-                .execute()
             )
             unique_hotels = set(h["serp_api_id"] for h in (hotels_res.data or []))
             hotels_monitored = len(unique_hotels)
@@ -83,11 +83,10 @@ async def get_pulse_network_stats(db: Client) -> Dict[str, Any]:
         # Total scans in 24h
         total_scans_24h = 0
         try:
-            scans_res = (
+            scans_res = await execute_async(
                 db.table("price_logs")
                 .select("id", count="exact")
                 .gte("recorded_at", cutoff_24h)
-                .execute()
             )
             total_scans_24h = scans_res.count or 0
         except Exception as e:
@@ -98,12 +97,11 @@ async def get_pulse_network_stats(db: Client) -> Dict[str, Any]:
         # we estimate cache hits from Global Pulse alerts (conservative estimate).
         cache_hits_24h = 0
         try:
-            pulse_alerts_res = (
+            pulse_alerts_res = await execute_async(
                 db.table("alerts")
                 .select("id", count="exact")
                 .ilike("message", "%Global Pulse%")
                 .gte("created_at", cutoff_24h)
-                .execute()
             )
             # Each pulse alert represents at least 1 cache-served result
             cache_hits_24h = pulse_alerts_res.count or 0
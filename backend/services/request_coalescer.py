@@ -0,0 +1,204 @@
+"""
+Request Coalescer (Single-Flight)
+=================================
+Collapses concurrent, identical price lookups into one upstream call.
+
+WHY: When several users' scans overlap (scheduler ticks, manual scans, the
+frontend "lazy cron"), `ScraperAgent.run_scan` can fire the same
+`fetch_price` for the same property and stay dates at the same moment. The
+Global Pulse cache only helps once a row has been written to `price_logs`, so
+in-flight duplicates each burn a paid SerpApi credit.
+
+HOW: The first caller for a key (the "leader") starts the real fetch as a task.
+Anyone asking for the same key while that task is running (a "merge") awaits
+the same task. Every caller receives its own deep copy of the parsed result,
+because downstream code mutates `price_data` in place (room normalization, ID
+sanitization).
+
+Key: (serp_api_id, check_in, check_out, adults, currency). Hotels without a
+serp_api_id fall back to their normalized name + location.
+"""
+
+import asyncio
+import copy
+import weakref
+from collections import OrderedDict
+from datetime import date
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+from backend.services.data_provider_interface import HotelDataProvider
+from backend.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+CoalesceKey = Tuple[str, str, str, int, str]
+
+# Per-key counters are kept for the most recent keys only so a long-running
+# worker doesn't grow this map forever.
+MAX_TRACKED_KEYS = 500
+
+
+def build_price_key(
+    hotel_name: str,
+    location: str,
+    check_in: date,
+    check_out: date,
+    adults: int,
+    currency: str,
+    serp_api_id: Optional[str],
+) -> CoalesceKey:
+    identity = (
+        str(serp_api_id)
+        if serp_api_id
+        else f"name:{(hotel_name or '').strip().lower()}|{(location or '').strip().lower()}"
+    )
+    return (
+        identity,
+        str(check_in),
+        str(check_out),
+        int(adults or 2),
+        (currency or "USD").upper(),
+    )
+
+
+class RequestCoalescer:
+    """In-process single-flight map with per-key hit/merge counters."""
+
+    def __init__(self, max_tracked_keys: int = MAX_TRACKED_KEYS):
+        # EXPLANATION: Per-Loop In-Flight Map
+        # asyncio tasks belong to the loop that created them. The scheduler uses
+        # asyncio.run() per tick, so in-flight work is tracked per loop.
+        self._inflight: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[CoalesceKey, asyncio.Task]]" = weakref.WeakKeyDictionary()
+        self._key_stats: "OrderedDict[CoalesceKey, Dict[str, int]]" = OrderedDict()
+        self._max_tracked_keys = max_tracked_keys
+        self.total_calls = 0
+        self.total_merged = 0
+
+    def _record(self, key: CoalesceKey, merged: bool):
+        stats = self._key_stats.pop(key, None) or {"hits": 0, "merged": 0, "fetches": 0}
+        stats["hits"] += 1
+        if merged:
+            stats["merged"] += 1
+            self.total_merged += 1
+        else:
+            stats["fetches"] += 1
+        self.total_calls += 1
+        self._key_stats[key] = stats
+        while len(self._key_stats) > self._max_tracked_keys:
+            self._key_stats.popitem(last=False)
+
+    async def run(
+        self, key: CoalesceKey, factory: Callable[[], Awaitable[Any]]
+    ) -> Any:
+        """Execute `factory()` once per key across concurrent callers."""
+        loop = asyncio.get_running_loop()
+        inflight = self._inflight.setdefault(loop, {})
+
+        task = inflight.get(key)
+        merged = task is not None and not task.done()
+        self._record(key, merged)
+
+        if merged:
+            logger.info(f"[Coalescer] Merged duplicate lookup for {key}")
+        else:
+            task = loop.create_task(factory())
+            inflight[key] = task
+
+            def _cleanup(t: asyncio.Task, k: CoalesceKey = key):
+                if inflight.get(k) is t:
+                    del inflight[k]
+
+            task.add_done_callback(_cleanup)
+
+        # KAIZEN: Shielded Await
+        # A caller hitting its own timeout must not cancel the shared fetch that
+        # other scans are still waiting on.
+        result = await asyncio.shield(task)
+        return copy.deepcopy(result)
+
+    def inflight_count(self) -> int:
+        return sum(len(m) for m in list(self._inflight.values()))
+
+    def get_stats(self) -> Dict[str, Any]:
+        keys = [
+            {
+                "serp_api_id": k[0],
+                "check_in": k[1],
+                "check_out": k[2],
+                "adults": k[3],
+                "currency": k[4],
+                **v,
+            }
+            for k, v in self._key_stats.items()
+            if v["merged"] > 0
+        ]
+        keys.sort(key=lambda x: x["merged"], reverse=True)
+        return {
+            "total_calls": self.total_calls,
+            "total_merged": self.total_merged,
+            "credits_saved": self.total_merged,
+            "merge_rate": round(self.total_merged / self.total_calls, 4)
+            if self.total_calls
+            else 0.0,
+            "inflight": self.inflight_count(),
+            "tracked_keys": len(self._key_stats),
+            "keys": keys[:50],
+        }
+
+    def reset(self):
+        self._key_stats.clear()
+        self.total_calls = 0
+        self.total_merged = 0
+
+
+class CoalescingProvider(HotelDataProvider):
+    """
+    Wraps a concrete provider so identical concurrent `fetch_price` calls share
+    one upstream request. Everything else is delegated to the wrapped provider.
+    """
+
+    def __init__(self, provider: HotelDataProvider, coalescer: "RequestCoalescer"):
+        self._provider = provider
+        self._coalescer = coalescer
+
+    @property
+    def wrapped(self) -> HotelDataProvider:
+        return self._provider
+
+    def get_provider_name(self) -> str:
+        return self._provider.get_provider_name()
+
+    def __getattr__(self, item):
+        if item.startswith("__") or item == "_provider":
+            raise AttributeError(item)
+        return getattr(self._provider, item)
+
+    async def fetch_price(
+        self,
+        hotel_name: str,
+        location: str,
+        check_in: date,
+        check_out: date,
+        adults: int = 2,
+        currency: str = "USD",
+        serp_api_id: Optional[str] = None,
+    ) -> Optional[Dict[str, Any]]:
+        key = build_price_key(
+            hotel_name, location, check_in, check_out, adults, currency, serp_api_id
+        )
+        return await self._coalescer.run(
+            key,
+            lambda: self._provider.fetch_price(
+                hotel_name=hotel_name,
+                location=location,
+                check_in=check_in,
+                check_out=check_out,
+                adults=adults,
+                currency=currency,
+                serp_api_id=serp_api_id,
+            ),
+        )
+
+
+# Global instance
+price_request_coalescer = RequestCoalescer()
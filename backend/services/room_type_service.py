@@ -17,6 +17,7 @@ from typing import List, Dict, Any
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
 
 from backend.utils.embeddings import get_embedding, format_room_type_for_embedding
+from backend.utils.db import execute_async
 
 
 async def update_room_type_catalog(
@@ -54,11 +55,10 @@ async def update_room_type_catalog(
             continue
 
         try:
-            existing_res = (
+            existing_res = await execute_async(
                 db.table("room_type_catalog")
                 .select("original_name")
                 .eq("hotel_id", hotel_id)
-                .execute()
             )
             existing_names = {r["original_name"] for r in (existing_res.data or [])}
         except Exception:
@@ -134,9 +134,11 @@ async def update_room_type_catalog(
         if valid_upserts:
             try:
                 # Supabase handles batch upserts via list of dicts
-                db.table("room_type_catalog").upsert(
-                    valid_upserts, on_conflict="hotel_id,original_name"
-                ).execute()
+                await execute_async(
+                    db.table("room_type_catalog").upsert(
+                        valid_upserts, on_conflict="hotel_id,original_name"
+                    )
+                )
                 new_count = len(valid_upserts)
                 duration = time.time() - start_time
                 print(
@@ -0,0 +1,282 @@
+"""
+Scan Checkpoints (per-hotel resume)
+===================================
+Records every fetched hotel in the `scan_checkpoints` table (migration 037) so a
+retried, re-claimed or split scan never pays twice for the same price.
+
+WHY: The analyst persists results in batches. If the process died between a
+SerpApi fetch and the end of its batch, those paid results were lost and the
+retry fetched every hotel again.
+
+HOW:
+- `record_fetch` buffers each successful scraper result as one
+  (session_id, cell_key) row with `fetched_at`. Date grid cells are keyed
+  `<hotel_id>@<check_in>` (date_grid.cell_key). A background task upserts the
+  buffer in batches, so the scraper never waits on the write (it used to hold a
+  limiter slot for it) and concurrent fetches do not queue on the session row.
+- `record_persisted` appends the hotels of each analyst batch that reached the
+  database to `completed_hotel_ids` (migration 032).
+- `plan` splits a session's hotels on resume:
+    skip    persisted, fetched within the freshness window
+    replay  fetched within the window but never persisted -> fed to the analyst
+    fetch   everything else (never fetched, failed, or stale)
+  `load_plan` reads only keys and timestamps, then the results it replays.
+
+EXPLANATION: Checkpoints used to be merged into one `scan_sessions` jsonb column.
+Every fetch rewrote the whole (TOASTed) value - O(n^2) bytes for a 900-cell
+date grid - and every `select("*")` on scan_sessions shipped the raw results.
+Rows live in their own table now and a trigger deletes them once the session
+reaches a final status (completed, partial, failed, cancelled).
+
+If the table or RPC is missing, checkpointing switches itself off for the
+process and scans behave exactly as before.
+
+TUNING (environment variables):
+    SCAN_CHECKPOINTS_ENABLED    Record per-hotel checkpoints (default 1)
+    SCAN_CHECKPOINT_TTL_S       Freshness window for reusing a fetch (default 10800,
+                                the same 3 hours as the Global Pulse cache)
+    SCAN_CHECKPOINT_FLUSH_ROWS  Rows per checkpoint upsert (default 50)
+"""
+
+import asyncio
+import os
+from dataclasses import dataclass, field
+from datetime import date, datetime, timezone
+from typing import Any, Dict, List, Optional, Set
+
+from backend.services.date_grid import cell_key
+from backend.utils.db import execute_async
+from backend.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+SCAN_CHECKPOINTS_ENABLED = os.getenv("SCAN_CHECKPOINTS_ENABLED", "1") != "0"
+try:
+    SCAN_CHECKPOINT_TTL_S = float(os.getenv("SCAN_CHECKPOINT_TTL_S", "10800"))
+except ValueError:
+    SCAN_CHECKPOINT_TTL_S = 10800.0
+try:
+    SCAN_CHECKPOINT_FLUSH_ROWS = max(1, int(os.getenv("SCAN_CHECKPOINT_FLUSH_ROWS", "50")))
+except ValueError:
+    SCAN_CHECKPOINT_FLUSH_ROWS = 50
+
+CHECKPOINT_TABLE = "scan_checkpoints"
+# Keys per page when reading a session's checkpoints (PostgREST max-rows)
+CHECKPOINT_PAGE_SIZE = 1000
+
+# Flipped off for the process when migration 032/037 is not deployed
+_rpc_available = {"checkpoint_scan_hotels": True}
+_table_available = {CHECKPOINT_TABLE: True}
+
+
+def _json_safe(value: Any) -> Any:
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, dict):
+        return {k: _json_safe(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_json_safe(v) for v in value]
+    return value
+
+
+def _parse_ts(value: Any) -> Optional[datetime]:
+    if not value:
+        return None
+    try:
+        ts = datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    return ts if ts.tzinfo else ts.replace(tzinfo=timezone.utc)
+
+
+@dataclass
+class ResumePlan:
+    fetch: List[Dict[str, Any]] = field(default_factory=list)
+    replay: List[Dict[str, Any]] = field(default_factory=list)
+    skip: Set[str] = field(default_factory=set)
+
+    @property
+    def credits_saved(self) -> int:
+        return len(self.replay) + len(self.skip)
+
+
+def plan(
+    hotels: List[Dict[str, Any]],
+    checkpoints: Optional[Dict[str, Any]],
+    completed_ids: Optional[List[Any]] = None,
+    ttl_s: Optional[float] = None,
+    now: Optional[datetime] = None,
+) -> ResumePlan:
+    """Splits `hotels` into skip / replay / fetch (see module docstring)."""
+    ttl_s = SCAN_CHECKPOINT_TTL_S if ttl_s is None else ttl_s
+    now = now or datetime.now(timezone.utc)
+    checkpoints = checkpoints or {}
+    completed = {str(h) for h in completed_ids or []}
+
+    result = ResumePlan()
+    for hotel in hotels:
+        hid = cell_key(hotel["id"], hotel.get("grid"))
+        entry = checkpoints.get(hid)
+        fetched_at = _parse_ts(entry.get("fetched_at")) if entry else None
+        fresh = fetched_at is not None and (now - fetched_at).total_seconds() <= ttl_s
+        if hid in completed and (fresh or entry is None):
+            # Persisted before checkpoints existed (no timestamp) counts as done
+            result.skip.add(hid)
+        elif fresh and entry.get("result"):
+            result.replay.append(dict(entry["result"]))
+        else:
+            result.fetch.append(hotel)
+    return result
+
+
+class ScanCheckpointer:
+    """Per-session checkpoint writer. Safe to share across concurrent fetches."""
+
+    def __init__(self, db, session_id: Any):
+        self.db = db
+        self.session_id = str(session_id)
+        self.recorded = 0
+        self._pending: Dict[str, Dict[str, Any]] = {}
+        self._writer: Optional[asyncio.Task] = None
+
+    async def _rpc(self, name: str, params: Dict[str, Any]) -> bool:
+        if not _rpc_available[name]:
+            return False
+        try:
+            await execute_async(self.db.rpc(name, params))
+            return True
+        except Exception as e:
+            if name in str(e) or "PGRST202" in str(e):
+                logger.warning(f"{name} RPC missing; scan checkpoints disabled")
+                _rpc_available[name] = False
+            else:
+                # A lost checkpoint only costs a refetch on resume
+                logger.warning(f"Checkpoint write failed for {self.session_id}: {e}")
+            return False
+
+    @staticmethod
+    def _disable_if_missing(e: Exception) -> bool:
+        msg = str(e)
+        if any(s in msg for s in (CHECKPOINT_TABLE, "PGRST205", "42P01")):
+            logger.warning(f"{CHECKPOINT_TABLE} table missing; scan checkpoints disabled")
+            _table_available[CHECKPOINT_TABLE] = False
+            return True
+        return False
+
+    async def record_fetch(self, result: Dict[str, Any]) -> None:
+        """
+        Buffer one scraper result (errors are not reused, so not stored). Returns
+        at once; the write happens in the background (see `flush`).
+        """
+        if not _table_available[CHECKPOINT_TABLE]:
+            return
+        if result.get("status") != "success" or not result.get("hotel_id"):
+            return
+        key = cell_key(result["hotel_id"], result.get("grid"))
+        self._pending[key] = {
+            "session_id": self.session_id,
+            "cell_key": key,
+            "fetched_at": datetime.now(timezone.utc).isoformat(),
+            "result": _json_safe(result),
+        }
+        if self._writer is None or self._writer.done():
+            self._writer = asyncio.get_running_loop().create_task(self._drain())
+
+    async def _drain(self) -> None:
+        # Results arriving while a batch is in flight form the next batch
+        while self._pending and _table_available[CHECKPOINT_TABLE]:
+            keys = list(self._pending)[:SCAN_CHECKPOINT_FLUSH_ROWS]
+            rows = [self._pending.pop(k) for k in keys]
+            try:
+                await execute_async(
+                    self.db.table(CHECKPOINT_TABLE).upsert(
+                        rows, on_conflict="session_id,cell_key"
+                    )
+                )
+                self.recorded += len(rows)
+            except Exception as e:
+                if not self._disable_if_missing(e):
+                    # A lost checkpoint only costs a refetch on resume
+                    logger.warning(f"Checkpoint write failed for {self.session_id}: {e}")
+        self._pending.clear()
+
+    async def flush(self) -> None:
+        """Waits until every buffered checkpoint has been written."""
+        while self._writer is not None and not self._writer.done():
+            await asyncio.shield(self._writer)
+
+    async def record_persisted(self, items: List[Dict[str, Any]]) -> None:
+        hotel_ids = [cell_key(i["hotel_id"], i.get("grid")) for i in items if i.get("hotel_id")]
+        if hotel_ids:
+            await self._rpc(
+                "checkpoint_scan_hotels",
+                {"p_session_id": self.session_id, "p_hotel_ids": hotel_ids},
+            )
+
+    async def _load_checkpoints(
+        self, completed: Set[str], ttl_s: float
+    ) -> Dict[str, Dict[str, Any]]:
+        """
+        {cell_key: {"fetched_at", "result"}}. Keys and timestamps come first; the
+        heavy `result` is read only for fresh keys that were never persisted.
+        """
+        if not _table_available[CHECKPOINT_TABLE]:
+            return {}
+        checkpoints: Dict[str, Dict[str, Any]] = {}
+        start = 0
+        while True:
+            res = await execute_async(
+                self.db.table(CHECKPOINT_TABLE)
+                .select("cell_key, fetched_at")
+                .eq("session_id", self.session_id)
+                .order("cell_key")
+                .range(start, start + CHECKPOINT_PAGE_SIZE - 1)
+            )
+            page = res.data or []
+            for row in page:
+                checkpoints[row["cell_key"]] = {"fetched_at": row.get("fetched_at")}
+            if len(page) < CHECKPOINT_PAGE_SIZE:
+                break
+            start += CHECKPOINT_PAGE_SIZE
+
+        now = datetime.now(timezone.utc)
+        replayable = []
+        for key, entry in checkpoints.items():
+            fetched_at = _parse_ts(entry["fetched_at"])
+            fresh = fetched_at is not None and (now - fetched_at).total_seconds() <= ttl_s
+            if fresh and key not in completed:
+                replayable.append(key)
+        for i in range(0, len(replayable), SCAN_CHECKPOINT_FLUSH_ROWS):
+            res = await execute_async(
+                self.db.table(CHECKPOINT_TABLE)
+                .select("cell_key, result")
+                .eq("session_id", self.session_id)
+                .in_("cell_key", replayable[i : i + SCAN_CHECKPOINT_FLUSH_ROWS])
+            )
+            for row in res.data or []:
+                checkpoints[row["cell_key"]]["result"] = row.get("result")
+        return checkpoints
+
+    async def load_plan(
+        self, hotels: List[Dict[str, Any]], ttl_s: Optional[float] = None
+    ) -> ResumePlan:
+        """Reads the session's checkpoints and plans the resume."""
+        ttl_s = SCAN_CHECKPOINT_TTL_S if ttl_s is None else ttl_s
+        try:
+            res = await execute_async(
+                self.db.table("scan_sessions")
+                .select("completed_hotel_ids")
+                .eq("id", self.session_id)
+            )
+            row = res.data[0] if res.data else {}
+            completed = {str(h) for h in row.get("completed_hotel_ids") or []}
+            try:
+                checkpoints = await self._load_checkpoints(completed, ttl_s)
+            except Exception as e:
+                if not self._disable_if_missing(e):
+                    raise
+                checkpoints = {}
+        except Exception as e:
+            logger.warning(f"Could not load checkpoints for {self.session_id}: {e}")
+            return ResumePlan(fetch=list(hotels))
+        return plan(hotels, checkpoints, list(completed), ttl_s=ttl_s)
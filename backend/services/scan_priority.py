@@ -0,0 +1,341 @@
+"""
+Priority Scan Scheduling (expected information gain)
+====================================================
+Optional scheduler mode for `monitor_service.run_scheduler_check_logic`.
+
+WHY: Every hotel is rescanned at its user's fixed `check_frequency_minutes`.
+A hotel whose price has not moved in weeks, for a stay three months out, costs
+exactly as many SerpApi credits as a volatile one checking in this weekend,
+even though a rescan of the first almost never tells us anything new.
+
+HOW:
+- Each (hotel, check-in date) pair is scored by the chance that a rescan shows
+  a move worth alerting on, weighted by how soon the stay is:
+
+      spread   = max(volatility, SCAN_PRIORITY_MIN_VOLATILITY) * sqrt(days since last log)
+      p_moved  = P(|N(0, spread)| >= SCAN_PRIORITY_CHANGE_PCT)
+      urgency  = 1 / (1 + days_to_check_in / SCAN_PRIORITY_HORIZON_DAYS)
+      score    = p_moved * urgency
+
+  `volatility` is `PredictiveService.volatility_from_logs` over the pair's last
+  30 logs (the std of log-to-log % changes), rescaled to a daily figure by the
+  median gap between those logs, because in this mode scans are no longer one
+  a day. Prices are treated as a random walk, so the spread grows with the
+  square root of elapsed time. With fewer than 5 logs the volatility is
+  unknown and SCAN_PRIORITY_PRIOR_VOLATILITY is assumed. The floor makes stable
+  pairs age too, so nothing is starved forever. A pair with no log for its own
+  check-in date falls back to the hotel's newest log (prices of neighbouring
+  dates move together); a hotel never scanned scores its full urgency.
+- Hotels with fixed dates are one pair. Auto-dated hotels are ranked over
+  SCAN_PRIORITY_CHECKIN_DAYS check-in dates from their default one (tomorrow).
+  The default date is scanned as the hotel itself; other dates are scanned as
+  secondary date grid cells (date_grid.py), which fill the Rate Calendar but
+  never overwrite the hotel's current price.
+- A fixed daily credit budget per key set (SCAN_DAILY_CREDITS_PER_KEY x the
+  configured SerpApi keys, or SCAN_DAILY_CREDIT_BUDGET) is paced across the
+  remaining cron runs of the (UTC) day. Each run scans the best-scoring pairs
+  that fit its allowance and skips pairs below SCAN_PRIORITY_MIN_SCORE.
+- Credits already spent today are counted from `query_logs` rows of the
+  CREDIT_ACTION_TYPES, which the analyst writes once per real provider call
+  (Global Pulse hits and shared fetches are logged as 'monitor_cached'), so
+  manual scans on the same keys count against the budget too.
+
+Volatile, near-term pairs therefore get scanned several times a day and
+stable, far-out ones every few days, for the same total spend.
+`backend/scripts/sim_scan_priority.py` replays price history against this
+policy and a fixed-interval one at equal cost.
+
+TUNING (environment variables):
+    SCHEDULER_PRIORITY_MODE          Rank pairs instead of scanning every hotel of due users (default 0)
+    SCAN_DAILY_CREDITS_PER_KEY       Daily SerpApi credits per configured key (default 150)
+    SCAN_DAILY_CREDIT_BUDGET         Daily credits for the whole key set; overrides the above (default 0)
+    SCHEDULER_RUN_INTERVAL_MINUTES   Cron cadence used to pace the budget (default 60)
+    SCAN_PRIORITY_HORIZON_DAYS       Days to check-in at which urgency halves (default 14)
+    SCAN_PRIORITY_CHECKIN_DAYS       Check-in dates ranked per auto-dated hotel (default 7)
+    SCAN_PRIORITY_MIN_VOLATILITY     Volatility floor in % per day (default 0.5)
+    SCAN_PRIORITY_PRIOR_VOLATILITY   Volatility assumed without enough history (default 3.0)
+    SCAN_PRIORITY_CHANGE_PCT         Move that counts as news, like threshold_percent (default 2.0)
+    SCAN_PRIORITY_MIN_SCORE          Pairs scoring below this are not worth a credit (default 0.05)
+"""
+
+import math
+import os
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+from backend.services.predictive_service import predictive_service
+from backend.services.price_history_index import PriceHistoryIndex, parse_timestamp
+from backend.utils.db import execute_async, run_db
+from backend.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+def _env_float(name: str, default: float) -> float:
+    try:
+        return float(os.getenv(name, default))
+    except (TypeError, ValueError):
+        return default
+
+
+SCHEDULER_PRIORITY_MODE = os.getenv("SCHEDULER_PRIORITY_MODE", "0") == "1"
+SCAN_DAILY_CREDITS_PER_KEY = max(0, int(_env_float("SCAN_DAILY_CREDITS_PER_KEY", 150)))
+SCAN_DAILY_CREDIT_BUDGET = max(0, int(_env_float("SCAN_DAILY_CREDIT_BUDGET", 0)))
+SCHEDULER_RUN_INTERVAL_MINUTES = max(1.0, _env_float("SCHEDULER_RUN_INTERVAL_MINUTES", 60))
+SCAN_PRIORITY_HORIZON_DAYS = max(0.1, _env_float("SCAN_PRIORITY_HORIZON_DAYS", 14))
+SCAN_PRIORITY_MIN_VOLATILITY = _env_float("SCAN_PRIORITY_MIN_VOLATILITY", 0.5)
+SCAN_PRIORITY_MIN_SCORE = _env_float("SCAN_PRIORITY_MIN_SCORE", 0.05)
+SCAN_PRIORITY_CHANGE_PCT = _env_float("SCAN_PRIORITY_CHANGE_PCT", 2.0)
+SCAN_PRIORITY_PRIOR_VOLATILITY = _env_float("SCAN_PRIORITY_PRIOR_VOLATILITY", 3.0)
+SCAN_PRIORITY_CHECKIN_DAYS = max(1, int(_env_float("SCAN_PRIORITY_CHECKIN_DAYS", 7)))
+
+# query_logs action types written for a result that cost a provider call
+# (AnalystAgent); 'monitor_cached' rows did not
+CREDIT_ACTION_TYPES = ("monitor", "monitor_fallback", "monitor_fallback_any")
+
+# Same window calculate_market_volatility reads
+VOLATILITY_WINDOW = 30
+
+
+def priority_score(
+    volatility: float,
+    hours_since_scan: Optional[float],
+    days_to_check_in: float,
+    horizon_days: Optional[float] = None,
+    min_volatility: Optional[float] = None,
+    change_pct: Optional[float] = None,
+) -> float:
+    """
+    Probability that the price moved by at least `change_pct` since the last
+    scan (random walk with daily std `volatility`), weighted by check-in proximity.
+    """
+    if days_to_check_in < 0:
+        return 0.0  # The stay is in the past
+    urgency = 1.0 / (1.0 + days_to_check_in / (horizon_days or SCAN_PRIORITY_HORIZON_DAYS))
+    if hours_since_scan is None:
+        return urgency  # Never scanned: the whole price is news
+    floor = SCAN_PRIORITY_MIN_VOLATILITY if min_volatility is None else min_volatility
+    spread = max(volatility, floor) * math.sqrt(max(0.0, hours_since_scan) / 24.0)
+    if spread <= 0:
+        return 0.0
+    threshold = SCAN_PRIORITY_CHANGE_PCT if change_pct is None else change_pct
+    # P(|N(0, spread)| >= threshold)
+    p_moved = math.erfc(threshold / (spread * math.sqrt(2.0)))
+    return p_moved * urgency
+
+
+def daily_volatility(logs: List[Dict[str, Any]]) -> float:
+    """
+    `volatility_from_logs` over newest-first logs, per day instead of per log.
+    Logs without usable timestamps are assumed to be a day apart (no rescaling).
+    """
+    if sum(1 for r in logs if (r.get("price") or 0) > 0) < 5:
+        return SCAN_PRIORITY_PRIOR_VOLATILITY  # Too little history to tell
+    volatility = predictive_service.volatility_from_logs(logs)
+    if not volatility:
+        return 0.0
+    stamps = [parse_timestamp(r.get("recorded_at")) for r in logs]
+    gaps = [
+        (newer - older).total_seconds() / 3600.0
+        for newer, older in zip(stamps, stamps[1:])
+        if newer and older and newer > older
+    ]
+    if not gaps:
+        return volatility
+    median_gap_h = sorted(gaps)[len(gaps) // 2]
+    return round(volatility * math.sqrt(24.0 / max(median_gap_h, 0.25)), 2)
+
+
+@dataclass
+class ScanCandidate:
+    hotel: Dict[str, Any]
+    check_in: date
+    volatility: float
+    last_scanned_at: Optional[datetime]
+    primary: bool = True
+
+    @property
+    def key(self) -> Tuple[str, str]:
+        return str(self.hotel["id"]), self.check_in.isoformat()
+
+    def scan_row(self) -> Dict[str, Any]:
+        """The hotel row to scan: the hotel itself, or a date grid cell for other dates."""
+        if self.primary:
+            return self.hotel
+        nights = 1
+        check_in, check_out = _fixed_dates(self.hotel)
+        if check_in and check_out and check_out > check_in:
+            nights = (check_out - check_in).days
+        return {
+            **self.hotel,
+            "fixed_check_in": self.check_in.isoformat(),
+            "fixed_check_out": (self.check_in + timedelta(days=nights)).isoformat(),
+            "grid": {"date": self.check_in.isoformat(), "primary": False},
+        }
+
+    def score(self, now: datetime) -> float:
+        hours = (
+            (now - self.last_scanned_at).total_seconds() / 3600.0
+            if self.last_scanned_at
+            else None
+        )
+        return priority_score(self.volatility, hours, (self.check_in - now.date()).days)
+
+
+def _fixed_dates(hotel: Dict[str, Any]) -> Tuple[Optional[date], Optional[date]]:
+    from backend.agents.scraper_agent import ScraperAgent
+
+    check_in, check_out, _, auto = ScraperAgent._resolve_search_params(hotel, None)
+    return (None, None) if auto else (check_in, check_out)
+
+
+def build_candidates(
+    hotels: List[Dict[str, Any]],
+    history: PriceHistoryIndex,
+    checkin_days: Optional[int] = None,
+) -> List[ScanCandidate]:
+    """
+    (hotel, check-in) candidates: a hotel's fixed date, or `checkin_days` dates
+    from the default one a scheduled scan would use for auto-dated hotels.
+    """
+    from backend.agents.scraper_agent import ScraperAgent
+
+    span = checkin_days or SCAN_PRIORITY_CHECKIN_DAYS
+    candidates = []
+    for hotel in hotels:
+        hid = str(hotel["id"])
+        check_in, _, _, auto = ScraperAgent._resolve_search_params(hotel, None)
+        hotel_logs = history.logs(hid)
+        by_date: Dict[str, List[Dict[str, Any]]] = {}
+        for r in hotel_logs:
+            by_date.setdefault(str(r.get("check_in_date")), []).append(r)
+
+        for offset in range(span if auto else 1):
+            day = check_in + timedelta(days=offset)
+            pair_logs = by_date.get(day.isoformat(), [])
+            # Thin per-date history: the hotel's overall series is the better estimate
+            vol_logs = pair_logs if len(pair_logs) >= 5 else hotel_logs
+            latest = pair_logs[0] if pair_logs else history.latest(hid)
+            candidates.append(
+                ScanCandidate(
+                    hotel=hotel,
+                    check_in=day,
+                    volatility=daily_volatility(vol_logs[:VOLATILITY_WINDOW]),
+                    last_scanned_at=parse_timestamp(latest.get("recorded_at")) if latest else None,
+                    primary=offset == 0,
+                )
+            )
+    return candidates
+
+
+def select_pairs(
+    candidates: List[ScanCandidate],
+    allowance: int,
+    now: Optional[datetime] = None,
+    min_score: Optional[float] = None,
+) -> Tuple[List[ScanCandidate], List[ScanCandidate]]:
+    """Best-scoring candidates that fit `allowance` credits -> (selected, skipped)."""
+    now = now or datetime.now(timezone.utc)
+    floor = SCAN_PRIORITY_MIN_SCORE if min_score is None else min_score
+    scored = sorted(
+        ((c.score(now), c) for c in candidates), key=lambda sc: sc[0], reverse=True
+    )
+    selected, skipped = [], []
+    for score, candidate in scored:
+        if len(selected) < allowance and score >= floor and score > 0:
+            selected.append(candidate)
+        else:
+            skipped.append(candidate)
+    return selected, skipped
+
+
+def daily_budget(key_count: Optional[int] = None) -> int:
+    """Daily credits for the configured SerpApi key set."""
+    if SCAN_DAILY_CREDIT_BUDGET:
+        return SCAN_DAILY_CREDIT_BUDGET
+    if key_count is None:
+        from backend.services.serpapi_client import load_api_keys
+
+        key_count = len(load_api_keys())
+    return SCAN_DAILY_CREDITS_PER_KEY * max(1, key_count)
+
+
+def run_allowance(
+    budget: int,
+    spent_today: int,
+    now: datetime,
+    interval_minutes: Optional[float] = None,
+) -> int:
+    """Credits this run may spend: what is left today, spread over the runs left."""
+    interval = interval_minutes or SCHEDULER_RUN_INTERVAL_MINUTES
+    remaining = max(0, budget - spent_today)
+    midnight = datetime.combine(now.date() + timedelta(days=1), datetime.min.time(), now.tzinfo)
+    runs_left = max(1, math.ceil((midnight - now).total_seconds() / 60.0 / interval))
+    return math.ceil(remaining / runs_left)
+
+
+async def credits_spent_today(db, now: Optional[datetime] = None) -> int:
+    """Provider calls logged since midnight UTC (one CREDIT_ACTION_TYPES row each)."""
+    now = now or datetime.now(timezone.utc)
+    midnight = now.replace(hour=0, minute=0, second=0, microsecond=0)
+    try:
+        res = await execute_async(
+            db.table("query_logs")
+            .select("id", count="exact")
+            .in_("action_type", list(CREDIT_ACTION_TYPES))
+            .gte("created_at", midnight.isoformat())
+            .limit(1)
+        )
+        return int(res.count or 0)
+    except Exception as e:
+        logger.warning(f"Could not count today's credits, assuming none spent: {e}")
+        return 0
+
+
+async def plan_priority_scan(
+    db,
+    user_hotels_map: Dict[str, List[Dict[str, Any]]],
+    now: Optional[datetime] = None,
+) -> Tuple[Dict[str, List[Dict[str, Any]]], Dict[str, Any]]:
+    """
+    Picks this run's (hotel, check-in) pairs across all users.
+    Returns ({user_id: hotels to scan}, report for the run summary).
+    """
+    now = now or datetime.now(timezone.utc)
+    hotels = [h for hs in user_hotels_map.values() for h in hs]
+    history = await run_db(
+        PriceHistoryIndex.load,
+        db,
+        [h["id"] for h in hotels],
+        include_hotels=False,
+    )
+    candidates = build_candidates(hotels, history)
+
+    budget = daily_budget()
+    spent = await credits_spent_today(db, now)
+    allowance = run_allowance(budget, spent, now)
+    selected, skipped = select_pairs(candidates, allowance, now)
+
+    picked: Dict[str, List[Dict[str, Any]]] = {}
+    for candidate in selected:
+        picked.setdefault(candidate.hotel["user_id"], []).append(candidate.scan_row())
+
+    report = {
+        "daily_budget": budget,
+        "spent_today": spent,
+        "allowance": allowance,
+        "candidates": len(candidates),
+        "selected": len(selected),
+        "skipped": len(skipped),
+        "top": [
+            {
+                "hotel_id": c.key[0],
+                "check_in": c.key[1],
+                "volatility": c.volatility,
+                "score": round(c.score(now), 3),
+            }
+            for c in selected[:5]
+        ],
+    }
+    return picked, report
@@ -0,0 +1,292 @@
+"""
+Durable Scan Queue (scan_sessions + SKIP LOCKED)
+================================================
+Replaces fire-and-forget BackgroundTasks scans with jobs stored on the
+`scan_sessions` row itself (migration 032). No Redis/Celery required.
+
+WHY: `trigger_monitor_logic` used to hand `run_monitor_background` to FastAPI
+BackgroundTasks. A restart or crash lost the scan, and its `scan_sessions` row
+sat in 'pending'/'running' until the 2-hour zombie cleanup marked it failed.
+
+HOW:
+- `enqueue_scan` turns an existing session row into a job (`job_options` holds
+  the hotel ids and scan options). The request handler then only "kicks" a
+  worker through BackgroundTasks; the durable state lives in Postgres.
+- Workers call the `claim_scan_job` RPC, which picks the oldest runnable job
+  with `FOR UPDATE SKIP LOCKED`: any number of workers (API processes, the
+  `scan_worker.py` CLI, cron) can poll the same table without double-claiming.
+- A claim is a lease (visibility timeout, SCAN_QUEUE_VISIBILITY_S) that the
+  worker renews while the scan runs. If the worker dies, the lease expires and
+  another worker re-claims the job.
+- Every fetch and every persisted analyst batch is checkpointed on the row
+  (scan_checkpoints.py), so a re-claimed job resumes with the remaining hotels.
+- The scheduler cron also drains a few jobs per run, so orphaned scans resume
+  even on deployments without a dedicated `scan_worker.py` process.
+- Failures are retried with exponential backoff (`run_after`) up to
+  `max_attempts`, then the session is marked failed with `last_error`.
+
+If migration 032 is not deployed, `enqueue_scan` returns False and callers fall
+back to running the scan directly in BackgroundTasks.
+
+TUNING (environment variables):
+    SCAN_QUEUE_ENABLED        Use the queue for manual scans (default 1)
+    SCAN_QUEUE_VISIBILITY_S   Lease length before a job can be re-claimed (default 900)
+    SCAN_QUEUE_MAX_ATTEMPTS   Attempts before a job is marked failed (default 3)
+    SCAN_QUEUE_BACKOFF_S      Base retry delay, doubled per attempt (default 60)
+    SCAN_QUEUE_POLL_S         Idle poll interval for long-running workers (default 5)
+    SCAN_QUEUE_CRON_DRAIN     Queued/orphaned jobs the scheduler cron runs (default 5)
+"""
+
+import asyncio
+import os
+import socket
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional
+
+from backend.models.schemas import ScanOptions
+from backend.utils.db import execute_async
+from backend.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+def _env_float(name: str, default: float) -> float:
+    try:
+        return float(os.getenv(name, default))
+    except (TypeError, ValueError):
+        return default
+
+
+SCAN_QUEUE_ENABLED = os.getenv("SCAN_QUEUE_ENABLED", "1") != "0"
+SCAN_QUEUE_VISIBILITY_S = int(_env_float("SCAN_QUEUE_VISIBILITY_S", 900))
+SCAN_QUEUE_MAX_ATTEMPTS = max(1, int(_env_float("SCAN_QUEUE_MAX_ATTEMPTS", 3)))
+SCAN_QUEUE_BACKOFF_S = _env_float("SCAN_QUEUE_BACKOFF_S", 60.0)
+SCAN_QUEUE_POLL_S = _env_float("SCAN_QUEUE_POLL_S", 5.0)
+SCAN_QUEUE_CRON_DRAIN = int(_env_float("SCAN_QUEUE_CRON_DRAIN", 5))
+# Retry delays never exceed an hour
+MAX_BACKOFF_S = 3600.0
+
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def retry_delay(attempts: int, base: Optional[float] = None) -> float:
+    """Exponential backoff: base, 2*base, 4*base, ... capped at MAX_BACKOFF_S."""
+    base = SCAN_QUEUE_BACKOFF_S if base is None else base
+    return min(MAX_BACKOFF_S, base * (2 ** max(0, attempts - 1)))
+
+
+async def enqueue_scan(
+    db,
+    session_id: Any,
+    hotels: List[Dict[str, Any]],
+    options: Optional[ScanOptions] = None,
+    max_attempts: Optional[int] = None,
+) -> bool:
+    """
+    Marks an existing scan_sessions row as a queued job. Returns False when the
+    queue is disabled or unavailable so the caller can run the scan directly.
+    """
+    if not SCAN_QUEUE_ENABLED or not session_id:
+        return False
+    job_options = {
+        "hotel_ids": [str(h["id"]) for h in hotels],
+        "options": options.model_dump(mode="json") if options else None,
+    }
+    try:
+        await execute_async(
+            db.table("scan_sessions")
+            .update(
+                {
+                    "job_options": job_options,
+                    "status": "pending",
+                    "attempts": 0,
+                    "max_attempts": max_attempts or SCAN_QUEUE_MAX_ATTEMPTS,
+                    "run_after": _now().isoformat(),
+                    "completed_hotel_ids": [],
+                }
+            )
+            .eq("id", str(session_id))
+        )
+        return True
+    except Exception as e:
+        # Migration 032 not applied yet - run in-process like before
+        logger.warning(f"Scan queue unavailable, running {session_id} directly: {e}")
+        return False
+
+
+class ScanQueueWorker:
+    """Claims and runs queued scans. One instance per worker loop."""
+
+    def __init__(
+        self,
+        db,
+        worker_id: Optional[str] = None,
+        visibility_s: Optional[int] = None,
+        backoff_s: Optional[float] = None,
+    ):
+        self.db = db
+        self.worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}"
+        self.visibility_s = visibility_s or SCAN_QUEUE_VISIBILITY_S
+        self.backoff_s = SCAN_QUEUE_BACKOFF_S if backoff_s is None else backoff_s
+        self.stats = {"claimed": 0, "completed": 0, "retried": 0, "failed": 0, "resumed": 0}
+
+    async def claim(self) -> Optional[Dict[str, Any]]:
+        res = await execute_async(
+            self.db.rpc(
+                "claim_scan_job",
+                {"p_worker_id": self.worker_id, "p_visibility_s": self.visibility_s},
+            )
+        )
+        rows = res.data or []
+        if isinstance(rows, dict):
+            rows = [rows]
+        if not rows:
+            return None
+        self.stats["claimed"] += 1
+        return rows[0]
+
+    async def _heartbeat(self, session_id: str):
+        # Renew the lease well before it expires so a long scan is not re-claimed
+        interval = max(1.0, self.visibility_s / 3)
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await execute_async(
+                    self.db.table("scan_sessions")
+                    .update(
+                        {
+                            "locked_until": (
+                                _now() + timedelta(seconds=self.visibility_s)
+                            ).isoformat()
+                        }
+                    )
+                    .eq("id", session_id)
+                    .eq("locked_by", self.worker_id)
+                )
+            except Exception as e:
+                logger.warning(f"Lease renewal failed for {session_id}: {e}")
+
+    async def _load_hotels(self, job: Dict[str, Any]) -> List[Dict[str, Any]]:
+        hotel_ids = (job.get("job_options") or {}).get("hotel_ids") or []
+        if not hotel_ids:
+            return []
+        res = await execute_async(
+            self.db.table("hotels")
+            .select("*")
+            .in_("id", hotel_ids)
+            .is_("deleted_at", "null")
+        )
+        return res.data or []
+
+    async def run_job(self, job: Dict[str, Any]) -> str:
+        """Runs one claimed job and settles its queue state. Returns the outcome."""
+        from backend.services.monitor_service import run_monitor_background
+
+        session_id = str(job["id"])
+        raw_options = (job.get("job_options") or {}).get("options")
+        options = ScanOptions(**raw_options) if raw_options else None
+        heartbeat = asyncio.create_task(self._heartbeat(session_id))
+        try:
+            hotels = await self._load_hotels(job)
+            if int(job.get("attempts") or 1) > 1:
+                # Checkpointed hotels are skipped or replayed by run_monitor_background
+                self.stats["resumed"] += 1
+                logger.info(f"[ScanQueue] Resuming {session_id} (attempt {job['attempts']})")
+            await run_monitor_background(
+                user_id=uuid.UUID(str(job["user_id"])),
+                hotels=hotels,
+                options=options,
+                db=self.db,
+                session_id=uuid.UUID(session_id),
+                raise_errors=True,
+                resume=True,
+            )
+            await self._release(session_id)
+            self.stats["completed"] += 1
+            return "completed"
+        except Exception as e:
+            return await self._fail(job, e)
+        finally:
+            heartbeat.cancel()
+
+    async def _release(self, session_id: str, extra: Optional[Dict[str, Any]] = None):
+        await execute_async(
+            self.db.table("scan_sessions")
+            .update({"locked_by": None, "locked_until": None, **(extra or {})})
+            .eq("id", session_id)
+            .eq("locked_by", self.worker_id)
+        )
+
+    async def _fail(self, job: Dict[str, Any], error: Exception) -> str:
+        session_id = str(job["id"])
+        attempts = int(job.get("attempts") or 1)
+        max_attempts = int(job.get("max_attempts") or SCAN_QUEUE_MAX_ATTEMPTS)
+        if attempts < max_attempts:
+            delay = retry_delay(attempts, self.backoff_s)
+            logger.warning(
+                f"[ScanQueue] {session_id} attempt {attempts}/{max_attempts} failed ({error}); "
+                f"retrying in {delay:.0f}s"
+            )
+            update = {
+                "status": "pending",
+                "run_after": (_now() + timedelta(seconds=delay)).isoformat(),
+                "last_error": str(error)[:500],
+            }
+            outcome = "retried"
+        else:
+            logger.error(f"[ScanQueue] {session_id} failed after {attempts} attempts: {error}")
+            update = {
+                "status": "failed",
+                "completed_at": _now().isoformat(),
+                "last_error": str(error)[:500],
+            }
+            outcome = "failed"
+        try:
+            await self._release(session_id, update)
+        except Exception as e:
+            # The lease will expire and the claim RPC takes it from there
+            logger.error(f"[ScanQueue] Could not settle {session_id}: {e}")
+        self.stats[outcome] += 1
+        return outcome
+
+    async def drain(self, max_jobs: Optional[int] = None) -> int:
+        """Runs jobs until the queue has nothing runnable (or max_jobs ran)."""
+        ran = 0
+        while max_jobs is None or ran < max_jobs:
+            try:
+                job = await self.claim()
+            except Exception as e:
+                logger.error(f"[ScanQueue] Claim failed: {e}")
+                break
+            if not job:
+                break
+            await self.run_job(job)
+            ran += 1
+        return ran
+
+    async def run_forever(self, stop: Optional[asyncio.Event] = None):
+        stop = stop or asyncio.Event()
+        logger.info(f"[ScanQueue] Worker {self.worker_id} started")
+        while not stop.is_set():
+            # One job at a time so a stop request is honoured between scans
+            if not await self.drain(max_jobs=1):
+                try:
+                    await asyncio.wait_for(stop.wait(), timeout=SCAN_QUEUE_POLL_S)
+                except asyncio.TimeoutError:
+                    pass
+        logger.info(f"[ScanQueue] Worker {self.worker_id} stopped: {self.stats}")
+
+
+async def kick_scan_worker(db, max_jobs: int = 1) -> int:
+    """
+    BackgroundTasks entry point: run up to `max_jobs` queued scans in this
+    process. One kick per enqueue keeps work spread across API instances.
+    """
+    try:
+        return await ScanQueueWorker(db).drain(max_jobs=max_jobs)
+    except Exception as e:
+        logger.error(f"[ScanQueue] Worker kick failed: {e}")
+        return 0
@@ -0,0 +1,395 @@
+"""
+Scan Scheduler (concurrent, fair-share)
+=======================================
+Helpers for `monitor_service.run_scheduler_check_logic`.
+
+WHY: The cron loop used to await one user's full scan before starting the next,
+so a cron window with 100 due users took the *sum* of every scan, and one slow
+200-hotel account delayed everyone queued behind it.
+
+HOW:
+- Users run in parallel, at most SCHEDULER_MAX_CONCURRENT_USERS at a time,
+  smallest accounts first (shortest-job-first keeps the average wait low).
+- Every SerpApi call across all users goes through one `FairShareBudget`:
+  at most SCHEDULER_GLOBAL_CONCURRENCY calls are in flight, and each active user
+  is entitled to an equal share of them. A user may borrow idle slots beyond
+  its share only while no user below their share is waiting, so a 200-hotel
+  account can't starve smaller ones (max-min fairness), yet no slot sits idle.
+- Hotels are pooled across users into one `SharedFetchPlan` keyed by
+  (serp_api_id, dates, adults, currency): each unique key is fetched once per
+  run and the result is fanned out to every user's own Analyst pass. Credits
+  saved are reported with the run summary.
+- SCHEDULER_CREDIT_BUDGET (optional) caps the credits one cron run may spend.
+  Users that don't fit are deferred: their `next_scan_at` is not advanced, so
+  they are first in line on the next run.
+- SCHEDULER_MAX_HOTELS_PER_SCAN (optional) splits a large account's scan across
+  cron runs. The session is checkpointed per hotel (scan_checkpoints.py) and left
+  'paused'; the user comes due again after SCHEDULER_RESUME_AFTER_MINUTES and the
+  next run resumes the same session with the hotels it has not fetched yet.
+- `project_schedule` replays the same policy in simulated time, which is what
+  the scheduler's dry-run mode reports (wall-clock time and credit use).
+
+TUNING (environment variables):
+    SCHEDULER_MAX_CONCURRENT_USERS   Users scanned at the same time (default 4)
+    SCHEDULER_GLOBAL_CONCURRENCY     SerpApi calls in flight across all users (default 20)
+    SCHEDULER_CREDIT_BUDGET          Max credits per cron run, 0 = unlimited (default 0)
+    SCHEDULER_EST_FETCH_S            Avg provider latency used by dry runs (default 4)
+    SCHEDULER_MAX_HOTELS_PER_SCAN    Hotels fetched per user per run, 0 = all (default 0)
+    SCHEDULER_RESUME_AFTER_MINUTES   Delay before a split scan continues (default 15)
+"""
+
+import asyncio
+import copy
+import os
+from collections import defaultdict
+from contextlib import asynccontextmanager
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from backend.services.request_coalescer import CoalesceKey, build_price_key
+from backend.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+def _env_float(name: str, default: float) -> float:
+    try:
+        return float(os.getenv(name, default))
+    except (TypeError, ValueError):
+        return default
+
+
+SCHEDULER_MAX_CONCURRENT_USERS = max(1, int(_env_float("SCHEDULER_MAX_CONCURRENT_USERS", 4)))
+SCHEDULER_GLOBAL_CONCURRENCY = max(1, int(_env_float("SCHEDULER_GLOBAL_CONCURRENCY", 20)))
+SCHEDULER_CREDIT_BUDGET = max(0, int(_env_float("SCHEDULER_CREDIT_BUDGET", 0)))
+SCHEDULER_EST_FETCH_S = _env_float("SCHEDULER_EST_FETCH_S", 4.0)
+SCHEDULER_MAX_HOTELS_PER_SCAN = max(0, int(_env_float("SCHEDULER_MAX_HOTELS_PER_SCAN", 0)))
+SCHEDULER_RESUME_AFTER_MINUTES = _env_float("SCHEDULER_RESUME_AFTER_MINUTES", 15.0)
+# Mirrors the starting limit of each scan's AdaptiveConcurrencyLimiter
+SCAN_CONCURRENCY_INITIAL = max(1, int(_env_float("SCAN_CONCURRENCY_INITIAL", 10)))
+
+
+class FairShareBudget:
+    """
+    Global cap on in-flight SerpApi calls, split evenly across active users.
+    Create one per scheduler run (asyncio.Condition is loop-bound).
+    """
+
+    def __init__(self, global_limit: Optional[int] = None):
+        self.global_limit = max(1, global_limit or SCHEDULER_GLOBAL_CONCURRENCY)
+        self._cond = asyncio.Condition()
+        self._active: set = set()
+        self._inflight: Dict[str, int] = defaultdict(int)
+        self._waiting: Dict[str, int] = defaultdict(int)
+        self._total = 0
+        self.peak_inflight = 0
+        self.peak_by_user: Dict[str, int] = defaultdict(int)
+        self.calls_by_user: Dict[str, int] = defaultdict(int)
+
+    @property
+    def share(self) -> int:
+        return max(1, self.global_limit // max(1, len(self._active)))
+
+    async def register(self, user_id: Any):
+        async with self._cond:
+            self._active.add(str(user_id))
+            self._cond.notify_all()
+
+    async def unregister(self, user_id: Any):
+        # A finished user's share is redistributed to the ones still running
+        async with self._cond:
+            self._active.discard(str(user_id))
+            self._cond.notify_all()
+
+    def _can_take(self, uid: str) -> bool:
+        if self._total >= self.global_limit:
+            return False
+        share = self.share
+        if self._inflight[uid] < share:
+            return True
+        # Borrow beyond the fair share only when no user below its share is queued
+        return not any(
+            n and self._inflight[u] < share
+            for u, n in self._waiting.items()
+            if u != uid
+        )
+
+    @asynccontextmanager
+    async def slot(self, user_id: Any):
+        uid = str(user_id)
+        async with self._cond:
+            self._waiting[uid] += 1
+            try:
+                await self._cond.wait_for(lambda: self._can_take(uid))
+            finally:
+                self._waiting[uid] -= 1
+            self._inflight[uid] += 1
+            self._total += 1
+            self.calls_by_user[uid] += 1
+            self.peak_inflight = max(self.peak_inflight, self._total)
+            self.peak_by_user[uid] = max(self.peak_by_user[uid], self._inflight[uid])
+        try:
+            yield self
+        finally:
+            async with self._cond:
+                self._inflight[uid] -= 1
+                self._total -= 1
+                self._cond.notify_all()
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "global_limit": self.global_limit,
+            "peak_inflight": self.peak_inflight,
+            "calls": sum(self.calls_by_user.values()),
+            "peak_by_user": dict(self.peak_by_user),
+        }
+
+
+class SharedFetchPlan:
+    """
+    One fetch per unique (serp_api_id, check_in, check_out, adults, currency)
+    for a whole scheduler run. Create one per run (tasks are loop-bound).
+
+    The request coalescer only merges calls that overlap in time; once a fetch
+    finishes, a user whose scan starts later would pay for it again (or race the
+    3-hour price_logs cache). The plan keeps each result for the rest of the
+    run and hands every user a private deep copy for its own Analyst pass.
+    """
+
+    def __init__(self):
+        self._tasks: Dict[CoalesceKey, asyncio.Task] = {}
+        self._planned: Dict[CoalesceKey, int] = defaultdict(int)
+        self.fetches = 0
+        self.shared = 0
+
+    @classmethod
+    def build(
+        cls,
+        users: List[Dict[str, Any]],
+        user_hotels_map: Dict[str, List[Dict[str, Any]]],
+        options: Optional[Any] = None,
+    ) -> "SharedFetchPlan":
+        """Keys every admitted hotel exactly as ScraperAgent.run_scan will."""
+        from backend.agents.scraper_agent import ScraperAgent
+
+        plan = cls()
+        currency = options.currency if options and options.currency else "TRY"
+        for user in users:
+            for hotel in user_hotels_map.get(user["id"], []):
+                check_in, check_out, adults, _ = ScraperAgent._resolve_search_params(
+                    hotel, options
+                )
+                key = build_price_key(
+                    hotel.get("name"),
+                    hotel.get("location"),
+                    check_in,
+                    check_out,
+                    adults,
+                    currency,
+                    hotel.get("serp_api_id"),
+                )
+                plan._planned[key] += 1
+        return plan
+
+    @property
+    def planned_requests(self) -> int:
+        return sum(self._planned.values())
+
+    @property
+    def unique_keys(self) -> int:
+        return len(self._planned)
+
+    @staticmethod
+    def _usable(result: Any) -> bool:
+        """Empty and error-status results are failures, not prices to share."""
+        return bool(result) and not (
+            isinstance(result, dict) and result.get("status") == "error"
+        )
+
+    async def fetch(
+        self, key: CoalesceKey, factory: Callable[[], Awaitable[Any]]
+    ) -> Tuple[Any, bool]:
+        """Returns (result, shared); `shared` is True when no credit was spent."""
+        task = self._tasks.get(key)
+        joined = task is not None
+        if not joined:
+            task = asyncio.get_running_loop().create_task(factory())
+            self._tasks[key] = task
+            self.fetches += 1
+
+            def _forget_failures(t: asyncio.Task, k: CoalesceKey = key):
+                # Exceptions, timeouts, empty and error results are not reused;
+                # the next user retries
+                failed = (
+                    t.cancelled()
+                    or t.exception() is not None
+                    or not self._usable(t.result())
+                )
+                if failed and self._tasks.get(k) is t:
+                    del self._tasks[k]
+
+            task.add_done_callback(_forget_failures)
+
+        # Shielded: one caller's cancellation must not abort a shared fetch.
+        # Everyone gets a copy because run_scan mutates price_data in place.
+        result = await asyncio.shield(task)
+        # Only a usable result counts as a saved credit; a user that joined an
+        # in-flight fetch which failed gets the failure, not a "reuse"
+        shared = joined and self._usable(result)
+        if shared:
+            self.shared += 1
+        return copy.deepcopy(result), shared
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "planned_requests": self.planned_requests,
+            "unique_keys": self.unique_keys,
+            "max_credits_saved": self.planned_requests - self.unique_keys,
+            "fetches": self.fetches,
+            "shared": self.shared,
+            "credits_saved": self.shared,
+        }
+
+
+def plan_users(
+    users: List[Dict[str, Any]],
+    user_hotels_map: Dict[str, List[Dict[str, Any]]],
+    credit_budget: Optional[int] = None,
+) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+    """
+    Splits due users into (admitted, deferred) under the per-run credit budget.
+    Admission goes most-overdue first so deferred users win the next run; the
+    admitted list is returned smallest-first for dispatch.
+    """
+    budget = SCHEDULER_CREDIT_BUDGET if credit_budget is None else credit_budget
+    by_due = sorted(users, key=lambda u: u.get("next_scan_at") or "")
+    admitted, deferred, spent = [], [], 0
+    for user in by_due:
+        cost = len(user_hotels_map.get(user["id"], []))
+        # Always admit at least one user so an oversized account can't block forever
+        if budget and admitted and spent + cost > budget:
+            deferred.append(user)
+            continue
+        admitted.append(user)
+        spent += cost
+    admitted.sort(key=lambda u: len(user_hotels_map.get(u["id"], [])))
+    return admitted, deferred
+
+
+def split_scan(
+    hotels: List[Dict[str, Any]],
+    pending: List[Dict[str, Any]],
+    max_hotels: Optional[int] = None,
+) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+    """
+    Splits a resumed scan into (this_run, later). `pending` are the hotels the
+    session still has to fetch; checkpointed ones always stay in this run (they
+    are skipped or replayed for free) and at most `max_hotels` pending ones join.
+    """
+    limit = SCHEDULER_MAX_HOTELS_PER_SCAN if max_hotels is None else max_hotels
+    if not limit or len(pending) <= limit:
+        return list(hotels), []
+    later_ids = {str(h["id"]) for h in pending[limit:]}
+    this_run = [h for h in hotels if str(h["id"]) not in later_ids]
+    later = [h for h in hotels if str(h["id"]) in later_ids]
+    return this_run, later
+
+
+def _water_fill(demands: Dict[str, int], capacity: int) -> Dict[str, int]:
+    """Max-min fair split of `capacity` slots across per-user demands."""
+    shares = {}
+    left = capacity
+    pending = sorted(demands.items(), key=lambda kv: kv[1])
+    for i, (uid, demand) in enumerate(pending):
+        share = min(demand, left // (len(pending) - i)) if left else 0
+        shares[uid] = share
+        left -= share
+    # Integer division can leave a few slots over; hand them out in order
+    for uid, demand in pending:
+        if not left:
+            break
+        extra = min(left, demand - shares[uid])
+        shares[uid] += extra
+        left -= extra
+    return shares
+
+
+def project_schedule(
+    hotel_counts: List[Tuple[str, int]],
+    max_users: Optional[int] = None,
+    global_limit: Optional[int] = None,
+    per_user_limit: Optional[int] = None,
+    fetch_s: Optional[float] = None,
+) -> Dict[str, Any]:
+    """
+    Simulates the scheduler in rounds of one provider round-trip. Each round,
+    up to `max_users` users are running and share `global_limit` slots max-min
+    fairly, each capped by its own scan limiter (`per_user_limit`).
+    `hotel_counts` is [(user_id, hotels)] in dispatch order.
+    """
+    max_users = max(1, max_users or SCHEDULER_MAX_CONCURRENT_USERS)
+    global_limit = max(1, global_limit or SCHEDULER_GLOBAL_CONCURRENCY)
+    per_user_limit = max(1, per_user_limit or SCAN_CONCURRENCY_INITIAL)
+    fetch_s = SCHEDULER_EST_FETCH_S if fetch_s is None else fetch_s
+
+    waiting = [(uid, n) for uid, n in hotel_counts]
+    running: Dict[str, int] = {}
+    started: Dict[str, int] = {}
+    finished: Dict[str, int] = {}
+    rounds = 0
+    while waiting or running:
+        while waiting and len(running) < max_users:
+            uid, n = waiting.pop(0)
+            if n <= 0:
+                finished[uid] = rounds
+                continue
+            running[uid] = n
+            started[uid] = rounds
+        if not running:
+            break
+        demands = {uid: min(n, per_user_limit) for uid, n in running.items()}
+        for uid, done in _water_fill(demands, global_limit).items():
+            running[uid] -= done
+        rounds += 1
+        for uid in [u for u, n in running.items() if n <= 0]:
+            del running[uid]
+            finished[uid] = rounds
+
+    # Baseline: the old loop, one user at a time with only its own limiter
+    sequential_rounds = sum(-(-n // per_user_limit) for _, n in hotel_counts if n > 0)
+    return {
+        "users": len(hotel_counts),
+        "hotels": sum(n for _, n in hotel_counts),
+        "projected_wall_s": round(rounds * fetch_s, 1),
+        "sequential_wall_s": round(sequential_rounds * fetch_s, 1),
+        "per_user": {
+            uid: {
+                "wait_s": round(started.get(uid, finished[uid]) * fetch_s, 1),
+                "done_s": round(finished[uid] * fetch_s, 1),
+            }
+            for uid, _ in hotel_counts
+        },
+    }
+
+
+async def run_users(
+    users: List[Dict[str, Any]],
+    worker,
+    budget: FairShareBudget,
+    max_users: Optional[int] = None,
+) -> List[Any]:
+    """
+    Runs `await worker(user, budget)` for every user, at most `max_users` at a
+    time, in list order. Errors are returned per user instead of raised.
+    """
+    gate = asyncio.Semaphore(max(1, max_users or SCHEDULER_MAX_CONCURRENT_USERS))
+
+    async def run_one(user):
+        async with gate:
+            await budget.register(user["id"])
+            try:
+                return await worker(user, budget)
+            finally:
+                await budget.unregister(user["id"])
+
+    # Tasks are created in order and the semaphore is FIFO, so dispatch order holds
+    return await asyncio.gather(*(run_one(u) for u in users), return_exceptions=True)
@@ -4,8 +4,8 @@ Fetches real-time hotel prices from Google Hotels via SerpApi.
 
 Features:
 - Rotating API keys with automatic failover on quota exhaustion
-- Rate limiting awareness
-- Connection pooling
+- Rate limiting awareness (proactive per-key token buckets, see ApiKeyManager.acquire)
+- Connection pooling (shared keep-alive HTTP/2 client, see backend.utils.http_client)
 """
 
 import os
@@ -13,10 +13,12 @@ import httpx
 import re
 import threading
 import asyncio
+import time
 from typing import Optional, List, Dict, Any
 from datetime import date, timedelta, datetime
 from dotenv import load_dotenv
 from backend.utils.logger import get_logger
+from backend.utils.http_client import get_http_client
 
 # EXPLANATION: Module-level logger replaces raw print() for structured output
 logger = get_logger(__name__)
@@ -46,6 +48,44 @@ def load_api_keys() -> List[str]:
     return keys
 
 
+def _env_float(name: str, default: float) -> float:
+    try:
+        return float(os.getenv(name, default))
+    except (TypeError, ValueError):
+        return default
+
+
+class _TokenBucket:
+    """Refills `rate` tokens per second, holding at most `burst` tokens."""
+
+    def __init__(self, rate: float, burst: float):
+        self.rate = max(rate, 0.001)
+        self.burst = max(burst, 1.0)
+        self.tokens = self.burst
+        self.updated = time.monotonic()
+
+    def _refill(self, now: float):
+        elapsed = now - self.updated
+        if elapsed > 0:
+            self.tokens = min(self.burst, self.tokens + elapsed * self.rate)
+            self.updated = now
+
+    def available(self, now: float) -> float:
+        self._refill(now)
+        return self.tokens
+
+    def take(self, now: float) -> bool:
+        self._refill(now)
+        if self.tokens >= 1.0:
+            self.tokens -= 1.0
+            return True
+        return False
+
+    def wait_time(self, now: float) -> float:
+        self._refill(now)
+        return max(0.0, (1.0 - self.tokens) / self.rate)
+
+
 class ApiKeyManager:
     """
     Manages rotating API keys with automatic failover.
@@ -66,41 +106,121 @@ class ApiKeyManager:
         self._last_quota_check: Dict[str, datetime] = {}  # key -> last check time
         self._exhaustion_cooldown = timedelta(hours=24)  # Reset after 24h
         self._rate_limit_cooldown = timedelta(minutes=15)  # Reset after 15m
+        # Monotonic count of temporary (429) rotations. Read by the scraper's
+        # adaptive concurrency limiter to back off before keys hit cooldown.
+        self.rate_limit_events = 0
+
+        # EXPLANATION: Proactive Token Buckets
+        # Each key gets its own bucket (SERPAPI_KEY_RATE_PER_SEC refill,
+        # SERPAPI_KEY_BURST capacity). acquire() hands out whichever healthy key
+        # has a token and the most remaining quota, spreading load across every
+        # key at once instead of draining one key into a 429 and rotating.
+        self._rate_per_sec = _env_float("SERPAPI_KEY_RATE_PER_SEC", 5.0)
+        self._burst = _env_float("SERPAPI_KEY_BURST", 10)
+        self._buckets: Dict[str, _TokenBucket] = {}
+        self.rotation_events = 0
+        self.throttle_waits = 0
 
     async def _fetch_quota(self, api_key: str):
         """Fetch actual searches left from SerpApi Account API."""
         try:
-            async with httpx.AsyncClient(timeout=10.0) as client:
-                response = await client.get(
-                    f"https://serpapi.com/account?api_key={api_key}"
+            client = get_http_client()
+            response = await client.get(
+                f"https://serpapi.com/account?api_key={api_key}", timeout=10.0
+            )
+            if response.status_code == 200:
+                data = response.json()
+                left = data.get("total_searches_left", 0)
+                self._quota_info[api_key] = left
+                self._renewal_info[api_key] = data.get(
+                    "plan_renewal_date", "Unknown"
                 )
-                if response.status_code == 200:
-                    data = response.json()
-                    left = data.get("total_searches_left", 0)
-                    self._quota_info[api_key] = left
-                    self._renewal_info[api_key] = data.get(
-                        "plan_renewal_date", "Unknown"
-                    )
-                    self._last_quota_check[api_key] = datetime.now()
+                self._last_quota_check[api_key] = datetime.now()
 
-                    # Also update exhaustion status based on real data (PROACTIVE HEALING)
-                    if left <= 0:
-                        self._exhausted_keys[api_key] = datetime.now()
-                    else:
-                        # If left > 0, it's healthy. Clear all lockout statuses immediately.
-                        if api_key in self._exhausted_keys:
-                            del self._exhausted_keys[api_key]
-                        if api_key in self._rate_limited_keys:
-                            del self._rate_limited_keys[api_key]
+                # Also update exhaustion status based on real data (PROACTIVE HEALING)
+                if left <= 0:
+                    self._exhausted_keys[api_key] = datetime.now()
+                else:
+                    # If left > 0, it's healthy. Clear all lockout statuses immediately.
+                    if api_key in self._exhausted_keys:
+                        del self._exhausted_keys[api_key]
+                    if api_key in self._rate_limited_keys:
+                        del self._rate_limited_keys[api_key]
 
-                    return left
+                return left
         except Exception as e:
             logger.error(f"Quota Check Error for {api_key[-6:]}: {e}")
         return None
 
+    def _bucket(self, key: str) -> _TokenBucket:
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = _TokenBucket(self._rate_per_sec, self._burst)
+            self._buckets[key] = bucket
+        return bucket
+
+    def _is_available_locked(self, key: str, now: datetime) -> bool:
+        """True if the key is outside both cooldown windows (expects lock)."""
+        if key in self._exhausted_keys:
+            if now - self._exhausted_keys[key] <= self._exhaustion_cooldown:
+                return False
+            del self._exhausted_keys[key]
+        if key in self._rate_limited_keys:
+            if now - self._rate_limited_keys[key] <= self._rate_limit_cooldown:
+                return False
+            del self._rate_limited_keys[key]
+        return True
+
+    async def acquire(self) -> str:
+        """
+        Reserve a request slot and return the key to use for it.
+
+        Picks, among keys that are not cooling down, the one with a token
+        available and the most remaining quota (`_quota_info`; unknown quota
+        ranks after known-positive). If every healthy key is out of tokens we
+        sleep until the earliest refill instead of firing a request that would
+        come back as a 429. If no key is healthy at all we fall back to
+        `current_key` so callers still get the legacy failover behaviour.
+        """
+        while True:
+            with self._lock:
+                if not self._keys:
+                    raise ValueError("No API keys configured")
+
+                now_dt = datetime.now()
+                now = time.monotonic()
+                healthy = [k for k in self._keys if self._is_available_locked(k, now_dt)]
+                if not healthy:
+                    break
+
+                ready = [k for k in healthy if self._bucket(k).available(now) >= 1.0]
+                if ready:
+                    key = max(
+                        ready,
+                        key=lambda k: (
+                            self._quota_info.get(k, 0) or 0,
+                            self._bucket(k).available(now),
+                        ),
+                    )
+                    self._bucket(key).take(now)
+                    self._current_index = self._keys.index(key)
+                    self._usage_counts[key] = self._usage_counts.get(key, 0) + 1
+                    if self._quota_info.get(key):
+                        self._quota_info[key] -= 1  # Local estimate until next refresh
+                    return key
+
+                wait = min(self._bucket(k).wait_time(now) for k in healthy)
+                self.throttle_waits += 1
+            await asyncio.sleep(wait)
+
+        return self.current_key
+
     @property
     def current_key(self) -> str:
-        """Get the current active API key."""
+        """
+        Get the current active API key (sync, no rate limiting).
+        Prefer `await acquire()` for outbound requests.
+        """
         with self._lock:
             if not self._keys:
                 raise ValueError("No API keys configured")
@@ -153,20 +273,33 @@ class ApiKeyManager:
             return self._current_index + 1 if self._keys else 0
 
     def rotate_key(
-        self, reason: str = "quota_exhausted", is_permanent: bool = True
+        self,
+        reason: str = "quota_exhausted",
+        is_permanent: bool = True,
+        key: Optional[str] = None,
     ) -> bool:
-        """Mark current key as exhausted and rotate to next available key."""
+        """
+        Mark a key as exhausted/rate-limited and rotate to next available key.
+        `key` is the key the failing request actually used (from acquire());
+        defaults to the current key.
+        """
         with self._lock:
-            return self._rotate_key_locked(reason, is_permanent)
+            return self._rotate_key_locked(reason, is_permanent, key)
 
     def _rotate_key_locked(
-        self, reason: str = "quota_exhausted", is_permanent: bool = True
+        self,
+        reason: str = "quota_exhausted",
+        is_permanent: bool = True,
+        key: Optional[str] = None,
     ) -> bool:
         """Internal rotation logic (expects lock)."""
         if not self._keys:
             return False
 
+        if key and key in self._keys:
+            self._current_index = self._keys.index(key)
         current_key = self._keys[self._current_index]
+        self.rotation_events += 1
 
         # EXPLANATION: Smart Rotation logic
         if is_permanent:
@@ -176,6 +309,7 @@ class ApiKeyManager:
             )
         else:
             self._rate_limited_keys[current_key] = datetime.now()
+            self.rate_limit_events += 1
             logger.info(
                 f"Key {self._current_index + 1} hitting temporary limit (15m cooldown). Rotating..."
             )
@@ -279,6 +413,9 @@ class ApiKeyManager:
                 "current_key_index": idx,
                 "exhausted_keys": len(self._exhausted_keys),
                 "active_keys": self.active_keys,
+                "rate_limit_events": self.rate_limit_events,
+                "rotation_events": self.rotation_events,
+                "throttle_waits": self.throttle_waits,
                 "keys_status": [],
             }
             for i, key in enumerate(self._keys):
@@ -322,6 +459,10 @@ class SerpApiClient:
     def api_key(self) -> str:
         return self._key_manager.current_key
 
+    async def acquire_key(self) -> str:
+        """Rate-limited key checkout; use for every outbound SerpApi request."""
+        return await self._key_manager.acquire()
+
     async def get_key_status(self) -> Dict[str, Any]:
         current_keys = load_api_keys()
         if len(current_keys) != self._key_manager.total_keys:
@@ -503,63 +644,65 @@ class SerpApiClient:
                 "hl": "en",
                 "check_in_date": check_in.isoformat(),
                 "check_out_date": check_out.isoformat(),
-                "api_key": self.api_key,
+                "api_key": await self.acquire_key(),
                 "start": offset,
             }
             try:
-                async with httpx.AsyncClient(timeout=30.0) as client:
-                    response = await client.get(SERPAPI_BASE_URL, params=params)
+                client = get_http_client()
+                response = await client.get(SERPAPI_BASE_URL, params=params)
 
-                    # Robust Rotation Loop: Continue trying other keys until success or exhaustion
-                    is_err, is_perm = self._is_quota_error(response)
-                    while is_err:
-                        logger.warning(
-                            f"Key {self._key_manager.current_key_index} encountered {'PERMANENT' if is_perm else 'TEMPORARY'} limit. Rotating..."
+                # Robust Rotation Loop: Continue trying other keys until success or exhaustion
+                is_err, is_perm = self._is_quota_error(response)
+                while is_err:
+                    logger.warning(
+                        f"Key {self._key_manager.current_key_index} encountered {'PERMANENT' if is_perm else 'TEMPORARY'} limit. Rotating..."
+                    )
+                    if self._key_manager.rotate_key(
+                        is_permanent=is_perm, key=params["api_key"]
+                    ):
+                        params["api_key"] = await self.acquire_key()
+                        response = await client.get(SERPAPI_BASE_URL, params=params)
+                        is_err, is_perm = self._is_quota_error(response)
+                    else:
+                        logger.critical(
+                            "All SerpApi keys exhausted for search_hotels"
                         )
-                        if self._key_manager.rotate_key(is_permanent=is_perm):
-                            params["api_key"] = self.api_key
-                            response = await client.get(SERPAPI_BASE_URL, params=params)
-                            is_err, is_perm = self._is_quota_error(response)
-                        else:
-                            logger.critical(
-                                "All SerpApi keys exhausted for search_hotels"
-                            )
-                            break
-
-                    response.raise_for_status()
-                    data = response.json()
-                    properties = data.get("properties", [])
-
-                    if not properties:
                         break
 
-                    for p in properties:
-                        all_results.append(
-                            {
-                                "name": self._clean_hotel_name(p.get("name", "")),
-                                "location": p.get("location", "Unknown"),
-                                "serp_api_id": p.get("hotel_id")
-                                or p.get("property_token"),
-                                "source": "serpapi",
-                                "stars": p.get("extracted_hotel_class"),
-                                "rating": p.get("overall_rating"),
-                                "review_count": p.get("reviews"),
-                                "description": p.get("description"),
-                                "amenities": p.get("amenities", []),
-                                "image_url": p.get("images", [{}])[0].get("thumbnail")
-                                if p.get("images")
-                                else None,
-                                "images": p.get("images", []),
-                            }
-                        )
+                response.raise_for_status()
+                data = response.json()
+                properties = data.get("properties", [])
 
-                    # Pagination Check
-                    pagination = data.get("serpapi_pagination", {})
-                    if not pagination.get("next"):
-                        break
+                if not properties:
+                    break
 
-                    offset += 20
-                    page_count += 1
+                for p in properties:
+                    all_results.append(
+                        {
+                            "name": self._clean_hotel_name(p.get("name", "")),
+                            "location": p.get("location", "Unknown"),
+                            "serp_api_id": p.get("hotel_id")
+                            or p.get("property_token"),
+                            "source": "serpapi",
+                            "stars": p.get("extracted_hotel_class"),
+                            "rating": p.get("overall_rating"),
+                            "review_count": p.get("reviews"),
+                            "description": p.get("description"),
+                            "amenities": p.get("amenities", []),
+                            "image_url": p.get("images", [{}])[0].get("thumbnail")
+                            if p.get("images")
+                            else None,
+                            "images": p.get("images", []),
+                        }
+                    )
+
+                # Pagination Check
+                pagination = data.get("serpapi_pagination", {})
+                if not pagination.get("next"):
+                    break
+
+                offset += 20
+                page_count += 1
 
             except Exception as e:
                 logger.error(f"Search Error: {e}")
@@ -590,7 +733,7 @@ class SerpApiClient:
             "currency": currency,
             "gl": "us",
             "hl": "en",
-            "api_key": self.api_key,
+            "api_key": await self.acquire_key(),
         }
         if serp_api_id:
             if str(serp_api_id).isdigit():
@@ -605,29 +748,31 @@ class SerpApiClient:
         elif currency == "EUR":
             params["gl"] = "fr"
         try:
-            async with httpx.AsyncClient(timeout=30.0) as client:
-                response = await client.get(SERPAPI_BASE_URL, params=params)
-
-                # Robust Rotation Loop: Continue trying other keys until success or exhaustion
-                is_err, is_perm = self._is_quota_error(response)
-                while is_err:
-                    logger.warning(
-                        f"Key {self._key_manager.current_key_index} encountered {'PERMANENT' if is_perm else 'TEMPORARY'} limit. Rotating..."
+            client = get_http_client()
+            response = await client.get(SERPAPI_BASE_URL, params=params)
+
+            # Robust Rotation Loop: Continue trying other keys until success or exhaustion
+            is_err, is_perm = self._is_quota_error(response)
+            while is_err:
+                logger.warning(
+                    f"Key {self._key_manager.current_key_index} encountered {'PERMANENT' if is_perm else 'TEMPORARY'} limit. Rotating..."
+                )
+                if self._key_manager.rotate_key(
+                    is_permanent=is_perm, key=params["api_key"]
+                ):
+                    params["api_key"] = await self.acquire_key()
+                    response = await client.get(SERPAPI_BASE_URL, params=params)
+                    is_err, is_perm = self._is_quota_error(response)
+                else:
+                    logger.critical(
+                        "All SerpApi keys exhausted for fetch_hotel_price"
                     )
-                    if self._key_manager.rotate_key(is_permanent=is_perm):
-                        params["api_key"] = self.api_key
-                        response = await client.get(SERPAPI_BASE_URL, params=params)
-                        is_err, is_perm = self._is_quota_error(response)
-                    else:
-                        logger.critical(
-                            "All SerpApi keys exhausted for fetch_hotel_price"
-                        )
-                        return {"error": "quota_exhausted", "status": "error"}
+                    return {"error": "quota_exhausted", "status": "error"}
 
-                response.raise_for_status()
-                return self._parse_hotel_result(
-                    response.json(), hotel_name, currency, serp_api_id
-                )
+            response.raise_for_status()
+            return self._parse_hotel_result(
+                response.json(), hotel_name, currency, serp_api_id
+            )
         except Exception as e:
             logger.error(f"Error fetching {hotel_name}: {e}")
             return None
@@ -2,6 +2,7 @@ from datetime import datetime, timezone
 from typing import Dict, Any, Tuple
 
 import time
+from backend.utils.db import execute_async
 
 # Fallback Configuration (Used if DB table is missing or unreachable)
 DEFAULT_TIERS = {
@@ -10,24 +11,28 @@ DEFAULT_TIERS = {
         "ui_comparison_limit": 15,
         "can_scan_hourly": True,
         "history_days": 9999,
+        "grid_days_limit": 7,
     },
     "starter": {
         "hotel_limit": 20,
         "ui_comparison_limit": 5,
         "can_scan_hourly": False,
         "history_days": 30,
+        "grid_days_limit": 1,
     },
     "pro": {
         "hotel_limit": 100,
         "ui_comparison_limit": 10,
         "can_scan_hourly": True,
         "history_days": 365,
+        "grid_days_limit": 14,
     },
     "enterprise": {
         "hotel_limit": 9999,
         "ui_comparison_limit": 15,
         "can_scan_hourly": True,
         "history_days": 9999,
+        "grid_days_limit": 30,
     },
 }
 
@@ -56,7 +61,7 @@ class SubscriptionService:
         try:
             # Attempt to fetch from dynamic membership_plans table
             # Admin can update this any time via Supabase dashboard or Admin UI
-            res = db.table("membership_plans").select("*").execute()
+            res = await execute_async(db.table("membership_plans").select("*"))
             if res.data:
                 new_cache = {t["name"].lower(): t for t in res.data}
                 _tier_cache = new_cache
@@ -113,12 +118,11 @@ class SubscriptionService:
         limit = access["limits"].get("hotel_limit", 5)
 
         # Count current usage (not soft-deleted)
-        count_res = (
+        count_res = await execute_async(
             db.table("hotels")
             .select("id", count="exact")
             .eq("user_id", user_id)
             .is_("deleted_at", "null")
-            .execute()
         )
         current_count = count_res.count or 0
 
@@ -129,3 +133,19 @@ class SubscriptionService:
             )
 
         return True, "OK"
+
+    @staticmethod
+    def grid_days_limit(access: Dict[str, Any]) -> int:
+        """
+        Check-in dates a manual date grid scan may cover (each hotel x date cell
+        can cost one SerpApi credit). Plans from membership_plans without a
+        grid_days_limit use the DEFAULT_TIERS value for their tier; 1 means no grid.
+        """
+        limit = (access.get("limits") or {}).get("grid_days_limit")
+        if limit is None:
+            tier = DEFAULT_TIERS.get(access.get("tier") or "", {})
+            limit = tier.get("grid_days_limit", 1)
+        try:
+            return max(1, int(limit))
+        except (TypeError, ValueError):
+            return 1
@@ -0,0 +1,165 @@
+"""
+Reasoning Trace Sink
+Single, append-only writer for `scan_sessions.reasoning_trace`, shared by the
+Scraper, Analyst and Notifier agents.
+
+EXPLANATION:
+Each agent used to read the whole trace, extend it in Python and write the whole
+array back. The analyst did this once per hotel (O(n^2) bytes per scan), and two
+agents flushing at the same time silently dropped each other's entries.
+
+Agents now hand entries to this sink, which buffers them per session and appends
+them server-side with the `append_reasoning_trace` RPC (migration 031) - one
+atomic `reasoning_trace || entries` UPDATE per batch. Only the new entries travel
+over the wire and concurrent appends serialize on the row lock, so nothing is lost.
+
+A buffer is flushed when it reaches TRACE_FLUSH_BATCH entries, when its oldest
+entry is older than TRACE_FLUSH_INTERVAL_S (so the ScanSessionModal keeps updating
+live), or explicitly at the end of each agent stage.
+
+TUNING (environment variables):
+    TRACE_FLUSH_BATCH        Entries per automatic flush (default 25)
+    TRACE_FLUSH_INTERVAL_S   Max age of a buffered entry before flushing (default 2)
+"""
+
+import asyncio
+import os
+import time
+import weakref
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Union
+
+from backend.utils.db import execute_async
+from backend.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+def _env_number(name: str, default: float) -> float:
+    try:
+        return float(os.getenv(name, default))
+    except (TypeError, ValueError):
+        return default
+
+
+class ReasoningTraceSink:
+    def __init__(
+        self,
+        flush_batch: Optional[int] = None,
+        flush_interval: Optional[float] = None,
+    ):
+        self.flush_batch = int(flush_batch or _env_number("TRACE_FLUSH_BATCH", 25))
+        self.flush_interval = (
+            flush_interval
+            if flush_interval is not None
+            else _env_number("TRACE_FLUSH_INTERVAL_S", 2.0)
+        )
+        self._buffers: Dict[str, List[Any]] = {}
+        self._first_buffered_at: Dict[str, float] = {}
+        self._db: Dict[str, Any] = {}
+        # Flushes for one session run one at a time so batches land in order.
+        # asyncio.Lock is loop-bound, and the scheduler calls asyncio.run()
+        # repeatedly, so locks are kept per loop.
+        self._locks: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[str, asyncio.Lock]]" = (
+            weakref.WeakKeyDictionary()
+        )
+        self._rpc_available = True
+        self.stats = {"entries": 0, "flushes": 0, "rpc_calls": 0, "fallback_writes": 0}
+
+    def _lock(self, sid: str) -> asyncio.Lock:
+        loop = asyncio.get_running_loop()
+        locks = self._locks.setdefault(loop, {})
+        if sid not in locks:
+            locks[sid] = asyncio.Lock()
+        return locks[sid]
+
+    def add(self, db, session_id: Any, entries: Union[Any, List[Any]]) -> bool:
+        """
+        Buffer one entry (or a list). Returns True when the buffer is due for a
+        flush; async callers should use `append`, which flushes for them.
+        """
+        if not session_id:
+            return False
+        sid = str(session_id)
+        batch = entries if isinstance(entries, list) else [entries]
+        if not batch:
+            return False
+        self._db[sid] = db
+        self._buffers.setdefault(sid, []).extend(batch)
+        self._first_buffered_at.setdefault(sid, time.monotonic())
+        self.stats["entries"] += len(batch)
+        return self._due(sid)
+
+    def _due(self, sid: str) -> bool:
+        buffered = self._buffers.get(sid)
+        if not buffered:
+            return False
+        age = time.monotonic() - self._first_buffered_at.get(sid, time.monotonic())
+        return len(buffered) >= self.flush_batch or age >= self.flush_interval
+
+    async def append(
+        self, db, session_id: Any, entries: Union[Any, List[Any]], flush: bool = False
+    ) -> None:
+        """Buffer entries and flush if the batch/interval threshold is reached."""
+        if self.add(db, session_id, entries) or (flush and session_id):
+            await self.flush(session_id)
+
+    def pending(self, session_id: Any) -> int:
+        return len(self._buffers.get(str(session_id), []))
+
+    async def flush(self, session_id: Any) -> bool:
+        """Append everything buffered for a session in one server-side call."""
+        if not session_id:
+            return True
+        sid = str(session_id)
+        async with self._lock(sid):
+            batch = self._buffers.pop(sid, [])
+            self._first_buffered_at.pop(sid, None)
+            db = self._db.get(sid)
+            if not batch or db is None:
+                return True
+            try:
+                await self._write(db, sid, batch)
+                self.stats["flushes"] += 1
+                if sid not in self._buffers:
+                    self._db.pop(sid, None)
+                return True
+            except Exception as e:
+                # Put the batch back in front so a later flush retries it in order
+                self._buffers[sid] = batch + self._buffers.get(sid, [])
+                self._first_buffered_at.setdefault(sid, time.monotonic())
+                logger.warning(f"Reasoning trace flush failed for {sid}: {e}")
+                return False
+
+    async def _write(self, db, sid: str, batch: List[Any]) -> None:
+        if self._rpc_available:
+            try:
+                await execute_async(
+                    db.rpc(
+                        "append_reasoning_trace",
+                        {"p_session_id": sid, "p_entries": batch},
+                    )
+                )
+                self.stats["rpc_calls"] += 1
+                return
+            except Exception as e:
+                if "append_reasoning_trace" not in str(e) and "PGRST202" not in str(e):
+                    raise
+                # RPC not deployed (migration 031 pending) - fall back for this process
+                logger.warning("append_reasoning_trace RPC missing; using read-modify-write")
+                self._rpc_available = False
+
+        res = await execute_async(
+            db.table("scan_sessions").select("reasoning_trace").eq("id", sid)
+        )
+        trace = (res.data[0].get("reasoning_trace") or []) if res.data else []
+        trace.extend(batch)
+        await execute_async(
+            db.table("scan_sessions")
+            .update({"reasoning_trace": trace, "updated_at": datetime.now().isoformat()})
+            .eq("id", sid)
+        )
+        self.stats["fallback_writes"] += 1
+
+
+trace_sink = ReasoningTraceSink()
@@ -0,0 +1,121 @@
+"""
+Bulk Write Helpers
+Collapses per-row `hotels` updates and `query_logs` inserts into a handful of
+round trips, while still reporting which individual rows failed.
+
+EXPLANATION:
+PostgREST has no "update many rows with different values" verb, and a bulk
+`upsert` on `hotels` would have to carry every NOT NULL column (name, user_id...)
+because Postgres validates the INSERT tuple before resolving the conflict. So
+hotel metadata patches go through the `bulk_update_hotels(p_rows jsonb)` RPC
+(migration 030), which applies each patch in its own sub-transaction and returns
+one (id, ok, error) row per patch.
+
+If the RPC is not deployed yet (PGRST202 / missing function) it is switched off
+for the process and every later call goes straight to the old per-row updates,
+so the analyst keeps working against an un-migrated database without paying a
+failed RPC round trip per chunk. Any other RPC error falls back for that chunk
+only.
+
+`query_logs` rows are plain inserts: one chunked insert, and only when a chunk is
+rejected do we retry its rows individually to isolate the bad ones.
+
+TUNING (environment variables):
+    BULK_WRITE_CHUNK_SIZE   Rows per insert / RPC call (default 500)
+"""
+
+import os
+from typing import Any, Dict, List
+
+from backend.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+RPC_NAME = "bulk_update_hotels"
+
+# Flipped off for the process when migration 030 is not deployed
+_rpc_available = {RPC_NAME: True}
+
+
+def _chunk_size() -> int:
+    try:
+        return max(1, int(os.getenv("BULK_WRITE_CHUNK_SIZE", "500")))
+    except ValueError:
+        return 500
+
+
+def _chunks(rows: List[Any], size: int):
+    for i in range(0, len(rows), size):
+        yield rows[i : i + size]
+
+
+def bulk_update_hotels(
+    db, patches: Dict[str, Dict[str, Any]]
+) -> List[Dict[str, Any]]:
+    """
+    Apply `{hotel_id: {column: value}}` patches in batched RPC calls.
+
+    Returns one `{"table", "id", "error"}` entry per row that failed.
+    """
+    if not patches:
+        return []
+
+    items = [{"id": str(hid), "patch": patch} for hid, patch in patches.items()]
+    failures: List[Dict[str, Any]] = []
+    for chunk in _chunks(items, _chunk_size()):
+        if not _rpc_available[RPC_NAME]:
+            failures.extend(_update_rows_individually(db, chunk))
+            continue
+        try:
+            res = db.rpc(RPC_NAME, {"p_rows": chunk}).execute()
+        except Exception as e:
+            if RPC_NAME in str(e) or "PGRST202" in str(e):
+                logger.warning(f"{RPC_NAME} RPC missing; updating hotels row by row")
+                _rpc_available[RPC_NAME] = False
+            else:
+                logger.warning(f"{RPC_NAME} RPC failed, updating this chunk row by row: {e}")
+            failures.extend(_update_rows_individually(db, chunk))
+            continue
+
+        returned = {str(r.get("id")): r for r in res.data or []}
+        for item in chunk:
+            row = returned.get(item["id"])
+            if row is None:
+                failures.append({"table": "hotels", "id": item["id"], "error": "not found"})
+            elif not row.get("ok"):
+                failures.append(
+                    {"table": "hotels", "id": item["id"], "error": row.get("error") or "unknown"}
+                )
+    return failures
+
+
+def _update_rows_individually(db, items: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    failures = []
+    for item in items:
+        try:
+            db.table("hotels").update(item["patch"]).eq("id", item["id"]).execute()
+        except Exception as e:
+            failures.append({"table": "hotels", "id": item["id"], "error": str(e)})
+    return failures
+
+
+def bulk_insert(db, table: str, rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Insert rows in chunks; a rejected chunk is retried row by row so one bad
+    row does not drop its neighbours. Returns the per-row failures.
+    """
+    failures: List[Dict[str, Any]] = []
+    for chunk in _chunks(rows, _chunk_size()):
+        try:
+            db.table(table).insert(chunk).execute()
+            continue
+        except Exception as e:
+            logger.warning(f"Bulk insert into {table} rejected ({len(chunk)} rows): {e}")
+        for index, row in enumerate(chunk):
+            try:
+                db.table(table).insert(row).execute()
+            except Exception as e:
+                failures.append(
+                    {"table": table, "id": row.get("id") or row.get("hotel_name") or index, "error": str(e)}
+                )
+    return failures
@@ -1,19 +1,147 @@
 """
 Shared database utilities and dependencies.
 Provides the Supabase client and consistent auth helpers.
+
+ASYNC ACCESS:
+supabase-py's `.execute()` is synchronous. Called from an `async def` it blocks
+the event loop for the whole round trip, stalling every other request on the
+worker. Async code paths go through `execute_async(query)` / `run_db(fn, ...)`,
+which run the blocking call on a bounded, process-wide thread pool.
+
+TUNING (environment variables):
+    DB_THREAD_POOL_SIZE   Max concurrent blocking DB calls (default 16)
+    DB_OFFLOAD_ENABLED    "0" runs DB calls inline on the loop (debug/benchmarks)
+
+CLIENT LIFECYCLE:
+One Supabase client per (url, key) is shared by the whole process. It is warmed
+on FastAPI startup (`init_supabase`) and released on shutdown
+(`close_supabase_clients`). Admin code uses `get_service_client()`.
 """
 
+import asyncio
+import functools
 import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional, Tuple, TypeVar
+
 from supabase import create_client, Client
 from dotenv import load_dotenv
 
 load_dotenv()
 
+T = TypeVar("T")
+
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+_stats = {"calls": 0, "inflight": 0, "peak_inflight": 0}
+
+
+def _pool_size() -> int:
+    try:
+        return max(1, int(os.getenv("DB_THREAD_POOL_SIZE", "16")))
+    except ValueError:
+        return 16
+
+
+def _offload_enabled() -> bool:
+    return os.getenv("DB_OFFLOAD_ENABLED", "1") != "0"
+
+
+def get_db_executor() -> ThreadPoolExecutor:
+    """Lazily create the shared pool used for blocking Supabase calls."""
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=_pool_size(), thread_name_prefix="supabase-db"
+                )
+    return _executor
+
+
+def shutdown_db_executor(wait: bool = True) -> None:
+    """Called on app shutdown; a later call to run_db recreates the pool."""
+    global _executor
+    with _executor_lock:
+        executor, _executor = _executor, None
+    if executor is not None:
+        executor.shutdown(wait=wait)
+
+
+async def run_db(fn: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    """
+    Run a blocking DB function (anything that ends in `.execute()`) off the loop.
+
+    EXPLANATION: The pool is bounded so a burst of scans cannot open an unbounded
+    number of threads/sockets; excess calls queue inside the executor while the
+    event loop keeps serving other requests.
+    """
+    call = functools.partial(fn, *args, **kwargs) if (args or kwargs) else fn
+    if not _offload_enabled():
+        return call()
+
+    _stats["calls"] += 1
+    _stats["inflight"] += 1
+    _stats["peak_inflight"] = max(_stats["peak_inflight"], _stats["inflight"])
+    try:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(get_db_executor(), call)
+    finally:
+        _stats["inflight"] -= 1
+
+
+async def execute_async(query: Any) -> Any:
+    """`await execute_async(db.table(...).select(...))` == non-blocking `.execute()`."""
+    return await run_db(query.execute)
+
+
+def get_db_pool_stats() -> Dict[str, Any]:
+    return {**_stats, "max_workers": _pool_size(), "offload": _offload_enabled()}
+
+
+# EXPLANATION: Process-Wide Client Cache
+# `create_client` builds a new PostgREST/auth stack (and a new HTTP session) on
+# every call. get_supabase is the FastAPI dependency on almost every route, so we
+# keep one client per (url, key) for the life of the process: connections stay
+# warm and the per-request cost drops to a dict lookup. The backend never signs a
+# user in on these clients (tokens are only verified via auth.get_user), so the
+# shared auth state never changes.
+_clients: Dict[Tuple[str, str], Client] = {}
+_clients_lock = threading.Lock()
+
+
+def _client_options():
+    try:
+        from supabase import ClientOptions
+
+        return ClientOptions(auto_refresh_token=False, persist_session=False)
+    except Exception:
+        return None
+
+
+def _get_cached_client(url: str, key: str) -> Client:
+    cache_key = (url, key)
+    client = _clients.get(cache_key)
+    if client is None:
+        with _clients_lock:
+            client = _clients.get(cache_key)
+            if client is None:
+                options = _client_options()
+                client = (
+                    create_client(url, key, options=options)
+                    if options is not None
+                    else create_client(url, key)
+                )
+                _clients[cache_key] = client
+    return client
+
 
 def get_supabase() -> Client:
     """
     Dependency to provide a Supabase client.
     Uses SERVICE_ROLE_KEY for backend operations to bypass RLS when necessary.
+    The client is created once per process and reused (see _get_cached_client).
 
     Reminder Note: The SERVICE_ROLE_KEY should NEVER be exposed to the frontend.
     It allows full admin access to the database.
@@ -32,7 +160,42 @@ def get_supabase() -> Client:
                 "WARNING: Supabase credentials missing (URL or Key). Check environment variables."
             )
             return None
-        return create_client(url, key)
+        return _get_cached_client(url, key)
     except Exception as e:
         print(f"CRITICAL: Failed to initialize Supabase client: {e}")
         return None
+
+
+def get_service_client() -> Optional[Client]:
+    """
+    Cached service-role client for admin-only operations (auth.admin.*, RLS bypass).
+    Unlike get_supabase there is no ANON fallback: returns None if the key is missing.
+    """
+    url = os.getenv("NEXT_PUBLIC_SUPABASE_URL")
+    key = os.getenv("SUPABASE_SERVICE_ROLE_KEY")
+    if not url or not key:
+        return None
+    try:
+        return _get_cached_client(url, key)
+    except Exception as e:
+        print(f"CRITICAL: Failed to initialize Supabase service client: {e}")
+        return None
+
+
+def init_supabase() -> Optional[Client]:
+    """Warm the shared client on app startup so the first request doesn't pay for it."""
+    return get_supabase()
+
+
+def close_supabase_clients() -> None:
+    """Release cached clients and their HTTP sessions (app shutdown)."""
+    with _clients_lock:
+        clients = list(_clients.values())
+        _clients.clear()
+    for client in clients:
+        try:
+            postgrest = getattr(client, "_postgrest", None)
+            if postgrest is not None:
+                postgrest.session.close()
+        except Exception:
+            pass
@@ -1,7 +1,8 @@
 from datetime import date
-from typing import Optional
+from typing import Any, Dict, Optional
 from uuid import UUID
 from supabase import Client
+from backend.utils.db import execute_async
 
 # Exchange rates to USD (approximate, update periodically or use API)
 EXCHANGE_RATES_TO_USD = {
@@ -24,6 +25,35 @@ def convert_currency(amount: float, from_currency: str, to_currency: str) -> flo
     return round(usd_amount / target_rate, 2)
 
 
+def build_query_log(
+    user_id: Optional[UUID],
+    hotel_name: str,
+    location: Optional[str],
+    action_type: str,
+    status: str = "success",
+    price: Optional[float] = None,
+    currency: Optional[str] = None,
+    vendor: Optional[str] = None,
+    session_id: Optional[UUID] = None,
+    check_in: Optional[date] = None,
+    adults: Optional[int] = 2,
+) -> Dict[str, Any]:
+    """Build a query_logs row (shared by log_query and batched writers)."""
+    return {
+        "user_id": str(user_id) if user_id else None,
+        "hotel_name": hotel_name.title().strip(),
+        "location": location.title().strip() if location else None,
+        "action_type": action_type,
+        "status": status,
+        "price": price,
+        "currency": currency,
+        "vendor": vendor,
+        "session_id": str(session_id) if session_id else None,
+        "check_in_date": check_in.isoformat() if check_in else None,
+        "adults": adults,
+    }
+
+
 async def log_query(
     db: Client,
     user_id: Optional[UUID],
@@ -40,20 +70,20 @@ async def log_query(
 ):
     """Log a search or monitor query for future reporting/analysis."""
     try:
-        log_data = {
-            "user_id": str(user_id) if user_id else None,
-            "hotel_name": hotel_name.title().strip(),
-            "location": location.title().strip() if location else None,
-            "action_type": action_type,
-            "status": status,
-            "price": price,
-            "currency": currency,
-            "vendor": vendor,
-            "session_id": str(session_id) if session_id else None,
-            "check_in_date": check_in.isoformat() if check_in else None,
-            "adults": adults,
-        }
-
-        db.table("query_logs").insert(log_data).execute()
+        log_data = build_query_log(
+            user_id,
+            hotel_name,
+            location,
+            action_type,
+            status=status,
+            price=price,
+            currency=currency,
+            vendor=vendor,
+            session_id=session_id,
+            check_in=check_in,
+            adults=adults,
+        )
+
+        await execute_async(db.table("query_logs").insert(log_data))
     except Exception as e:
         print(f"Error logging query: {e}")
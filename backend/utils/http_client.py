@@ -0,0 +1,117 @@
+"""
+Shared HTTP Client
+==================
+Provides a single, long-lived `httpx.AsyncClient` for all outbound SerpApi traffic.
+
+WHY: Every SerpApi call used to open its own `httpx.AsyncClient`, paying a fresh
+TCP + TLS handshake per hotel. A 200-hotel scan meant 200+ handshakes against the
+same host. A pooled client keeps connections alive between requests so a scan
+reuses a handful of sockets instead.
+
+HOW: One client per running event loop (FastAPI worker, scheduler `asyncio.run`,
+CLI scripts). The client is created lazily on first use and closed on FastAPI
+shutdown via `close_http_client()`.
+
+TUNING (environment variables):
+    HTTP_MAX_CONNECTIONS      Max open sockets in the pool (default 20)
+    HTTP_MAX_KEEPALIVE        Idle sockets kept warm (default 10)
+    HTTP_KEEPALIVE_EXPIRY     Seconds an idle socket stays open (default 30)
+    HTTP_ENABLE_HTTP2         "0" to force HTTP/1.1 (default "1")
+"""
+
+import asyncio
+import os
+import weakref
+from typing import Optional
+
+import httpx
+
+from backend.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+DEFAULT_TIMEOUT = 30.0
+
+# EXPLANATION: Per-Loop Registry
+# httpx connections are bound to the event loop that opened them. The scheduler
+# and CLI scripts call asyncio.run() repeatedly, so a single global client would
+# be reused on a dead loop. We keep one client per loop instead; the weak map
+# lets finished loops (and their clients) be garbage collected.
+_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, httpx.AsyncClient]" = (
+    weakref.WeakKeyDictionary()
+)
+
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return int(os.getenv(name, default))
+    except (TypeError, ValueError):
+        return default
+
+
+def _env_float(name: str, default: float) -> float:
+    try:
+        return float(os.getenv(name, default))
+    except (TypeError, ValueError):
+        return default
+
+
+def _http2_available() -> bool:
+    """HTTP/2 needs the optional `h2` package (installed via httpx[http2])."""
+    if os.getenv("HTTP_ENABLE_HTTP2", "1") == "0":
+        return False
+    try:
+        import h2  # noqa: F401
+
+        return True
+    except ImportError:
+        return False
+
+
+def get_pool_limits() -> httpx.Limits:
+    """Connection pool limits, read from the environment on each client build."""
+    return httpx.Limits(
+        max_connections=_env_int("HTTP_MAX_CONNECTIONS", 20),
+        max_keepalive_connections=_env_int("HTTP_MAX_KEEPALIVE", 10),
+        keepalive_expiry=_env_float("HTTP_KEEPALIVE_EXPIRY", 30.0),
+    )
+
+
+def build_http_client(
+    transport: Optional[httpx.AsyncBaseTransport] = None,
+) -> httpx.AsyncClient:
+    """Create a pooled client. Exposed separately so benchmarks/tests can inject a transport."""
+    return httpx.AsyncClient(
+        http2=_http2_available() if transport is None else False,
+        limits=get_pool_limits(),
+        timeout=httpx.Timeout(DEFAULT_TIMEOUT),
+        transport=transport,
+    )
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """
+    Returns the process-wide pooled client for the current event loop.
+    Must be called from inside a running loop.
+    """
+    loop = asyncio.get_running_loop()
+    client = _clients.get(loop)
+    if client is None or client.is_closed:
+        client = build_http_client()
+        _clients[loop] = client
+        logger.info(
+            f"Created pooled HTTP client (http2={_http2_available()}, limits={get_pool_limits()})"
+        )
+    return client
+
+
+async def close_http_client():
+    """Close the client for the current loop. Called from the FastAPI lifespan."""
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        return
+    client = _clients.pop(loop, None)
+    if client is not None and not client.is_closed:
+        await client.aclose()
+        logger.info("Closed pooled HTTP client")
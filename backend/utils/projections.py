@@ -0,0 +1,233 @@
+"""
+Column Projections
+==================
+Named column lists for the hot `price_logs` and `hotels` reads, so each code path
+only transfers (and JSON-decodes) the fields it actually reads.
+
+WHY: `select("*")` on `hotels` ships two 768-dim vectors (sentiment_embedding,
+pricing_dna) plus reviews/images jsonb per hotel, and on `price_logs` it ships
+metadata and every room/offer array even where a path only needs price and date.
+The Global Pulse lookup, market analysis, dashboard, manual scan trigger and the
+sentiment embedding refresh all did that on every call.
+
+HOW:
+- A `Projection` names the table, the columns a use case always reads, and its
+  `heavy` columns: large jsonb that is only selected on request
+  (`include=`) or fetched later for just the rows that need it (`hydrate`).
+- `select_projected` / `select_projected_async` run `build(db.table(...).select(cols))`.
+  Column sets differ between environments (some never ran every migration), so
+  if PostgREST rejects a listed column the query is retried with "*" and that
+  projection stays on "*" for the process.
+
+TUNING (environment variables):
+    QUERY_PROJECTIONS_ENABLED   "0" makes every projection select "*" (default 1)
+"""
+
+import os
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterable, List, Set, Tuple
+
+from backend.utils.db import run_db
+from backend.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+QUERY_PROJECTIONS_ENABLED = os.getenv("QUERY_PROJECTIONS_ENABLED", "1") != "0"
+
+# Projections PostgREST rejected in this environment (unknown column)
+_select_all: Set[str] = set()
+
+
+@dataclass(frozen=True)
+class Projection:
+    name: str
+    table: str
+    columns: Tuple[str, ...]
+    heavy: Tuple[str, ...] = ()
+
+    def columns_for(
+        self, include: Iterable[str] = (), exclude: Iterable[str] = ()
+    ) -> List[str]:
+        """Base columns plus the requested heavy ones, minus `exclude`."""
+        wanted = set(include)
+        unknown = wanted - set(self.heavy) - set(self.columns)
+        if unknown:
+            raise ValueError(f"{self.name}: unknown heavy columns {sorted(unknown)}")
+        skip = set(exclude)
+        cols = [c for c in self.columns if c not in skip]
+        cols += [c for c in self.heavy if c in wanted and c not in skip]
+        return cols
+
+    def select(self, include: Iterable[str] = (), exclude: Iterable[str] = ()) -> str:
+        if not QUERY_PROJECTIONS_ENABLED or self.name in _select_all:
+            return "*"
+        return ", ".join(self.columns_for(include, exclude))
+
+
+# --- price_logs ---
+
+# Global Pulse (ScraperAgent._check_global_cache): rebuilds a scraper result
+PRICE_LOG_PULSE = Projection(
+    "price_log_pulse",
+    "price_logs",
+    (
+        "serp_api_id", "check_in_date", "recorded_at", "price", "currency",
+        "vendor", "search_rank", "room_types", "parity_offers", "offers",
+    ),
+)
+
+# Market analysis / incremental engine (get_market_intelligence_data)
+PRICE_LOG_ANALYSIS = Projection(
+    "price_log_analysis",
+    "price_logs",
+    (
+        "id", "hotel_id", "serp_api_id", "check_in_date", "recorded_at", "price",
+        "currency", "vendor", "is_estimated", "room_types", "parity_offers", "offers",
+    ),
+)
+
+# Dashboard hotel cards: price history for every log, offers and rooms only
+# for each hotel's current log (hydrated)
+PRICE_LOG_CARD = Projection(
+    "price_log_card",
+    "price_logs",
+    ("id", "hotel_id", "price", "currency", "recorded_at", "vendor", "check_in_date"),
+    heavy=("parity_offers", "room_types"),
+)
+
+# Dashboard scan history list
+PRICE_LOG_HISTORY = Projection(
+    "price_log_history",
+    "price_logs",
+    (
+        "id", "hotel_id", "price", "currency", "recorded_at", "vendor",
+        "check_in_date", "source", "is_estimated", "session_id",
+    ),
+)
+
+# AnalystAgent history window (PriceHistoryIndex): light columns for every log
+# in the window; offers, rooms and metadata only for each hotel's newest logs
+# (hydrated)
+PRICE_LOG_ANALYST = Projection(
+    "price_log_analyst",
+    "price_logs",
+    ("id", "hotel_id", "price", "currency", "recorded_at", "check_in_date", "vendor"),
+    heavy=("parity_offers", "room_types", "metadata"),
+)
+
+# --- hotels ---
+
+# Dashboard: everything the cards and the frontend `Hotel` type read; never the
+# embedding vectors or the raw reviews
+HOTEL_DASHBOARD = Projection(
+    "hotel_dashboard",
+    "hotels",
+    (
+        "id", "user_id", "name", "is_target_hotel", "location", "serp_api_id",
+        "property_token", "rating", "review_count", "stars", "image_url",
+        "latitude", "longitude", "preferred_currency", "fixed_check_in",
+        "fixed_check_out", "default_adults", "amenities", "images",
+        "sentiment_breakdown", "guest_mentions", "pricing_dna_text",
+        "created_at", "updated_at",
+    ),
+)
+
+# Market analysis: scoring, sentiment, ordering and the hotels-table seed
+HOTEL_ANALYSIS = Projection(
+    "hotel_analysis",
+    "hotels",
+    (
+        "id", "user_id", "name", "is_target_hotel", "serp_api_id", "rating",
+        "review_count", "current_price", "preferred_currency", "updated_at",
+        "sentiment_breakdown", "guest_mentions", "pricing_dna_text",
+    ),
+)
+
+# Manual scan trigger: what the scraper, scheduler, date grid and room catalog
+# read from a hotel (these rows are also stored on the scan queue)
+HOTEL_SCAN = Projection(
+    "hotel_scan",
+    "hotels",
+    (
+        "id", "user_id", "name", "is_target_hotel", "location", "serp_api_id",
+        "property_token", "stars", "preferred_currency", "fixed_check_in",
+        "fixed_check_out", "default_adults",
+    ),
+)
+
+# Sentiment embedding profile text
+HOTEL_SENTIMENT_PROFILE = Projection(
+    "hotel_sentiment_profile",
+    "hotels",
+    ("id", "name", "stars", "location"),
+    heavy=("sentiment_breakdown", "reviews"),
+)
+
+
+def _is_unknown_column(error: Exception) -> bool:
+    text = str(error)
+    return "42703" in text or ("column" in text and "does not exist" in text)
+
+
+def select_projected(
+    db,
+    projection: Projection,
+    build: Callable[[Any], Any],
+    include: Iterable[str] = (),
+    exclude: Iterable[str] = (),
+) -> Any:
+    """
+    `build(db.table(table).select(columns)).execute()`; `build` adds filters,
+    order and limit. Retried once with "*" if a projected column is unknown.
+    """
+    include, exclude = tuple(include), tuple(exclude)
+    columns = projection.select(include, exclude)
+    try:
+        return build(db.table(projection.table).select(columns)).execute()
+    except Exception as e:
+        if columns == "*" or not _is_unknown_column(e):
+            raise
+        # A filter column can be the unknown one too: only a working "*" retry
+        # pins the projection to "*"
+        result = build(db.table(projection.table).select("*")).execute()
+        logger.warning(f"Projection {projection.name} rejected ({e}); selecting *")
+        _select_all.add(projection.name)
+        return result
+
+
+async def select_projected_async(
+    db,
+    projection: Projection,
+    build: Callable[[Any], Any],
+    include: Iterable[str] = (),
+    exclude: Iterable[str] = (),
+) -> Any:
+    """Non-blocking `select_projected` (runs on the shared DB pool)."""
+    return await run_db(select_projected, db, projection, build, include, exclude)
+
+
+async def hydrate(
+    db,
+    projection: Projection,
+    rows: List[Dict[str, Any]],
+    columns: Iterable[str],
+    key: str = "id",
+) -> List[Dict[str, Any]]:
+    """
+    Fill heavy `columns` into `rows` (in place) with one `in_(key, ...)` query,
+    for the rows that do not have them yet. Returns `rows`.
+    """
+    columns = [c for c in columns if c in projection.heavy]
+    missing = [r for r in rows if r.get(key) is not None and any(c not in r for c in columns)]
+    if not columns or not missing:
+        return rows
+
+    ids = list(dict.fromkeys(str(r[key]) for r in missing))
+    hydration = Projection(f"{projection.name}:hydrate", projection.table, (key, *columns))
+    res = await select_projected_async(db, hydration, lambda q: q.in_(key, ids))
+    by_key = {str(r.get(key)): r for r in res.data or []}
+    for row in missing:
+        found = by_key.get(str(row[key]))
+        for c in columns:
+            row.setdefault(c, found.get(c) if found else None)
+    return rows
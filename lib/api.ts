@@ -149,6 +149,7 @@ class ApiClient {
       check_out?: string;
       adults?: number;
       currency?: string;
+      grid_days?: number;
     },
   ): Promise<MonitorResult> {
     return this.fetch<MonitorResult>(`/api/monitor/${userId}`, {
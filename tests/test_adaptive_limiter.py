@@ -0,0 +1,74 @@
+import asyncio
+import unittest
+
+from backend.services.adaptive_limiter import AdaptiveConcurrencyLimiter
+
+
+class FakeKeyManager:
+    def __init__(self, active_keys=1):
+        self.active_keys = active_keys
+        self.rate_limit_events = 0
+
+
+class TestAdaptiveConcurrencyLimiter(unittest.IsolatedAsyncioTestCase):
+    async def test_additive_increase_on_healthy_calls(self):
+        limiter = AdaptiveConcurrencyLimiter(FakeKeyManager(active_keys=2), initial=4, per_key=10)
+        for _ in range(20):
+            limiter.observe(0.5, ok=True)
+        self.assertGreater(limiter.limit, 4)
+        self.assertLessEqual(limiter.limit, 20)
+
+    async def test_ceiling_scales_with_active_keys(self):
+        km = FakeKeyManager(active_keys=1)
+        limiter = AdaptiveConcurrencyLimiter(km, initial=50, per_key=5, max_limit=100)
+        self.assertEqual(limiter.limit, 5)
+        km.active_keys = 4
+        self.assertEqual(limiter.ceiling, 20)
+        km.active_keys = 0  # all keys cooling down -> still allow a trickle
+        self.assertEqual(limiter.ceiling, 5)
+
+    async def test_multiplicative_decrease_on_rate_limit(self):
+        km = FakeKeyManager(active_keys=4)
+        limiter = AdaptiveConcurrencyLimiter(km, initial=16, per_key=10)
+        km.rate_limit_events += 1  # rotate_key(is_permanent=False) happened
+        limiter.observe(0.5, ok=True)
+        self.assertEqual(limiter.limit, 8)
+        self.assertEqual(limiter.rate_limit_backoffs, 1)
+
+    async def test_burst_of_failures_backs_off_once(self):
+        limiter = AdaptiveConcurrencyLimiter(FakeKeyManager(active_keys=4), initial=16, per_key=10)
+        for _ in range(5):
+            limiter.observe(1.0, ok=False)
+        self.assertEqual(limiter.limit, 8)
+        self.assertEqual(limiter.decreases, 1)
+
+    async def test_slow_responses_back_off(self):
+        limiter = AdaptiveConcurrencyLimiter(
+            FakeKeyManager(active_keys=2), initial=10, per_key=10, target_latency=2.0
+        )
+        limiter.observe(5.0, ok=True)
+        self.assertEqual(limiter.limit, 5)
+
+    async def test_timeout_tracks_latency(self):
+        limiter = AdaptiveConcurrencyLimiter(
+            FakeKeyManager(), timeout_floor=10.0, timeout_ceiling=60.0
+        )
+        self.assertEqual(limiter.timeout, 60.0)
+        for _ in range(30):
+            limiter.observe(4.0, ok=True)
+        self.assertAlmostEqual(limiter.timeout, 16.0, delta=0.5)
+
+    async def test_inflight_never_exceeds_limit(self):
+        limiter = AdaptiveConcurrencyLimiter(FakeKeyManager(active_keys=1), initial=3, per_key=3)
+
+        async def work():
+            async with limiter.slot():
+                await asyncio.sleep(0.01)
+
+        await asyncio.gather(*(work() for _ in range(20)))
+        self.assertEqual(limiter.peak_inflight, 3)
+        self.assertEqual(limiter.get_stats()["inflight"], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
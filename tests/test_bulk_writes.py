@@ -0,0 +1,159 @@
+import unittest
+from unittest.mock import patch
+
+from backend.agents.analyst_agent import AnalystAgent
+from backend.scripts.fake_supabase import FakeSupabase
+from backend.services.global_pulse_cache import global_pulse_cache
+from backend.utils import bulk_writes
+from backend.utils.bulk_writes import bulk_insert, bulk_update_hotels
+
+
+def bulk_update_hotels_rpc(client, params):
+    """In-memory twin of migration 030: per-row apply with per-row status."""
+    out = []
+    hotels = {str(h["id"]): h for h in client.tables.get("hotels", [])}
+    for item in params["p_rows"]:
+        hotel = hotels.get(item["id"])
+        if hotel is None:
+            out.append({"id": item["id"], "ok": False, "error": "not found"})
+        elif "bad" in item["patch"]:
+            out.append({"id": item["id"], "ok": False, "error": "invalid input syntax"})
+        else:
+            hotel.update(item["patch"])
+            out.append({"id": item["id"], "ok": True, "error": None})
+    return out
+
+
+class TestBulkWrites(unittest.TestCase):
+    def setUp(self):
+        self.addCleanup(bulk_writes._rpc_available.update, {bulk_writes.RPC_NAME: True})
+
+    def test_rpc_reports_failures_per_row(self):
+        db = FakeSupabase(
+            {"hotels": [{"id": "h1"}, {"id": "h2"}]},
+            rpc_handlers={"bulk_update_hotels": bulk_update_hotels_rpc},
+        )
+        failures = bulk_update_hotels(
+            db, {"h1": {"rating": 4.5}, "h2": {"bad": 1}, "ghost": {"rating": 1}}
+        )
+
+        self.assertEqual(db.query_count, 1)
+        self.assertEqual(db.tables["hotels"][0]["rating"], 4.5)
+        self.assertEqual(
+            sorted((f["id"], f["error"]) for f in failures),
+            [("ghost", "not found"), ("h2", "invalid input syntax")],
+        )
+
+    def test_missing_rpc_is_switched_off_for_the_process(self):
+        db = FakeSupabase({"hotels": [{"id": "h1"}, {"id": "h2"}, {"id": "h3"}]})
+        missing = Exception(
+            "{'code': 'PGRST202', 'message': 'Could not find the function "
+            "public.bulk_update_hotels(p_rows) in the schema cache'}"
+        )
+        with patch.dict("os.environ", {"BULK_WRITE_CHUNK_SIZE": "1"}), patch.object(
+            db, "rpc", side_effect=missing
+        ) as rpc:
+            failures = bulk_update_hotels(
+                db, {h: {"embedding_status": "current"} for h in ("h1", "h2", "h3")}
+            )
+            bulk_update_hotels(db, {"h1": {"rating": 4.0}})
+
+        self.assertEqual(failures, [])
+        self.assertEqual(rpc.call_count, 1)
+        self.assertFalse(bulk_writes._rpc_available[bulk_writes.RPC_NAME])
+        self.assertTrue(all(h["embedding_status"] == "current" for h in db.tables["hotels"]))
+        self.assertEqual(db.tables["hotels"][0]["rating"], 4.0)
+
+    def test_other_rpc_errors_fall_back_per_chunk(self):
+        db = FakeSupabase(
+            {"hotels": [{"id": "h1"}, {"id": "h2"}]},
+            rpc_handlers={"bulk_update_hotels": bulk_update_hotels_rpc},
+        )
+        real_rpc = db.rpc
+        calls = []
+
+        def flaky_rpc(name, params=None):
+            calls.append(name)
+            if len(calls) == 1:
+                raise Exception("canceling statement due to statement timeout")
+            return real_rpc(name, params)
+
+        with patch.dict("os.environ", {"BULK_WRITE_CHUNK_SIZE": "1"}), patch.object(
+            db, "rpc", side_effect=flaky_rpc
+        ):
+            failures = bulk_update_hotels(db, {"h1": {"rating": 4.1}, "h2": {"rating": 4.2}})
+
+        self.assertEqual(failures, [])
+        self.assertEqual(len(calls), 2)
+        self.assertTrue(bulk_writes._rpc_available[bulk_writes.RPC_NAME])
+        self.assertEqual([h["rating"] for h in db.tables["hotels"]], [4.1, 4.2])
+
+    def test_rejected_chunk_isolates_bad_rows(self):
+        db = FakeSupabase()
+        real_table = db.table
+
+        def table(name):
+            query = real_table(name)
+            original = query.insert
+
+            def insert(payload):
+                rows = payload if isinstance(payload, list) else [payload]
+                if any(r.get("price") == "oops" for r in rows):
+                    raise Exception("invalid input syntax for type numeric")
+                return original(payload)
+
+            query.insert = insert
+            return query
+
+        with patch.object(db, "table", side_effect=table):
+            failures = bulk_insert(
+                db, "query_logs", [{"hotel_name": "A", "price": 1}, {"hotel_name": "B", "price": "oops"}]
+            )
+        self.assertEqual([f["id"] for f in failures], ["B"])
+        self.assertEqual([r["hotel_name"] for r in db.tables["query_logs"]], ["A"])
+
+
+class TestAnalystBulkFlush(unittest.IsolatedAsyncioTestCase):
+    async def test_hundred_hotel_scan_makes_a_handful_of_writes(self):
+        global_pulse_cache.clear()
+        count = 100
+        hotels = [{"id": f"h{i}", "sentiment_breakdown": []} for i in range(count)]
+        results = [
+            {
+                "hotel_id": f"h{i}",
+                "hotel_name": f"Hotel {i}",
+                "status": "success",
+                "check_in": "2026-11-01",
+                "price_data": {"price": 1000.0, "currency": "TRY", "offers": [{}] * 5,
+                               "room_types": [{"name": "Std"}], "rating": 4.1,
+                               "reviews_breakdown": [{"name": "Service", "positive": 3, "negative": 1}]},
+            }
+            for i in range(count)
+        ]
+        db = FakeSupabase(
+            {"hotels": hotels, "scan_sessions": [{"id": "s1", "reasoning_trace": []}]},
+            rpc_handlers={"bulk_update_hotels": bulk_update_hotels_rpc},
+        )
+        agent = AnalystAgent(db)
+
+        async def fake_embedding(hotel_id, meta):
+            return True
+
+        with patch.object(agent, "_update_sentiment_embedding", side_effect=fake_embedding):
+            summary = await agent.analyze_results("user-1", results, 2.0, session_id="s1")
+
+        # Reasoning-trace writes to scan_sessions are a separate concern
+        writes = sum(
+            n for op, n in db.queries_by_op.items()
+            if op.endswith((".insert", ".update", ".upsert", ".rpc"))
+            and not op.startswith(("scan_sessions.", "rpc:append_reasoning_trace"))
+        )
+        self.assertLessEqual(writes, 8)
+        self.assertEqual(db.queries_by_op["hotels.update"], 0)
+        self.assertEqual(len(db.tables["query_logs"]), count)
+        self.assertTrue(all(h["embedding_status"] == "current" for h in db.tables["hotels"]))
+        self.assertNotIn("write_failures", summary)
+
+
+if __name__ == "__main__":
+    unittest.main()
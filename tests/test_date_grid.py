@@ -0,0 +1,175 @@
+import asyncio
+import unittest
+import uuid
+from datetime import date, datetime, timedelta, timezone
+from unittest.mock import patch
+
+from backend.agents.scraper_agent import ScraperAgent
+from backend.models.schemas import ScanOptions
+from backend.scripts.fake_supabase import FakeSupabase
+from backend.services import date_grid
+from backend.services.date_grid import cell_key, expand_date_grid
+from backend.services.global_pulse_cache import global_pulse_cache
+from backend.services.monitor_service import trigger_monitor_logic
+from backend.services.scan_checkpoints import plan
+
+TODAY = date(2026, 3, 1)
+
+
+class FakeProvider:
+    def __init__(self):
+        self.calls = []
+
+    def get_provider_name(self):
+        return "Fake"
+
+    async def fetch_price(self, hotel_name, location, check_in, check_out, adults=2, currency="USD", serp_api_id=None):
+        self.calls.append((serp_api_id, check_in.isoformat(), check_out.isoformat()))
+        await asyncio.sleep(0.01)
+        return {"price": 100.0, "currency": currency, "room_types": [{"name": "Standard Room", "price": 100.0}]}
+
+
+class TestExpandDateGrid(unittest.TestCase):
+    def test_one_cell_per_hotel_and_date(self):
+        hotels = [{"id": "a", "serp_api_id": "sa"}, {"id": "b", "serp_api_id": "sb"}]
+        options = ScanOptions(check_in=date(2026, 4, 10), check_out=date(2026, 4, 12), grid_days=3)
+
+        cells, cell_options = expand_date_grid(hotels, options, today=TODAY)
+
+        self.assertEqual(len(cells), 6)
+        # Date-major: the nearest night fills first for every hotel
+        self.assertEqual(
+            [(c["id"], c["fixed_check_in"]) for c in cells[:3]],
+            [("a", "2026-04-10"), ("b", "2026-04-10"), ("a", "2026-04-11")],
+        )
+        # Length of stay comes from the session dates
+        self.assertTrue(all(
+            date.fromisoformat(c["fixed_check_out"]) - date.fromisoformat(c["fixed_check_in"]) == timedelta(days=2)
+            for c in cells
+        ))
+        self.assertEqual([c["grid"]["primary"] for c in cells], [True, True] + [False] * 4)
+        # Cells carry their own dates; the session dates must not override them
+        self.assertIsNone(cell_options.check_in)
+        self.assertIsNone(cell_options.grid_days)
+        self.assertEqual(
+            ScraperAgent._resolve_search_params(cells[-1], cell_options)[:2],
+            (date(2026, 4, 12), date(2026, 4, 14)),
+        )
+        self.assertNotIn("grid", hotels[0])
+
+    def test_defaults_to_tomorrow_and_caps_the_cell_count(self):
+        hotels = [{"id": f"h{i}"} for i in range(10)]
+        with patch.object(date_grid, "SCAN_GRID_MAX_CELLS", 25):
+            cells, _ = expand_date_grid(hotels, ScanOptions(grid_days=30), today=TODAY)
+
+        self.assertEqual(len(cells), 20)
+        self.assertEqual(sorted({c["fixed_check_in"] for c in cells}), ["2026-03-02", "2026-03-03"])
+        self.assertEqual(cells[0]["fixed_check_out"], "2026-03-03")
+
+    def test_checkpoints_are_kept_per_cell(self):
+        cells, _ = expand_date_grid([{"id": "a"}], ScanOptions(grid_days=3), today=TODAY)
+        keys = [cell_key(c["id"], c["grid"]) for c in cells]
+        self.assertEqual(keys, ["a@2026-03-02", "a@2026-03-03", "a@2026-03-04"])
+        self.assertEqual(cell_key("a"), "a")
+
+        now = datetime.now(timezone.utc)
+        checkpoints = {
+            keys[0]: {"fetched_at": now.isoformat(), "result": {"hotel_id": "a", "grid": cells[0]["grid"]}},
+            keys[1]: {"fetched_at": now.isoformat(), "result": {"hotel_id": "a", "grid": cells[1]["grid"]}},
+        }
+        resume = plan(cells, checkpoints, [keys[0]], ttl_s=3600, now=now)
+
+        self.assertEqual(resume.skip, {keys[0]})
+        self.assertEqual([r["grid"]["date"] for r in resume.replay], ["2026-03-03"])
+        # Only the missing date is fetched again
+        self.assertEqual([c["fixed_check_in"] for c in resume.fetch], ["2026-03-04"])
+
+
+class TestGridScan(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        global_pulse_cache.clear()
+        self.addCleanup(global_pulse_cache.clear)
+
+    async def test_fetches_each_cell_once_and_reuses_fresh_pulses(self):
+        tomorrow = date.today() + timedelta(days=1)
+        fresh = {
+            "id": str(uuid.uuid4()),
+            "hotel_id": "other-user-hotel",
+            "serp_api_id": "sa",
+            "check_in_date": (tomorrow + timedelta(days=1)).isoformat(),
+            "price": 95.0,
+            "currency": "TRY",
+            "vendor": "Booking.com",
+            "recorded_at": (datetime.now() - timedelta(minutes=10)).isoformat(),
+        }
+        db = FakeSupabase({"price_logs": [fresh], "query_logs": []})
+        provider = FakeProvider()
+        hotels = [
+            {"id": "a", "name": "A", "serp_api_id": "sa"},
+            {"id": "b", "name": "B", "serp_api_id": "sb"},
+        ]
+        cells, cell_options = expand_date_grid(hotels, ScanOptions(grid_days=3))
+
+        with patch("backend.agents.scraper_agent.ProviderFactory.get_provider", return_value=provider):
+            results = await ScraperAgent(db).run_scan(str(uuid.uuid4()), cells, cell_options)
+
+        # 6 cells, one served by another tenant's fresh scan of the same (property, date)
+        self.assertEqual(len(provider.calls), 5)
+        self.assertNotIn(("sa", fresh["check_in_date"], (tomorrow + timedelta(days=2)).isoformat()), provider.calls)
+        self.assertEqual(len(set(provider.calls)), 5)
+        self.assertEqual(db.queries_by_op.get("price_logs.select"), 1)
+        self.assertEqual(len(results), 6)
+        # Only real provider calls are marked as spending a credit
+        self.assertEqual(sum(r["credit_spent"] for r in results), 5)
+        self.assertEqual(
+            sorted((r["hotel_id"], r["grid"]["date"]) for r in results),
+            sorted((c["id"], c["fixed_check_in"]) for c in cells),
+        )
+
+
+class TestGridCostGate(unittest.IsolatedAsyncioTestCase):
+    def make_db(self, plan_type, role="user"):
+        hotels = [
+            {"id": f"h{i}", "user_id": "u", "name": f"Hotel {i}", "serp_api_id": f"s{i}", "deleted_at": None}
+            for i in range(3)
+        ]
+        return FakeSupabase(
+            {
+                "hotels": hotels,
+                "user_profiles": [{"user_id": "u", "role": role}],
+                "profiles": [{"id": "u", "plan_type": plan_type, "subscription_status": "active"}],
+                "scan_sessions": [],
+            }
+        )
+
+    async def trigger(self, db, grid_days):
+        options = ScanOptions(check_in=date.today() + timedelta(days=2), grid_days=grid_days)
+        result = await trigger_monitor_logic("u", None, options, db, "u", None)
+        session = db.tables["scan_sessions"][0]
+        return result, session, session["job_options"]["options"]["grid_days"]
+
+    async def test_plan_caps_grid_dates_and_session_records_cells(self):
+        result, session, grid_days = await self.trigger(self.make_db("pro"), 90)
+
+        self.assertEqual(grid_days, 14)
+        self.assertEqual(session["hotels_count"], 3)
+        self.assertEqual(session["cells_count"], 42)
+        self.assertEqual(result.errors, ["GRID_DAYS_LIMITED (14)"])
+
+    async def test_starter_plan_scans_a_single_date(self):
+        _, session, grid_days = await self.trigger(self.make_db("starter"), 30)
+
+        self.assertEqual(grid_days, 1)
+        self.assertEqual(session["cells_count"], 3)
+
+    async def test_admin_is_only_capped_by_max_cells(self):
+        with patch.object(date_grid, "SCAN_GRID_MAX_CELLS", 60):
+            result, session, grid_days = await self.trigger(self.make_db("starter", role="admin"), 90)
+
+        self.assertEqual(grid_days, 20)
+        self.assertEqual(session["cells_count"], 60)
+        self.assertEqual(result.errors, [])
+
+
+if __name__ == "__main__":
+    unittest.main()
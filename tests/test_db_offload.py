@@ -0,0 +1,61 @@
+import asyncio
+import threading
+import time
+import unittest
+from unittest.mock import patch
+
+from backend.utils import db as db_utils
+
+
+class BlockingQuery:
+    def __init__(self, delay=0.05):
+        self.delay = delay
+        self.thread = None
+
+    def execute(self):
+        self.thread = threading.current_thread().name
+        time.sleep(self.delay)
+        return "ok"
+
+
+class TestDbOffload(unittest.IsolatedAsyncioTestCase):
+    def tearDown(self):
+        db_utils.shutdown_db_executor()
+
+    async def test_execute_async_does_not_block_the_loop(self):
+        ticks = 0
+
+        async def heartbeat():
+            nonlocal ticks
+            while True:
+                await asyncio.sleep(0.005)
+                ticks += 1
+
+        beat = asyncio.create_task(heartbeat())
+        query = BlockingQuery(delay=0.1)
+        self.assertEqual(await db_utils.execute_async(query), "ok")
+        beat.cancel()
+
+        self.assertGreater(ticks, 5)
+        self.assertTrue(query.thread.startswith("supabase-db"))
+
+    async def test_pool_is_bounded(self):
+        with patch.dict("os.environ", {"DB_THREAD_POOL_SIZE": "2"}):
+            db_utils.shutdown_db_executor()
+            queries = [BlockingQuery(delay=0.05) for _ in range(6)]
+            start = time.perf_counter()
+            await asyncio.gather(*(db_utils.execute_async(q) for q in queries))
+            elapsed = time.perf_counter() - start
+
+        self.assertEqual(len({q.thread for q in queries}), 2)
+        self.assertGreaterEqual(elapsed, 0.14)
+
+    async def test_offload_can_be_disabled(self):
+        with patch.dict("os.environ", {"DB_OFFLOAD_ENABLED": "0"}):
+            query = BlockingQuery(delay=0)
+            await db_utils.execute_async(query)
+        self.assertEqual(query.thread, threading.current_thread().name)
+
+
+if __name__ == "__main__":
+    unittest.main()
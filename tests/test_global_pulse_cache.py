@@ -0,0 +1,193 @@
+import time
+import unittest
+from datetime import date, datetime, timedelta
+from unittest.mock import MagicMock, patch
+
+from backend.agents import scraper_agent
+from backend.scripts.fake_supabase import FakeSupabase
+from backend.services.global_pulse_cache import GlobalPulseCache, global_pulse_cache
+from backend.agents.scraper_agent import ScraperAgent
+
+
+def make_row(serp_id="tok1", check_in="2026-03-01", price=100.0, age_minutes=0, rooms=None):
+    return {
+        "serp_api_id": serp_id,
+        "check_in_date": check_in,
+        "price": price,
+        "currency": "TRY",
+        "vendor": "Booking.com",
+        "parity_offers": [],
+        "room_types": rooms or [{"name": "Standart Oda", "price": price}],
+        "recorded_at": (datetime.now() - timedelta(minutes=age_minutes)).isoformat(),
+    }
+
+
+class TestGlobalPulseCache(unittest.TestCase):
+    def test_hit_miss_and_rates(self):
+        cache = GlobalPulseCache(max_entries=10)
+        self.assertIsNone(cache.get("tok1", "2026-03-01"))
+        cache.put(make_row())
+        self.assertEqual(cache.get("tok1", date(2026, 3, 1))["price"], 100.0)
+
+        stats = cache.get_stats()
+        self.assertEqual(stats["hits"], 1)
+        self.assertEqual(stats["misses"], 1)
+        self.assertEqual(stats["hit_rate"], 0.5)
+
+    def test_expired_entry_counts_as_stale(self):
+        cache = GlobalPulseCache(ttl_seconds=60)
+        cache.put(make_row())
+        key = cache.make_key("tok1", "2026-03-01")
+        recorded, size, row = cache._entries[key]
+        cache._entries[key] = (time.time() - 120, size, row)
+
+        self.assertIsNone(cache.get("tok1", "2026-03-01"))
+        self.assertEqual(cache.get_stats()["stale"], 1)
+        self.assertEqual(cache.get_stats()["entries"], 0)
+
+    def test_rows_older_than_ttl_are_not_stored(self):
+        cache = GlobalPulseCache()
+        self.assertFalse(cache.put(make_row(age_minutes=200)))
+
+    def test_lru_eviction_by_entry_count(self):
+        cache = GlobalPulseCache(max_entries=2)
+        cache.put(make_row(serp_id="a"))
+        cache.put(make_row(serp_id="b"))
+        cache.get("a", "2026-03-01")  # touch a -> b becomes LRU
+        cache.put(make_row(serp_id="c"))
+        self.assertIsNone(cache.get("b", "2026-03-01"))
+        self.assertIsNotNone(cache.get("a", "2026-03-01"))
+        self.assertEqual(cache.get_stats()["evictions"], 1)
+
+    def test_eviction_by_bytes(self):
+        row_size = len(str(make_row()))
+        cache = GlobalPulseCache(max_entries=100, max_bytes=row_size * 2)
+        for i in range(5):
+            cache.put(make_row(serp_id=f"h{i}"))
+        stats = cache.get_stats()
+        self.assertLessEqual(stats["bytes"], row_size * 2)
+        self.assertLess(stats["entries"], 5)
+
+    def test_older_row_does_not_replace_newer(self):
+        cache = GlobalPulseCache()
+        cache.put(make_row(price=120.0))
+        cache.put(make_row(price=90.0, age_minutes=30))
+        self.assertEqual(cache.get("tok1", "2026-03-01")["price"], 120.0)
+
+    def test_returned_rows_are_copies(self):
+        cache = GlobalPulseCache()
+        cache.put(make_row())
+        cache.get("tok1", "2026-03-01")["room_types"].append({"name": "X"})
+        self.assertEqual(len(cache.get("tok1", "2026-03-01")["room_types"]), 1)
+
+
+class TestScraperTieredLookup(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        global_pulse_cache.clear()
+
+    def tearDown(self):
+        global_pulse_cache.clear()
+
+    async def test_memory_hit_costs_zero_db_round_trips(self):
+        db = MagicMock()
+        global_pulse_cache.put(make_row())
+        agent = ScraperAgent(db)
+
+        result = await agent._check_global_cache("tok1", date(2026, 3, 1), "Standard")
+
+        self.assertEqual(result["source"], "global_cache")
+        self.assertEqual(result["matched_room_type"], "Standart Oda")
+        db.table.assert_not_called()
+
+    async def test_db_hit_backfills_memory_tier(self):
+        db = MagicMock()
+        db.table().select().eq().eq().gte().order().limit().execute.return_value.data = [
+            make_row()
+        ]
+        db.table.reset_mock()
+        agent = ScraperAgent(db)
+
+        first = await agent._check_global_cache("tok1", date(2026, 3, 1))
+        second = await agent._check_global_cache("tok1", date(2026, 3, 1))
+
+        self.assertEqual(first["price"], second["price"])
+        self.assertEqual(db.table.call_count, 1)
+
+    async def test_batched_prefetch_is_one_query_sliced_per_hotel(self):
+        db = MagicMock()
+        newer = make_row(serp_id="a", price=150.0)
+        older = make_row(serp_id="a", price=90.0, age_minutes=60)
+        db.table().select().in_().in_().gte().order().range().execute.return_value.data = [
+            newer,
+            older,
+            make_row(serp_id="zzz"),  # not part of this scan
+        ]
+        db.table.reset_mock()
+        agent = ScraperAgent(db)
+
+        prefetched = await agent._prefetch_global_cache(
+            [("a", date(2026, 3, 1)), ("b", date(2026, 3, 1))]
+        )
+        global_pulse_cache.clear()  # force the slice path, not tier 1
+
+        hit = await agent._check_global_cache("a", date(2026, 3, 1), prefetched=prefetched)
+        miss = await agent._check_global_cache("b", date(2026, 3, 1), prefetched=prefetched)
+
+        self.assertEqual(hit["price"], 150.0)
+        self.assertIsNone(miss)
+        self.assertNotIn(("zzz", "2026-03-01"), prefetched)
+        self.assertEqual(db.table.call_count, 1)
+
+    async def test_prefetch_pages_past_max_rows(self):
+        # A busy hotel's pulses fill the first pages; b's only pulse is oldest
+        rows = [make_row(serp_id="a", price=100.0 + i, age_minutes=i) for i in range(12)]
+        rows.append(make_row(serp_id="b", price=80.0, age_minutes=100))
+        db = FakeSupabase({"price_logs": rows}, max_rows=5)
+        agent = ScraperAgent(db)
+
+        with patch.object(scraper_agent, "PAGE_SIZE", 5):
+            prefetched = await agent._prefetch_global_cache(
+                [("a", date(2026, 3, 1)), ("b", date(2026, 3, 1)), ("c", date(2026, 3, 1))]
+            )
+
+        self.assertEqual(prefetched[("a", "2026-03-01")]["price"], 100.0)
+        self.assertEqual(prefetched[("b", "2026-03-01")]["price"], 80.0)
+        self.assertIsNone(prefetched[("c", "2026-03-01")])
+        self.assertEqual(db.queries_by_table["price_logs"], 3)
+
+    async def test_truncated_prefetch_leaves_unfilled_keys_unknown(self):
+        rows = [make_row(serp_id="a", age_minutes=i) for i in range(12)]
+        rows.append(make_row(serp_id="b", price=80.0, age_minutes=100))
+        db = FakeSupabase({"price_logs": rows}, max_rows=5)
+        agent = ScraperAgent(db)
+
+        with patch.object(scraper_agent, "PAGE_SIZE", 5), patch.object(scraper_agent, "PULSE_MAX_PAGES", 1):
+            prefetched = await agent._prefetch_global_cache(
+                [("a", date(2026, 3, 1)), ("b", date(2026, 3, 1))]
+            )
+            global_pulse_cache.clear()
+            hit = await agent._check_global_cache("b", date(2026, 3, 1), prefetched=prefetched)
+
+        self.assertIn(("a", "2026-03-01"), prefetched)
+        self.assertNotIn(("b", "2026-03-01"), prefetched)
+        # Unknown, not a miss: the per-hotel query finds the pulse
+        self.assertEqual(hit["price"], 80.0)
+
+    async def test_prefetch_groups_hotels_by_their_dates(self):
+        rows = [
+            make_row(serp_id="a", check_in="2026-03-01"),
+            make_row(serp_id="a", check_in="2026-03-02"),  # not requested for a
+            make_row(serp_id="b", check_in="2026-03-02"),
+        ]
+        db = FakeSupabase({"price_logs": rows})
+        agent = ScraperAgent(db)
+
+        prefetched = await agent._prefetch_global_cache(
+            [("a", date(2026, 3, 1)), ("b", date(2026, 3, 2))]
+        )
+
+        self.assertEqual(sorted(prefetched), [("a", "2026-03-01"), ("b", "2026-03-02")])
+        self.assertTrue(all(prefetched.values()))
+
+if __name__ == "__main__":
+    unittest.main()
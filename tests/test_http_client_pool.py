@@ -0,0 +1,69 @@
+import unittest
+from unittest.mock import patch
+
+import httpx
+
+from backend.utils import http_client
+from backend.utils.http_client import (
+    build_http_client,
+    close_http_client,
+    get_http_client,
+)
+
+
+class TestSharedHttpClient(unittest.IsolatedAsyncioTestCase):
+    async def asyncTearDown(self):
+        await close_http_client()
+
+    async def test_client_reused_within_loop(self):
+        first = get_http_client()
+        second = get_http_client()
+        self.assertIs(first, second)
+
+    async def test_client_recreated_after_close(self):
+        first = get_http_client()
+        await close_http_client()
+        self.assertTrue(first.is_closed)
+        second = get_http_client()
+        self.assertIsNot(first, second)
+        self.assertFalse(second.is_closed)
+
+    async def test_pool_limits_from_env(self):
+        with patch.dict("os.environ", {"HTTP_MAX_CONNECTIONS": "7"}):
+            limits = http_client.get_pool_limits()
+        self.assertEqual(limits.max_connections, 7)
+
+    async def test_serpapi_fetch_uses_shared_client(self):
+        from backend.services.serpapi_client import SerpApiClient
+
+        calls = []
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            calls.append(request)
+            return httpx.Response(
+                200,
+                json={
+                    "name": "Hilton Test",
+                    "rate_per_night": {"extracted_lowest": 120},
+                },
+            )
+
+        shared = build_http_client(transport=httpx.MockTransport(handler))
+        client = SerpApiClient()
+        client._key_manager._keys = ["test-key"]
+
+        try:
+            with patch(
+                "backend.services.serpapi_client.get_http_client", return_value=shared
+            ):
+                await client.fetch_hotel_price("Hilton Test", "Istanbul")
+                await client.fetch_hotel_price("Hilton Test", "Istanbul")
+        finally:
+            await shared.aclose()
+
+        # Both lookups went through the one injected client (no per-call clients)
+        self.assertEqual(len(calls), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,59 @@
+import asyncio
+import time
+import unittest
+from collections import Counter
+from unittest.mock import patch
+
+from backend.services.serpapi_client import ApiKeyManager
+
+
+def make_manager(keys, rate="5", burst="2"):
+    with patch.dict(
+        "os.environ", {"SERPAPI_KEY_RATE_PER_SEC": rate, "SERPAPI_KEY_BURST": burst}
+    ):
+        return ApiKeyManager(keys)
+
+
+class TestKeyTokenBucket(unittest.IsolatedAsyncioTestCase):
+    async def test_load_spreads_across_keys(self):
+        mgr = make_manager(["key-aaaaaa", "key-bbbbbb", "key-cccccc"], burst="2")
+        used = Counter([await mgr.acquire() for _ in range(6)])
+        # Each key's burst of 2 is used before anyone has to wait
+        self.assertEqual(set(used.values()), {2})
+        self.assertEqual(mgr.throttle_waits, 0)
+
+    async def test_prefers_key_with_most_remaining_quota(self):
+        mgr = make_manager(["key-aaaaaa", "key-bbbbbb"], burst="5")
+        mgr._quota_info = {"key-aaaaaa": 10, "key-bbbbbb": 200}
+        self.assertEqual(await mgr.acquire(), "key-bbbbbb")
+        self.assertEqual(mgr._quota_info["key-bbbbbb"], 199)
+
+    async def test_waits_for_refill_instead_of_overdrawing(self):
+        mgr = make_manager(["key-aaaaaa"], rate="20", burst="1")
+        await mgr.acquire()
+        start = time.monotonic()
+        await mgr.acquire()
+        self.assertGreaterEqual(time.monotonic() - start, 0.03)
+        self.assertGreaterEqual(mgr.throttle_waits, 1)
+
+    async def test_rate_limited_key_is_skipped(self):
+        mgr = make_manager(["key-aaaaaa", "key-bbbbbb"], burst="5")
+        mgr.rotate_key(reason="rate_limit", is_permanent=False, key="key-aaaaaa")
+        keys = {await mgr.acquire() for _ in range(4)}
+        self.assertEqual(keys, {"key-bbbbbb"})
+        self.assertEqual(mgr.rate_limit_events, 1)
+
+    async def test_rotate_marks_the_key_actually_used(self):
+        mgr = make_manager(["key-aaaaaa", "key-bbbbbb", "key-cccccc"])
+        mgr.rotate_key(reason="quota_exhausted", is_permanent=True, key="key-cccccc")
+        self.assertIn("key-cccccc", mgr._exhausted_keys)
+        self.assertNotIn("key-aaaaaa", mgr._exhausted_keys)
+
+    async def test_all_keys_cooling_down_falls_back_to_current_key(self):
+        mgr = make_manager(["key-aaaaaa"])
+        mgr.rotate_key(reason="rate_limit", is_permanent=False)
+        self.assertEqual(await asyncio.wait_for(mgr.acquire(), 1), "key-aaaaaa")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,95 @@
+import unittest
+from datetime import datetime, timedelta, timezone
+from unittest.mock import MagicMock
+
+from backend.scripts.fake_supabase import FakeSupabase
+from backend.services import latest_price_logs
+from backend.services.latest_price_logs import latest_logs_per_hotel
+
+NOW = datetime(2026, 3, 1, 12, 0, tzinfo=timezone.utc)
+
+
+def make_logs():
+    logs = []
+    # A date-grid hotel scanned every 10 minutes for two days...
+    for i in range(300):
+        logs.append(
+            {
+                "hotel_id": "busy",
+                "price": 1000 + i,
+                "currency": "TRY",
+                "room_types": [{"name": "Standard", "price": 1000 + i}],
+                "recorded_at": (NOW - timedelta(minutes=10 * i)).isoformat(),
+            }
+        )
+    # ...and a hotel scanned once a week
+    for week in range(3):
+        logs.append(
+            {
+                "hotel_id": "quiet",
+                "price": 2000 + week,
+                "currency": "EUR",
+                "room_types": [],
+                "recorded_at": (NOW - timedelta(days=7 * week + 3)).isoformat(),
+            }
+        )
+    return logs
+
+
+class TestLatestLogsPerHotel(unittest.IsolatedAsyncioTestCase):
+    async def test_every_hotel_gets_its_newest_rows(self):
+        db = FakeSupabase({"price_logs": make_logs()})
+
+        latest = await latest_logs_per_hotel(db, ["busy", "quiet", "empty"], per_hotel=10)
+
+        self.assertEqual(sorted(latest), ["busy", "quiet"])
+        self.assertEqual([r["price"] for r in latest["busy"]], list(range(1000, 1010)))
+        self.assertEqual([r["price"] for r in latest["quiet"]], [2000, 2001, 2002])
+        self.assertEqual(db.queries_by_table["rpc:latest_price_logs_per_hotel"], 1)
+        self.assertEqual(db.queries_by_table["price_logs"], 0)
+
+    async def test_projection_keeps_grouping_columns(self):
+        db = FakeSupabase({"price_logs": make_logs()})
+
+        latest = await latest_logs_per_hotel(db, ["quiet"], per_hotel=1, columns="price, currency")
+
+        self.assertEqual(
+            latest["quiet"],
+            [
+                {
+                    "hotel_id": "quiet",
+                    "recorded_at": (NOW - timedelta(days=3)).isoformat(),
+                    "price": 2000,
+                    "currency": "EUR",
+                }
+            ],
+        )
+
+    async def test_missing_rpc_falls_back_to_limited_query(self):
+        db = FakeSupabase({"price_logs": make_logs()})
+        db.rpc = MagicMock(side_effect=Exception("PGRST202: latest_price_logs_per_hotel not found"))
+        self.addCleanup(
+            latest_price_logs._rpc_available.update,
+            {latest_price_logs.RPC_NAME: True},
+        )
+
+        first = await latest_logs_per_hotel(db, ["busy", "quiet"], per_hotel=2, columns="price")
+        await latest_logs_per_hotel(db, ["busy"], per_hotel=2)
+
+        self.assertEqual(db.rpc.call_count, 1)
+        self.assertEqual(db.queries_by_table["price_logs"], 2)
+        # Without the RPC a shared limit is all we have: the busy hotel fills it
+        self.assertEqual(list(first), ["busy"])
+        self.assertEqual([r["price"] for r in first["busy"]], [1000, 1001])
+
+    async def test_other_rpc_errors_propagate(self):
+        db = FakeSupabase({"price_logs": make_logs()})
+        db.rpc = MagicMock(side_effect=Exception("connection reset"))
+
+        with self.assertRaises(Exception):
+            await latest_logs_per_hotel(db, ["busy"])
+        self.assertTrue(latest_price_logs._rpc_available[latest_price_logs.RPC_NAME])
+
+
+if __name__ == "__main__":
+    unittest.main()
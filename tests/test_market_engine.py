@@ -0,0 +1,224 @@
+import asyncio
+import random
+import unittest
+import uuid
+from datetime import datetime, timedelta, timezone
+
+from backend.scripts.fake_supabase import FakeSupabase
+from backend.services import market_engine
+from backend.services.analysis_service import (
+    get_market_intelligence_data,
+    perform_market_analysis,
+    price_log_sort_key,
+)
+from backend.services.market_engine import MarketAnalysisEngine, market_engines
+
+ROOM_NAMES = ["Standard Room", "Standart Oda", "Deluxe Room", "King Suite", "Family Room", "Promo"]
+ROOM_TYPES = ["Standard", "Suite", "Deluxe", "Family Room", ""]
+CURRENCIES = ["TRY", "EUR", "USD"]
+
+
+def random_hotels(rng):
+    hotels = []
+    for i in range(rng.randint(1, 5)):
+        hotels.append(
+            {
+                "id": f"h{i}",
+                "name": rng.choice(["Alpha", "Beta", "Gamma", "Delta", "Alpha"]),
+                "rating": rng.choice([None, 3.9, 4.4, 4.8]),
+                "review_count": rng.randint(0, 900),
+                "is_target_hotel": rng.random() < 0.3,
+                "sentiment_breakdown": [{"name": "Value", "score": rng.randint(1, 5)}],
+            }
+        )
+    return hotels
+
+
+def random_log(rng, hotels, now):
+    rooms = [
+        {"name": rng.choice(ROOM_NAMES), "price": rng.choice([None, 0, 1500, 2200.5, "3.100", "2.450,00"])}
+        for _ in range(rng.randint(0, 3))
+    ]
+    offers = [
+        {"vendor": rng.choice(["Booking", "Expedia", None]), "price": rng.choice([0, 1800, 2100])}
+        for _ in range(rng.randint(0, 2))
+    ]
+    recorded = now - timedelta(hours=rng.randint(0, 24 * 20), minutes=rng.choice([0, 30]))
+    return {
+        "id": str(uuid.UUID(int=rng.getrandbits(128))),
+        "hotel_id": rng.choice(hotels)["id"],
+        "price": rng.choice([None, 0, 1900, 2500]),
+        "currency": rng.choice(CURRENCIES),
+        "vendor": rng.choice([None, "Booking"]),
+        "check_in_date": (now + timedelta(days=rng.randint(-8, 8))).date().isoformat()
+        if rng.random() > 0.05
+        else "",
+        "recorded_at": recorded.isoformat(),
+        "is_estimated": rng.random() < 0.1,
+        "room_types": rooms,
+        "parity_offers": offers,
+    }
+
+
+def full_prices_map(hotels, rows):
+    """What get_market_intelligence_data hands perform_market_analysis."""
+    prices_map = {}
+    for row in sorted(rows, key=price_log_sort_key, reverse=True):
+        prices_map.setdefault(str(row["hotel_id"]), []).append(row)
+    for h in hotels:
+        prices_map.setdefault(str(h["id"]), [])
+    return prices_map
+
+
+class TestEngineMatchesFullRecomputation(unittest.TestCase):
+    """Property test: on random log streams the engine equals a full recomputation."""
+
+    def check_stream(self, seed):
+        rng = random.Random(seed)
+        now = datetime.now(timezone.utc)
+        hotels = random_hotels(rng)
+        view = {
+            "display_currency": rng.choice(CURRENCIES),
+            "room_type": rng.choice(ROOM_TYPES),
+            "start_date": rng.choice([None, (now - timedelta(days=5)).date().isoformat()]),
+            "end_date": rng.choice([None, (now + timedelta(days=4)).date().isoformat()]),
+        }
+        allowed = {}
+        if rng.random() < 0.4:
+            allowed = {h["id"]: {rng.choice(ROOM_NAMES)} for h in hotels}
+
+        engine = MarketAnalysisEngine(hotels, allowed_room_names_map=allowed, **view)
+        live = []
+        for step in range(rng.randint(1, 6)):
+            batch = [random_log(rng, hotels, now) for _ in range(rng.randint(0, 25))]
+            if live and rng.random() < 0.3:
+                batch.append(rng.choice(live))  # overlap re-read
+            engine.apply(batch)
+            live.extend(r for r in batch if r not in live)
+
+            if rng.random() < 0.3:
+                cutoff = (now - timedelta(days=rng.randint(3, 15))).isoformat()
+                engine.expire(cutoff)
+                live = [r for r in live if r["recorded_at"] >= cutoff]
+            if rng.random() < 0.2:
+                allowed = {h["id"]: {rng.choice(ROOM_NAMES)} for h in hotels}
+                engine.set_allowed_room_names_map(allowed)
+
+            expected = asyncio.run(
+                perform_market_analysis(
+                    user_id="u",
+                    hotels=hotels,
+                    hotel_prices_map=full_prices_map(hotels, live),
+                    allowed_room_names_map=allowed,
+                    **view,
+                )
+            )
+            self.assertEqual(engine.result(), expected, f"seed={seed} step={step}")
+            self.assertEqual(engine.log_count, len(live))
+
+    def test_random_streams(self):
+        for seed in range(150):
+            self.check_stream(seed)
+
+
+class TestEngineIsUsedByMarketIntelligence(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        market_engines.clear()
+        self.addCleanup(market_engines.clear)
+
+    def make_db(self, now):
+        hotels = [
+            {"id": "t", "user_id": "u", "name": "Target", "serp_api_id": "st", "is_target_hotel": True, "deleted_at": None},
+            {"id": "c", "user_id": "u", "name": "Rival", "serp_api_id": "sc", "is_target_hotel": False, "deleted_at": None},
+        ]
+        logs = [
+            {
+                "id": f"{hid}{i}",
+                "hotel_id": hid,
+                "serp_api_id": f"s{hid}",
+                "price": price + i,
+                "currency": "TRY",
+                "check_in_date": (now + timedelta(days=i % 3)).date().isoformat(),
+                "recorded_at": (now - timedelta(hours=i)).isoformat(),
+            }
+            for hid, price in (("t", 2000.0), ("c", 2400.0))
+            for i in range(6)
+        ]
+        return FakeSupabase({"hotels": hotels, "price_logs": logs, "query_logs": []})
+
+    async def test_second_request_reads_only_new_logs(self):
+        now = datetime.now(timezone.utc)
+        db = self.make_db(now)
+        first = await get_market_intelligence_data(db, "u")
+        self.assertEqual(first["target_price"], 2000.0)
+
+        db.tables["price_logs"].append(
+            {
+                "id": "t-new",
+                "hotel_id": "t",
+                "serp_api_id": "st",
+                "price": 1750.0,
+                "currency": "TRY",
+                "check_in_date": now.date().isoformat(),
+                "recorded_at": (now + timedelta(minutes=1)).isoformat(),
+            }
+        )
+        second = await get_market_intelligence_data(db, "u")
+
+        self.assertEqual(market_engines.get_stats()["hits"], 1)
+        self.assertEqual(second["target_price"], 1750.0)
+        market_engines.clear()
+        self.assertEqual(await get_market_intelligence_data(db, "u"), second)
+
+    async def test_scan_updating_hotel_fields_keeps_engine(self):
+        now = datetime.now(timezone.utc)
+        db = self.make_db(now)
+        await get_market_intelligence_data(db, "u")
+
+        # What a scan of the user's own hotel writes: a log plus hotel fields
+        db.tables["price_logs"].append(
+            {
+                "id": "t-scan",
+                "hotel_id": "t",
+                "serp_api_id": "st",
+                "price": 1700.0,
+                "currency": "TRY",
+                "check_in_date": now.date().isoformat(),
+                "recorded_at": (now + timedelta(minutes=1)).isoformat(),
+            }
+        )
+        target = db.tables["hotels"][0]
+        target.update(current_price=1700.0, rating=4.6, review_count=120, updated_at=now.isoformat())
+        second = await get_market_intelligence_data(db, "u")
+
+        self.assertEqual(market_engines.get_stats()["hits"], 1)
+        self.assertEqual(market_engines.get_stats()["rebuilds"], 0)
+        self.assertEqual(second["target_price"], 1700.0)
+        market_engines.clear()
+        self.assertEqual(await get_market_intelligence_data(db, "u"), second)
+
+    async def test_renamed_hotel_rebuilds_engine(self):
+        now = datetime.now(timezone.utc)
+        db = self.make_db(now)
+        await get_market_intelligence_data(db, "u")
+
+        db.tables["hotels"][1]["name"] = "Rival Renamed"
+        await get_market_intelligence_data(db, "u")
+
+        self.assertEqual(market_engines.get_stats()["rebuilds"], 1)
+
+    async def test_disabled_engine_computes_in_full(self):
+        now = datetime.now(timezone.utc)
+        db = self.make_db(now)
+        original = market_engine.MARKET_ENGINE_ENABLED
+        market_engine.MARKET_ENGINE_ENABLED = False
+        self.addCleanup(setattr, market_engine, "MARKET_ENGINE_ENABLED", original)
+
+        await get_market_intelligence_data(db, "u")
+        await get_market_intelligence_data(db, "u")
+
+        self.assertEqual(market_engines.get_stats()["engines"], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,179 @@
+import asyncio
+import unittest
+import uuid
+from datetime import datetime, timedelta, timezone
+from unittest.mock import MagicMock, patch
+
+from backend.scripts.fake_supabase import FakeSupabase
+from backend.services import market_snapshot
+from backend.services.market_snapshot import (
+    get_market_intelligence,
+    is_fresh,
+    refresh_user_snapshots,
+    schedule_refresh,
+    snapshot_key,
+    snapshot_params,
+)
+
+USER = str(uuid.UUID(int=7))
+
+
+def make_db():
+    now = datetime.now(timezone.utc)
+    hotels = [
+        {"id": "t", "user_id": USER, "name": "Target", "serp_api_id": "st", "is_target_hotel": True, "deleted_at": None},
+        {"id": "c", "user_id": USER, "name": "Rival", "serp_api_id": "sc", "is_target_hotel": False, "deleted_at": None},
+    ]
+    price_logs = [
+        {
+            "id": str(uuid.uuid4()),
+            "hotel_id": hid,
+            "serp_api_id": f"s{hid}",
+            "price": price + i,
+            "currency": "TRY",
+            "check_in_date": (now + timedelta(days=1)).date().isoformat(),
+            "recorded_at": (now - timedelta(hours=i)).isoformat(),
+        }
+        for hid, price in (("t", 2000.0), ("c", 2400.0))
+        for i in range(6)
+    ]
+    return FakeSupabase({"hotels": hotels, "price_logs": price_logs, "query_logs": []})
+
+
+def bump(db):
+    """What the migration 034 triggers do when price_logs rows land."""
+    rows = db.tables.setdefault("market_data_versions", [])
+    if rows:
+        rows[0]["version"] += 1
+    else:
+        rows.append({"user_id": USER, "version": 1})
+
+
+class TestFreshness(unittest.TestCase):
+    def test_version_day_and_age_must_all_match(self):
+        now = datetime(2026, 3, 2, 12, 0, tzinfo=timezone.utc)
+        row = {"payload": {}, "data_version": 3, "computed_at": (now - timedelta(hours=1)).isoformat()}
+        self.assertTrue(is_fresh(row, 3, now))
+        self.assertFalse(is_fresh(row, 4, now))
+        self.assertFalse(is_fresh({**row, "computed_at": (now - timedelta(hours=13)).isoformat()}, 3, now))
+        with patch.object(market_snapshot, "MARKET_SNAPSHOT_MAX_AGE_S", 600):
+            self.assertFalse(is_fresh(row, 3, now))
+
+    def test_currency_alias_maps_to_the_same_snapshot(self):
+        a = snapshot_params(room_type="Standard", display_currency="usd")
+        b = snapshot_params(room_type="standard ", display_currency="TRY", currency="USD")
+        self.assertEqual(snapshot_key(a), snapshot_key(b))
+
+
+class TestMarketSnapshot(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        market_snapshot._last_touched.clear()
+        self.addCleanup(market_snapshot._last_touched.clear)
+
+    async def test_serves_snapshot_until_new_prices_land(self):
+        db = make_db()
+
+        first = await get_market_intelligence(db, USER)
+        logs_read = db.queries_by_op["price_logs.select"]
+        self.assertGreater(logs_read, 0)
+        self.assertEqual(len(db.tables["market_intel_snapshots"]), 1)
+
+        second = await get_market_intelligence(db, USER, room_type="Standard", display_currency="TRY")
+        self.assertEqual(second, first)
+        self.assertEqual(db.queries_by_op["price_logs.select"], logs_read)
+
+        bump(db)
+        await get_market_intelligence(db, USER)
+        self.assertGreater(db.queries_by_op["price_logs.select"], logs_read)
+
+    async def test_scan_refresh_makes_the_next_request_a_hit(self):
+        db = make_db()
+        await get_market_intelligence(db, USER, room_type="Suite", currency="EUR")
+        bump(db)
+
+        written = await refresh_user_snapshots(db, USER)
+
+        # Only the view the user opened; the default view was never served
+        self.assertEqual(written, 1)
+        logs_read = db.queries_by_op["price_logs.select"]
+        await get_market_intelligence(db, USER, room_type="Suite", currency="EUR")
+        self.assertEqual(db.queries_by_op["price_logs.select"], logs_read)
+
+    async def test_views_not_served_recently_are_not_refreshed(self):
+        db = make_db()
+        await get_market_intelligence(db, USER, room_type="Suite", currency="EUR")
+        await get_market_intelligence(db, USER)
+        snapshots = db.tables["market_intel_snapshots"]
+        old = (datetime.now(timezone.utc) - timedelta(days=30)).isoformat()
+        next(r for r in snapshots if r["snapshot_key"].startswith("suite"))["last_served_at"] = old
+        bump(db)
+
+        self.assertEqual(await refresh_user_snapshots(db, USER), 1)
+        # A refresh is not a use: repeated scans do not keep a view alive
+        self.assertEqual(
+            next(r for r in snapshots if r["snapshot_key"].startswith("suite"))["last_served_at"], old
+        )
+
+    async def test_hit_records_last_served_at(self):
+        db = make_db()
+        await get_market_intelligence(db, USER)
+        row = db.tables["market_intel_snapshots"][0]
+        row["last_served_at"] = None
+        market_snapshot._last_touched.clear()
+
+        await get_market_intelligence(db, USER)
+        await asyncio.gather(*market_snapshot._background)
+        self.assertIsNotNone(row["last_served_at"])
+
+        # Throttled: a second hit right away writes nothing
+        updates = db.queries_by_op["market_intel_snapshots.update"]
+        await get_market_intelligence(db, USER)
+        await asyncio.gather(*market_snapshot._background)
+        self.assertEqual(db.queries_by_op["market_intel_snapshots.update"], updates)
+
+    async def test_scheduled_refresh_runs_in_the_background_once_per_user(self):
+        db = make_db()
+        await get_market_intelligence(db, USER)
+        bump(db)
+        gate = asyncio.Event()
+        calls = []
+
+        async def slow_refresh(db, user_id):
+            calls.append(user_id)
+            await gate.wait()
+            return 1
+
+        with patch.object(market_snapshot, "refresh_user_snapshots", slow_refresh):
+            first = schedule_refresh(db, USER)
+            await asyncio.sleep(0)  # refresh under way
+            second = schedule_refresh(db, USER)
+            self.assertIs(first, second)
+            self.assertFalse(first.done())
+            gate.set()
+            await first
+
+        # The scan that landed mid-refresh made it run once more
+        self.assertEqual(calls, [USER, USER])
+        self.assertNotIn(USER, market_snapshot._refreshing)
+
+    async def test_missing_tables_fall_back_to_live_analysis(self):
+        db = make_db()
+        real_table = db.table
+
+        def table(name):
+            if name.startswith("market_"):
+                raise Exception('relation "market_intel_snapshots" does not exist (42P01)')
+            return real_table(name)
+
+        db.table = MagicMock(side_effect=table)
+        self.addCleanup(market_snapshot._tables_available.update, ok=True)
+
+        data = await get_market_intelligence(db, USER)
+
+        self.assertEqual(data["target_price"], 2000.0)
+        self.assertFalse(market_snapshot._tables_available["ok"])
+        self.assertEqual(await refresh_user_snapshots(db, USER), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
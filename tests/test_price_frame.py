@@ -0,0 +1,135 @@
+import random
+import unittest
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+
+from backend.services.analysis_service import (
+    RoomPriceMatcher,
+    _checkin_key,
+    _summarize_checkin_frame,
+    _summarize_checkin_logs,
+    price_log_sort_key,
+)
+from backend.services.predictive_service import predictive_service
+from backend.services.price_frame import (
+    PriceLogFrame,
+    first_extreme_per_group,
+    first_per_group,
+    group_runs,
+)
+
+ROOM_NAMES = ["Standard Room", "Deluxe Room", "King Suite"]
+
+
+def random_log(rng, hotel_count, now):
+    recorded = now - timedelta(hours=rng.randint(0, 24 * 12), minutes=rng.choice([0, 30]))
+    recorded_at = rng.choice(
+        [
+            recorded.isoformat(),
+            recorded.isoformat(),
+            recorded.replace(tzinfo=None).isoformat(),  # naive: mixing ends the look-back
+            recorded.strftime("%Y-%m-%dT%H:%M:%SZ"),
+            "not-a-date",
+        ]
+    )
+    return {
+        "hotel_id": f"h{rng.randrange(hotel_count)}",
+        "price": rng.choice([None, 0, 1900, 2500.25]),
+        "currency": rng.choice([None, "", "TRY", "EUR"]),
+        "vendor": rng.choice([None, "Booking"]),
+        "search_rank": rng.choice([None, 1, 4]),
+        "check_in_date": rng.choice(
+            ["", (now + timedelta(days=rng.randint(-3, 3))).date().isoformat(), "2026-01-02T00:00:00"]
+        ),
+        "recorded_at": recorded_at,
+        "is_estimated": rng.random() < 0.2,
+        "room_types": [
+            {"name": rng.choice(ROOM_NAMES), "price": rng.choice([None, 0, 1500, 2200.5, "3.100"])}
+            for _ in range(rng.randint(0, 2))
+        ],
+        "parity_offers": [
+            {"vendor": rng.choice(["Expedia", None]), "price": rng.choice([0, 1800, 1800.125, "2.100,50"])}
+            for _ in range(rng.randint(0, 2))
+        ],
+    }
+
+
+class TestPrimitives(unittest.TestCase):
+    def test_first_per_group(self):
+        codes = np.array([2, 0, 2, 1, 0])
+        self.assertEqual(first_per_group(codes, 4).tolist(), [1, 3, 0, -1])
+        mask = np.array([False, False, True, True, True])
+        self.assertEqual(first_per_group(codes, 4, mask).tolist(), [4, 3, 2, -1])
+
+    def test_first_extreme_ties_pick_earliest(self):
+        groups = np.array([0, 0, 0, 1, 1])
+        values = np.array([3.0, 5.0, 5.0, 2.0, 2.0])
+        self.assertEqual(first_extreme_per_group(groups, values, 3, largest=True).tolist(), [1, 3, -1])
+        self.assertEqual(first_extreme_per_group(groups, values, 3, largest=False).tolist(), [0, 3, -1])
+
+    def test_group_runs_keeps_row_order(self):
+        a = np.array([1, 0, 1, 0, 1])
+        b = np.array([0, 0, 0, 1, 0])
+        order, starts, ends = group_runs(a, b)
+        groups = [order[s:e].tolist() for s, e in zip(starts, ends)]
+        self.assertEqual(groups, [[1], [3], [0, 2, 4]])
+
+    def test_columns(self):
+        frame = PriceLogFrame(
+            [
+                {"hotel_id": 7, "price": "12", "currency": None, "check_in_date": "2026-03-02T00:00:00"},
+                {"hotel_id": "7", "price": 5, "currency": "EUR", "check_in_date": "2026-03-01"},
+            ]
+        )
+        self.assertEqual(frame.hotel_ids, ["7"])
+        self.assertTrue(np.isnan(frame.price[0]))
+        self.assertEqual(frame.price[1], 5.0)
+        self.assertEqual([frame.currencies[c] for c in frame.currency], ["USD", "EUR"])
+        self.assertEqual(frame.checkin_dates, ["2026-03-01", "2026-03-02"])
+        self.assertEqual(frame.checkin.tolist(), [1, 0])
+
+
+class TestFrameMatchesLoops(unittest.TestCase):
+    def test_checkin_summaries_match_per_group_loop(self):
+        now = datetime(2026, 5, 10, 12, tzinfo=timezone.utc)
+        for seed in range(150):
+            rng = random.Random(seed)
+            room_type = rng.choice(["Standard", "Suite", ""])
+            logs = [random_log(rng, 3, now) for _ in range(rng.randint(0, 60))]
+            logs.sort(key=price_log_sort_key, reverse=True)
+            prices_map = {}
+            for log in logs:
+                prices_map.setdefault(log["hotel_id"], []).append(log)
+
+            matcher = RoomPriceMatcher(room_type, {}, memoize=True)
+            expected = []
+            for prices in prices_map.values():
+                groups = {}
+                for p in prices:
+                    d = _checkin_key(p)
+                    if d:
+                        groups.setdefault(d, []).append(p)
+                for group in groups.values():
+                    expected.append(_summarize_checkin_logs(group, matcher.price, room_type))
+
+            frame = PriceLogFrame.from_hotel_map(prices_map, price=matcher.price)
+            actual = [cell[3:] for cell in _summarize_checkin_frame(frame, room_type)]
+            self.assertEqual(
+                sorted(map(repr, actual)), sorted(map(repr, expected)), f"seed {seed}"
+            )
+
+    def test_volatility_matches_list_computation(self):
+        for seed in range(50):
+            rng = random.Random(seed)
+            logs = [{"price": rng.choice([0, 1800, 2100.5, 2400])} for _ in range(rng.randint(0, 20))]
+            prices = [row["price"] for row in logs if row["price"] > 0]
+            expected = 0.0
+            if len(logs) >= 5 and len(prices) >= 5:
+                pct = [abs((prices[i] - prices[i + 1]) / prices[i + 1]) * 100 for i in range(len(prices) - 1)]
+                expected = round(float(np.std(pct)), 2)
+            self.assertEqual(predictive_service.volatility_from_logs(logs), expected)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,191 @@
+import asyncio
+import unittest
+from datetime import datetime, timedelta, timezone
+
+from unittest.mock import patch
+
+from backend.agents.analyst_agent import AnalystAgent
+from backend.scripts.fake_supabase import FakeSupabase
+from backend.services.global_pulse_cache import global_pulse_cache
+from backend.services.monitor_service import _run_streaming_pipeline
+from backend.services.predictive_service import predictive_service
+from backend.services.price_history_index import HISTORY_COLUMNS, PriceHistoryIndex
+
+
+def _log(hid, hours_ago, price, currency="TRY", check_in="2026-11-01", **extra):
+    return {
+        "hotel_id": hid,
+        "price": price,
+        "currency": currency,
+        "check_in_date": check_in,
+        "recorded_at": (datetime.now() - timedelta(hours=hours_ago)).isoformat(),
+        **extra,
+    }
+
+
+class TestPriceHistoryIndex(unittest.TestCase):
+    def setUp(self):
+        self.logs = [
+            _log("h1", 1, 0.0),
+            _log("h1", 2, 900.0, currency="USD"),
+            _log("h1", 3, 1000.0, check_in="2026-11-02"),
+            _log("h1", 24 * 10, 1100.0),
+            _log("h2", 5, 500.0),
+        ]
+
+    def test_lookups_match_the_queries_they_replace(self):
+        index = PriceHistoryIndex(list(reversed(self.logs)))
+        cutoff = (datetime.now() - timedelta(days=7)).isoformat()
+
+        self.assertEqual([r["price"] for r in index.recent("h1", 2)], [0.0, 900.0])
+        self.assertEqual(len(index.recent("h1", 10, since=cutoff)), 3)
+        self.assertEqual(index.valid_prices("h1", "TRY"), [1000.0, 1100.0])
+        self.assertEqual(index.latest("h1", since=cutoff, check_in_date="2026-11-01")["price"], 0.0)
+        self.assertEqual(index.latest("h1", since=cutoff, check_in_date="2026-11-02")["price"], 1000.0)
+        self.assertIsNone(index.latest("h2", since=datetime.now(timezone.utc)))
+        self.assertEqual(index.recent("unknown", 5), [])
+
+    def test_load_pages_past_max_rows_in_constant_queries(self):
+        logs = [_log(f"h{i % 40}", i, 100.0 + i) for i in range(2500)]
+        db = FakeSupabase({"price_logs": logs, "hotels": [{"id": "h1", "rating": 4.2}]}, max_rows=1000)
+
+        index = PriceHistoryIndex.load(db, [f"h{i}" for i in range(40)], days=365)
+
+        self.assertEqual(sum(len(index.logs(f"h{i}")) for i in range(40)), 2500)
+        self.assertEqual(db.queries_by_op["price_logs.select"], 3)
+        self.assertEqual(db.queries_by_op["hotels.select"], 1)
+        self.assertEqual(index.hotel("h1")["rating"], 4.2)
+
+    def test_volatility_from_logs_matches_db_path(self):
+        logs = [_log("h1", i, 1000.0 + (i % 4) * 40) for i in range(30)]
+        db = FakeSupabase({"price_logs": logs})
+        from_db = asyncio.run(predictive_service.calculate_market_volatility(db, "h1"))
+        from_index = predictive_service.volatility_from_logs(PriceHistoryIndex(logs).recent("h1", 30))
+        self.assertEqual(from_db, from_index)
+        self.assertGreater(from_index, 0)
+
+
+class SelectRecordingSupabase(FakeSupabase):
+    def __init__(self, tables):
+        super().__init__(tables)
+        self.selects = []
+
+    def table(self, name):
+        query = super().table(name)
+        select = query.select
+
+        def recorded(columns="*", count=None):
+            self.selects.append((name, columns))
+            return select(columns, count=count)
+
+        query.select = recorded
+        return query
+
+
+class TestLightWindow(unittest.IsolatedAsyncioTestCase):
+    def make_logs(self):
+        heavy = {"room_types": [{"name": "Std"}], "parity_offers": [{"vendor": "X"}], "metadata": {"is_shallow": True}}
+        logs = [_log("busy", j + 1, 1000.0, id=f"b{j}", **heavy) for j in range(40)]
+        # Last scanned six weeks ago: outside the 30-day window
+        logs.append(_log("quiet", 24 * 42, 800.0, id="q0", **heavy))
+        return logs
+
+    async def test_heavy_columns_only_for_newest_rows(self):
+        db = SelectRecordingSupabase({"price_logs": self.make_logs()})
+        index = await PriceHistoryIndex.load_async(db, ["busy"], days=30)
+        await index.hydrate(db, ["busy"])
+
+        window = [cols for table, cols in db.selects if table == "price_logs"][0]
+        self.assertEqual(window, HISTORY_COLUMNS)
+        self.assertNotIn("room_types", window)
+        logs = index.logs("busy")
+        self.assertEqual(len(logs), 40)
+        self.assertTrue(all(r["room_types"] for r in logs[:10]))
+        self.assertTrue(all("room_types" not in r for r in logs[10:]))
+
+        # A deeper row (continuity on an old check-in date) is hydrated on demand
+        await index.hydrate_rows(db, [logs[25]])
+        self.assertEqual(logs[25]["parity_offers"], [{"vendor": "X"}])
+
+    async def test_quiet_hotel_keeps_its_newest_log_as_baseline(self):
+        db = FakeSupabase({"price_logs": self.make_logs()})
+        index = await PriceHistoryIndex.load_async(db, ["busy", "quiet"], days=30)
+
+        self.assertEqual([r["price"] for r in index.recent("quiet", 2)], [800.0])
+        self.assertEqual(index.valid_prices("quiet", "TRY"), [800.0])
+        # Continuity stays within its own 7-day window
+        cutoff = (datetime.now() - timedelta(days=7)).isoformat()
+        self.assertIsNone(index.latest("quiet", since=cutoff))
+
+    async def test_added_rows_are_seen_newest_first(self):
+        index = PriceHistoryIndex([_log("h1", 5, 900.0)])
+        index.add([{"hotel_id": "h1", "price": 950.0, "currency": "TRY", "recorded_at": datetime.now().isoformat()}])
+        self.assertEqual([r["price"] for r in index.recent("h1", 2)], [950.0, 900.0])
+
+
+class TestHistorySharedAcrossBatches(unittest.IsolatedAsyncioTestCase):
+    async def test_pipeline_loads_history_once_per_scan(self):
+        global_pulse_cache.clear()
+        count = 6
+        hotels = [{"id": f"h{i}", "name": f"H{i}", "sentiment_breakdown": []} for i in range(count)]
+        logs = [_log(f"h{i}", 2, 1000.0, id=f"l{i}") for i in range(count)]
+        db = FakeSupabase({"hotels": hotels, "price_logs": logs})
+
+        class Scraper:
+            async def run_scan(self, user_id, hotels, options, session_id, on_result=None):
+                for h in hotels:
+                    await on_result(
+                        {"hotel_id": h["id"], "status": "success", "check_in": "2026-11-01",
+                         "price_data": {"price": 990.0, "currency": "TRY", "offers": [], "room_types": []}}
+                    )
+
+        with patch(
+            "backend.services.room_type_service.update_room_type_catalog",
+            side_effect=lambda *a, **k: asyncio.sleep(0),
+        ):
+            _, analysis = await _run_streaming_pipeline(
+                db, Scraper(), AnalystAgent(db), "user-1", hotels, None, None, 2.0, {},
+                batch_size=2,
+            )
+
+        self.assertEqual(analysis["prices_updated"], count)
+        # One window for the scan (not one per batch of 2)
+        self.assertEqual(db.queries_by_op["hotels.select"], 1)
+        # Plus one heavy-column hydration per batch, for that batch's hotels only
+        self.assertEqual(db.queries_by_op["price_logs.select"], 1 + count // 2)
+
+
+class TestAnalystUsesHistoryIndex(unittest.IsolatedAsyncioTestCase):
+    async def test_reads_do_not_grow_with_hotel_count(self):
+        reads = []
+        for count in (5, 25):
+            global_pulse_cache.clear()
+            hotels = [{"id": f"h{i}", "sentiment_breakdown": []} for i in range(count)]
+            logs = [
+                _log(f"h{i}", j + 1, 1000.0, id=f"l{i}-{j}", room_types=[{"name": "Std"}])
+                for i in range(count)
+                for j in range(3)
+            ]
+            results = [
+                {"hotel_id": f"h{i}", "status": "success" if i % 2 else "error", "check_in": "2026-11-01",
+                 "price_data": {"price": 980.0, "currency": "TRY", "offers": [], "room_types": []} if i % 2 else None}
+                for i in range(count)
+            ]
+            db = FakeSupabase({"hotels": hotels, "price_logs": logs})
+            summary = await AnalystAgent(db).analyze_results(
+                "user-1", results, 2.0, settings={"dynamic_threshold_enabled": True}
+            )
+            self.assertEqual(summary["prices_updated"], count)
+            reads.append(db.queries_by_op["price_logs.select"] + db.queries_by_op["hotels.select"])
+
+            # Continuity filled the missing prices from the index, room types were carried forward
+            inserted = [r for r in db.tables["price_logs"] if r.get("session_id", "x") is None]
+            self.assertTrue(all(r["price"] > 0 for r in inserted))
+            self.assertTrue(all(r["room_types"] for r in inserted))
+
+        # Window, heavy-column hydration of the newest logs, hotels
+        self.assertEqual(reads, [3, 3])
+
+
+if __name__ == "__main__":
+    unittest.main()
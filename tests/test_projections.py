@@ -0,0 +1,177 @@
+import unittest
+from datetime import datetime, timedelta, timezone
+
+from backend.scripts.fake_supabase import FakeSupabase
+from backend.services.analysis_service import get_market_intelligence_data
+from backend.services.market_engine import market_engines
+from backend.utils import projections
+from backend.utils.projections import (
+    HOTEL_SENTIMENT_PROFILE,
+    PRICE_LOG_CARD,
+    Projection,
+    hydrate,
+    select_projected,
+    select_projected_async,
+)
+
+WIDE = Projection("test_wide", "hotels", ("id", "name"), heavy=("reviews", "sentiment_breakdown"))
+
+
+class ProjectingSupabase(FakeSupabase):
+    """Records every select list and rejects `missing` columns like PostgREST."""
+
+    def __init__(self, tables, missing=()):
+        super().__init__(tables)
+        self.missing = set(missing)
+        self.selects = []
+
+    def table(self, name):
+        query = super().table(name)
+        select = query.select
+
+        def checked_select(columns="*", count=None):
+            self.selects.append((name, columns))
+            unknown = [c.strip() for c in columns.split(",") if c.strip() in self.missing]
+            if unknown:
+                raise Exception(f"{{'code': '42703', 'message': 'column hotels.{unknown[0]} does not exist'}}")
+            return select(columns, count=count)
+
+        query.select = checked_select
+        return query
+
+
+def hotel_rows():
+    return [
+        {"id": "a", "name": "Alpha", "reviews": ["great"], "sentiment_breakdown": [], "sentiment_embedding": [0.1] * 8},
+        {"id": "b", "name": "Beta", "reviews": [], "sentiment_breakdown": [{"name": "Value"}], "sentiment_embedding": [0.2] * 8},
+    ]
+
+
+class TestProjection(unittest.TestCase):
+    def setUp(self):
+        self.addCleanup(projections._select_all.clear)
+
+    def test_columns_include_and_exclude(self):
+        self.assertEqual(WIDE.select(), "id, name")
+        self.assertEqual(WIDE.select(include=["reviews"]), "id, name, reviews")
+        self.assertEqual(
+            HOTEL_SENTIMENT_PROFILE.columns_for(HOTEL_SENTIMENT_PROFILE.heavy, exclude=["reviews"]),
+            ["id", "name", "stars", "location", "sentiment_breakdown"],
+        )
+        with self.assertRaises(ValueError):
+            WIDE.columns_for(include=["pricing_dna"])
+
+    def test_disabled_selects_all(self):
+        original = projections.QUERY_PROJECTIONS_ENABLED
+        projections.QUERY_PROJECTIONS_ENABLED = False
+        self.addCleanup(setattr, projections, "QUERY_PROJECTIONS_ENABLED", original)
+        self.assertEqual(WIDE.select(), "*")
+
+    def test_projected_rows_skip_unlisted_columns(self):
+        db = ProjectingSupabase({"hotels": hotel_rows()})
+        res = select_projected(db, WIDE, lambda q: q.eq("id", "a"))
+        self.assertEqual(res.data, [{"id": "a", "name": "Alpha"}])
+
+    def test_unknown_column_falls_back_to_select_all(self):
+        db = ProjectingSupabase({"hotels": hotel_rows()}, missing={"name"})
+
+        first = select_projected(db, WIDE, lambda q: q.eq("id", "a"))
+        select_projected(db, WIDE, lambda q: q.eq("id", "b"))
+
+        self.assertEqual(first.data[0]["name"], "Alpha")
+        self.assertIn("test_wide", projections._select_all)
+        # One rejected attempt, then "*" for this call and every later one
+        self.assertEqual(db.selects, [("hotels", "id, name"), ("hotels", "*"), ("hotels", "*")])
+
+    def test_failed_retry_does_not_pin_projection(self):
+        db = ProjectingSupabase({"hotels": hotel_rows()}, missing={"name"})
+
+        def broken_filter(q):
+            q.select("name")  # the filter column is the unknown one
+            return q
+
+        with self.assertRaises(Exception):
+            select_projected(db, WIDE, broken_filter)
+        self.assertNotIn("test_wide", projections._select_all)
+
+    def test_other_errors_propagate(self):
+        db = ProjectingSupabase({"hotels": hotel_rows()})
+
+        def timeout(q):
+            raise Exception("canceling statement due to statement timeout")
+
+        with self.assertRaises(Exception):
+            select_projected(db, WIDE, timeout)
+        self.assertEqual(len(db.selects), 1)
+
+
+class TestHydrate(unittest.IsolatedAsyncioTestCase):
+    async def test_fills_only_missing_rows_in_one_query(self):
+        db = ProjectingSupabase(
+            {
+                "price_logs": [
+                    {"id": "1", "price": 10, "parity_offers": [{"vendor": "X"}], "room_types": [{"name": "Std"}]},
+                    {"id": "2", "price": 20, "parity_offers": [], "room_types": []},
+                ]
+            }
+        )
+        rows = [
+            {"id": "1", "price": 10},
+            {"id": "2", "price": 20, "parity_offers": ["kept"], "room_types": ["kept"]},
+            {"id": "gone", "price": 30},
+        ]
+
+        await hydrate(db, PRICE_LOG_CARD, rows, PRICE_LOG_CARD.heavy)
+
+        self.assertEqual(rows[0]["parity_offers"], [{"vendor": "X"}])
+        self.assertEqual(rows[0]["room_types"], [{"name": "Std"}])
+        self.assertEqual(rows[1]["parity_offers"], ["kept"])
+        self.assertIsNone(rows[2]["room_types"])
+        self.assertEqual(db.selects, [("price_logs", "id, parity_offers, room_types")])
+
+    async def test_nothing_missing_skips_query(self):
+        db = ProjectingSupabase({"price_logs": []})
+        await hydrate(db, PRICE_LOG_CARD, [{"id": "1", "parity_offers": [], "room_types": []}], PRICE_LOG_CARD.heavy)
+        await select_projected_async(db, PRICE_LOG_CARD, lambda q: q.limit(1))
+        self.assertEqual(db.selects, [("price_logs", PRICE_LOG_CARD.select())])
+
+
+class TestMarketIntelligenceProjections(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        market_engines.clear()
+        self.addCleanup(market_engines.clear)
+
+    async def test_hot_reads_never_select_all(self):
+        now = datetime.now(timezone.utc)
+        hotels = [
+            {"id": "t", "user_id": "u", "name": "Target", "serp_api_id": "st", "is_target_hotel": True, "deleted_at": None},
+            {"id": "c", "user_id": "u", "name": "Rival", "serp_api_id": "sc", "is_target_hotel": False, "deleted_at": None},
+        ]
+        for h in hotels:
+            h.update(sentiment_embedding=[0.5] * 768, pricing_dna=[0.5] * 768, reviews=[{"text": "ok"}] * 20)
+        logs = [
+            {
+                "id": f"{hid}{i}",
+                "hotel_id": hid,
+                "price": 2000.0 + i,
+                "currency": "TRY",
+                "check_in_date": (now + timedelta(days=i)).date().isoformat(),
+                "recorded_at": (now - timedelta(hours=i)).isoformat(),
+                "metadata": {"raw": "x" * 500},
+            }
+            for hid in ("t", "c")
+            for i in range(3)
+        ]
+        db = ProjectingSupabase({"hotels": hotels, "price_logs": logs, "query_logs": []})
+
+        result = await get_market_intelligence_data(db, "u")
+
+        self.assertEqual(result["target_price"], 2000.0)
+        hot = [cols for table, cols in db.selects if table in ("hotels", "price_logs")]
+        self.assertTrue(hot)
+        self.assertNotIn("*", hot)
+        self.assertFalse(any("embedding" in cols or "pricing_dna," in cols for cols in hot))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,77 @@
+import asyncio
+import unittest
+from datetime import date
+
+from backend.services.request_coalescer import CoalescingProvider, RequestCoalescer
+
+
+class FakeProvider:
+    def __init__(self):
+        self.calls = 0
+
+    def get_provider_name(self):
+        return "Fake"
+
+    async def fetch_price(self, hotel_name, location, check_in, check_out, adults=2, currency="USD", serp_api_id=None):
+        self.calls += 1
+        await asyncio.sleep(0.05)
+        return {"price": 100.0, "currency": currency, "room_types": [{"name": "Std"}]}
+
+
+class TestRequestCoalescer(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.fake = FakeProvider()
+        self.coalescer = RequestCoalescer()
+        self.provider = CoalescingProvider(self.fake, self.coalescer)
+
+    def _fetch(self, serp_id="123", currency="TRY"):
+        return self.provider.fetch_price(
+            hotel_name="Hilton",
+            location="Izmir",
+            check_in=date(2026, 3, 1),
+            check_out=date(2026, 3, 2),
+            adults=2,
+            currency=currency,
+            serp_api_id=serp_id,
+        )
+
+    async def test_identical_concurrent_calls_share_one_fetch(self):
+        results = await asyncio.gather(*(self._fetch() for _ in range(5)))
+        self.assertEqual(self.fake.calls, 1)
+        self.assertTrue(all(r["price"] == 100.0 for r in results))
+
+        stats = self.coalescer.get_stats()
+        self.assertEqual(stats["total_calls"], 5)
+        self.assertEqual(stats["total_merged"], 4)
+        self.assertEqual(stats["keys"][0]["merged"], 4)
+        self.assertEqual(stats["keys"][0]["fetches"], 1)
+
+    async def test_callers_get_independent_copies(self):
+        a, b = await asyncio.gather(self._fetch(), self._fetch())
+        a["room_types"][0]["name"] = "Mutated"
+        self.assertEqual(b["room_types"][0]["name"], "Std")
+
+    async def test_distinct_keys_do_not_merge(self):
+        await asyncio.gather(self._fetch(currency="TRY"), self._fetch(currency="USD"))
+        self.assertEqual(self.fake.calls, 2)
+
+    async def test_sequential_calls_are_not_merged(self):
+        await self._fetch()
+        await self._fetch()
+        self.assertEqual(self.fake.calls, 2)
+        self.assertEqual(self.coalescer.inflight_count(), 0)
+
+    async def test_caller_timeout_does_not_cancel_shared_fetch(self):
+        slow = asyncio.ensure_future(self._fetch())
+        with self.assertRaises(asyncio.TimeoutError):
+            await asyncio.wait_for(self._fetch(), timeout=0.01)
+        result = await slow
+        self.assertEqual(result["price"], 100.0)
+        self.assertEqual(self.fake.calls, 1)
+
+    async def test_delegates_provider_name(self):
+        self.assertEqual(self.provider.get_provider_name(), "Fake")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,108 @@
+"""
+Golden test for the room price matcher.
+
+tests/fixtures/room_price_matcher_golden.json holds (price, name, score) for every
+generated log x room type x room-name map, recorded from the per-log
+`get_price_for_room` implementation before it was compiled. Only regenerate
+(`python tests/test_room_price_matcher.py --regen`) when matching behaviour is
+meant to change.
+"""
+
+import json
+import os
+import random
+import sys
+import unittest
+
+from backend.services.analysis_service import RoomPriceMatcher, get_price_for_room
+
+GOLDEN_PATH = os.path.join(os.path.dirname(__file__), "fixtures", "room_price_matcher_golden.json")
+
+ROOM_TYPES = [
+    "Standard", "standart", "Standard Room", "Suite", "King Suite", "Deluxe",
+    "Superior", "Family Room", "Aile Odası", "Oda", "Economy", "Sea View", "",
+]
+ROOM_NAMES = [
+    "Standard Room", "Standart Oda", "Klasik Oda", "Economy Double", "Promo Rate",
+    "Deluxe Room", "Deluxe Standard", "Superior Sea View", "Premium Corner",
+    "Junior Suite", "Standard Suite", "Süit", "King Suite", "Presidential Suite",
+    "Family Room", "Aile Odası", "Connected Rooms", "Balayı Odası", "Dubleks",
+    "Oda", "Room Only",
+]
+PRICES = [None, 0, -1, 1450, 2199.9, "3.825,00", "3,825.00", "3.825", "₺ 2.450", "125,50", "n/a"]
+
+
+def build_cases(seed: int = 2021, count: int = 160):
+    rng = random.Random(seed)
+    logs = []
+    for i in range(count):
+        rooms = []
+        for _ in range(rng.choice([0, 1, 2, 3, 4])):
+            room = {"name": rng.choice(ROOM_NAMES), "price": rng.choice(PRICES)}
+            if rng.random() < 0.3:
+                room["canonical_name"] = rng.choice(["Standard", "Deluxe", "Suite", "Family", "Other"])
+            if rng.random() < 0.3:
+                room["canonical_code"] = rng.choice(["STD", "DLX", "SUI", "std"])
+            if rng.random() < 0.05:
+                del room["name"]
+            rooms.append(room)
+        if rng.random() < 0.05:
+            rooms.append("not-a-room")
+        log = {
+            "hotel_id": f"h{i % 4}",
+            "price": rng.choice(PRICES),
+            "room_types": rooms if rng.random() > 0.03 else {"bad": "shape"},
+        }
+        logs.append(log)
+
+    allowed_maps = [
+        {},
+        {f"h{h}": sorted(rng.sample(ROOM_NAMES, 4)) for h in range(3)},
+        {"h0": [" standard room ", "DELUXE ROOM", "King Suite"], "h3": ["Süit", "Family Room"]},
+    ]
+    return logs, allowed_maps
+
+
+def compute(match_fn):
+    logs, allowed_maps = build_cases()
+    return [
+        [list(match_fn(log, room_type, allowed)) for log in logs]
+        for allowed in allowed_maps
+        for room_type in ROOM_TYPES
+    ]
+
+
+class TestRoomPriceMatcherGolden(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        with open(GOLDEN_PATH, encoding="utf-8") as f:
+            cls.golden = json.load(f)
+
+    def test_compiled_matcher_matches_golden(self):
+        logs, allowed_maps = build_cases()
+        results = []
+        for allowed in allowed_maps:
+            for room_type in ROOM_TYPES:
+                matcher = RoomPriceMatcher(room_type, allowed)
+                results.append([list(matcher.match(log)) for log in logs])
+        self.assertEqual(results, self.golden)
+
+    def test_get_price_for_room_matches_golden(self):
+        self.assertEqual(compute(get_price_for_room), self.golden)
+
+    def test_memoized_lookups_are_stable(self):
+        logs, allowed_maps = build_cases()
+        matcher = RoomPriceMatcher("Standard", allowed_maps[1], memoize=True)
+        first = [matcher.match(log) for log in logs]
+        self.assertEqual([matcher.match(log) for log in logs], first)
+        self.assertEqual([matcher.price(log) for log in logs], [r[0] for r in first])
+
+
+if __name__ == "__main__":
+    if "--regen" in sys.argv:
+        os.makedirs(os.path.dirname(GOLDEN_PATH), exist_ok=True)
+        with open(GOLDEN_PATH, "w", encoding="utf-8") as f:
+            json.dump(compute(get_price_for_room), f, ensure_ascii=False, separators=(",", ":"))
+            f.write("\n")
+    else:
+        unittest.main()
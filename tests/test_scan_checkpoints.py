@@ -0,0 +1,232 @@
+import asyncio
+import unittest
+import uuid
+from datetime import datetime, timedelta, timezone
+from unittest.mock import MagicMock, patch
+
+from backend.scripts.fake_supabase import FakeSupabase
+from backend.services import scan_checkpoints
+from backend.services.monitor_service import _run_streaming_pipeline
+from backend.services.scan_checkpoints import ScanCheckpointer, plan
+from backend.services.scan_scheduler import split_scan
+
+NOW = datetime(2026, 3, 1, 12, 0, tzinfo=timezone.utc)
+
+
+def _entry(hotel_id, age_s):
+    return {
+        "fetched_at": (NOW - timedelta(seconds=age_s)).isoformat(),
+        "result": {"hotel_id": hotel_id, "status": "success", "price_data": {"price": 100}},
+    }
+
+
+def make_db(session_id):
+    def checkpoint_scan_hotels(client, params):
+        row = client.tables["scan_sessions"][0]
+        done = row.get("completed_hotel_ids") or []
+        row["completed_hotel_ids"] = done + [h for h in params["p_hotel_ids"] if h not in done]
+        return len(row["completed_hotel_ids"])
+
+    return FakeSupabase(
+        {
+            "scan_sessions": [{"id": session_id, "completed_hotel_ids": []}],
+            "scan_checkpoints": [],
+        },
+        rpc_handlers={"checkpoint_scan_hotels": checkpoint_scan_hotels},
+    )
+
+
+class RecordingScraper:
+    def __init__(self):
+        self.fetched = []
+
+    async def run_scan(self, user_id, hotels, options, session_id, on_result=None):
+        results = []
+        for h in hotels:
+            self.fetched.append(h["id"])
+            result = {"hotel_id": h["id"], "status": "success", "price_data": {"price": 100}}
+            await on_result(result)
+            results.append(result)
+        return results
+
+
+class FakeAnalyst:
+    def __init__(self):
+        self.analyzed = []
+
+    async def analyze_results(self, user_id, results, threshold, settings=None, options=None, session_id=None, history=None):
+        self.analyzed += [r["hotel_id"] for r in results]
+        return {"prices_updated": len(results), "alerts": [], "target_price": None}
+
+
+class TestResumePlan(unittest.TestCase):
+    def test_splits_skip_replay_and_fetch(self):
+        hotels = [{"id": f"h{i}"} for i in range(5)]
+        checkpoints = {"h0": _entry("h0", 60), "h1": _entry("h1", 60), "h3": _entry("h3", 99999)}
+
+        result = plan(hotels, checkpoints, ["h0"], ttl_s=3600, now=NOW)
+
+        self.assertEqual(result.skip, {"h0"})
+        self.assertEqual([r["hotel_id"] for r in result.replay], ["h1"])
+        # Never fetched, or fetched outside the freshness window
+        self.assertEqual([h["id"] for h in result.fetch], ["h2", "h3", "h4"])
+        self.assertEqual(result.credits_saved, 2)
+
+    def test_stale_persisted_hotel_is_refetched(self):
+        result = plan([{"id": "h0"}], {"h0": _entry("h0", 7200)}, ["h0"], ttl_s=3600, now=NOW)
+        self.assertEqual([h["id"] for h in result.fetch], ["h0"])
+        self.assertFalse(result.skip)
+
+    def test_split_keeps_checkpointed_hotels_in_this_run(self):
+        hotels = [{"id": f"h{i}"} for i in range(6)]
+        this_run, later = split_scan(hotels, hotels[2:], max_hotels=2)
+        self.assertEqual([h["id"] for h in this_run], ["h0", "h1", "h2", "h3"])
+        self.assertEqual([h["id"] for h in later], ["h4", "h5"])
+        self.assertEqual(split_scan(hotels, hotels, max_hotels=0), (hotels, []))
+
+
+class TestCheckpointedPipeline(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.catalog = patch(
+            "backend.services.room_type_service.update_room_type_catalog",
+            side_effect=lambda *a, **k: asyncio.sleep(0),
+        )
+        self.catalog.start()
+        self.addCleanup(self.catalog.stop)
+
+    async def test_resume_replays_and_refetches_only_the_rest(self):
+        session_id = str(uuid.uuid4())
+        db = make_db(session_id)
+        hotels = [{"id": f"h{i}", "name": f"H{i}"} for i in range(6)]
+        checkpointer = ScanCheckpointer(db, session_id)
+
+        # First attempt: h0-h3 were fetched, only h0-h1 reached the database
+        row = db.tables["scan_sessions"][0]
+        now = datetime.now(timezone.utc)
+        db.tables["scan_checkpoints"] = [
+            {
+                "session_id": session_id,
+                "cell_key": h,
+                "fetched_at": now.isoformat(),
+                "result": {"hotel_id": h, "status": "success"},
+            }
+            for h in ("h0", "h1", "h2", "h3")
+        ]
+        row["completed_hotel_ids"] = ["h0", "h1"]
+
+        resume = await checkpointer.load_plan(hotels)
+        scraper, analyst = RecordingScraper(), FakeAnalyst()
+        results, _ = await _run_streaming_pipeline(
+            MagicMock(), scraper, analyst, "user-1", hotels, None, session_id, 2.0, {},
+            checkpointer=checkpointer,
+            replay_results=resume.replay,
+            fetch_hotels=resume.fetch,
+        )
+
+        self.assertEqual(scraper.fetched, ["h4", "h5"])
+        self.assertEqual(sorted(analyst.analyzed), ["h2", "h3", "h4", "h5"])
+        self.assertEqual(len(results), 4)
+        self.assertEqual(
+            sorted(r["cell_key"] for r in db.tables["scan_checkpoints"]), [f"h{i}" for i in range(6)]
+        )
+        self.assertEqual(sorted(row["completed_hotel_ids"]), [f"h{i}" for i in range(6)])
+        self.assertEqual(checkpointer.recorded, 2)
+        # Results only travel for the replayed keys; the session row stays lean
+        self.assertNotIn("hotel_checkpoints", row)
+
+    async def test_fetches_do_not_wait_on_checkpoint_writes(self):
+        session_id = str(uuid.uuid4())
+        db = make_db(session_id)
+        checkpointer = ScanCheckpointer(db, session_id)
+        real_table = db.table
+        upserts = []
+
+        def slow_table(name):
+            query = real_table(name)
+            if name == "scan_checkpoints":
+                upsert = query.upsert
+
+                def counted(rows, **kwargs):
+                    upserts.append(len(rows))
+                    return upsert(rows, **kwargs)
+
+                query.upsert = counted
+            return query
+
+        async def slow_execute(builder):
+            await asyncio.sleep(0.05)
+            return builder.execute()
+
+        with patch.object(db, "table", side_effect=slow_table), patch(
+            "backend.services.scan_checkpoints.execute_async", side_effect=slow_execute
+        ):
+            started = asyncio.get_running_loop().time()
+            for i in range(10):
+                await checkpointer.record_fetch({"hotel_id": f"h{i}", "status": "success"})
+            buffered_in = asyncio.get_running_loop().time() - started
+            await checkpointer.flush()
+
+        self.assertLess(buffered_in, 0.05)
+        # Everything buffered before the writer ran goes out as one upsert
+        self.assertEqual(upserts, [10])
+        self.assertEqual(checkpointer.recorded, 10)
+        self.assertEqual(len(db.tables["scan_checkpoints"]), 10)
+        self.assertFalse(db.queries_by_op.get("scan_sessions.update"))
+
+    async def test_only_replayable_results_are_read(self):
+        session_id = str(uuid.uuid4())
+        db = make_db(session_id)
+        now = datetime.now(timezone.utc)
+        db.tables["scan_checkpoints"] = [
+            {"session_id": session_id, "cell_key": h, "fetched_at": ts.isoformat(),
+             "result": {"hotel_id": h, "status": "success"}}
+            for h, ts in (("h0", now), ("h1", now), ("h2", now - timedelta(days=1)))
+        ]
+        db.tables["scan_sessions"][0]["completed_hotel_ids"] = ["h0"]
+        selects = []
+        real_table = db.table
+
+        def recording_table(name):
+            query = real_table(name)
+            select = query.select
+
+            def recorded(columns="*", **kwargs):
+                selects.append((name, columns))
+                return select(columns, **kwargs)
+
+            query.select = recorded
+            return query
+
+        with patch.object(db, "table", side_effect=recording_table):
+            resume = await ScanCheckpointer(db, session_id).load_plan([{"id": f"h{i}"} for i in range(3)])
+
+        self.assertEqual(resume.skip, {"h0"})
+        self.assertEqual([r["hotel_id"] for r in resume.replay], ["h1"])
+        self.assertEqual([h["id"] for h in resume.fetch], ["h2"])
+        self.assertEqual(
+            [cols for table, cols in selects if table == "scan_checkpoints"],
+            ["cell_key, fetched_at", "cell_key, result"],
+        )
+
+    async def test_missing_table_disables_checkpoints_for_the_process(self):
+        db = FakeSupabase({"scan_sessions": []})
+        db.table = MagicMock(
+            side_effect=Exception("PGRST205: Could not find the table 'public.scan_checkpoints'")
+        )
+        self.addCleanup(
+            scan_checkpoints._table_available.update,
+            {scan_checkpoints.CHECKPOINT_TABLE: True},
+        )
+
+        checkpointer = ScanCheckpointer(db, uuid.uuid4())
+        await checkpointer.record_fetch({"hotel_id": "h0", "status": "success"})
+        await checkpointer.flush()
+        await checkpointer.record_fetch({"hotel_id": "h1", "status": "success"})
+        await checkpointer.flush()
+
+        self.assertEqual(db.table.call_count, 1)
+        self.assertEqual(checkpointer.recorded, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,247 @@
+import logging
+import unittest
+import uuid
+from datetime import date, datetime, timedelta, timezone
+from unittest.mock import patch
+
+from backend.agents.analyst_agent import AnalystAgent
+from backend.scripts.fake_supabase import FakeSupabase
+from backend.services import monitor_service, scan_priority
+from backend.services.price_history_index import PriceHistoryIndex
+from backend.services.scan_priority import (
+    ScanCandidate,
+    build_candidates,
+    credits_spent_today,
+    daily_volatility,
+    plan_priority_scan,
+    priority_score,
+    run_allowance,
+    select_pairs,
+)
+
+NOW = datetime(2026, 3, 2, 9, 0, tzinfo=timezone.utc)
+
+
+def logs(prices, every_h=24, hotel_id="h1", check_in=None, now=NOW):
+    """Newest-first price_logs rows, `every_h` hours apart, ending an hour before `now`."""
+    return [
+        {
+            "hotel_id": hotel_id,
+            "price": p,
+            "currency": "TRY",
+            "check_in_date": check_in,
+            "recorded_at": (now - timedelta(hours=1 + i * every_h)).isoformat(),
+        }
+        for i, p in enumerate(prices)
+    ]
+
+
+JUMPY = [100, 110, 95, 120, 90, 115, 100]
+FLAT = [100, 100, 100, 101, 100, 100, 100]
+
+
+class TestPriorityScore(unittest.TestCase):
+    def test_volatile_near_term_pairs_outrank_stable_far_out_ones(self):
+        hot = priority_score(volatility=8.0, hours_since_scan=6, days_to_check_in=2)
+        cold = priority_score(volatility=0.3, hours_since_scan=6, days_to_check_in=80)
+        self.assertGreater(hot, 10 * cold)
+
+    def test_score_grows_with_time_and_stops_after_check_in(self):
+        scores = [priority_score(1.0, h, 10) for h in (1, 24, 24 * 7)]
+        self.assertEqual(scores, sorted(scores))
+        self.assertEqual(priority_score(8.0, 48, -1), 0.0)
+        # Never scanned: the whole price is news
+        self.assertEqual(priority_score(0.0, None, 0), 1.0)
+
+    def test_volatility_is_rescaled_to_a_daily_figure(self):
+        daily = daily_volatility(logs(JUMPY, every_h=24))
+        hourly = daily_volatility(logs(JUMPY, every_h=1))
+        self.assertAlmostEqual(hourly / daily, 24 ** 0.5, places=1)
+        # Too little history to tell: assume the prior
+        self.assertEqual(daily_volatility(logs(JUMPY[:3])), scan_priority.SCAN_PRIORITY_PRIOR_VOLATILITY)
+
+    def test_allowance_paces_the_remaining_budget_over_the_day(self):
+        # 15 hourly runs left today (09:00 -> midnight)
+        self.assertEqual(run_allowance(300, 0, NOW, 60), 20)
+        self.assertEqual(run_allowance(300, 150, NOW, 60), 10)
+        self.assertEqual(run_allowance(300, 400, NOW, 60), 0)
+        last_run = NOW.replace(hour=23, minute=30)
+        self.assertEqual(run_allowance(300, 280, last_run, 60), 20)
+
+    def test_select_respects_allowance_and_minimum_score(self):
+        fresh = NOW - timedelta(minutes=5)
+        candidates = [
+            ScanCandidate({"id": "stable"}, date(2026, 5, 1), 0.3, fresh),
+            ScanCandidate({"id": "hot"}, date(2026, 3, 4), 8.0, NOW - timedelta(hours=12)),
+            ScanCandidate({"id": "new"}, date(2026, 3, 20), 0.0, None),
+            ScanCandidate({"id": "warm"}, date(2026, 3, 10), 3.0, NOW - timedelta(days=2)),
+        ]
+        selected, skipped = select_pairs(candidates, allowance=2, now=NOW)
+        self.assertEqual([c.hotel["id"] for c in selected], ["hot", "new"])
+
+        selected, skipped = select_pairs(candidates, allowance=10, now=NOW)
+        # Scanned five minutes ago and barely moves: not worth a credit
+        self.assertEqual([c.hotel["id"] for c in skipped], ["stable"])
+
+    def test_candidates_use_the_pair_history_and_fall_back_to_the_hotel(self):
+        check_in = "2026-03-10"
+        history = PriceHistoryIndex(
+            logs(JUMPY, hotel_id="h1", check_in=check_in)
+            + logs(FLAT, every_h=48, hotel_id="h2", check_in="2026-04-01")
+        )
+        hotels = [
+            {"id": "h1", "fixed_check_in": check_in, "fixed_check_out": "2026-03-11"},
+            {"id": "h2", "fixed_check_in": check_in, "fixed_check_out": "2026-03-11"},
+            {"id": "h3", "fixed_check_in": check_in, "fixed_check_out": "2026-03-11"},
+        ]
+        h1, h2, h3 = build_candidates(hotels, history)
+
+        self.assertGreater(h1.volatility, h2.volatility)
+        self.assertEqual(h1.check_in, date(2026, 3, 10))
+        # No log for h2's own date: its newest log for any date counts
+        self.assertEqual(h2.last_scanned_at, NOW - timedelta(hours=1))
+        self.assertIsNone(h3.last_scanned_at)
+
+    def test_auto_dated_hotels_are_ranked_over_a_horizon_of_dates(self):
+        tomorrow = date.today() + timedelta(days=1)
+        far = (tomorrow + timedelta(days=2)).isoformat()
+        history = PriceHistoryIndex(logs(JUMPY, every_h=6, hotel_id="auto", check_in=far))
+        hotels = [
+            {"id": "auto"},
+            {"id": "fixed", "fixed_check_in": "2026-03-10", "fixed_check_out": "2026-03-12"},
+        ]
+
+        candidates = build_candidates(hotels, history, checkin_days=3)
+
+        self.assertEqual(
+            [c.key for c in candidates],
+            [("auto", (tomorrow + timedelta(days=i)).isoformat()) for i in range(3)]
+            + [("fixed", "2026-03-10")],
+        )
+        self.assertEqual([c.primary for c in candidates], [True, False, False, True])
+        # The default date scans the hotel itself, other dates as secondary cells
+        self.assertIs(candidates[0].scan_row(), hotels[0])
+        cell = candidates[2].scan_row()
+        self.assertEqual(cell["fixed_check_in"], far)
+        self.assertEqual(cell["grid"], {"date": far, "primary": False})
+        self.assertEqual(candidates[2].last_scanned_at, NOW - timedelta(hours=1))
+
+
+class TestPriorityPlan(unittest.IsolatedAsyncioTestCase):
+    async def test_plan_spends_this_runs_allowance_on_the_best_pairs(self):
+        # PriceHistoryIndex loads a window relative to the real clock
+        now = datetime.now(timezone.utc)
+        near = (now + timedelta(days=2)).date().isoformat()
+        far = (now + timedelta(days=90)).date().isoformat()
+        users = [str(uuid.UUID(int=i + 1)) for i in range(2)]
+        hotels = [{"id": f"hot-{i}", "user_id": users[0], "fixed_check_in": near} for i in range(3)]
+        hotels += [{"id": f"cold-{i}", "user_id": users[1], "fixed_check_in": far} for i in range(3)]
+        for h in hotels:
+            h["fixed_check_out"] = (date.fromisoformat(h["fixed_check_in"]) + timedelta(days=1)).isoformat()
+        price_logs = []
+        for h in hotels:
+            prices = JUMPY if h["id"].startswith("hot") else FLAT
+            price_logs += logs(prices, every_h=6, hotel_id=h["id"], check_in=h["fixed_check_in"], now=now)
+        midnight = now.replace(hour=0, minute=0, second=0, microsecond=0)
+        query_logs = [
+            {"id": i, "action_type": "monitor", "created_at": midnight.isoformat()} for i in range(30)
+        ]
+        # Global Pulse hits and shared fetches cost no credit
+        query_logs += [
+            {"id": 100 + i, "action_type": "monitor_cached", "created_at": midnight.isoformat()}
+            for i in range(20)
+        ]
+        db = FakeSupabase({"hotels": hotels, "price_logs": price_logs, "query_logs": query_logs})
+        user_hotels = {u: [h for h in hotels if h["user_id"] == u] for u in users}
+
+        # At least 3 credits are left for this run whatever the time of day
+        with patch.object(scan_priority, "SCAN_DAILY_CREDIT_BUDGET", 30 + 24 * 3), patch.object(
+            scan_priority, "SCHEDULER_RUN_INTERVAL_MINUTES", 60
+        ):
+            picked, report = await plan_priority_scan(db, user_hotels, now=now)
+
+        self.assertEqual(report["spent_today"], 30)
+        self.assertEqual(report["allowance"], run_allowance(102, 30, now, 60))
+        self.assertEqual(sorted(h["id"] for h in picked[users[0]]), ["hot-0", "hot-1", "hot-2"])
+        # Flat, far-out and scanned an hour ago: not worth a credit even if one is left
+        self.assertNotIn(users[1], picked)
+
+
+class TestPrioritySchedulerMode(unittest.IsolatedAsyncioTestCase):
+    async def test_ranks_every_active_user_and_scans_only_selected_hotels(self):
+        not_due = (datetime.now(timezone.utc) + timedelta(days=1)).isoformat()
+        db = FakeSupabase(
+            {
+                "profiles": [
+                    {"id": str(uuid.UUID(int=1)), "next_scan_at": not_due, "subscription_status": "active"}
+                ],
+                "hotels": [
+                    {"id": "a", "user_id": str(uuid.UUID(int=1)), "name": "A", "serp_api_id": "sa", "deleted_at": None},
+                    {"id": "b", "user_id": str(uuid.UUID(int=1)), "name": "B", "serp_api_id": "sb", "deleted_at": None},
+                ],
+                "settings": [],
+                "scan_sessions": [],
+                "price_logs": [],
+                "query_logs": [],
+            }
+        )
+        scanned = []
+
+        async def fake_monitor(user_id, hotels, options, db, session_id, budget=None, fetch_plan=None, resume=False):
+            scanned.extend(h["id"] for h in hotels)
+
+        with patch("backend.utils.db.get_supabase", return_value=db), patch.object(
+            monitor_service, "run_monitor_background", fake_monitor
+        ), patch.object(
+            monitor_service, "get_scheduler_logger", return_value=logging.getLogger("scheduler.test")
+        ), patch.object(scan_priority, "SCHEDULER_PRIORITY_MODE", True), patch.object(
+            scan_priority, "SCAN_DAILY_CREDIT_BUDGET", 1
+        ):
+            summary = await monitor_service.run_scheduler_check_logic()
+
+        # Auto-dated hotels are ranked over SCAN_PRIORITY_CHECKIN_DAYS dates each
+        self.assertEqual(summary["priority"]["candidates"], 2 * scan_priority.SCAN_PRIORITY_CHECKIN_DAYS)
+        self.assertEqual(summary["priority"]["selected"], 1)
+        self.assertEqual(len(scanned), 1)
+
+
+class TestCreditLedger(unittest.IsolatedAsyncioTestCase):
+    def result(self, hid, price, credit_spent):
+        return {
+            "hotel_id": hid,
+            "hotel_name": f"Hotel {hid}",
+            "status": "success" if price else "error",
+            "check_in": "2026-11-01",
+            "credit_spent": credit_spent,
+            "price_data": {"price": price, "currency": "TRY", "offers": [{}] * 5} if price else None,
+        }
+
+    async def test_only_provider_calls_count_as_spent_credits(self):
+        db = FakeSupabase(
+            {
+                "hotels": [{"id": h, "sentiment_breakdown": []} for h in ("a", "b", "c")],
+                "scan_sessions": [{"id": "s1", "reasoning_trace": []}],
+            }
+        )
+        agent = AnalystAgent(db)
+
+        async def fake_embedding(hotel_id, meta):
+            return True
+
+        with patch.object(agent, "_update_sentiment_embedding", side_effect=fake_embedding):
+            # A fetch and a Global Pulse hit in a session...
+            await agent.analyze_results(
+                "user-1", [self.result("a", 1000.0, True), self.result("b", 1100.0, False)], 2.0, session_id="s1"
+            )
+            # ...and a failed provider call outside any session
+            await agent.analyze_results("user-1", [self.result("c", None, True)], 2.0)
+
+        actions = sorted(r["action_type"] for r in db.tables["query_logs"])
+        self.assertEqual(actions, ["monitor", "monitor", "monitor_cached"])
+        now = datetime.now(timezone.utc)
+        for row in db.tables["query_logs"]:
+            row["created_at"] = now.isoformat()
+        self.assertEqual(await credits_spent_today(db, now), 2)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,220 @@
+import asyncio
+import threading
+import unittest
+import uuid
+from datetime import datetime, timedelta, timezone
+from unittest.mock import patch
+
+from backend.scripts.fake_supabase import FakeSupabase
+from backend.services import monitor_service
+from backend.services.scan_checkpoints import ResumePlan, ScanCheckpointer
+from backend.services.scan_queue import ScanQueueWorker, enqueue_scan, retry_delay
+
+USER_ID = str(uuid.UUID(int=1))
+
+
+def _ts(value):
+    return datetime.fromisoformat(value.replace("Z", "+00:00")) if value else None
+
+
+def make_db(hotel_count=4):
+    # Row locks: the real RPC runs in one transaction with FOR UPDATE SKIP LOCKED
+    row_lock = threading.Lock()
+
+    def claim_scan_job(client, params):
+        now = datetime.now(timezone.utc)
+        with row_lock:
+            runnable = [
+                r
+                for r in client.tables["scan_sessions"]
+                if r.get("job_options") is not None
+                and r.get("attempts", 0) < r.get("max_attempts", 3)
+                and (
+                    (r["status"] == "pending" and _ts(r.get("run_after")) <= now)
+                    or (r["status"] == "running" and _ts(r.get("locked_until")) < now)
+                )
+            ]
+            if not runnable:
+                return []
+            row = min(runnable, key=lambda r: (r["run_after"], r["created_at"]))
+            row.update(
+                status="running",
+                locked_by=params["p_worker_id"],
+                locked_until=(now + timedelta(seconds=params["p_visibility_s"])).isoformat(),
+                attempts=row.get("attempts", 0) + 1,
+            )
+            return [dict(row)]
+
+    def checkpoint_scan_hotels(client, params):
+        for row in client.tables["scan_sessions"]:
+            if row["id"] == params["p_session_id"]:
+                done = row.get("completed_hotel_ids") or []
+                row["completed_hotel_ids"] = done + [h for h in params["p_hotel_ids"] if h not in done]
+                return len(row["completed_hotel_ids"])
+
+    hotels = [
+        {"id": f"h{i}", "user_id": USER_ID, "name": f"Hotel {i}", "deleted_at": None}
+        for i in range(hotel_count)
+    ]
+    return FakeSupabase(
+        {"scan_sessions": [], "hotels": hotels},
+        rpc_handlers={
+            "claim_scan_job": claim_scan_job,
+            "checkpoint_scan_hotels": checkpoint_scan_hotels,
+        },
+    )
+
+
+async def add_job(db, hotels=None):
+    session_id = str(uuid.uuid4())
+    db.tables["scan_sessions"].append(
+        {
+            "id": session_id,
+            "user_id": USER_ID,
+            "status": "pending",
+            "created_at": datetime.now(timezone.utc).isoformat(),
+        }
+    )
+    queued = await enqueue_scan(db, session_id, hotels or db.tables["hotels"])
+    assert queued
+    return session_id
+
+
+def row(db, session_id):
+    return next(r for r in db.tables["scan_sessions"] if r["id"] == session_id)
+
+
+class FakeMonitor:
+    """
+    Stands in for run_monitor_background: resumes from the session's checkpoints,
+    then fetches and persists the remaining hotels two at a time.
+    """
+
+    def __init__(self, fail_after_batches=None):
+        self.runs = []
+        self.fail_after_batches = fail_after_batches
+
+    async def __call__(self, user_id, hotels, options, db, session_id, raise_errors=False, resume=False):
+        checkpointer = ScanCheckpointer(db, session_id)
+        plan = await checkpointer.load_plan(hotels) if resume else ResumePlan(fetch=hotels)
+        pending = plan.fetch
+        self.runs.append((str(session_id), [h["id"] for h in pending]))
+        for i in range(0, len(pending), 2):
+            if self.fail_after_batches is not None and i // 2 >= self.fail_after_batches:
+                self.fail_after_batches = None  # only the first attempt crashes
+                raise RuntimeError("provider outage")
+            await asyncio.sleep(0.01)
+            batch = [{"hotel_id": h["id"], "status": "success"} for h in pending[i : i + 2]]
+            for result in batch:
+                await checkpointer.record_fetch(result)
+            await checkpointer.record_persisted(batch)
+        for r in db.tables["scan_sessions"]:
+            if r["id"] == str(session_id):
+                r["status"] = "completed"
+        return "completed"
+
+
+class TestScanQueue(unittest.IsolatedAsyncioTestCase):
+    async def test_workers_share_the_queue_without_double_claims(self):
+        db = make_db()
+        jobs = [await add_job(db) for _ in range(5)]
+        monitor = FakeMonitor()
+
+        with patch.object(monitor_service, "run_monitor_background", monitor):
+            ran = await asyncio.gather(*(ScanQueueWorker(db).drain() for _ in range(3)))
+
+        self.assertEqual(sum(ran), 5)
+        self.assertEqual(sorted(sid for sid, _ in monitor.runs), sorted(jobs))
+        for sid in jobs:
+            self.assertEqual(row(db, sid)["status"], "completed")
+            self.assertIsNone(row(db, sid)["locked_by"])
+            self.assertEqual(row(db, sid)["attempts"], 1)
+
+    async def test_failure_is_retried_with_backoff_and_resumes(self):
+        db = make_db()
+        sid = await add_job(db)
+        monitor = FakeMonitor(fail_after_batches=1)
+        worker = ScanQueueWorker(db, backoff_s=30)
+
+        with patch.object(monitor_service, "run_monitor_background", monitor):
+            self.assertEqual(await worker.drain(), 1)
+            job = row(db, sid)
+            self.assertEqual(job["status"], "pending")
+            self.assertEqual(job["last_error"], "provider outage")
+            self.assertGreater(_ts(job["run_after"]), datetime.now(timezone.utc) + timedelta(seconds=25))
+            # Backing off: nothing is runnable yet
+            self.assertEqual(await worker.drain(), 0)
+
+            job["run_after"] = datetime.now(timezone.utc).isoformat()
+            self.assertEqual(await worker.drain(), 1)
+
+        # The retry only scanned the hotels that were not persisted before the crash
+        self.assertEqual(monitor.runs[0][1], ["h0", "h1", "h2", "h3"])
+        self.assertEqual(monitor.runs[1][1], ["h2", "h3"])
+        self.assertEqual(row(db, sid)["status"], "completed")
+        self.assertEqual(worker.stats["resumed"], 1)
+
+    async def test_gives_up_after_max_attempts(self):
+        db = make_db()
+        sid = await add_job(db)
+        row(db, sid)["max_attempts"] = 2
+
+        async def always_fails(**kwargs):
+            raise RuntimeError("boom")
+
+        with patch.object(monitor_service, "run_monitor_background", always_fails):
+            worker = ScanQueueWorker(db, backoff_s=0)
+            self.assertEqual(await worker.drain(), 2)
+
+        self.assertEqual(row(db, sid)["status"], "failed")
+        self.assertEqual(row(db, sid)["attempts"], 2)
+        self.assertEqual(worker.stats, {"claimed": 2, "completed": 0, "retried": 1, "failed": 1, "resumed": 1})
+
+    async def test_expired_lease_is_reclaimed_after_a_crash(self):
+        db = make_db()
+        sid = await add_job(db)
+        # A worker claimed the job, checkpointed two hotels, then the process died
+        row(db, sid).update(
+            status="running",
+            attempts=1,
+            locked_by="dead-worker",
+            locked_until=(datetime.now(timezone.utc) - timedelta(seconds=1)).isoformat(),
+            completed_hotel_ids=["h0", "h1"],
+        )
+        monitor = FakeMonitor()
+
+        with patch.object(monitor_service, "run_monitor_background", monitor):
+            self.assertEqual(await ScanQueueWorker(db).drain(), 1)
+
+        self.assertEqual(monitor.runs, [(sid, ["h2", "h3"])])
+        self.assertEqual(row(db, sid)["attempts"], 2)
+        self.assertEqual(row(db, sid)["status"], "completed")
+
+    async def test_live_lease_is_not_stolen(self):
+        db = make_db()
+        sid = await add_job(db)
+        row(db, sid).update(
+            status="running",
+            attempts=1,
+            locked_by="busy-worker",
+            locked_until=(datetime.now(timezone.utc) + timedelta(minutes=5)).isoformat(),
+        )
+        self.assertIsNone(await ScanQueueWorker(db).claim())
+
+    async def test_enqueue_falls_back_when_queue_is_unavailable(self):
+        db = make_db()
+
+        class Broken:
+            def table(self, name):
+                raise Exception("column scan_sessions.job_options does not exist")
+
+        self.assertFalse(await enqueue_scan(Broken(), "s1", db.tables["hotels"]))
+        self.assertFalse(await enqueue_scan(db, None, db.tables["hotels"]))
+
+    def test_backoff_doubles_and_is_capped(self):
+        self.assertEqual([retry_delay(n, 60) for n in (1, 2, 3)], [60, 120, 240])
+        self.assertEqual(retry_delay(20, 60), 3600)
+
+
+if __name__ == "__main__":
+    unittest.main()
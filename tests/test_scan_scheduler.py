@@ -0,0 +1,376 @@
+import asyncio
+import logging
+import unittest
+import uuid
+from datetime import datetime, timedelta, timezone
+from unittest.mock import patch
+
+from backend.agents.scraper_agent import ScraperAgent
+from backend.scripts.fake_supabase import FakeSupabase
+from backend.services import monitor_service
+from backend.services.scan_checkpoints import ResumePlan, ScanCheckpointer
+from backend.services.scan_scheduler import (
+    FairShareBudget,
+    SharedFetchPlan,
+    plan_users,
+    project_schedule,
+    run_users,
+)
+
+
+class FakeProvider:
+    def __init__(self):
+        self.calls = []
+
+    def get_provider_name(self):
+        return "Fake"
+
+    async def fetch_price(self, hotel_name, location, check_in, check_out, adults=2, currency="USD", serp_api_id=None):
+        self.calls.append(serp_api_id)
+        await asyncio.sleep(0.01)
+        return {"price": 100.0, "currency": currency, "room_types": [{"name": "Standard Room", "price": 100.0}]}
+
+
+def make_db(hotel_counts):
+    due = (datetime.now(timezone.utc) - timedelta(minutes=5)).isoformat()
+    profiles, hotels = [], []
+    for i, count in enumerate(hotel_counts):
+        uid = str(uuid.UUID(int=i + 1))
+        profiles.append(
+            {
+                "id": uid,
+                "next_scan_at": due,
+                "scan_frequency_minutes": 1440,
+                "subscription_status": "active",
+            }
+        )
+        hotels += [
+            {"id": f"{uid}-h{j}", "user_id": uid, "name": f"H{j}", "serp_api_id": f"s{i}-{j}", "deleted_at": None}
+            for j in range(count)
+        ]
+    return FakeSupabase(
+        {"profiles": profiles, "hotels": hotels, "settings": [], "scan_sessions": []}
+    )
+
+
+class TestFairShareBudget(unittest.IsolatedAsyncioTestCase):
+    async def test_large_account_cannot_starve_small_ones(self):
+        budget = FairShareBudget(global_limit=8)
+        big_calls_when_done = {}
+
+        async def user(uid, calls):
+            await budget.register(uid)
+
+            async def call():
+                async with budget.slot(uid):
+                    await asyncio.sleep(0.005)
+
+            await asyncio.gather(*(call() for _ in range(calls)))
+            big_calls_when_done[uid] = budget.calls_by_user["big"]
+            await budget.unregister(uid)
+
+        await asyncio.gather(user("big", 200), user("small-a", 8), user("small-b", 8))
+
+        self.assertLessEqual(budget.peak_inflight, 8)
+        self.assertEqual(budget.peak_inflight, 8)  # idle slots are lent out
+        # Small accounts get their share from the first round on instead of
+        # queueing behind the 200-hotel account
+        self.assertLess(big_calls_when_done["small-a"], 50)
+        self.assertLess(big_calls_when_done["small-b"], 50)
+        self.assertEqual(budget.calls_by_user["big"], 200)
+
+    async def test_lone_user_borrows_idle_capacity(self):
+        budget = FairShareBudget(global_limit=6)
+        await budget.register("a")
+        await budget.register("b")  # registered but idle
+
+        async def call():
+            async with budget.slot("a"):
+                await asyncio.sleep(0.01)
+
+        await asyncio.gather(*(call() for _ in range(12)))
+        self.assertEqual(budget.peak_by_user["a"], 6)
+
+    async def test_run_users_bounds_concurrency_and_isolates_errors(self):
+        budget = FairShareBudget(global_limit=4)
+        running, peak = 0, 0
+
+        async def worker(user, _budget):
+            nonlocal running, peak
+            running += 1
+            peak = max(peak, running)
+            await asyncio.sleep(0.01)
+            running -= 1
+            if user["id"] == "u2":
+                raise RuntimeError("boom")
+            return user["id"]
+
+        users = [{"id": f"u{i}"} for i in range(6)]
+        outcomes = await run_users(users, worker, budget, max_users=2)
+        self.assertEqual(peak, 2)
+        self.assertIsInstance(outcomes[2], RuntimeError)
+        self.assertEqual(outcomes[5], "u5")
+
+
+class TestPlanning(unittest.TestCase):
+    def test_credit_budget_defers_least_overdue_users(self):
+        users = [
+            {"id": "late", "next_scan_at": "2026-01-01T00:00:00Z"},
+            {"id": "big", "next_scan_at": "2026-01-01T01:00:00Z"},
+            {"id": "small", "next_scan_at": "2026-01-01T02:00:00Z"},
+        ]
+        hotels = {"late": [{}] * 5, "big": [{}] * 200, "small": [{}] * 3}
+        admitted, deferred = plan_users(users, hotels, credit_budget=50)
+        self.assertEqual([u["id"] for u in admitted], ["small", "late"])
+        self.assertEqual([u["id"] for u in deferred], ["big"])
+
+        # An account larger than the whole budget still runs when it is first in line
+        admitted, _ = plan_users(users[1:2], hotels, credit_budget=50)
+        self.assertEqual([u["id"] for u in admitted], ["big"])
+
+    def test_projection_beats_sequential_and_protects_small_users(self):
+        counts = [("small", 10), ("mid", 40), ("big", 200)]
+        plan = project_schedule(counts, max_users=3, global_limit=30, per_user_limit=10, fetch_s=2)
+        self.assertEqual(plan["hotels"], 250)
+        self.assertEqual(plan["sequential_wall_s"], 2 * (1 + 4 + 20))
+        self.assertLess(plan["projected_wall_s"], plan["sequential_wall_s"])
+        self.assertEqual(plan["per_user"]["small"]["done_s"], 2)
+        self.assertEqual(plan["per_user"]["big"]["wait_s"], 0)
+
+
+class TestSharedFetchPlan(unittest.IsolatedAsyncioTestCase):
+    def _hotel(self, uid, serp_id, adults=2):
+        return {
+            "id": f"{uid}-{serp_id}-{adults}",
+            "name": f"Hotel {serp_id}",
+            "location": "Izmir",
+            "serp_api_id": serp_id,
+            "fixed_check_in": "2026-03-01",
+            "fixed_check_out": "2026-03-02",
+            "default_adults": adults,
+        }
+
+    def test_build_keys_by_property_dates_adults_and_currency(self):
+        users = [{"id": "u1"}, {"id": "u2"}, {"id": "u3"}]
+        hotels = {
+            "u1": [self._hotel("u1", "a"), self._hotel("u1", "b")],
+            "u2": [self._hotel("u2", "a"), self._hotel("u2", "b", adults=3)],
+            "u3": [self._hotel("u3", "a")],
+        }
+        plan = SharedFetchPlan.build(users, hotels)
+        self.assertEqual(plan.planned_requests, 5)
+        self.assertEqual(plan.unique_keys, 3)  # a, b/2 adults, b/3 adults
+
+    async def test_result_is_fetched_once_and_copied_per_user(self):
+        plan = SharedFetchPlan()
+        calls = 0
+
+        async def factory():
+            nonlocal calls
+            calls += 1
+            return {"price": 100.0, "room_types": []}
+
+        first, shared_first = await plan.fetch(("a",), factory)
+        first["room_types"].append("mutated by user 1")
+        second, shared_second = await plan.fetch(("a",), factory)
+
+        self.assertEqual(calls, 1)
+        self.assertEqual((shared_first, shared_second), (False, True))
+        self.assertEqual(second["room_types"], [])
+        self.assertEqual(plan.get_stats()["credits_saved"], 1)
+
+    async def test_failed_fetch_is_retried_by_the_next_user(self):
+        plan = SharedFetchPlan()
+        outcomes = [asyncio.TimeoutError(), {"price": 1.0}]
+
+        async def factory():
+            outcome = outcomes.pop(0)
+            if isinstance(outcome, Exception):
+                raise outcome
+            return outcome
+
+        with self.assertRaises(asyncio.TimeoutError):
+            await plan.fetch(("a",), factory)
+        result, shared = await plan.fetch(("a",), factory)
+        self.assertEqual(result, {"price": 1.0})
+        self.assertFalse(shared)
+        self.assertEqual(plan.fetches, 2)
+
+    async def test_empty_and_error_results_are_not_shared(self):
+        plan = SharedFetchPlan()
+        outcomes = [None, {"status": "error", "error": "quota"}, {"price": 1.0}]
+
+        async def factory():
+            await asyncio.sleep(0.01)
+            return outcomes.pop(0)
+
+        # A concurrent joiner of a failed fetch gets the failure, not a saved credit
+        (empty, shared_a), (joined, shared_b) = await asyncio.gather(
+            plan.fetch(("a",), factory), plan.fetch(("a",), factory)
+        )
+        self.assertIsNone(empty)
+        self.assertIsNone(joined)
+        error, shared_c = await plan.fetch(("a",), factory)
+        self.assertEqual(error["status"], "error")
+        result, shared_d = await plan.fetch(("a",), factory)
+
+        self.assertEqual(result, {"price": 1.0})
+        self.assertEqual((shared_a, shared_b, shared_c, shared_d), (False, False, False, False))
+        self.assertEqual(plan.fetches, 3)
+        self.assertEqual(plan.get_stats()["credits_saved"], 0)
+        _, shared_e = await plan.fetch(("a",), factory)
+        self.assertTrue(shared_e)
+        self.assertEqual(plan.get_stats()["credits_saved"], 1)
+
+    async def test_scans_fan_out_one_fetch_per_unique_key(self):
+        db = FakeSupabase({"price_logs": [], "scan_sessions": []})
+        provider = FakeProvider()
+        users = [{"id": "u1"}, {"id": "u2"}, {"id": "u3"}]
+        hotels = {u["id"]: [self._hotel(u["id"], s) for s in ("a", "b", "c")] for u in users}
+        hotels["u3"].append(self._hotel("u3", "d"))
+        plan = SharedFetchPlan.build(users, hotels)
+
+        with patch(
+            "backend.agents.scraper_agent.ProviderFactory.get_provider", return_value=provider
+        ):
+            # Staggered like the scheduler: later users start after earlier fetches finished
+            results = []
+            for user in users:
+                results.append(
+                    await ScraperAgent(db).run_scan(
+                        str(uuid.uuid4()), hotels[user["id"]], None, fetch_plan=plan
+                    )
+                )
+
+        self.assertEqual(sorted(provider.calls), ["a", "b", "c", "d"])
+        self.assertEqual(plan.get_stats()["credits_saved"], 6)
+        # Every user still gets a full, independent result for its own hotels
+        for user, user_results in zip(users, results):
+            self.assertEqual(
+                sorted(r["hotel_id"] for r in user_results),
+                sorted(h["id"] for h in hotels[user["id"]]),
+            )
+            self.assertTrue(all(r["status"] == "success" for r in user_results))
+
+
+class TestSchedulerCheck(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        # Keep scheduler.log out of the working tree
+        patcher = patch.object(
+            monitor_service, "get_scheduler_logger", return_value=logging.getLogger("scheduler.test")
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    async def test_dry_run_writes_nothing(self):
+        db = make_db([3, 20])
+        with patch("backend.utils.db.get_supabase", return_value=db):
+            plan = await monitor_service.run_scheduler_check_logic(dry_run=True)
+
+        self.assertTrue(plan["dry_run"])
+        self.assertEqual(plan["users"], 2)
+        self.assertEqual(plan["projected_credits"], 23)
+        self.assertEqual(plan["projected_credits_saved"], 0)
+        self.assertGreater(plan["projected_wall_s"], 0)
+        self.assertEqual(len(plan["per_user"]), 2)
+        writes = [op for op, n in db.queries_by_op.items() if n and not op.endswith(".select")]
+        self.assertEqual(writes, [])
+
+    async def test_users_run_concurrently_with_shared_budget(self):
+        db = make_db([2, 2, 2])
+        active, peak, budgets = 0, 0, set()
+
+        async def fake_monitor(user_id, hotels, options, db, session_id, budget=None, fetch_plan=None, resume=False):
+            nonlocal active, peak
+            active += 1
+            peak = max(peak, active)
+            budgets.add((id(budget), id(fetch_plan)))
+            await asyncio.sleep(0.02)
+            active -= 1
+
+        with patch("backend.utils.db.get_supabase", return_value=db), patch.object(
+            monitor_service, "run_monitor_background", fake_monitor
+        ), patch("backend.services.scan_scheduler.SCHEDULER_MAX_CONCURRENT_USERS", 3):
+            summary = await monitor_service.run_scheduler_check_logic()
+
+        self.assertEqual(summary["users"], 3)
+        self.assertEqual(peak, 3)
+        self.assertEqual(len(budgets), 1)
+        self.assertEqual(len(db.tables["scan_sessions"]), 3)
+        self.assertTrue(all(p["next_scan_at"].endswith("Z") for p in db.tables["profiles"]))
+
+    async def test_large_scan_is_split_across_runs_and_resumed(self):
+        db = make_db([5])
+        runs = []
+
+        def checkpoint_scan_hotels(client, params):
+            row = next(r for r in client.tables["scan_sessions"] if r["id"] == params["p_session_id"])
+            row["completed_hotel_ids"] = (row.get("completed_hotel_ids") or []) + params["p_hotel_ids"]
+
+        db.rpc_handlers["checkpoint_scan_hotels"] = checkpoint_scan_hotels
+
+        async def fake_monitor(user_id, hotels, options, db, session_id, budget=None, fetch_plan=None, resume=False):
+            checkpointer = ScanCheckpointer(db, session_id)
+            plan = await checkpointer.load_plan(hotels) if resume else ResumePlan(fetch=hotels)
+            runs.append((str(session_id), resume, [h["id"][-2:] for h in plan.fetch]))
+            await checkpointer.record_persisted([{"hotel_id": h["id"]} for h in plan.fetch])
+            db.table("scan_sessions").update({"status": "completed"}).eq("id", str(session_id)).execute()
+
+        def run_due_now():
+            for p in db.tables["profiles"]:
+                p["next_scan_at"] = (datetime.now(timezone.utc) - timedelta(minutes=1)).isoformat()
+            return monitor_service.run_scheduler_check_logic()
+
+        with patch("backend.utils.db.get_supabase", return_value=db), patch.object(
+            monitor_service, "run_monitor_background", fake_monitor
+        ), patch("backend.services.scan_scheduler.SCHEDULER_MAX_HOTELS_PER_SCAN", 2):
+            await monitor_service.run_scheduler_check_logic()
+            session = db.tables["scan_sessions"][0]
+            self.assertEqual(session["status"], "paused")
+            resume_at = datetime.fromisoformat(db.tables["profiles"][0]["next_scan_at"].replace("Z", "+00:00"))
+            self.assertLess(resume_at, datetime.now(timezone.utc) + timedelta(hours=1))
+
+            session["created_at"] = datetime.now(timezone.utc).isoformat()  # column default
+            await run_due_now()
+            await run_due_now()
+
+        sid = session["id"]
+        self.assertEqual(
+            runs,
+            [(sid, False, ["h0", "h1"]), (sid, True, ["h2", "h3"]), (sid, True, ["h4"])],
+        )
+        self.assertEqual(len(db.tables["scan_sessions"]), 1)
+        self.assertEqual(session["status"], "completed")
+        # Finished: the user is back on the regular daily schedule
+        next_at = datetime.fromisoformat(db.tables["profiles"][0]["next_scan_at"].replace("Z", "+00:00"))
+        self.assertGreater(next_at, datetime.now(timezone.utc) + timedelta(hours=20))
+
+    async def test_stale_paused_session_is_closed_and_restarted(self):
+        db = make_db([3])
+        user_id = db.tables["profiles"][0]["id"]
+        db.tables["scan_sessions"].append(
+            {
+                "id": str(uuid.uuid4()),
+                "user_id": user_id,
+                "session_type": "scheduled",
+                "status": "paused",
+                "created_at": (datetime.now(timezone.utc) - timedelta(days=1)).isoformat(),
+            }
+        )
+        seen = []
+
+        async def fake_monitor(user_id, hotels, options, db, session_id, budget=None, fetch_plan=None, resume=False):
+            seen.append((str(session_id), resume, len(hotels)))
+
+        with patch("backend.utils.db.get_supabase", return_value=db), patch.object(
+            monitor_service, "run_monitor_background", fake_monitor
+        ):
+            await monitor_service.run_scheduler_check_logic()
+
+        stale, fresh = db.tables["scan_sessions"]
+        self.assertEqual(stale["status"], "partial")
+        self.assertEqual(seen, [(fresh["id"], False, 3)])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,124 @@
+import asyncio
+import time
+import unittest
+from unittest.mock import MagicMock, patch
+
+from backend.services.monitor_service import _run_streaming_pipeline
+
+
+class FakeScraper:
+    """Emits one result per hotel with a fixed per-hotel fetch latency."""
+
+    def __init__(self, latency=0.02, concurrency=2):
+        self.latency = latency
+        self.concurrency = concurrency
+        self.finished_at = None
+        self.max_inflight = 0
+        self._inflight = 0
+
+    async def run_scan(self, user_id, hotels, options, session_id, on_result=None):
+        sem = asyncio.Semaphore(self.concurrency)
+
+        async def one(h):
+            async with sem:
+                self._inflight += 1
+                self.max_inflight = max(self.max_inflight, self._inflight)
+                await asyncio.sleep(self.latency)
+                result = {"hotel_id": h["id"], "status": "success", "price_data": {"price": 100}}
+                if on_result:
+                    await on_result(result)
+                self._inflight -= 1
+                return result
+
+        results = await asyncio.gather(*(one(h) for h in hotels))
+        self.finished_at = time.monotonic()
+        return results
+
+
+class FakeAnalyst:
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.batches = []
+        self.first_called_at = None
+
+    async def analyze_results(self, user_id, results, threshold, settings=None, options=None, session_id=None, history=None):
+        if self.first_called_at is None:
+            self.first_called_at = time.monotonic()
+        self.batches.append([r["hotel_id"] for r in results])
+        await asyncio.sleep(self.delay)
+        return {
+            "prices_updated": len(results),
+            "alerts": [{"hotel_id": results[0]["hotel_id"]}],
+            "target_price": None,
+        }
+
+
+class TestStreamingPipeline(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.catalog = patch(
+            "backend.services.room_type_service.update_room_type_catalog",
+            side_effect=lambda *a, **k: asyncio.sleep(0),
+        )
+        self.catalog_mock = self.catalog.start()
+
+    def tearDown(self):
+        self.catalog.stop()
+
+    async def _run(self, scraper, analyst, hotels, **kwargs):
+        return await _run_streaming_pipeline(
+            MagicMock(), scraper, analyst, "user-1", hotels, None, None, 2.0, {}, **kwargs
+        )
+
+    async def test_analysis_starts_before_scan_finishes(self):
+        hotels = [{"id": f"h{i}", "name": f"H{i}"} for i in range(10)]
+        scraper, analyst = FakeScraper(), FakeAnalyst()
+
+        results, analysis = await self._run(scraper, analyst, hotels)
+
+        self.assertLess(analyst.first_called_at, scraper.finished_at)
+        self.assertEqual(len(results), 10)
+        self.assertEqual(analysis["prices_updated"], 10)
+        self.assertEqual(sorted(h for b in analyst.batches for h in b), sorted(h["id"] for h in hotels))
+        self.assertEqual(self.catalog_mock.call_count, len(analyst.batches))
+
+    async def test_batches_respect_batch_size_and_merge_alerts(self):
+        hotels = [{"id": f"h{i}", "name": f"H{i}"} for i in range(12)]
+        scraper = FakeScraper(latency=0.001, concurrency=12)
+        analyst = FakeAnalyst(delay=0.02)
+
+        _, analysis = await self._run(scraper, analyst, hotels, batch_size=4, queue_size=4)
+
+        self.assertTrue(all(len(b) <= 4 for b in analyst.batches))
+        self.assertEqual(len(analysis["alerts"]), len(analyst.batches))
+
+    async def test_backpressure_bounds_buffering(self):
+        hotels = [{"id": f"h{i}", "name": f"H{i}"} for i in range(20)]
+        scraper = FakeScraper(latency=0.001, concurrency=20)
+        analyst = FakeAnalyst(delay=0.01)
+        queue_sizes = []
+
+        original_put = asyncio.Queue.put
+
+        async def tracking_put(q, item):
+            queue_sizes.append(q.qsize())
+            await original_put(q, item)
+
+        with patch.object(asyncio.Queue, "put", tracking_put):
+            await self._run(scraper, analyst, hotels, batch_size=2, queue_size=3)
+
+        self.assertLessEqual(max(queue_sizes), 3)
+
+    async def test_scraper_crash_propagates_after_draining(self):
+        class CrashingScraper:
+            async def run_scan(self, user_id, hotels, options, session_id, on_result=None):
+                await on_result({"hotel_id": "h0", "status": "success", "price_data": {}})
+                raise RuntimeError("boom")
+
+        analyst = FakeAnalyst()
+        with self.assertRaises(RuntimeError):
+            await self._run(CrashingScraper(), analyst, [{"id": "h0", "name": "H0"}])
+        self.assertEqual(analyst.batches, [["h0"]])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,46 @@
+import unittest
+from unittest.mock import patch
+
+from backend.utils import db as db_utils
+
+ENV = {
+    "NEXT_PUBLIC_SUPABASE_URL": "http://127.0.0.1:9",
+    "SUPABASE_SERVICE_ROLE_KEY": "stub.service.key",
+    "NEXT_PUBLIC_SUPABASE_ANON_KEY": "stub.anon.key",
+}
+
+
+class TestSupabaseClientCache(unittest.TestCase):
+    def tearDown(self):
+        db_utils.close_supabase_clients()
+
+    def test_get_supabase_reuses_one_client(self):
+        with patch.dict("os.environ", ENV), patch.object(
+            db_utils, "create_client", wraps=db_utils.create_client
+        ) as factory:
+            first = db_utils.get_supabase()
+            self.assertIs(db_utils.get_supabase(), first)
+            self.assertIs(db_utils.get_service_client(), first)
+        self.assertEqual(factory.call_count, 1)
+
+    def test_service_client_has_no_anon_fallback(self):
+        env = {**ENV, "SUPABASE_SERVICE_ROLE_KEY": ""}
+        with patch.dict("os.environ", env):
+            self.assertIsNone(db_utils.get_service_client())
+            self.assertIsNotNone(db_utils.get_supabase())  # anon fallback still works
+
+    def test_close_drops_cached_clients(self):
+        with patch.dict("os.environ", ENV):
+            first = db_utils.init_supabase()
+            db_utils.close_supabase_clients()
+            self.assertIsNot(db_utils.get_supabase(), first)
+
+    def test_missing_credentials_are_not_cached(self):
+        with patch.dict("os.environ", {**ENV, "NEXT_PUBLIC_SUPABASE_URL": ""}):
+            self.assertIsNone(db_utils.get_supabase())
+        with patch.dict("os.environ", ENV):
+            self.assertIsNotNone(db_utils.get_supabase())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,106 @@
+import asyncio
+import unittest
+
+from backend.agents.analyst_agent import AnalystAgent
+from backend.agents.notifier_agent import NotifierAgent
+from backend.scripts.fake_supabase import FakeSupabase
+from backend.services.trace_sink import ReasoningTraceSink
+
+
+def make_db(sent):
+    def append_reasoning_trace(client, params):
+        sent.append(len(params["p_entries"]))
+        for row in client.tables["scan_sessions"]:
+            if row["id"] == params["p_session_id"]:
+                row["reasoning_trace"] = (row.get("reasoning_trace") or []) + params["p_entries"]
+                return len(row["reasoning_trace"])
+        return None
+
+    return FakeSupabase(
+        {"scan_sessions": [{"id": "s1", "reasoning_trace": ["[Init]"]}]},
+        rpc_handlers={"append_reasoning_trace": append_reasoning_trace},
+    )
+
+
+class TestReasoningTraceSink(unittest.IsolatedAsyncioTestCase):
+    async def test_batches_entries_and_keeps_existing_trace(self):
+        sent = []
+        db = make_db(sent)
+        sink = ReasoningTraceSink(flush_batch=10, flush_interval=60)
+
+        for i in range(25):
+            await sink.append(db, "s1", f"entry {i}")
+        await sink.flush("s1")
+
+        trace = db.tables["scan_sessions"][0]["reasoning_trace"]
+        self.assertEqual(trace, ["[Init]"] + [f"entry {i}" for i in range(25)])
+        self.assertEqual(sent, [10, 10, 5])
+        # O(entries): every entry crosses the wire exactly once, no reads
+        self.assertEqual(sum(sent), 25)
+        self.assertEqual(db.queries_by_op["scan_sessions.select"], 0)
+
+    async def test_concurrent_agents_lose_nothing(self):
+        sent = []
+        db = make_db(sent)
+        sink = ReasoningTraceSink(flush_batch=3, flush_interval=60)
+
+        async def agent(name, count):
+            for i in range(count):
+                await sink.append(db, "s1", f"{name}-{i}")
+                await asyncio.sleep(0)
+
+        await asyncio.gather(agent("scraper", 20), agent("analyst", 20), agent("notifier", 7))
+        await sink.flush("s1")
+
+        trace = db.tables["scan_sessions"][0]["reasoning_trace"]
+        self.assertEqual(len(trace), 1 + 47)
+        for name in ("scraper", "analyst", "notifier"):
+            own = [e for e in trace if e.startswith(name)]
+            self.assertEqual(own, sorted(own, key=lambda e: int(e.split("-")[1])))
+
+    async def test_falls_back_when_rpc_is_missing(self):
+        db = FakeSupabase({"scan_sessions": [{"id": "s1", "reasoning_trace": ["[Init]"]}]})
+
+        def missing(client, params):
+            raise Exception("Could not find the function public.append_reasoning_trace (PGRST202)")
+
+        db.rpc_handlers["append_reasoning_trace"] = missing
+        sink = ReasoningTraceSink(flush_batch=100, flush_interval=60)
+        await sink.append(db, "s1", ["a", "b"], flush=True)
+        await sink.append(db, "s1", "c", flush=True)
+
+        self.assertEqual(db.tables["scan_sessions"][0]["reasoning_trace"], ["[Init]", "a", "b", "c"])
+        self.assertEqual(sink.stats["fallback_writes"], 2)
+
+    async def test_failed_flush_is_retried_in_order(self):
+        sent = []
+        db = make_db(sent)
+        sink = ReasoningTraceSink(flush_batch=100, flush_interval=60)
+        handler = db.rpc_handlers["append_reasoning_trace"]
+
+        def flaky(client, params):
+            raise Exception("connection reset")
+
+        db.rpc_handlers["append_reasoning_trace"] = flaky
+        await sink.append(db, "s1", "first", flush=True)
+        db.rpc_handlers["append_reasoning_trace"] = handler
+        await sink.append(db, "s1", "second", flush=True)
+
+        self.assertEqual(db.tables["scan_sessions"][0]["reasoning_trace"], ["[Init]", "first", "second"])
+
+    async def test_agents_share_the_sink(self):
+        sent = []
+        db = make_db(sent)
+        analyst, notifier = AnalystAgent(db), NotifierAgent(db)
+
+        await analyst._log_reasoning("s1", "[Start] analyst")
+        await notifier.log_reasoning("s1", "dispatching")
+        await notifier.flush_logs("s1")
+
+        trace = db.tables["scan_sessions"][0]["reasoning_trace"]
+        self.assertEqual(trace, ["[Init]", "[Start] analyst", "[Notifier] dispatching"])
+        self.assertEqual(db.queries_by_op.get("scan_sessions.update", 0), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
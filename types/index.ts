@@ -163,6 +163,8 @@ export interface ScanOptions {
   check_out?: string;
   adults?: number;
   currency?: string;
+  /** Date grid mode: scan this many consecutive check-in dates in one session */
+  grid_days?: number;
 }
 
 export interface MonitorResult {